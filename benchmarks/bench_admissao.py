@@ -0,0 +1,206 @@
+"""
+Benchmark: teste de carga do controle de admissão (src/api/admissao.py).
+
+Sobe a API de regras em um uvicorn de verdade, mede a capacidade (requisições/s
+com poucos clientes simultâneos) e então aplica uma carga em malha aberta (as
+requisições saem no horário programado, sem esperar as anteriores) acima da
+capacidade, com e sem o controle de admissão. Por padrão cada requisição é um
+lote de 200 ocorrências no `/prever/lote` (alguns ms de trabalho, bem mais que
+o custo de recusar) e os limites são os de um núcleo (`--simultaneas 1
+--fila 16`); com `--lote 1` a requisição é tão barata quanto a própria recusa e,
+numa máquina de um núcleo, recusar o excedente já ocupa a CPU. Cada requisição tem um prazo
+(`--prazo-ms`) contado do horário programado: o cliente desiste das que
+esperaram o prazo todo antes de sair e manda o que resta dele em `X-Prazo-Ms`,
+como um serviço que repassa o próprio prazo. Para cada configuração mostra as
+respostas 200 dentro do prazo (úteis) e fora dele (trabalho perdido), as 429 e
+503, as desistências e a latência p50/p99 de todas as respostas 200, medida a
+partir do horário programado (a espera do lado do cliente também conta).
+
+O cliente HTTP é mínimo (asyncio puro, conexões persistentes), para o gerador
+de carga consumir pouca CPU da máquina que também roda o servidor.
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.bench_admissao [--sobrecarga 1.5] [--duracao 10] [--prazo-ms 1000]
+        [--lote 200] [--simultaneas 1] [--fila 16]
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from benchmarks.suite import _payloads, _porta_livre
+
+CONEXOES = 4000
+TEMPO_LIMITE_CLIENTE_S = 5.0
+
+
+def _requisicao(payload, caminho):
+    """Cabeçalhos (sem a linha em branco final) e corpo; o `X-Prazo-Ms` entra no envio."""
+    corpo = json.dumps(payload).encode()
+    return (b"POST " + caminho.encode() + b" HTTP/1.1\r\nHost: teste\r\nContent-Type: application/json\r\n"
+            b"Content-Length: " + str(len(corpo)).encode() + b"\r\n", corpo)
+
+
+async def _enviar(conexao, porta, requisicao, prazo_s=None):
+    """Envia uma requisição por uma conexão persistente (abrindo-a se preciso); retorna o status."""
+    if conexao[0] is None:
+        conexao[:] = await asyncio.open_connection("127.0.0.1", porta)
+    leitor, escritor = conexao
+    cabecalhos, corpo = requisicao
+    if prazo_s is not None:
+        cabecalhos += b"X-Prazo-Ms: %d\r\n" % (prazo_s * 1000)
+    escritor.write(cabecalhos + b"\r\n" + corpo)
+    cabecalho = await leitor.readuntil(b"\r\n\r\n")
+    status = int(cabecalho[9:12])
+    tamanho = 0
+    for linha in cabecalho.split(b"\r\n"):
+        if linha.lower().startswith(b"content-length:"):
+            tamanho = int(linha.split(b":")[1])
+    await leitor.readexactly(tamanho)
+    return status
+
+
+async def _carga(porta, taxa, duracao_s, prazo_s, requisicoes):
+    """
+    Malha aberta: `taxa` requisições/s durante `duracao_s`; retorna `[(status, latência em s)]`
+    (status `None` para as desistências e os tempos limite do cliente).
+    """
+    pendentes = asyncio.Queue()
+    resultados = []
+
+    async def conexao_cliente():
+        conexao = [None, None]
+        while True:
+            programado, requisicao = await pendentes.get()
+            restante = programado + prazo_s - time.perf_counter()
+            if restante <= 0:
+                resultados.append((None, prazo_s))  # esperou o prazo todo do lado do cliente
+                pendentes.task_done()
+                continue
+            try:
+                status = await asyncio.wait_for(
+                    _enviar(conexao, porta, requisicao, restante), TEMPO_LIMITE_CLIENTE_S
+                )
+            except (asyncio.TimeoutError, OSError, asyncio.IncompleteReadError):
+                status = None  # tempo limite do cliente: a conexão é descartada
+                if conexao[1] is not None:
+                    conexao[1].close()
+                conexao[:] = [None, None]
+            resultados.append((status, time.perf_counter() - programado))
+            pendentes.task_done()
+
+    clientes = [asyncio.create_task(conexao_cliente()) for _ in range(CONEXOES)]
+    inicio = time.perf_counter()
+    total = int(taxa * duracao_s)
+    for i in range(total):
+        programado = inicio + i / taxa
+        atraso = programado - time.perf_counter()
+        if atraso > 0:
+            await asyncio.sleep(atraso)
+        pendentes.put_nowait((programado, requisicoes[i % len(requisicoes)]))
+    await pendentes.join()
+    for cliente in clientes:
+        cliente.cancel()
+    return resultados
+
+
+async def _capacidade(porta, requisicoes, duracao_s=3.0, simultaneas=8):
+    """Requisições/s em malha fechada, com poucas conexões."""
+    concluidas = 0
+    fim = time.perf_counter() + duracao_s
+
+    async def cliente():
+        nonlocal concluidas
+        conexao = [None, None]
+        while time.perf_counter() < fim:
+            await _enviar(conexao, porta, requisicoes[concluidas % len(requisicoes)])
+            concluidas += 1
+        conexao[1].close()
+
+    await asyncio.gather(*(cliente() for _ in range(simultaneas)))
+    return concluidas / duracao_s
+
+
+async def _aguardar(porta, limite_s=30):
+    inicio = time.perf_counter()
+    while time.perf_counter() - inicio < limite_s:
+        with contextlib.suppress(OSError):
+            _, escritor = await asyncio.open_connection("127.0.0.1", porta)
+            escritor.close()
+            return
+        await asyncio.sleep(0.05)
+    raise RuntimeError(f"uvicorn não ficou pronto em {limite_s} s")
+
+
+def _rodar(funcao, *args):
+    return asyncio.run(funcao(*args))
+
+
+def _servidor(porta, temporario, admissao, simultaneas, fila):
+    ambiente = {**os.environ, "RECARGA_INTERVALO_S": "0", "DIRETORIO_AUDITORIA": temporario,
+                "ADMISSAO_HABILITADA": "true" if admissao else "false",
+                "ADMISSAO_SIMULTANEAS_REGRAS": str(simultaneas), "ADMISSAO_FILA": str(fila)}
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "src.api.main_regras:app", "--port", str(porta),
+         "--log-level", "warning", "--no-access-log", "--backlog", "4096"],
+        env=ambiente, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+
+
+def _resumo(nome, resultados, duracao_s, prazo_s):
+    respondidas = sorted(latencia for status, latencia in resultados if status == 200)
+    uteis = sum(1 for latencia in respondidas if latencia <= prazo_s)
+    contagem = {status: sum(1 for s, _ in resultados if s == status) for status in (429, 503, None)}
+    p50 = statistics.median(respondidas) * 1e3 if respondidas else float("nan")
+    p99 = respondidas[int(0.99 * (len(respondidas) - 1))] * 1e3 if respondidas else float("nan")
+    print(f"{nome:<22} úteis: {uteis:6} ({uteis / duracao_s:5.0f}/s)  atrasadas: {len(respondidas) - uteis:6}  "
+          f"429: {contagem[429]:6}  503: {contagem[503]:6}  desistências: {contagem[None]:6}  "
+          f"p50 {p50:7.1f} ms  p99 {p99:7.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sobrecarga", type=float, default=1.5, help="Carga oferecida em múltiplos da capacidade")
+    parser.add_argument("--duracao", type=float, default=10.0, help="Segundos de carga por configuração")
+    parser.add_argument("--lote", type=int, default=200, help="Ocorrências por requisição (>1 usa /prever/lote)")
+    parser.add_argument("--simultaneas", type=int, default=1, help="Vagas do controle de admissão")
+    parser.add_argument("--fila", type=int, default=16, help="Fila de espera do controle de admissão")
+    parser.add_argument("--prazo-ms", type=float, default=1000.0, help="Prazo de cada requisição do cliente")
+    args = parser.parse_args()
+
+    payloads = _payloads()
+    if args.lote > 1:
+        requisicoes = [_requisicao([payloads[(i + j) % len(payloads)] for j in range(args.lote)], "/prever/lote")
+                       for i in range(len(payloads))]
+    else:
+        requisicoes = [_requisicao(payload, "/prever") for payload in payloads]
+    with tempfile.TemporaryDirectory() as temporario:
+        for nome, admissao in (("sem controle", False), ("controle de admissão", True)):
+            porta = _porta_livre()
+            processo = _servidor(porta, temporario, admissao, args.simultaneas, args.fila)
+            # O gerador de carga roda com prioridade baixa, cedendo a CPU ao servidor
+            # como se estivesse em outra máquina
+            try:
+                with ProcessPoolExecutor(1, initializer=os.nice, initargs=(10,)) as gerador:
+                    gerador.submit(_rodar, _aguardar, porta).result()
+                    capacidade = gerador.submit(_rodar, _capacidade, porta, requisicoes).result()
+                    taxa = capacidade * args.sobrecarga
+                    print(f"\n[{nome}] capacidade: {capacidade:.0f} req/s; carga oferecida: {taxa:.0f} req/s")
+                    resultados = gerador.submit(
+                        _rodar, _carga, porta, taxa, args.duracao, args.prazo_ms / 1000, requisicoes
+                    ).result()
+                _resumo(nome, resultados, args.duracao, args.prazo_ms / 1000)
+            finally:
+                processo.terminate()
+                processo.wait()
+
+
+if __name__ == "__main__":
+    main()
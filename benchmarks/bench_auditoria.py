@@ -0,0 +1,138 @@
+"""
+Benchmark: registro de auditoria das previsões (src/api/auditoria.py).
+
+Mede o custo de enfileirar uma previsão e um lote (o que fica na requisição),
+a vazão da thread de gravação (montar as linhas JSON e comprimir) e compara a
+latência do `/prever` da API de regras sem auditoria, com a fila e com a
+gravação síncrona de cada previsão dentro da requisição (o que a fila evita),
+com um cliente ASGI no mesmo processo, em rodadas alternadas. Por fim, mede a
+consulta de um intervalo curto contra a leitura de todos os segmentos.
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.bench_auditoria [--requisicoes 2000] [--rodadas 3]
+"""
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+import numpy as np
+
+from benchmarks.suite import _payloads
+from src.api import main_regras
+from src.api.auditoria import Auditoria, consultar, segmentos
+
+
+class _AuditoriaSincrona(Auditoria):
+    """Grava cada previsão na própria requisição, sem fila (referência de comparação)."""
+
+    def _enfileirar(self, entrada, n):
+        self._gravar([entrada])
+        self.gravadas += n
+
+
+def _matriz(n, semente=0):
+    rng = np.random.default_rng(semente)
+    return np.column_stack([rng.integers(0, 90, n), rng.random((n, 5)) < 0.5]).astype(np.int64)
+
+
+def _melhor_s(funcao, repeticoes=3):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos)
+
+
+async def _latencias(app, payloads, requisicoes):
+    transporte = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transporte, base_url="http://teste") as client:
+        for payload in payloads:
+            (await client.post("/prever", json=payload)).raise_for_status()
+        tempos = []
+        for i in range(requisicoes):
+            inicio = time.perf_counter()
+            resposta = await client.post("/prever", json=payloads[i % len(payloads)])
+            tempos.append(time.perf_counter() - inicio)
+            resposta.raise_for_status()
+    tempos.sort()
+    return statistics.median(tempos) * 1e3, tempos[int(0.99 * len(tempos))] * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requisicoes", type=int, default=2000, help="Requisições sequenciais por medição")
+    parser.add_argument("--rodadas", type=int, default=3, help="Medições por configuração (alternadas)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temporario:
+        temporario = Path(temporario)
+        X = _matriz(100_000)
+        classes = X[:, 1] * 2
+        probabilidades = np.full((len(X), 3), 1 / 3)
+
+        auditoria = Auditoria(temporario / "fila", "modelo", capacidade=10_000_000)
+        linhas = [tuple(linha) for linha in X[:10_000].tolist()]
+
+        def unitarias():
+            for i, linha in enumerate(linhas):
+                auditoria.registrar("v1", linha, classes[i], probabilidades[i])
+
+        def lotes():
+            for _ in range(100):
+                auditoria.registrar_lote("v1", X[:1000], classes[:1000], probabilidades[:1000])
+
+        print(f"Enfileirar uma previsão:               {_melhor_s(unitarias) / len(linhas) * 1e6:8.2f} µs")
+        print(f"Enfileirar um lote de 1.000 linhas:    {_melhor_s(lotes) / 100 * 1e6:8.2f} µs")
+
+        # O trabalho da thread de gravação, chamado diretamente (sem a thread)
+        gravacao = Auditoria(temporario / "gravacao", "modelo")
+        gravacao.diretorio.mkdir(parents=True)
+        inicio = time.perf_counter()
+        gravacao._gravar([(time.time(), "v1", X, classes, probabilidades, False)])
+        duracao = time.perf_counter() - inicio
+        tamanho = sum(caminho.stat().st_size for *_, caminho in segmentos(temporario / "gravacao"))
+        print(f"Gravação (JSON + gzip):                {len(X) / duracao:8,.0f} linhas/s"
+              f"  ({tamanho / len(X):.1f} bytes por linha)")
+
+        configuracoes = {
+            "sem auditoria": Auditoria(temporario / "desligada", "regras", habilitada=False),
+            "fila em memória": Auditoria(temporario / "fila_api", "regras"),
+            "gravação síncrona": _AuditoriaSincrona(temporario / "sincrona", "regras"),
+        }
+        for configuracao in configuracoes.values():
+            configuracao.iniciar()
+        payloads = _payloads()
+        medicoes = {nome: [] for nome in configuracoes}
+        for _ in range(args.rodadas):
+            for nome, configuracao in configuracoes.items():
+                main_regras.auditoria = configuracao
+                medicoes[nome].append(asyncio.run(_latencias(main_regras.app, payloads, args.requisicoes)))
+        for configuracao in configuracoes.values():
+            configuracao.fechar()
+        print(f"\n--- /prever da API de regras, ASGI no processo (mediana de {args.rodadas} rodadas) ---")
+        for nome, valores in medicoes.items():
+            p50 = statistics.median(v[0] for v in valores)
+            p99 = statistics.median(v[1] for v in valores)
+            print(f"{nome:<20} p50 {p50:6.3f} ms   p99 {p99:6.3f} ms")
+
+        # Consulta: 24 segmentos de uma hora, 20.000 previsões cada
+        historico = Auditoria(temporario / "historico", "modelo", segmento_max_s=3600)
+        historico.diretorio.mkdir(parents=True)
+        base = 1_700_000_000.0
+        historico._gravar([
+            (base + hora * 3600 + 1, "v1", X[:20_000], classes[:20_000], None, False) for hora in range(24)
+        ])
+        print(f"\n--- Consulta em {len(segmentos(temporario / 'historico'))} segmentos de uma hora ---")
+        for rotulo, intervalo in (("uma hora", (base + 5 * 3600, base + 6 * 3600)), ("tudo", (None, None))):
+            inicio = time.perf_counter()
+            n = sum(1 for _ in consultar(temporario / "historico", "modelo", *intervalo))
+            print(f"{rotulo:<10} {n:>9,} registros em {time.perf_counter() - inicio:6.3f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Benchmark: cache de dados e modelos do treinamento (src/api/cache_artefatos.py).
+
+Mede, para alguns `data_size`, o tempo de `gerar_dados` e de
+`treinar_avaliar_modelo` sem cache (gerando, treinando e gravando a entrada) e
+com cache (lendo a entrada): com a versão já registrada e com um registro
+vazio, que recebe uma cópia dos artefatos. Mede também o
+`python src/api/gerar_modelo.py` de ponta a ponta, na primeira execução e
+na seguinte.
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.bench_cache [--tamanhos 3500 200000]
+"""
+import argparse
+import contextlib
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from src.api.cache_artefatos import CacheArtefatos
+from src.api.gerar_modelo import gerar_dados, treinar_avaliar_modelo
+from src.api.registro_modelos import RegistroModelos
+
+
+def _medir_s(funcao):
+    inicio = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        resultado = funcao()
+    return time.perf_counter() - inicio, resultado
+
+
+def _script_s(ambiente):
+    inicio = time.perf_counter()
+    subprocess.run([sys.executable, "src/api/gerar_modelo.py"], env=ambiente, check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return time.perf_counter() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=[3500, 200_000], help="Valores de data_size")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temporario:
+        temporario = Path(temporario)
+        print(f"\n{'data_size':>10} {'etapa':<8} {'sem cache':>12} {'em cache':>12} {'registro vazio':>15}")
+        for tamanho in args.tamanhos:
+            cache = CacheArtefatos(temporario / f"cache-{tamanho}")
+            registro = RegistroModelos(temporario / f"modelos-{tamanho}")
+            frio, dados = _medir_s(lambda: gerar_dados(tamanho, cache=cache))
+            quente, dados = _medir_s(lambda: gerar_dados(tamanho, cache=cache))
+            print(f"{tamanho:>10,} {'dados':<8} {frio * 1e3:9.1f} ms {quente * 1e3:9.1f} ms")
+
+            frio, _ = _medir_s(lambda: treinar_avaliar_modelo(dados, registro, cache=cache))
+            quente, _ = _medir_s(lambda: treinar_avaliar_modelo(dados, registro, cache=cache))
+            vazio, _ = _medir_s(lambda: treinar_avaliar_modelo(
+                dados, RegistroModelos(temporario / f"vazio-{tamanho}"), cache=cache
+            ))
+            print(f"{tamanho:>10,} {'modelo':<8} {frio * 1e3:9.1f} ms {quente * 1e3:9.1f} ms {vazio * 1e3:12.1f} ms")
+
+        ambiente = {**os.environ, "DIRETORIO_CACHE": str(temporario / "cache-script"),
+                    "DIRETORIO_MODELOS": str(temporario / "modelos-script")}
+        primeira, segunda = _script_s(ambiente), _script_s(ambiente)
+        print(f"\npython src/api/gerar_modelo.py: primeira execução {primeira:.2f} s, seguinte {segunda:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
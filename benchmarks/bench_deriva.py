@@ -0,0 +1,85 @@
+"""
+Benchmark: custo e memória do monitor de deriva (src/api/monitor_deriva.py).
+
+Mede o custo por previsão de `registrar` (caminho do `/prever`) e de
+`registrar_lote` (por linha, em lotes de vários tamanhos), o tempo de montar o
+relatório e a memória alocada pelo monitor depois de volumes crescentes de
+tráfego, que deve ficar constante. No fim, mostra o relatório para um tráfego
+com deriva (suspeito conhecido com p=0,7 e dias de 30 a 180).
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.bench_deriva [--registros 200000]
+"""
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+
+from src.api.monitor_deriva import MonitorDeriva, estatisticas_referencia
+
+
+def _ocorrencias(n, p_suspeito=0.3, dias=(1, 60), semente=0):
+    rng = np.random.default_rng(semente)
+    flags = rng.random((n, 5)) < [p_suspeito, 0.35, 0.25, 0.3, 0.4]
+    return np.column_stack([rng.integers(*dias, n), flags]).astype(np.int64)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--registros", type=int, default=200_000, help="Previsões unitárias registradas")
+    args = parser.parse_args()
+
+    referencia_X = _ocorrencias(2800)
+    referencia = estatisticas_referencia(referencia_X, {"modelo": referencia_X[:, 1] * 2})
+    monitor = MonitorDeriva("modelo")
+    monitor.trocar_referencia(referencia)
+
+    linhas = [tuple(linha) for linha in _ocorrencias(10_000, semente=1).tolist()]
+    classes = [linha[1] * 2 for linha in linhas]
+    inicio = time.perf_counter()
+    for i in range(args.registros):
+        monitor.registrar(linhas[i % len(linhas)], classes[i % len(linhas)])
+    unitario = (time.perf_counter() - inicio) / args.registros * 1e6
+    print(f"registrar (uma previsão):          {unitario:8.2f} µs")
+
+    for tamanho in (10, 1_000, 100_000):
+        X = _ocorrencias(tamanho, semente=2)
+        repeticoes = max(1, 200_000 // tamanho)
+        inicio = time.perf_counter()
+        for _ in range(repeticoes):
+            monitor.registrar_lote(X, X[:, 1] * 2)
+        por_linha = (time.perf_counter() - inicio) / (repeticoes * tamanho) * 1e6
+        print(f"registrar_lote ({tamanho:>7,} linhas):  {por_linha:8.3f} µs por linha")
+
+    inicio = time.perf_counter()
+    for _ in range(100):
+        monitor.relatorio()
+    print(f"relatorio:                         {(time.perf_counter() - inicio) * 10:8.3f} ms")
+
+    print("\nMemória alocada pelo monitor após N previsões registradas:")
+    tracemalloc.start()
+    monitor = MonitorDeriva("modelo")
+    monitor.trocar_referencia(referencia)
+    registradas = 0
+    for alvo in (1_000, 10_000, 100_000, 1_000_000):
+        while registradas < alvo:
+            lote = min(alvo - registradas, 10_000)
+            monitor.registrar_lote(_ocorrencias(lote, semente=registradas), np.ones(lote, dtype=np.int64))
+            registradas += lote
+        atual, _ = tracemalloc.get_traced_memory()
+        print(f"  {alvo:>9,}: {atual / 1024:8.1f} KB")
+    tracemalloc.stop()
+
+    monitor = MonitorDeriva("modelo")
+    monitor.trocar_referencia(referencia)
+    derivado = _ocorrencias(5_000, p_suspeito=0.7, dias=(30, 180), semente=3)
+    monitor.registrar_lote(derivado, derivado[:, 1] * 2)
+    relatorio = monitor.relatorio()
+    print(f"\nTráfego com deriva: situação '{relatorio['situacao']}'")
+    for nome, item in {**relatorio["features"], "classe_prevista": relatorio["classes"]}.items():
+        print(f"  {nome:<24} PSI {item['psi']:7.3f}  KS {item['ks']:5.3f}  {item['situacao']}")
+
+
+if __name__ == "__main__":
+    main()
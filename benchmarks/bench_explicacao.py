@@ -0,0 +1,113 @@
+"""
+Benchmark: explicações pré-calculadas do modelo (src/api/explicacao_modelo.py).
+
+Com o modelo padrão (treinado por `treinar_avaliar_modelo`) carregado do
+registro, mede o custo de pré-calcular as contribuições de todo o domínio na
+carga, o custo de decompor os caminhos das árvores a cada previsão (o que a
+tabela evita) e a consulta de uma explicação já pré-calculada. Por fim compara
+a latência do `/prever` com e sem `explicar=true`, com um cliente ASGI no mesmo
+processo, em rodadas alternadas.
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.bench_explicacao [--requisicoes 2000] [--rodadas 5]
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+import numpy as np
+
+from benchmarks.suite import _payloads, preparar_app
+from src.api.explicacao_modelo import compilar_explicacoes
+from src.api.gerar_modelo import gerar_dados, treinar_avaliar_modelo
+from src.api.registro_modelos import RegistroModelos
+
+
+def _decompor_caminhos(floresta, X):
+    """Decomposição sob demanda: desce as árvores com as linhas de X somando as variações por feature."""
+    X = np.asarray(X, dtype=np.float32)
+    amostras = np.arange(len(X))
+    saida = np.zeros((len(X), X.shape[1], floresta.valor.shape[1]))
+    nos = np.repeat(np.asarray(floresta.raizes)[:, None], len(X), axis=1)
+    for _ in range(floresta.profundidade):
+        feature = floresta.feature[nos]
+        proximos = floresta.filhos[nos, (X[amostras, feature] > floresta.limiar[nos]).astype(np.intp)]
+        # Nas folhas o nó aponta para si mesmo e a variação é zero
+        np.add.at(saida, (amostras, np.maximum(feature, 0)), floresta.valor[proximos] - floresta.valor[nos])
+        nos = proximos
+    return saida / floresta.n_arvores
+
+
+def _melhor_us(funcao, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos) * 1e6
+
+
+async def _latencias(app, payloads, requisicoes, caminho):
+    transporte = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transporte, base_url="http://teste") as client:
+        for payload in payloads:  # aquecimento (inclui montar o texto de cada célula usada)
+            (await client.post(caminho, json=payload)).raise_for_status()
+        tempos = []
+        for i in range(requisicoes):
+            inicio = time.perf_counter()
+            resposta = await client.post(caminho, json=payloads[i % len(payloads)])
+            tempos.append(time.perf_counter() - inicio)
+            resposta.raise_for_status()
+    tempos.sort()
+    return statistics.median(tempos) * 1e3, tempos[int(0.99 * len(tempos))] * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requisicoes", type=int, default=2000, help="Requisições sequenciais por medição")
+    parser.add_argument("--rodadas", type=int, default=5, help="Medições por configuração (alternadas)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temporario:
+        registro = RegistroModelos(Path(temporario))
+        with contextlib.redirect_stdout(io.StringIO()):
+            treinar_avaliar_modelo(gerar_dados(), registro)
+            app = preparar_app("modelo", temporario)
+        from src.api import main_modelo
+        atual = main_modelo.ativo
+        floresta, tabela, explicacoes = atual.modelo, atual.tabela, atual.explicacoes
+
+        celulas = explicacoes.contribuicoes.shape[0] * explicacoes.contribuicoes.shape[1]
+        carga = _melhor_us(lambda: compilar_explicacoes(floresta, tabela), 3) / 1e3
+        print(f"Floresta: {floresta.n_arvores} árvores, {len(floresta.valor):,} nós; domínio: {celulas:,} células")
+        print(f"Pré-cálculo na carga (todas as células):        {carga:10.1f} ms")
+
+        linha = np.array([[12, 1, 0, 0, 1, 1]])
+        _, esperadas = floresta.contribuicoes(linha)
+        assert np.allclose(_decompor_caminhos(floresta, linha), esperadas)
+        por_previsao = _melhor_us(lambda: _decompor_caminhos(floresta, linha), 20)
+        consulta = _melhor_us(lambda: explicacoes.explicar(*linha[0].tolist()), 1000)
+        print(f"Decomposição dos caminhos a cada previsão:       {por_previsao:10.1f} µs")
+        print(f"Consulta da explicação pré-calculada:            {consulta:10.2f} µs")
+
+        payloads = _payloads()
+        caminhos = ("/prever", "/prever?explicar=true")
+        medicoes = {caminho: [] for caminho in caminhos}
+        for _ in range(args.rodadas):
+            for caminho in caminhos:
+                medicoes[caminho].append(asyncio.run(_latencias(app, payloads, args.requisicoes, caminho)))
+        print(f"\n--- /prever sequencial, ASGI no processo (mediana de {args.rodadas} rodadas) ---")
+        for caminho, valores in medicoes.items():
+            p50 = statistics.median(v[0] for v in valores)
+            p99 = statistics.median(v[1] for v in valores)
+            print(f"{caminho:<24} p50 {p50:6.3f} ms   p99 {p99:6.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
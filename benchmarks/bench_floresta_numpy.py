@@ -0,0 +1,85 @@
+"""
+Benchmark: pickle do scikit-learn vs. floresta em arrays planos (.npz mapeado).
+
+Mede o custo de carga em um processo novo (inclui os imports), o tamanho dos
+arquivos e o tempo de `predict_proba` em lotes de tamanhos diferentes.
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.bench_floresta_numpy
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import joblib
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+
+from src.api.floresta_numpy import carregar_floresta
+from src.api.gerar_modelo import FEATURES, PARAMETROS_MODELO, TARGET, exportar_floresta, gerar_dados
+
+CARGA_PICKLE = """
+import time, sys; t = time.perf_counter()
+import joblib; m = joblib.load(sys.argv[1])
+print(time.perf_counter() - t, 'sklearn' in sys.modules)
+"""
+CARGA_NPZ = """
+import time, sys; t = time.perf_counter()
+from src.api.floresta_numpy import carregar_floresta; m = carregar_floresta(sys.argv[1])
+print(time.perf_counter() - t, 'sklearn' in sys.modules)
+"""
+
+
+def _carga_processo_novo(codigo, caminho, repeticoes=3):
+    """Menor tempo de carga (s) entre processos novos e se o sklearn foi importado."""
+    tempos = []
+    for _ in range(repeticoes):
+        saida = subprocess.run(
+            [sys.executable, "-c", codigo, caminho], capture_output=True, text=True, check=True
+        ).stdout.split()
+        tempos.append(float(saida[0]))
+    return min(tempos), saida[1] == "True"
+
+
+def _melhor_tempo(funcao, repeticoes=5):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos)
+
+
+def main():
+    dados = gerar_dados()
+    modelo = RandomForestClassifier(**PARAMETROS_MODELO).fit(dados[FEATURES], dados[TARGET])
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        caminho_pkl = os.path.join(diretorio, "modelo.pkl")
+        caminho_npz = os.path.join(diretorio, "modelo.npz")
+        joblib.dump(modelo, caminho_pkl)
+        exportar_floresta(modelo, caminho_npz)
+        floresta = carregar_floresta(caminho_npz)
+
+        print("\n--- Carga em processo novo ---")
+        for nome, codigo, caminho in (("pickle (joblib)", CARGA_PICKLE, caminho_pkl),
+                                      ("npz mapeado", CARGA_NPZ, caminho_npz)):
+            segundos, com_sklearn = _carga_processo_novo(codigo, caminho)
+            print(f"{nome:<16} {segundos * 1e3:>8.1f} ms | {os.path.getsize(caminho) / 1024:>8.0f} KB"
+                  f" | importa sklearn: {com_sklearn}")
+
+        rng = np.random.default_rng(0)
+        print("\n--- predict_proba ---")
+        for linhas in (1, 1_000, 100_000):
+            X = np.column_stack([rng.integers(0, 90, linhas), rng.random((linhas, 5)) < 0.4])
+            tempo_sklearn = _melhor_tempo(lambda: modelo.predict_proba(X))
+            tempo_numpy = _melhor_tempo(lambda: floresta.predict_proba(X))
+            diferenca = np.max(np.abs(modelo.predict_proba(X) - floresta.predict_proba(X)))
+            print(f"{linhas:>7} linhas | sklearn {tempo_sklearn * 1e3:>9.2f} ms | "
+                  f"numpy {tempo_numpy * 1e3:>9.2f} ms | diferença máx. {diferenca:.1e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Benchmark: formato binário (`/prever/lote/binario`) vs. JSON (`/prever/lote`).
+
+Para vários tamanhos de lote, com as APIs servidas por uvicorn, mede o tamanho
+da requisição e da resposta e a vazão de ponta a ponta (ocorrências/s),
+incluindo a codificação no cliente e a decodificação da resposta. As duas
+respostas são conferidas: as classes do binário precisam ser as do JSON.
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.bench_formato_binario [--tamanhos 1000 10000 100000] [--repeticoes 5]
+"""
+import argparse
+import contextlib
+import io
+import json
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from benchmarks.bench_unificado import _servidor
+from src.api import formato_binario
+from src.api.constantes import FEATURES, RESOLUTIVIDADE_CLASSES
+from src.api.gerar_modelo import gerar_dados, treinar_avaliar_modelo
+from src.api.registro_modelos import RegistroModelos
+
+CABECALHOS_BINARIO = {"content-type": formato_binario.TIPO_CONTEUDO}
+
+
+def _ocorrencias(n, semente=0):
+    rng = np.random.default_rng(semente)
+    return np.column_stack([rng.integers(0, 90, n), rng.random((n, 5)) < 0.5]).astype(np.int64)
+
+
+def _por_json(cliente, X):
+    corpo = json.dumps([
+        {FEATURES[0]: int(linha[0]), **{nome: bool(v) for nome, v in zip(FEATURES[1:], linha[1:])}}
+        for linha in X.tolist()
+    ]).encode()
+    resposta = cliente.post("/prever/lote", content=corpo, headers={"content-type": "application/json"})
+    resposta.raise_for_status()
+    classes = [r["resolutividade"] for r in resposta.json()]
+    return len(corpo), len(resposta.content), classes
+
+
+def _por_binario(cliente, X, decodificar):
+    corpo = formato_binario.codificar_ocorrencias(X)
+    resposta = cliente.post("/prever/lote/binario", content=corpo, headers=CABECALHOS_BINARIO)
+    resposta.raise_for_status()
+    classes = decodificar(resposta.content)[0]
+    return len(corpo), len(resposta.content), [RESOLUTIVIDADE_CLASSES[c] for c in classes.tolist()]
+
+
+def _melhor(funcao, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos), resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--repeticoes", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temporario:
+        registro = RegistroModelos(Path(temporario) / "modelos")
+        with contextlib.redirect_stdout(io.StringIO()):
+            treinar_avaliar_modelo(gerar_dados(), registro)
+
+        print(f"{'api':<7} {'lote':>8} | {'req. JSON':>10} {'binário':>9} {'resp. JSON':>11} {'binário':>9} | "
+              f"{'JSON ocorr./s':>14} {'binário':>12} {'ganho':>7}")
+        for api, decodificar in (("modelo", formato_binario.decodificar_resposta_modelo),
+                                 ("regras", formato_binario.decodificar_resposta_regras)):
+            with _servidor(f"src.api.main_{api}", registro.raiz) as (_, cliente):
+                for n in args.tamanhos:
+                    X = _ocorrencias(n)
+                    _por_json(cliente, X[:100])  # aquecimento
+                    _por_binario(cliente, X[:100], decodificar)
+                    tempo_json, (req_json, resp_json, classes_json) = _melhor(
+                        lambda: _por_json(cliente, X), args.repeticoes)
+                    tempo_bin, (req_bin, resp_bin, classes_bin) = _melhor(
+                        lambda: _por_binario(cliente, X, decodificar), args.repeticoes)
+                    assert classes_json == classes_bin, "O formato binário diverge do JSON"
+                    print(f"{api:<7} {n:>8,} | {req_json / 1024:>8.0f}KB {req_bin / 1024:>7.0f}KB "
+                          f"{resp_json / 1024:>9.0f}KB {resp_bin / 1024:>7.0f}KB | "
+                          f"{n / tempo_json:>14,.0f} {n / tempo_bin:>12,.0f} {tempo_json / tempo_bin:>6.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Benchmark: tempo de inicialização da API de ML, etapa por etapa.
+
+Em processos novos, mede separadamente:
+  - importação do app (`src.api.main_modelo`, sem NumPy nem modelo);
+  - importação das dependências pesadas, carga/compilação do modelo e
+    aquecimento da primeira previsão (etapas de `inicializar`, no lifespan);
+  - a primeira e a segunda requisição ao `/prever`.
+Repete com o modelo em `.npz` e só com o pickle (que importa o scikit-learn) e,
+com um uvicorn de verdade, mede quanto tempo após o início do processo o `/`
+e o `/ready` passam a responder, com a carga no lifespan e em segundo plano.
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.bench_inicializacao [--repeticoes 5]
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+from sklearn.ensemble import RandomForestClassifier
+
+from src.api.gerar_modelo import (
+    FEATURES, FOREST_FILENAME, PARAMETROS_MODELO, TARGET, gerar_dados, salvar_modelo,
+)
+from src.api.registro_modelos import RegistroModelos
+
+ETAPAS = """
+import json, sys, time
+inicio = time.perf_counter()
+import src.api.main_modelo as m
+tempos = {"importacao_app": time.perf_counter() - inicio}
+m.inicializar()
+assert m.inicializacao["estado"] == "pronto", m.inicializacao
+tempos.update(m.inicializacao["tempos_s"])
+
+from fastapi.testclient import TestClient
+client = TestClient(m.app)
+payload = {"periodo_decorrido_dias": 3, "suspeito_conhecido": True, "tem_testemunhas": True,
+           "tem_imagens_cameras": False, "suspeito_rastreavel": False, "vestigios_preservados": True}
+for nome in ("primeira_requisicao", "segunda_requisicao"):
+    inicio = time.perf_counter()
+    assert client.post("/prever", json=payload).status_code == 200
+    tempos[nome] = time.perf_counter() - inicio
+tempos["sklearn_importado"] = "sklearn" in sys.modules
+print(json.dumps(tempos))
+"""
+
+COLUNAS = ("importacao_app", "importacao", "carga", "aquecimento", "primeira_requisicao", "segunda_requisicao")
+
+
+def _ambiente(diretorio_modelos, **extras):
+    return {
+        **os.environ, "DIRETORIO_MODELOS": str(diretorio_modelos), "RECARGA_INTERVALO_S": "0",
+        **{chave.upper(): str(valor) for chave, valor in extras.items()},
+    }
+
+
+def _etapas(diretorio_modelos, repeticoes):
+    """Mediana de cada etapa entre processos novos."""
+    execucoes = []
+    for _ in range(repeticoes):
+        saida = subprocess.run(
+            [sys.executable, "-c", ETAPAS], env=_ambiente(diretorio_modelos),
+            capture_output=True, text=True, check=True,
+        ).stdout.strip().splitlines()[-1]
+        execucoes.append(json.loads(saida))
+    medianas = {coluna: statistics.median(e[coluna] for e in execucoes) for coluna in COLUNAS}
+    return medianas, execucoes[0]["sklearn_importado"]
+
+
+def _porta_livre():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _responde(url):
+    try:
+        with urllib.request.urlopen(url, timeout=1) as resposta:
+            return resposta.status == 200
+    except (urllib.error.URLError, ConnectionError):
+        return False
+
+
+def _uvicorn(diretorio_modelos, em_segundo_plano, limite_s=60):
+    """Segundos, desde o início do processo, até o `/` e o `/ready` responderem 200."""
+    porta = _porta_livre()
+    base = f"http://127.0.0.1:{porta}"
+    inicio = time.perf_counter()
+    processo = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "src.api.main_modelo:app", "--port", str(porta), "--log-level", "warning"],
+        env=_ambiente(diretorio_modelos, carregamento_em_segundo_plano=int(em_segundo_plano)),
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    no_ar = pronto = None
+    try:
+        while pronto is None and time.perf_counter() - inicio < limite_s:
+            if no_ar is None and _responde(base + "/"):
+                no_ar = time.perf_counter() - inicio
+            if no_ar is not None and _responde(base + "/ready"):
+                pronto = time.perf_counter() - inicio
+            time.sleep(0.002)
+    finally:
+        processo.terminate()
+        processo.wait()
+    return no_ar, pronto
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeticoes", type=int, default=5, help="Processos novos por configuração")
+    args = parser.parse_args()
+
+    dados = gerar_dados()
+    modelo = RandomForestClassifier(**PARAMETROS_MODELO).fit(dados[FEATURES], dados[TARGET])
+
+    with tempfile.TemporaryDirectory() as temporario:
+        registros = {}
+        for formato in ("npz", "pickle"):
+            registro = RegistroModelos(Path(temporario) / formato)
+            versao = registro.registrar(lambda d: salvar_modelo(modelo, d), {}, promover=True)
+            if formato == "pickle":
+                (registro.caminho(versao) / FOREST_FILENAME).unlink()
+            registros[formato] = registro.raiz
+
+        print(f"\n--- Etapas em processo novo (mediana de {args.repeticoes}, ms) ---")
+        print(f"{'modelo':<8}" + "".join(f"{coluna:>21}" for coluna in COLUNAS) + "  sklearn")
+        for formato, raiz in registros.items():
+            medianas, com_sklearn = _etapas(raiz, args.repeticoes)
+            print(f"{formato:<8}" + "".join(f"{medianas[c] * 1e3:>21.1f}" for c in COLUNAS) + f"  {com_sklearn}")
+
+        print("\n--- uvicorn: segundos até responder ---")
+        for formato, raiz in registros.items():
+            for em_segundo_plano in (False, True):
+                no_ar, pronto = _uvicorn(raiz, em_segundo_plano)
+                modo = "segundo plano" if em_segundo_plano else "no lifespan"
+                print(f"{formato:<8} carga {modo:<14} | / {no_ar or float('nan'):6.2f} s"
+                      f" | /ready {pronto or float('nan'):6.2f} s")
+
+
+if __name__ == "__main__":
+    main()
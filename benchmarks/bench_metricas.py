@@ -0,0 +1,93 @@
+"""
+Benchmark: custo da instrumentação por etapa (src/api/metricas.py).
+
+Mede o custo, em microssegundos, de um ciclo completo de instrumentação de uma
+requisição (marcas, cinco etapas, duração total e contadores) e compara o
+`/prever` das duas APIs com as métricas ligadas e desligadas
+(`METRICAS_HABILITADAS`), em processos novos alternados.
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.bench_metricas [--requisicoes 2000] [--rodadas 3]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from src.api.gerar_modelo import gerar_dados, treinar_avaliar_modelo
+from src.api.metricas import Cronometro, Metricas, _Marcas, _requisicao
+from src.api.registro_modelos import RegistroModelos
+
+CARGA = """
+import asyncio, contextlib, io, json, sys
+from benchmarks.suite import medir_asgi, preparar_app
+with contextlib.redirect_stdout(io.StringIO()):
+    app = preparar_app(sys.argv[1], sys.argv[2])
+print(json.dumps(asyncio.run(medir_asgi(app, int(sys.argv[3]), 1))))
+"""
+
+
+def custo_ciclo(repeticoes=100_000):
+    """Microssegundos de instrumentação por requisição, sem o restante do atendimento."""
+    metricas = Metricas("bench")
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        marcas = _Marcas("/prever", time.perf_counter())
+        token = _requisicao.set(marcas)
+        etapas = Cronometro(metricas)
+        etapas.marcar("features")
+        etapas.marcar("predicao")
+        etapas.marcar("resposta")
+        metricas.incrementar("previsoes_total", classe="Alta")
+        _requisicao.reset(token)
+        fim = time.perf_counter()
+        metricas.observar_etapa("/prever", "serializacao", fim - marcas.ultima)
+        metricas.observar_etapa("/prever", "total", fim - marcas.inicio)
+        metricas.incrementar("requisicoes_total", rota="/prever", status="200")
+    return (time.perf_counter() - inicio) / repeticoes * 1e6
+
+
+def _medir(api, diretorio_modelos, requisicoes, habilitadas):
+    ambiente = {**os.environ, "METRICAS_HABILITADAS": str(habilitadas).lower(), "RECARGA_INTERVALO_S": "0"}
+    saida = subprocess.run(
+        [sys.executable, "-c", CARGA, api, str(diretorio_modelos), str(requisicoes)],
+        env=ambiente, capture_output=True, text=True, check=True,
+    ).stdout.strip().splitlines()[-1]
+    return json.loads(saida)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requisicoes", type=int, default=2000, help="Requisições sequenciais por medição")
+    parser.add_argument("--rodadas", type=int, default=3, help="Processos por configuração (alternados)")
+    args = parser.parse_args()
+
+    print(f"Ciclo de instrumentação: {custo_ciclo():.2f} µs por requisição\n")
+
+    with tempfile.TemporaryDirectory() as temporario:
+        registro = RegistroModelos(Path(temporario))
+        with contextlib.redirect_stdout(io.StringIO()):
+            treinar_avaliar_modelo(gerar_dados(), registro)
+
+        print(f"--- /prever sequencial, ASGI no processo (mediana de {args.rodadas} rodadas) ---")
+        for api in ("regras", "modelo"):
+            medicoes = {True: [], False: []}
+            for _ in range(args.rodadas):
+                for habilitadas in (False, True):
+                    medicoes[habilitadas].append(_medir(api, registro.raiz, args.requisicoes, habilitadas))
+            p50 = {h: statistics.median(m["p50_ms"] for m in medicoes[h]) for h in medicoes}
+            vazao = {h: statistics.median(m["req_s"] for m in medicoes[h]) for h in medicoes}
+            print(f"main_{api:<7} sem métricas p50 {p50[False] * 1000:7.1f} µs {vazao[False]:8.0f} req/s"
+                  f" | com métricas p50 {p50[True] * 1000:7.1f} µs {vazao[True]:8.0f} req/s"
+                  f" | custo {(p50[True] - p50[False]) * 1000:+6.1f} µs ({p50[True] / p50[False] - 1:+.1%})")
+
+
+if __name__ == "__main__":
+    main()
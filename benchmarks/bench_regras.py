@@ -0,0 +1,82 @@
+"""
+Benchmark: motor de regras colunar vs. laço escalar com `if` vs. tabela de decisão.
+
+A tabela de decisão é a compilada do arquivo de regras padrão
+(`tabela_regras`), consultada com os dias e o código das flags (como no
+formato binário) e, por ocorrência, com `consultar` (como no `/prever`).
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.bench_regras [--linhas 1000000]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from src.api.regras import avaliar_regras
+from src.api.tabela_modelo import codificar_flags
+from src.api.tabela_regras import carregar_regras
+from src.config import settings
+
+
+def _regras_escalar(dias, conhecido, testemunhas, cameras, rastreavel, vestigios):
+    """Regras como eram aplicadas por ocorrência em `main_regras` (cadeia de `if`)."""
+    total_evidencias = sum([testemunhas, cameras, vestigios])
+    if dias <= 5 and (conhecido or rastreavel) and total_evidencias >= 1:
+        return 2
+    if (dias <= 30 and ((conhecido or rastreavel) and total_evidencias >= 1)) or \
+            total_evidencias >= 3 and dias <= 60:
+        return 1
+    return 0
+
+
+def gerar_colunas(linhas, semente=0):
+    """Colunas aleatórias com a mesma forma das entradas da API."""
+    rng = np.random.default_rng(semente)
+    dias = rng.integers(0, 90, linhas, dtype=np.uint16)
+    flags = rng.random((5, linhas)) < 0.4
+    return (dias, *flags)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--linhas", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    colunas = gerar_colunas(args.linhas)
+
+    inicio = time.perf_counter()
+    classes, _ = avaliar_regras(*colunas)
+    tempo_colunar = time.perf_counter() - inicio
+
+    # O laço escalar é medido em uma amostra para não levar minutos
+    amostra = min(args.linhas, 200_000)
+    linhas_python = list(zip(*(c[:amostra].tolist() for c in colunas)))
+    inicio = time.perf_counter()
+    esperado = [_regras_escalar(*linha) for linha in linhas_python]
+    tempo_escalar = (time.perf_counter() - inicio) * args.linhas / amostra
+
+    assert np.array_equal(classes[:amostra], esperado), "motor colunar diverge do laço escalar"
+
+    tabela = carregar_regras(settings.arquivo_regras)
+    codigos = codificar_flags(np.column_stack(colunas[1:]))
+    inicio = time.perf_counter()
+    classes_tabela, _ = tabela.prever_codificado(colunas[0], codigos)
+    tempo_tabela = time.perf_counter() - inicio
+    assert np.array_equal(classes, classes_tabela), "tabela de decisão diverge do motor colunar"
+
+    inicio = time.perf_counter()
+    consultas = [tabela.consultar(*linha)[0] for linha in linhas_python]
+    tempo_consulta = (time.perf_counter() - inicio) * args.linhas / amostra
+    assert np.array_equal(classes[:amostra], consultas), "consulta escalar diverge do motor colunar"
+
+    print(f"--- Regras de negócio ({args.linhas:,} linhas) ---")
+    print(f"Laço escalar : {args.linhas / tempo_escalar:>14,.0f} linhas/s (estimado a partir de {amostra:,})")
+    print(f"Colunar NumPy: {args.linhas / tempo_colunar:>14,.0f} linhas/s")
+    print(f"Aceleração   : {tempo_escalar / tempo_colunar:>14,.1f}x")
+    print(f"Tabela (lote): {args.linhas / tempo_tabela:>14,.0f} linhas/s")
+    print(f"Tabela (1 a 1): {args.linhas / tempo_consulta:>13,.0f} linhas/s (estimado a partir de {amostra:,})")
+
+
+if __name__ == "__main__":
+    main()
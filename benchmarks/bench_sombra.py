@@ -0,0 +1,131 @@
+"""
+Benchmark: pontuação em sombra de modelos candidatos (src/api/sombra.py).
+
+Mede o custo de registrar uma previsão e um lote na fila da sombra (o que fica
+na requisição), a vazão da thread de pontuação com dois candidatos e compara a
+latência do `/prever` e do `/prever/lote` (500 ocorrências) da API de ML sem
+sombra, com dois candidatos limitados a 25% do tempo e com dois candidatos
+sem limite, com um cliente ASGI no mesmo processo, em rodadas alternadas.
+Mostra também quanto a sombra pontuou e quanto descartou em cada caso.
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.bench_sombra [--requisicoes 2000] [--rodadas 3]
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+import numpy as np
+
+from benchmarks.suite import _payloads
+from src.api import main_modelo
+from src.api.gerar_modelo import gerar_dados, treinar_avaliar_modelo
+from src.api.registro_modelos import RegistroModelos
+from src.api.sombra import Sombra
+
+TAMANHO_LOTE_API = 500
+
+
+def _matriz(n, semente=0):
+    rng = np.random.default_rng(semente)
+    return np.column_stack([rng.integers(0, 90, n), rng.random((n, 5)) < 0.5]).astype(np.int64)
+
+
+async def _latencias(caminho, corpos, requisicoes):
+    transporte = httpx.ASGITransport(app=main_modelo.app)
+    async with httpx.AsyncClient(transport=transporte, base_url="http://teste") as client:
+        for corpo in corpos[:50]:
+            (await client.post(caminho, json=corpo)).raise_for_status()
+        tempos = []
+        for i in range(requisicoes):
+            inicio = time.perf_counter()
+            resposta = await client.post(caminho, json=corpos[i % len(corpos)])
+            tempos.append(time.perf_counter() - inicio)
+            resposta.raise_for_status()
+    tempos.sort()
+    return statistics.median(tempos) * 1e3, tempos[int(0.99 * len(tempos))] * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requisicoes", type=int, default=2000, help="Requisições sequenciais por medição")
+    parser.add_argument("--rodadas", type=int, default=3, help="Medições por configuração (alternadas)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temporario:
+        registro = RegistroModelos(Path(temporario) / "modelos")
+        dados = gerar_dados()
+        with contextlib.redirect_stdout(io.StringIO()):
+            treinar_avaliar_modelo(dados, registro)
+            for profundidade in (6, 14):
+                treinar_avaliar_modelo(dados, registro, promover=False, estimador="RandomForestClassifier",
+                                       parametros={"n_estimators": 150, "max_depth": profundidade})
+        main_modelo.registro = registro
+        with contextlib.redirect_stdout(io.StringIO()):
+            atual, _ = main_modelo.recarregar_modelo()
+            candidatos = main_modelo.carregar_candidatos([m["versao"] for m in registro.versoes()[1:]])
+        tabelas = {versao: candidato.tabela for versao, candidato in candidatos.items()}
+
+        X = _matriz(100_000)
+        classes, _ = atual.tabela.prever(X)
+        fila = Sombra(capacidade=10_000_000)
+        fila.trocar_candidatos(tabelas)
+        linhas = [tuple(linha) for linha in X[:10_000].tolist()]
+        inicio = time.perf_counter()
+        for linha, classe in zip(linhas, classes.tolist()):
+            fila.registrar(atual, linha, classe)
+        unitaria = (time.perf_counter() - inicio) / len(linhas)
+        inicio = time.perf_counter()
+        for _ in range(100):
+            fila.registrar_lote(atual, X[:1000], classes[:1000])
+        lote = (time.perf_counter() - inicio) / 100
+        print(f"Registrar uma previsão:                {unitaria * 1e6:8.2f} µs")
+        print(f"Registrar um lote de 1.000 linhas:     {lote * 1e6:8.2f} µs")
+
+        # O trabalho da thread, chamado diretamente: ativo + dois candidatos no mesmo lote
+        pontuacao = Sombra()
+        pontuacao.trocar_candidatos(tabelas)
+        inicio = time.perf_counter()
+        pontuacao._pontuar([(atual, False, X, classes)])
+        print(f"Pontuação em sombra (2 candidatos):    {len(X) / (time.perf_counter() - inicio):8,.0f} linhas/s")
+        for versao, comparacao in pontuacao.relatorio()["comparacoes"].items():
+            print(f"  {versao}: concordância {comparacao['concordancia']:.3f}, "
+                  f"latência {comparacao['latencia_us_por_linha']['razao_ativo']:.2f}x a do ativo")
+
+        configuracoes = {
+            "sem sombra": ({}, 0.25),
+            "2 candidatos, 25% CPU": (tabelas, 0.25),
+            "2 candidatos, sem limite": (tabelas, 1.0),
+        }
+        payloads = _payloads()
+        lotes = [[payloads[(i + j) % len(payloads)] for j in range(TAMANHO_LOTE_API)] for i in range(8)]
+        for caminho, corpos in (("/prever", payloads), ("/prever/lote", lotes)):
+            requisicoes = args.requisicoes if caminho == "/prever" else max(args.requisicoes // 10, 50)
+            medicoes = {nome: [] for nome in configuracoes}
+            sombras = {}
+            for _ in range(args.rodadas):
+                for nome, (candidatas, fracao) in configuracoes.items():
+                    sombra = sombras.setdefault(nome, Sombra(fracao_cpu=fracao))
+                    sombra.trocar_candidatos(candidatas)
+                    main_modelo.sombra = sombra
+                    sombra.iniciar()
+                    medicoes[nome].append(asyncio.run(_latencias(caminho, corpos, requisicoes)))
+                    sombra.fechar()
+            print(f"\n--- {caminho} da API de ML, ASGI no processo (mediana de {args.rodadas} rodadas) ---")
+            for nome, valores in medicoes.items():
+                p50 = statistics.median(v[0] for v in valores)
+                p99 = statistics.median(v[1] for v in valores)
+                sombra = sombras[nome]
+                descartadas = sum(sombra.descartadas.values())
+                print(f"{nome:<26} p50 {p50:7.3f} ms   p99 {p99:7.3f} ms   "
+                      f"sombra: {sombra.pontuadas:>9,} pontuadas, {descartadas:>9,} descartadas")
+
+
+if __name__ == "__main__":
+    main()
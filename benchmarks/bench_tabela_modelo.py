@@ -0,0 +1,58 @@
+"""
+Benchmark: tabela compilada vs. chamadas ao RandomForest.
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.bench_tabela_modelo
+"""
+import time
+import timeit
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+
+from src.api.gerar_modelo import FEATURES, PARAMETROS_MODELO, TARGET, gerar_dados
+from src.api.tabela_modelo import compilar_tabela, verificar_tabela
+
+
+def _por_chamada(funcao, repeticoes):
+    """Menor tempo médio por chamada (em segundos) entre 5 rodadas."""
+    return min(timeit.repeat(funcao, number=repeticoes, repeat=5)) / repeticoes
+
+
+def main():
+    dados = gerar_dados()
+    modelo = RandomForestClassifier(**PARAMETROS_MODELO).fit(dados[FEATURES], dados[TARGET])
+
+    inicio = time.perf_counter()
+    tabela = compilar_tabela(modelo)
+    tempo_compilacao = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    verificacao = verificar_tabela(tabela, modelo)
+    tempo_verificacao = time.perf_counter() - inicio
+
+    linha = np.array([[5, True, False, True, True, False]])
+    lote = dados[FEATURES].to_numpy()[:10_000]
+
+    def caminho_atual():
+        modelo.predict(linha)[0]
+        modelo.predict_proba(linha)[0]
+
+    resultados = {
+        "1 linha - predict + predict_proba": _por_chamada(caminho_atual, 20),
+        "1 linha - tabela.consultar": _por_chamada(lambda: tabela.consultar(5, True, False, True, True, False), 100_000),
+        "10k linhas - predict_proba": _por_chamada(lambda: modelo.predict_proba(lote), 3),
+        "10k linhas - tabela.prever": _por_chamada(lambda: tabela.prever(lote), 200),
+    }
+
+    print("\n--- Tabela compilada ---")
+    print(f"Faixas de dias: {len(tabela.classes)} (limiares: {len(tabela.limiares)})")
+    print(f"Compilação: {tempo_compilacao * 1e3:.1f} ms | Verificação: {tempo_verificacao * 1e3:.1f} ms")
+    print(f"Verificação: {verificacao}")
+    print("\n--- Tempo por chamada ---")
+    for nome, segundos in resultados.items():
+        print(f"{nome:<36} {segundos * 1e6:>12.2f} µs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Benchmark: atualização incremental da floresta vs. retreino completo.
+
+Parte de um modelo treinado com um bloco de dados e recebe novos lotes
+rotulados. A cada lote compara o custo de acrescentar árvores
+(`treino_incremental.adicionar_arvores`) com o de retreinar as 150 árvores com
+tudo o que já chegou, e a acurácia de três modelos em um conjunto de teste do
+regime atual: a versão base congelada, a incremental e a retreinada.
+
+Com `--deriva`, a partir da metade dos lotes o rótulo muda (ocorrências com
+imagens de câmeras em até 15 dias passam a ser de resolutividade Alta),
+simulando uma mudança de conceito nos casos que chegam do campo.
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.bench_treino_incremental [--lotes 8] [--linhas-lote 20000] [--deriva]
+"""
+import argparse
+import copy
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+
+from src.api.dados_sinteticos import TARGET, gerar_bloco
+from src.api.gerar_modelo import FEATURES, PARAMETROS_MODELO
+from src.api.regras import CLASSE_ALTA
+from src.api.treino_incremental import ARVORES_POR_LOTE, adicionar_arvores
+
+
+def _lote(indice, linhas, deriva):
+    colunas = gerar_bloco(123, indice, linhas)
+    X = pd.DataFrame({c: colunas[c].astype(np.int64) for c in FEATURES})
+    y = colunas[TARGET].copy()
+    if deriva:
+        y[(X['tem_imagens_cameras'] == 1).to_numpy() & (X['periodo_decorrido_dias'] <= 15).to_numpy()] = CLASSE_ALTA
+    return X, y
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--lotes", type=int, default=8)
+    parser.add_argument("--linhas-lote", type=int, default=20_000)
+    parser.add_argument("--arvores-por-lote", type=int, default=ARVORES_POR_LOTE)
+    parser.add_argument("--deriva", action="store_true", help="Muda o rótulo a partir da metade dos lotes")
+    args = parser.parse_args()
+
+    X_base, y_base = _lote(0, args.linhas_lote, deriva=False)
+    base = RandomForestClassifier(**PARAMETROS_MODELO).fit(X_base, y_base)
+    incremental = copy.deepcopy(base)
+    vistos_X, vistos_y = [X_base], [y_base]
+
+    print(f"{'lote':>4} {'deriva':>6} | {'incremental':>11} {'retreino':>9} {'razão':>6} | "
+          f"{'acurácia base':>13} {'incremental':>11} {'retreino':>9}")
+    for lote in range(1, args.lotes + 1):
+        deriva = args.deriva and lote > args.lotes // 2
+        X, y = _lote(lote, args.linhas_lote, deriva)
+        X_teste, y_teste = _lote(10_000 + lote, args.linhas_lote, deriva)
+        vistos_X.append(X)
+        vistos_y.append(y)
+
+        inicio = time.perf_counter()
+        adicionar_arvores(incremental, X.to_numpy(), y, args.arvores_por_lote, semente=lote)
+        tempo_incremental = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        retreinado = RandomForestClassifier(**PARAMETROS_MODELO).fit(
+            pd.concat(vistos_X, ignore_index=True), np.concatenate(vistos_y)
+        )
+        tempo_retreino = time.perf_counter() - inicio
+
+        acuracias = [(m.predict(X_teste) == y_teste).mean() for m in (base, incremental, retreinado)]
+        print(f"{lote:>4} {'sim' if deriva else 'não':>6} | {tempo_incremental:>10.2f}s {tempo_retreino:>8.2f}s "
+              f"{tempo_retreino / tempo_incremental:>5.1f}x | "
+              f"{acuracias[0]:>13.4f} {acuracias[1]:>11.4f} {acuracias[2]:>9.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Benchmark: API unificada (`main_unificado`) vs. as duas APIs em processos separados.
+
+Sobe, com uvicorn, a API de regras e a de ML (dois processos) e depois a API
+unificada (um processo), com o mesmo modelo registrado. Compara:
+  - memória residente (RSS) somada dos processos, após o aquecimento;
+  - comparar os dois motores para cada ocorrência: duas requisições (uma a cada
+    API) contra uma requisição `?motor=ambos`, em sequência, com conexões
+    mantidas abertas.
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.bench_unificado [--requisicoes 2000]
+"""
+import argparse
+import contextlib
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+import numpy as np
+
+from benchmarks.suite import _payloads, _porta_livre
+from src.api.gerar_modelo import gerar_dados, treinar_avaliar_modelo
+from src.api.registro_modelos import RegistroModelos
+
+
+def _rss_mb(pid):
+    with open(f"/proc/{pid}/status", encoding="utf-8") as f:
+        for linha in f:
+            if linha.startswith("VmRSS:"):
+                return int(linha.split()[1]) / 1024
+    return float("nan")
+
+
+@contextlib.contextmanager
+def _servidor(modulo, diretorio_modelos, limite_s=60):
+    """Sobe `uvicorn <modulo>:app` e devolve `(processo, cliente)` quando o /ready (ou /) responde."""
+    porta = _porta_livre()
+    ambiente = {**os.environ, "DIRETORIO_MODELOS": str(diretorio_modelos), "RECARGA_INTERVALO_S": "0"}
+    processo = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", f"{modulo}:app", "--port", str(porta),
+         "--log-level", "warning", "--no-access-log"],
+        env=ambiente, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    prontidao = "/" if modulo.endswith("regras") else "/ready"
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{porta}") as cliente:
+            inicio = time.perf_counter()
+            while True:
+                with contextlib.suppress(httpx.TransportError):
+                    if cliente.get(prontidao).status_code == 200:
+                        break
+                if time.perf_counter() - inicio > limite_s:
+                    raise RuntimeError(f"uvicorn ({modulo}) não ficou pronto em {limite_s} s")
+                time.sleep(0.05)
+            yield processo, cliente
+    finally:
+        processo.terminate()
+        processo.wait()
+
+
+def _medir(chamadas, requisicoes, aquecimento=200):
+    """Latência (p50/p99) de comparar os dois motores para uma ocorrência, com `chamadas(payload)`."""
+    payloads = _payloads()
+    for i in range(aquecimento):
+        chamadas(payloads[i % len(payloads)])
+    tempos = []
+    for i in range(requisicoes):
+        inicio = time.perf_counter()
+        chamadas(payloads[i % len(payloads)])
+        tempos.append(time.perf_counter() - inicio)
+    p50, p99 = np.percentile(np.array(tempos) * 1000, [50, 99])
+    return p50, p99, requisicoes / sum(tempos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requisicoes", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temporario:
+        registro = RegistroModelos(Path(temporario) / "modelos")
+        with contextlib.redirect_stdout(io.StringIO()):
+            treinar_avaliar_modelo(gerar_dados(), registro)
+
+        with _servidor("src.api.main_regras", registro.raiz) as (proc_regras, regras), \
+                _servidor("src.api.main_modelo", registro.raiz) as (proc_modelo, modelo):
+            def separadas(payload):
+                respostas = [c.post("/prever", json=payload) for c in (regras, modelo)]
+                for resposta in respostas:
+                    resposta.raise_for_status()
+                return respostas[0].json()["resolutividade"] == respostas[1].json()["resolutividade"]
+
+            separado = _medir(separadas, args.requisicoes)
+            rss_separado = _rss_mb(proc_regras.pid) + _rss_mb(proc_modelo.pid)
+
+        with _servidor("src.api.main_unificado", registro.raiz) as (proc_unificado, unificado):
+            def ambos(payload):
+                resposta = unificado.post("/prever", params={"motor": "ambos"}, json=payload)
+                resposta.raise_for_status()
+                return resposta.json()["concordam"]
+
+            junto = _medir(ambos, args.requisicoes)
+            rss_unificado = _rss_mb(proc_unificado.pid)
+
+    print(f"{'implantação':<24} {'processos':>9} {'RSS':>9} {'req. HTTP':>9} {'p50':>9} {'p99':>9} {'comparações/s':>14}")
+    for nome, processos, rss, chamadas, (p50, p99, vazao) in (
+        ("regras + modelo", 2, rss_separado, 2, separado),
+        ("unificada (ambos)", 1, rss_unificado, 1, junto),
+    ):
+        print(f"{nome:<24} {processos:>9} {rss:>7.1f}MB {chamadas:>9} {p50:>7.3f}ms {p99:>7.3f}ms {vazao:>14,.0f}")
+    print(f"\nMemória: {rss_unificado / rss_separado:.0%} da implantação separada; "
+          f"vazão: {junto[2] / separado[2]:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
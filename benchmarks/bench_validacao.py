@@ -0,0 +1,111 @@
+"""
+Benchmark: validação colunar de lotes (src/api/validacao_colunar.py).
+
+Compara, em linhas por segundo, a validação por linha do `/prever/lote` (um
+`OcorrenciaRequest` por ocorrência, como o FastAPI faz, mais a matriz de
+features) com a validação colunar do mesmo lote por linhas e por colunas, com
+o JSON limpo e com 1% de valores que exigem conversão ou são inválidos. Mostra
+também o custo de pontuar o lote nas regras, para comparação, e a latência do
+`/prever/lote` contra o `/prever/colunas` da API de regras com lotes grandes.
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.bench_validacao [--linhas 100000]
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from typing import List
+
+import httpx
+import numpy as np
+from pydantic import TypeAdapter
+
+from src.api import main_regras
+from src.api.constantes import FEATURES
+from src.api.validacao_colunar import validar_colunas, validar_linhas
+from src.models.schemas import OcorrenciaRequest
+
+# Valores que precisam do caminho lento: convertidos pelo Pydantic ou inválidos
+SUJEIRA = {FEATURES[0]: ["12", 3.0, -1, None], **{flag: [1, "true", "talvez", None] for flag in FEATURES[1:]}}
+
+
+def _linhas(n, sujas=0.0, semente=0):
+    aleatorio = random.Random(semente)
+    linhas = []
+    for _ in range(n):
+        linha = {FEATURES[0]: aleatorio.randint(0, 120), **{f: aleatorio.random() < 0.5 for f in FEATURES[1:]}}
+        if aleatorio.random() < sujas:
+            campo = aleatorio.choice(FEATURES)
+            linha[campo] = aleatorio.choice(SUJEIRA[campo])
+        linhas.append(linha)
+    return linhas
+
+
+def _por_linha(adaptador, linhas):
+    ocorrencias = adaptador.validate_python(linhas)
+    return np.array([o.linha() for o in ocorrencias], dtype=np.int64)
+
+
+def _melhor_s(funcao, repeticoes=3):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos)
+
+
+async def _latencia_ms(app, caminho, corpo, repeticoes=5):
+    transporte = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transporte, base_url="http://teste", timeout=None) as client:
+        tempos = []
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            resposta = await client.post(caminho, content=corpo, headers={"content-type": "application/json"})
+            tempos.append(time.perf_counter() - inicio)
+            resposta.raise_for_status()
+    return min(tempos) * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--linhas", type=int, default=100_000, help="Ocorrências por lote")
+    args = parser.parse_args()
+
+    adaptador = TypeAdapter(List[OcorrenciaRequest])
+    tabela = main_regras._regras_atuais()
+    print(f"\n--- Validação de {args.linhas:,} ocorrências (linhas por segundo) ---")
+    for rotulo, sujas in (("JSON limpo", 0.0), ("1% de valores a converter ou inválidos", 0.01)):
+        linhas = _linhas(args.linhas, sujas)
+        colunas = {nome: [linha[nome] for linha in linhas] for nome in FEATURES}
+        print(f"{rotulo}:")
+        medidas = {"por linha (Pydantic)": None, "colunar, lote por linhas": None, "colunar, lote por colunas": None}
+        if sujas == 0:
+            medidas["por linha (Pydantic)"] = _melhor_s(lambda: _por_linha(adaptador, linhas))
+        medidas["colunar, lote por linhas"] = _melhor_s(lambda: validar_linhas(linhas))
+        medidas["colunar, lote por colunas"] = _melhor_s(lambda: validar_colunas(colunas))
+        for nome, segundos in medidas.items():
+            if segundos is not None:
+                print(f"  {nome:<28} {args.linhas / segundos:12,.0f}")
+        if sujas:
+            print(f"  ({len(validar_linhas(linhas).erros):,} linhas com erro; o Pydantic rejeitaria o lote inteiro)")
+
+    X = validar_linhas(_linhas(args.linhas)).X
+    print(f"Pontuação nas regras (referência): {args.linhas / _melhor_s(lambda: tabela.prever(X)):12,.0f}")
+
+    print("\n--- API de regras, ASGI no processo (melhor de 5) ---")
+    for n in (1_000, 10_000):
+        linhas = _linhas(n)
+        por_linhas = json.dumps(linhas).encode()
+        por_colunas = json.dumps({nome: [linha[nome] for linha in linhas] for nome in FEATURES}).encode()
+        lote = asyncio.run(_latencia_ms(main_regras.app, "/prever/lote", por_linhas))
+        colunar_linhas = asyncio.run(_latencia_ms(main_regras.app, "/prever/colunas", por_linhas))
+        colunar = asyncio.run(_latencia_ms(main_regras.app, "/prever/colunas", por_colunas))
+        print(f"{n:>6,} ocorrências: /prever/lote {lote:7.1f} ms   /prever/colunas (linhas) {colunar_linhas:7.1f} ms"
+              f"   /prever/colunas (colunas) {colunar:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+"""
+Suíte de desempenho reprodutível: APIs, treinamento e geração de dados.
+
+`executar` mede e grava um JSON com os resultados e o commit medido:
+  - latência (p50/p95/p99) e requisições/s do `/prever` das duas APIs, com um
+    cliente ASGI no mesmo processo (só o custo da aplicação) e com um uvicorn
+    de verdade (inclui HTTP e sockets);
+  - tempo de `gerar_dados` e de `treinar_avaliar_modelo` em vários `data_size`.
+`comparar` confronta dois desses JSONs (por exemplo, de dois commits) e
+termina com código 1 se alguma métrica piorou além da tolerância.
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.suite executar [--saida arquivo.json] [--requisicoes 2000] [--concorrencia 16]
+    python -m benchmarks.suite comparar base.json novo.json [--tolerancia 0.15]
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+import numpy as np
+
+from src.api.constantes import FEATURES
+from src.api.gerar_modelo import gerar_dados, treinar_avaliar_modelo
+from src.api.registro_modelos import RegistroModelos
+
+DIRETORIO_RESULTADOS = Path(__file__).parent / "resultados"
+TAMANHOS_DADOS = (1_000, 3_500, 10_000)
+# Métricas em que um valor maior é melhor; nas demais (tempos), menor é melhor
+MAIOR_MELHOR = {"req_s"}
+
+
+def _payloads(quantidade=256, semente=0):
+    """Ocorrências variadas (dias e flags), para não medir sempre a mesma célula."""
+    rng = np.random.default_rng(semente)
+    dias = rng.integers(0, 90, quantidade)
+    flags = rng.random((quantidade, 5)) < 0.5
+    return [
+        {FEATURES[0]: int(d), **{nome: bool(f) for nome, f in zip(FEATURES[1:], linha)}}
+        for d, linha in zip(dias, flags)
+    ]
+
+
+async def _carga(client, requisicoes, concorrencia, aquecimento=100):
+    """Dispara `requisicoes` POSTs ao /prever com `concorrencia` clientes simultâneos."""
+    payloads = _payloads()
+    for i in range(aquecimento):
+        (await client.post("/prever", json=payloads[i % len(payloads)])).raise_for_status()
+
+    latencias = []
+    proxima = iter(range(requisicoes))
+
+    async def cliente():
+        for i in proxima:
+            inicio = time.perf_counter()
+            resposta = await client.post("/prever", json=payloads[i % len(payloads)])
+            latencias.append(time.perf_counter() - inicio)
+            resposta.raise_for_status()
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(cliente() for _ in range(concorrencia)))
+    duracao = time.perf_counter() - inicio
+
+    p50, p95, p99 = np.percentile(np.array(latencias) * 1000, [50, 95, 99])
+    return {"p50_ms": p50, "p95_ms": p95, "p99_ms": p99, "req_s": requisicoes / duracao}
+
+
+def preparar_app(nome, diretorio_modelos):
+    """App da API pronta para servir (o lifespan não roda no cliente ASGI)."""
+    if nome == "regras":
+        from src.api.main_regras import app
+        return app
+    from src.api import main_modelo
+    main_modelo.registro = RegistroModelos(diretorio_modelos)
+    main_modelo.ativo = None
+    main_modelo.inicializar()
+    return main_modelo.app
+
+
+async def medir_asgi(app, requisicoes, concorrencia):
+    """Latência e vazão do /prever de `app` com um cliente ASGI no mesmo processo."""
+    transporte = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transporte, base_url="http://teste") as client:
+        return await _carga(client, requisicoes, concorrencia)
+
+
+def _porta_livre():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def _medir_uvicorn(nome, diretorio_modelos, requisicoes, concorrencia, limite_s=60):
+    porta = _porta_livre()
+    ambiente = {**os.environ, "DIRETORIO_MODELOS": str(diretorio_modelos), "RECARGA_INTERVALO_S": "0"}
+    processo = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", f"src.api.main_{nome}:app", "--port", str(porta),
+         "--log-level", "warning", "--no-access-log"],
+        env=ambiente, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    limites = httpx.Limits(max_connections=concorrencia, max_keepalive_connections=concorrencia)
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{porta}", limits=limites) as client:
+            prontidao = "/ready" if nome == "modelo" else "/"
+            inicio = time.perf_counter()
+            while True:
+                with contextlib.suppress(httpx.TransportError):
+                    if (await client.get(prontidao)).status_code == 200:
+                        break
+                if time.perf_counter() - inicio > limite_s:
+                    raise RuntimeError(f"uvicorn (main_{nome}) não ficou pronto em {limite_s} s")
+                await asyncio.sleep(0.05)
+            return await _carga(client, requisicoes, concorrencia)
+    finally:
+        processo.terminate()
+        processo.wait()
+
+
+def _melhor_tempo(funcao, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos)
+
+
+def _medir_treinamento(tamanhos, repeticoes, diretorio_modelos):
+    registro = RegistroModelos(diretorio_modelos)
+    resultados = {}
+    # Os relatórios impressos pelo treino não interessam aqui
+    with contextlib.redirect_stdout(io.StringIO()):
+        for tamanho in tamanhos:
+            dados = gerar_dados(data_size=tamanho)
+            resultados[f"treino.gerar_dados.{tamanho}"] = {
+                "ms": _melhor_tempo(lambda: gerar_dados(data_size=tamanho), repeticoes) * 1000
+            }
+            resultados[f"treino.treinar_avaliar_modelo.{tamanho}"] = {
+                "ms": _melhor_tempo(lambda: treinar_avaliar_modelo(dados, registro, promover=False), repeticoes) * 1000
+            }
+    return resultados
+
+
+def _ambiente_execucao():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "data": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def executar(args):
+    resultados = {}
+    with tempfile.TemporaryDirectory() as temporario:
+        # Modelo de referência da API de ML, registrado em um diretório temporário
+        registro = RegistroModelos(Path(temporario) / "api")
+        with contextlib.redirect_stdout(io.StringIO()):
+            treinar_avaliar_modelo(gerar_dados(), registro)
+
+        for nome in ("regras", "modelo"):
+            print(f"Medindo main_{nome} (ASGI no processo)...")
+            with contextlib.redirect_stdout(io.StringIO()):
+                app = preparar_app(nome, registro.raiz)
+            resultados[f"api.{nome}.asgi.prever"] = asyncio.run(
+                medir_asgi(app, args.requisicoes, args.concorrencia)
+            )
+            print(f"Medindo main_{nome} (uvicorn)...")
+            resultados[f"api.{nome}.uvicorn.prever"] = asyncio.run(
+                _medir_uvicorn(nome, registro.raiz, args.requisicoes, args.concorrencia)
+            )
+
+        print("Medindo geração de dados e treinamento...")
+        resultados.update(_medir_treinamento(args.tamanhos, args.repeticoes, Path(temporario) / "treino"))
+
+    relatorio = {
+        "ambiente": _ambiente_execucao(),
+        "parametros": {
+            "requisicoes": args.requisicoes, "concorrencia": args.concorrencia,
+            "tamanhos": list(args.tamanhos), "repeticoes": args.repeticoes,
+        },
+        "resultados": resultados,
+    }
+    saida = args.saida or DIRETORIO_RESULTADOS / f"{relatorio['ambiente']['commit'] or 'sem-commit'}.json"
+    saida = Path(saida)
+    saida.parent.mkdir(parents=True, exist_ok=True)
+    saida.write_text(json.dumps(relatorio, indent=2), encoding="utf-8")
+
+    for chave, metricas in resultados.items():
+        print(f"{chave:<40} " + "  ".join(f"{nome} {valor:>10.2f}" for nome, valor in metricas.items()))
+    print(f"\nResultados gravados em {saida}")
+
+
+def comparar_resultados(base, novo, tolerancia=0.15):
+    """
+    Variação relativa de cada métrica presente nos dois relatórios.
+
+    Retorna uma lista de `(chave, metrica, valor_base, valor_novo, variacao, regressao)`,
+    em que `variacao` é positiva quando a métrica piorou.
+    """
+    linhas = []
+    for chave in sorted(base["resultados"].keys() & novo["resultados"].keys()):
+        metricas_base, metricas_novo = base["resultados"][chave], novo["resultados"][chave]
+        for metrica in sorted(metricas_base.keys() & metricas_novo.keys()):
+            antes, depois = metricas_base[metrica], metricas_novo[metrica]
+            if not antes:
+                continue
+            variacao = (depois - antes) / antes
+            if metrica in MAIOR_MELHOR:
+                variacao = -variacao
+            linhas.append((chave, metrica, antes, depois, variacao, variacao > tolerancia))
+    return linhas
+
+
+def comparar(args):
+    base = json.loads(Path(args.base).read_text(encoding="utf-8"))
+    novo = json.loads(Path(args.novo).read_text(encoding="utf-8"))
+    print(f"Base: {base['ambiente']['commit']}  |  Novo: {novo['ambiente']['commit']}"
+          f"  |  tolerância {args.tolerancia:.0%}\n")
+    linhas = comparar_resultados(base, novo, args.tolerancia)
+    for chave, metrica, antes, depois, variacao, regressao in linhas:
+        marcador = "REGRESSÃO" if regressao else ("melhora" if variacao < -args.tolerancia else "")
+        print(f"{chave:<40} {metrica:<7} {antes:>10.2f} -> {depois:>10.2f}  piora {variacao:>+7.1%}  {marcador}")
+    regressoes = sum(linha[-1] for linha in linhas)
+    print(f"\n{regressoes} regressão(ões) em {len(linhas)} métricas.")
+    return 1 if regressoes else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    comandos = parser.add_subparsers(dest="comando", required=True)
+
+    execucao = comandos.add_parser("executar", help="Mede e grava os resultados em JSON")
+    execucao.add_argument("--saida", help=f"Arquivo JSON (padrão: {DIRETORIO_RESULTADOS.name}/<commit>.json)")
+    execucao.add_argument("--requisicoes", type=int, default=2000, help="Requisições medidas por cenário de API")
+    execucao.add_argument("--concorrencia", type=int, default=16, help="Clientes simultâneos")
+    execucao.add_argument("--tamanhos", type=lambda s: [int(t) for t in s.split(",")],
+                          default=TAMANHOS_DADOS, help="Valores de data_size separados por vírgula")
+    execucao.add_argument("--repeticoes", type=int, default=3, help="Repetições do treino (vale a menor)")
+
+    comparacao = comandos.add_parser("comparar", help="Compara dois resultados e aponta regressões")
+    comparacao.add_argument("base")
+    comparacao.add_argument("novo")
+    comparacao.add_argument("--tolerancia", type=float, default=0.15,
+                            help="Piora relativa tolerada antes de acusar regressão (0.15 = 15%%)")
+
+    args = parser.parse_args(argv)
+    if args.comando == "executar":
+        executar(args)
+        return 0
+    return comparar(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
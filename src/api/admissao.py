@@ -0,0 +1,203 @@
+"""
+Controle de admissão dos endpoints de previsão: limite de concorrência, fila
+limitada e prazo por requisição.
+
+Sem limite, um pico de tráfego enche o threadpool e o event loop: a latência
+cresce até os clientes desistirem, e o servidor continua pontuando
+requisições que ninguém vai ler. O `MiddlewareAdmissao` fica na frente das
+rotas `/prever*` (antes da leitura e da validação do corpo) e, para cada
+motor (`ControleAdmissao`):
+
+  - admite até `simultaneas` requisições em andamento;
+  - enfileira até `fila` requisições à espera de uma vaga (ordem de chegada);
+    com a fila cheia responde 429 na hora;
+  - dá a cada requisição um prazo (cabeçalho `X-Prazo-Ms`, ou o padrão):
+    se ele acabar na fila, responde 503 sem pontuar; os handlers chamam
+    `verificar_prazo()` logo antes da pontuação, para o caso de o prazo
+    acabar durante a leitura e a validação de um lote grande.
+
+As respostas 429 e 503 trazem `Retry-After`, estimado pela fila e pelo tempo
+médio de atendimento. As rotas de monitoramento (`/metrics`, `/ready`, ...)
+não passam pelo controle.
+"""
+import asyncio
+import math
+import time
+from collections import deque
+from contextvars import ContextVar
+
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+
+CABECALHO_PRAZO = b"x-prazo-ms"
+# Peso da média móvel exponencial do tempo de atendimento (para o Retry-After)
+PESO_MEDIA_ATENDIMENTO = 0.1
+
+# Instante (time.monotonic) em que a requisição corrente deixa de interessar ao cliente
+_prazo = ContextVar("prazo_requisicao", default=None)
+
+
+class Sobrecarga(Exception):
+    """Requisição recusada pelo controle de admissão (429 com a fila cheia, 503 com o prazo esgotado)."""
+
+    def __init__(self, status, mensagem, retry_after):
+        super().__init__(mensagem)
+        self.status = status
+        self.mensagem = mensagem
+        self.retry_after = retry_after
+
+
+class ControleAdmissao:
+    """Vagas de atendimento e fila de espera de um motor, no event loop do servidor."""
+
+    def __init__(self, motor, simultaneas=16, fila=128, prazo_padrao_s=1.0, habilitado=True):
+        self.motor = motor
+        self.simultaneas = simultaneas
+        self.fila_maxima = fila
+        self.prazo_padrao_s = prazo_padrao_s
+        self.habilitado = habilitado
+        self.rejeitadas = {"fila_cheia": 0, "prazo": 0}
+        self._atendimento_s = 0.001
+        self._em_andamento = 0
+        self._fila = deque()
+        self._loop = None
+
+    def _retry_after(self):
+        """Segundos (inteiros, mínimo 1) até a fila atual ser atendida."""
+        espera = (len(self._fila) + 1) * self._atendimento_s / max(self.simultaneas, 1)
+        return max(1, math.ceil(espera))
+
+    async def entrar(self, prazo):
+        """Ocupa uma vaga, esperando na fila até `prazo`; levanta `Sobrecarga` se não conseguir."""
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # Novo event loop (ex.: reinício do servidor): vagas e fila recomeçam
+            self._loop, self._em_andamento, self._fila = loop, 0, deque()
+
+        if self._em_andamento < self.simultaneas and not self._fila:
+            self._em_andamento += 1
+            return
+        if len(self._fila) >= self.fila_maxima:
+            self.rejeitadas["fila_cheia"] += 1
+            raise Sobrecarga(429, f"Motor '{self.motor}' sobrecarregado: fila de espera cheia.", self._retry_after())
+
+        vaga = loop.create_future()
+        self._fila.append(vaga)
+        try:
+            await asyncio.wait({vaga}, timeout=max(prazo - time.monotonic(), 0))
+        except asyncio.CancelledError:
+            # Cliente desconectou enquanto esperava: devolve a vaga se ela já tinha chegado
+            if vaga.done():
+                self.sair()
+            else:
+                self._fila.remove(vaga)
+            raise
+        if not vaga.done():
+            self._fila.remove(vaga)
+            self.rejeitadas["prazo"] += 1
+            raise Sobrecarga(503, f"Prazo esgotado na fila do motor '{self.motor}'.", self._retry_after())
+
+    def sair(self, duracao_s=None):
+        """Libera a vaga, passando-a direto para a próxima requisição da fila."""
+        if duracao_s is not None:
+            self._atendimento_s += PESO_MEDIA_ATENDIMENTO * (duracao_s - self._atendimento_s)
+        while self._fila:
+            vaga = self._fila.popleft()
+            if not vaga.done():
+                vaga.set_result(None)
+                return
+        self._em_andamento -= 1
+
+    def contagens(self):
+        """`{estado: valor}` para o gauge do /metrics e o GET /admissao."""
+        return {
+            "em_andamento": self._em_andamento,
+            "na_fila": len(self._fila),
+            "rejeitadas_fila_cheia": self.rejeitadas["fila_cheia"],
+            "rejeitadas_prazo": self.rejeitadas["prazo"],
+        }
+
+
+def _prazo_s(scope, padrao_s):
+    for nome, valor in scope["headers"]:
+        if nome == CABECALHO_PRAZO:
+            try:
+                return max(float(valor) / 1000, 0.0)
+            except ValueError:
+                break
+    return padrao_s
+
+
+class MiddlewareAdmissao:
+    """
+    Middleware ASGI que passa as rotas `/prever*` pelos controles de admissão.
+
+    `controles(scope)` retorna os controles da requisição (um por motor usado,
+    sempre na mesma ordem), o que permite à API unificada escolher pelo `motor`.
+    """
+
+    def __init__(self, app, controles, prefixo="/prever"):
+        self.app = app
+        self.controles = controles
+        self.prefixo = prefixo
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith(self.prefixo):
+            await self.app(scope, receive, send)
+            return
+        controles = [controle for controle in self.controles(scope) if controle.habilitado]
+        if not controles:
+            await self.app(scope, receive, send)
+            return
+
+        inicio = time.monotonic()
+        prazo = inicio + _prazo_s(scope, max(controle.prazo_padrao_s for controle in controles))
+        ocupados = []
+        try:
+            for controle in controles:
+                await controle.entrar(prazo)
+                ocupados.append(controle)
+        except Sobrecarga as recusa:
+            for controle in ocupados:
+                controle.sair()
+            resposta = JSONResponse(
+                {"detail": recusa.mensagem}, status_code=recusa.status,
+                headers={"Retry-After": str(recusa.retry_after)},
+            )
+            await resposta(scope, receive, send)
+            return
+        except BaseException:
+            for controle in ocupados:
+                controle.sair()
+            raise
+
+        token = _prazo.set(prazo)
+        atendimento = time.monotonic()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _prazo.reset(token)
+            duracao = time.monotonic() - atendimento
+            for controle in ocupados:
+                controle.sair(duracao)
+
+
+def verificar_prazo():
+    """Chamada pelos handlers logo antes de pontuar: 503 se o prazo da requisição já passou."""
+    prazo = _prazo.get()
+    if prazo is not None and time.monotonic() >= prazo:
+        raise HTTPException(
+            status_code=503,
+            detail="Prazo da requisição esgotado antes da pontuação.",
+            headers={"Retry-After": "1"},
+        )
+
+
+def criar_controle(motor, simultaneas):
+    """`ControleAdmissao` de um motor com as opções de `src/config.py`."""
+    from src.config import settings
+
+    return ControleAdmissao(
+        motor, simultaneas, settings.admissao_fila, settings.admissao_prazo_ms / 1000,
+        habilitado=settings.admissao_habilitada,
+    )
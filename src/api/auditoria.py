@@ -0,0 +1,386 @@
+"""
+Registro de auditoria das previsões: entradas, classe, probabilidades e versão.
+
+Na requisição, registrar uma previsão (ou um lote inteiro) é só anexar uma
+tupla a uma fila em memória, sob um lock: nada é serializado nem gravado no
+caminho da resposta. Uma thread de gravação esvazia a fila em lotes (ao juntar
+`tamanho_lote` linhas ou a cada `intervalo_s`), monta as linhas JSON e as
+acrescenta ao segmento corrente como um novo membro gzip. Um arquivo com vários
+membros gzip é lido normalmente por `gzip`/`zcat`, e uma queda do processo
+perde no máximo o lote em andamento.
+
+A fila é limitada a `capacidade` linhas. Quando ela enche, a `politica` decide:
+  descartar  a previsão não é registrada (contada em `descartados`)
+  bloquear   a requisição espera a gravação liberar espaço, até `espera_max_s`
+             (nos handlers async, `registrar_async` espera em uma thread do
+             pool, sem travar o event loop)
+  amostrar   a partir de metade da capacidade, só uma fração
+             `taxa_amostragem` das previsões entra na fila; cheia, descarta
+
+Um lote maior que a capacidade entra em partes de até `capacidade` linhas, e
+a política vale para cada parte.
+
+Os segmentos ficam em `<diretorio>/<api>/<início em ms>.jsonl.gz` e trocam ao
+passar de `segmento_max_bytes` ou de `segmento_max_s`. O nome de cada segmento
+e o do seguinte delimitam o intervalo de tempo que ele cobre: `consultar`
+abre só os segmentos que cruzam o intervalo pedido e, dentro deles, filtra
+pelo `ts` no início de cada linha, sem decodificar o JSON das que ficam de fora.
+
+Uso da consulta (a partir da raiz do projeto):
+    python -m src.api.auditoria segmentos
+    python -m src.api.auditoria consultar --api modelo --inicio 2026-10-18T09:00 --fim 2026-10-18T10:00
+    python -m src.api.auditoria consultar --classe Alta --contar
+"""
+import argparse
+import asyncio
+import gzip
+import json
+import random
+import sys
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+
+if __package__ in (None, ""):
+    sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from src.api.constantes import FEATURES, RESOLUTIVIDADE_CLASSES
+
+POLITICAS = ("descartar", "bloquear", "amostrar")
+EXTENSAO = ".jsonl.gz"
+
+# Prefixo de cada linha, antes do `ts`: a consulta lê o horário sem decodificar o JSON
+_PREFIXO_TS = b'{"ts":'
+_NOMES_CLASSES = [json.dumps(RESOLUTIVIDADE_CLASSES[c], ensure_ascii=False) for c in sorted(RESOLUTIVIDADE_CLASSES)]
+# Texto das flags de cada uma das 32 combinações (bit i = FEATURES[1 + i], como no formato binário)
+_TEXTO_FLAGS = [
+    ",".join(f'{json.dumps(flag)}:{"true" if codigo >> bit & 1 else "false"}' for bit, flag in enumerate(FEATURES[1:]))
+    for codigo in range(1 << (len(FEATURES) - 1))
+]
+_FORMATO_PROBABILIDADES = ',"probabilidades":{' + ",".join(f"{nome}:%.6f" for nome in _NOMES_CLASSES) + "}}\n"
+
+
+class Auditoria:
+    """Fila limitada de previsões a registrar e a thread que as grava em segmentos JSONL comprimidos."""
+
+    def __init__(self, diretorio, api, habilitada=True, capacidade=100_000, politica="descartar",
+                 taxa_amostragem=0.1, espera_max_s=1.0, tamanho_lote=1000, intervalo_s=1.0,
+                 segmento_max_bytes=64 * 1024 * 1024, segmento_max_s=3600.0, relogio=time.time):
+        if politica not in POLITICAS:
+            raise ValueError(f"Política de auditoria desconhecida: {politica!r} (use {', '.join(POLITICAS)}).")
+        self.diretorio = Path(diretorio) / api
+        self.api = api
+        self.habilitada = habilitada
+        self.capacidade = capacidade
+        self.politica = politica
+        self.taxa_amostragem = taxa_amostragem
+        self.espera_max_s = espera_max_s
+        self.tamanho_lote = tamanho_lote
+        self.intervalo_s = intervalo_s
+        self.segmento_max_bytes = segmento_max_bytes
+        self.segmento_max_s = segmento_max_s
+        self._relogio = relogio
+        self._fila = deque()
+        self._pendentes = 0
+        self._condicao = threading.Condition()
+        self._fechando = False
+        self._thread = None
+        self._segmento = None  # (caminho, início em s, bytes gravados)
+        self._prefixo_api = f'"api":{json.dumps(api)},"versao":'
+        self.registradas = 0
+        self.gravadas = 0
+        self.descartadas = {"fila_cheia": 0, "amostragem": 0, "erro_gravacao": 0}
+
+    # --- Lado da requisição ---
+
+    def _entrada(self, versao, linha, classe, probabilidades):
+        return (self._relogio(), versao, (linha,), (classe,),
+                None if probabilidades is None else (probabilidades,), False)
+
+    def registrar(self, versao, linha, classe, probabilidades=None):
+        """Uma previsão: `linha` na ordem de FEATURES, o código da classe e, no modelo, as probabilidades."""
+        if self.habilitada:
+            self._enfileirar(self._entrada(versao, linha, classe, probabilidades), 1)
+
+    async def registrar_async(self, versao, linha, classe, probabilidades=None):
+        """
+        Como `registrar`, para handlers que rodam no event loop: se a política
+        `bloquear` mandar esperar, a espera acontece em uma thread do pool.
+        """
+        if self.habilitada:
+            entrada = self._entrada(versao, linha, classe, probabilidades)
+            if not self._enfileirar(entrada, 1, esperar=False):
+                await asyncio.to_thread(self._enfileirar, entrada, 1)
+
+    def registrar_lote(self, versao, X, classes, probabilidades=None):
+        """Um lote: matriz (n, 6) na ordem de FEATURES, códigos das classes e, no modelo, as probabilidades."""
+        if self.habilitada and len(classes):
+            self._enfileirar_em_partes(versao, X, classes, probabilidades, False)
+
+    def registrar_codificado(self, versao, dias, codigos, classes, probabilidades=None):
+        """Um lote no formato binário: as colunas de flags só são montadas na thread de gravação."""
+        if self.habilitada and len(classes):
+            self._enfileirar_em_partes(versao, (dias, codigos), classes, probabilidades, True)
+
+    def _enfileirar_em_partes(self, versao, X, classes, probabilidades, codificado):
+        """Enfileira o lote em partes de até `capacidade` linhas (um lote maior nunca caberia inteiro)."""
+        ts, n = self._relogio(), len(classes)
+        for inicio in range(0, n, self.capacidade):
+            fim = min(inicio + self.capacidade, n)
+            parte = (X[0][inicio:fim], X[1][inicio:fim]) if codificado else X[inicio:fim]
+            self._enfileirar((ts, versao, parte, classes[inicio:fim],
+                              None if probabilidades is None else probabilidades[inicio:fim], codificado), fim - inicio)
+
+    def _enfileirar(self, entrada, n, esperar=True):
+        """
+        Aplica a política e enfileira. Com `esperar=False`, retorna False (sem
+        contar descarte) quando a política `bloquear` mandaria esperar.
+        """
+        with self._condicao:
+            if not esperar and self.politica == "bloquear" and self._pendentes + n > self.capacidade:
+                return False
+            if self._admitir(n):
+                self._fila.append(entrada)
+                self._pendentes += n
+                self.registradas += n
+                if self._pendentes >= self.tamanho_lote:
+                    self._condicao.notify_all()
+            return True
+
+    def _admitir(self, n):
+        """Aplica a política a `n` linhas novas (com a condição adquirida); False se ficam de fora."""
+        if self.politica == "amostrar" and self._pendentes >= self.capacidade // 2:
+            if random.random() >= self.taxa_amostragem:
+                self.descartadas["amostragem"] += n
+                return False
+        if self._pendentes + n > self.capacidade:
+            livre = self.politica == "bloquear" and self._condicao.wait_for(
+                lambda: self._pendentes + n <= self.capacidade, timeout=self.espera_max_s
+            )
+            if not livre:
+                self.descartadas["fila_cheia"] += n
+                return False
+        return True
+
+    # --- Thread de gravação ---
+
+    def iniciar(self):
+        """Inicia a thread de gravação (no lifespan); cada início abre um segmento novo."""
+        if not self.habilitada or (self._thread is not None and self._thread.is_alive()):
+            return
+        self.diretorio.mkdir(parents=True, exist_ok=True)
+        self._fechando = False
+        self._segmento = None
+        self._thread = threading.Thread(target=self._gravar_continuamente, name=f"auditoria-{self.api}", daemon=True)
+        self._thread.start()
+
+    def fechar(self, timeout=10.0):
+        """Grava o que ainda estiver na fila e encerra a thread (no fim do lifespan)."""
+        if self._thread is None:
+            return
+        with self._condicao:
+            self._fechando = True
+            self._condicao.notify_all()
+        self._thread.join(timeout)
+        self._thread = None
+
+    def _gravar_continuamente(self):
+        while True:
+            with self._condicao:
+                self._condicao.wait_for(
+                    lambda: self._pendentes >= self.tamanho_lote or self._fechando, timeout=self.intervalo_s
+                )
+                lote, n = self._fila, self._pendentes
+                self._fila, self._pendentes = deque(), 0
+                fechando = self._fechando
+                # Libera as requisições que esperam espaço (política "bloquear")
+                self._condicao.notify_all()
+            if lote:
+                try:
+                    self._gravar(lote)
+                    self.gravadas += n
+                except Exception as erro:
+                    self.descartadas["erro_gravacao"] += n
+                    print(f"⚠️ Falha ao gravar a auditoria ({n} previsões perdidas): {erro}")
+            if fechando:
+                return
+
+    def _gravar(self, lote):
+        """Grava o lote como um membro gzip por segmento (um lote pode atravessar a troca de segmento)."""
+        caminho, partes = None, []
+        for entrada in lote:
+            destino = self._segmento_para(entrada[0])
+            if destino != caminho and partes:
+                self._acrescentar(caminho, partes)
+                partes = []
+            caminho = destino
+            partes.extend(self._linhas(*entrada))
+        self._acrescentar(caminho, partes)
+
+    def _acrescentar(self, caminho, partes):
+        comprimido = gzip.compress("".join(partes).encode("utf-8"), compresslevel=6)
+        with open(caminho, "ab") as arquivo:
+            arquivo.write(comprimido)
+        atual, inicio, tamanho = self._segmento
+        if atual == caminho:  # senão o segmento já foi trocado e o tamanho dele não importa mais
+            self._segmento = (atual, inicio, tamanho + len(comprimido))
+
+    def _segmento_para(self, ts):
+        """Segmento corrente, trocado por um novo se passou do tamanho ou da idade máxima."""
+        if self._segmento is not None:
+            caminho, inicio, tamanho = self._segmento
+            if tamanho < self.segmento_max_bytes and ts - inicio < self.segmento_max_s:
+                return caminho
+        inicio_ms = int(ts * 1000)
+        caminho = self.diretorio / f"{inicio_ms:013d}{EXTENSAO}"
+        self._segmento = (caminho, inicio_ms / 1000, caminho.stat().st_size if caminho.exists() else 0)
+        return caminho
+
+    def _linhas(self, ts, versao, X, classes, probabilidades, codificado):
+        """Linhas JSON de uma entrada da fila, com `ts` sempre como primeiro campo."""
+        import numpy as np
+
+        if codificado:
+            dias, codigos = X
+        else:
+            X = np.asarray(X)
+            dias, codigos = X[:, 0], (X[:, 1:].astype(bool) << np.arange(len(FEATURES) - 1)).sum(axis=1)
+        cabecalho = f'{{"ts":{ts:.3f},{self._prefixo_api}{json.dumps(versao)},"entrada":{{"{FEATURES[0]}":'
+        linhas = [
+            f'{cabecalho}{dia},{_TEXTO_FLAGS[codigo]}}},"classe":{_NOMES_CLASSES[classe]}'
+            for dia, codigo, classe in zip(np.asarray(dias).tolist(), np.asarray(codigos).tolist(),
+                                           np.asarray(classes).tolist())
+        ]
+        if probabilidades is None:
+            return [linha + "}\n" for linha in linhas]
+        return [linha + _FORMATO_PROBABILIDADES % tuple(p)
+                for linha, p in zip(linhas, np.asarray(probabilidades).tolist())]
+
+    def estatisticas(self):
+        """Contadores da fila e da gravação (GET /auditoria e /metrics)."""
+        with self._condicao:
+            pendentes = self._pendentes
+        return {
+            "habilitada": self.habilitada,
+            "politica": self.politica,
+            "capacidade": self.capacidade,
+            "pendentes": pendentes,
+            "registradas": self.registradas,
+            "gravadas": self.gravadas,
+            "descartadas": dict(self.descartadas),
+            "segmento": str(self._segmento[0]) if self._segmento else None,
+        }
+
+    def contagens(self):
+        """`{estado: previsões}` para o gauge do /metrics."""
+        estatisticas = self.estatisticas()
+        return {
+            "pendentes": estatisticas["pendentes"],
+            "gravadas": estatisticas["gravadas"],
+            **{f"descartadas_{motivo}": n for motivo, n in estatisticas["descartadas"].items()},
+        }
+
+
+def criar_auditoria(api):
+    """`Auditoria` de uma API com as opções de `src/config.py`."""
+    from src.config import settings
+
+    return Auditoria(
+        settings.diretorio_auditoria, api,
+        habilitada=settings.auditoria_habilitada,
+        capacidade=settings.auditoria_capacidade,
+        politica=settings.auditoria_politica,
+        taxa_amostragem=settings.auditoria_taxa_amostragem,
+        tamanho_lote=settings.auditoria_tamanho_lote,
+        intervalo_s=settings.auditoria_intervalo_s,
+        segmento_max_bytes=int(settings.auditoria_segmento_mb * 1024 * 1024),
+        segmento_max_s=settings.auditoria_segmento_s,
+    )
+
+
+# --- Consulta ---
+
+def segmentos(diretorio, api=None):
+    """`[(api, início em s, fim em s ou None, caminho)]` em ordem; o fim é o início do segmento seguinte."""
+    raiz = Path(diretorio)
+    pastas = [raiz / api] if api else sorted(p for p in raiz.iterdir() if p.is_dir()) if raiz.exists() else []
+    resultado = []
+    for pasta in pastas:
+        arquivos = sorted(pasta.glob(f"*{EXTENSAO}"))
+        inicios = [int(a.name[:-len(EXTENSAO)]) / 1000 for a in arquivos]
+        for caminho, inicio, fim in zip(arquivos, inicios, inicios[1:] + [None]):
+            resultado.append((pasta.name, inicio, fim, caminho))
+    return resultado
+
+
+def consultar(diretorio, api=None, inicio=None, fim=None):
+    """Registros (dicts) com `inicio <= ts < fim`, lendo só os segmentos que cruzam o intervalo."""
+    for _, inicio_segmento, fim_segmento, caminho in segmentos(diretorio, api):
+        if fim is not None and inicio_segmento >= fim:
+            continue
+        if inicio is not None and fim_segmento is not None and fim_segmento < inicio:
+            continue
+        with gzip.open(caminho, "rb") as arquivo:
+            try:
+                for linha in arquivo:
+                    ts = float(linha[len(_PREFIXO_TS):linha.index(b",", len(_PREFIXO_TS))])
+                    if (inicio is None or ts >= inicio) and (fim is None or ts < fim):
+                        yield json.loads(linha)
+            except EOFError:
+                # Segmento ainda sendo gravado (ou interrompido por uma queda): vale o que já está completo
+                pass
+
+
+def _instante(texto):
+    """Segundos desde a época a partir de um número ou de uma data ISO (horário local se sem fuso)."""
+    try:
+        return float(texto)
+    except ValueError:
+        return datetime.fromisoformat(texto).timestamp()
+
+
+def main(argv=None):
+    from src.config import settings
+
+    parser = argparse.ArgumentParser(description="Consulta o registro de auditoria das previsões.")
+    parser.add_argument("--diretorio", default=settings.diretorio_auditoria, help="Diretório da auditoria")
+    parser.add_argument("--api", help="Só os segmentos de uma API (regras ou modelo)")
+    comandos = parser.add_subparsers(dest="comando", required=True)
+    comandos.add_parser("segmentos", help="Lista os segmentos e o intervalo de tempo de cada um")
+    consulta = comandos.add_parser("consultar", help="Imprime os registros de um intervalo, em JSONL")
+    consulta.add_argument("--inicio", type=_instante, help="Data ISO ou segundos desde a época (inclusive)")
+    consulta.add_argument("--fim", type=_instante, help="Data ISO ou segundos desde a época (exclusive)")
+    consulta.add_argument("--versao", help="Só previsões desta versão do modelo ou das regras")
+    consulta.add_argument("--classe", choices=list(RESOLUTIVIDADE_CLASSES.values()))
+    consulta.add_argument("--contar", action="store_true", help="Só conta os registros, por API e classe")
+    args = parser.parse_args(argv)
+
+    if args.comando == "segmentos":
+        for api, inicio, fim, caminho in segmentos(args.diretorio, args.api):
+            fim = datetime.fromtimestamp(fim).isoformat(timespec="seconds") if fim else "(atual)"
+            tamanho = caminho.stat().st_size / 1024
+            print(f"{api:<8} {datetime.fromtimestamp(inicio).isoformat(timespec='seconds')} -> {fim:<19}"
+                  f"  {tamanho:10.1f} KB  {caminho}")
+        return
+
+    contagem = {}
+    for registro in consultar(args.diretorio, args.api, args.inicio, args.fim):
+        if args.versao and registro["versao"] != args.versao:
+            continue
+        if args.classe and registro["classe"] != args.classe:
+            continue
+        if args.contar:
+            chave = (registro["api"], registro["classe"])
+            contagem[chave] = contagem.get(chave, 0) + 1
+        else:
+            sys.stdout.write(json.dumps(registro, ensure_ascii=False) + "\n")
+    if args.contar:
+        for (api, classe), n in sorted(contagem.items()):
+            print(f"{api:<8} {classe:<6} {n}")
+        print(f"total    {sum(contagem.values())}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+"""
+Busca de estimador e hiperparâmetros com validação cruzada estratificada.
+
+Cada candidato (estimador + combinação de parâmetros da grade) é avaliado em
+k dobras estratificadas dentro de um pool de processos. A matriz de features,
+os rótulos e a dobra de cada linha são gravados uma única vez como `.npy` e
+abertos pelos workers com `mmap_mode="r"`: cada tarefa carrega só a descrição
+do candidato, sem serializar os dados.
+
+O resultado de cada candidato fica em cache no disco, indexado pelo conteúdo
+dos dados, pelas dobras e pelos parâmetros; uma nova execução pula o que já
+foi avaliado. O vencedor é o candidato exportável para a API (uma floresta de
+árvores) com a melhor acurácia média. A API serve pela tabela compilada
+(`tabela_modelo`), cuja consulta custa o mesmo para qualquer floresta; o que
+muda entre elas é o tempo de compilação (na carga e em cada troca de versão)
+e o tamanho da tabela, medidos aqui e usados só para desempatar os candidatos
+a até `tolerancia_acuracia` (zero por padrão) da melhor acurácia.
+
+Uso (a partir da raiz do projeto):
+    python -m src.api.busca_hiperparametros [--dobras 5] [--processos 4] [--grade grade.json]
+    python src/api/gerar_modelo.py --buscar
+"""
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+if __package__ in (None, ""):
+    sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+import numpy as np
+from sklearn.model_selection import StratifiedKFold
+
+from src.api.cache_artefatos import impressao_digital
+from src.api.constantes import FEATURES
+from src.api.dados_sinteticos import TARGET
+from src.api.gerar_modelo import ESTIMADORES_EXPORTAVEIS, criar_estimador, gerar_dados
+from src.api.tabela_modelo import compilar_tabela
+
+DIRETORIO_CACHE = Path(".cache") / "busca_hiperparametros"
+DOBRAS = 5
+TOLERANCIA_ACURACIA = 0.0
+# Consultas de uma linha usadas para medir a latência (na tabela compilada, como na API)
+REPETICOES_LATENCIA = 30
+# Muda quando os campos do resultado mudam: resultados antigos em cache deixam de valer
+VERSAO_RESULTADO = 2
+TAMANHO_LOTE_LATENCIA = 1024
+
+GRADE_PADRAO = {
+    "RandomForestClassifier": {"n_estimators": [50, 150], "max_depth": [6, 10], "min_samples_leaf": [1, 5]},
+    "ExtraTreesClassifier": {"n_estimators": [50, 150], "max_depth": [10]},
+    "LogisticRegression": {"C": [0.1, 1.0, 10.0]},
+}
+
+# Dados abertos por `_abrir_dados` em cada worker (mapeados em memória)
+_dados = None
+
+
+def expandir_grade(grade):
+    """Lista de `(estimador, parametros)` com todas as combinações da grade."""
+    candidatos = []
+    for estimador, parametros in grade.items():
+        nomes = sorted(parametros)
+        for valores in itertools.product(*(parametros[nome] for nome in nomes)):
+            candidatos.append((estimador, dict(zip(nomes, valores))))
+    return candidatos
+
+
+def _chave(dados, estimador, parametros):
+    texto = json.dumps([VERSAO_RESULTADO, dados, estimador, parametros], sort_keys=True)
+    return hashlib.sha256(texto.encode()).hexdigest()[:24]
+
+
+def _abrir_dados(diretorio):
+    global _dados
+    _dados = {nome: np.load(Path(diretorio) / f"{nome}.npy", mmap_mode="r") for nome in ("X", "y", "dobras")}
+
+
+def _avaliar(estimador, parametros):
+    """
+    Acurácia em cada dobra, tempo de treino e custo de servir um candidato:
+    latência, tempo de compilação e tamanho da tabela compilada (florestas) ou
+    latência do `predict_proba` (demais estimadores, que a API não serve).
+    """
+    X, y, dobras = _dados["X"], _dados["y"], _dados["dobras"]
+    acuracias, treino_s = [], 0.0
+    for dobra in range(int(dobras.max()) + 1):
+        teste = dobras == dobra
+        modelo = criar_estimador(estimador, parametros, n_jobs=1)
+        inicio = time.perf_counter()
+        modelo.fit(X[~teste], y[~teste])
+        treino_s += time.perf_counter() - inicio
+        acuracias.append(float((modelo.predict(X[teste]) == y[teste]).mean()))
+
+    # Custo de servir o modelo da última dobra: uma linha por chamada e um lote
+    exportavel = estimador in ESTIMADORES_EXPORTAVEIS
+    compilacao_s = tabela_kb = None
+    if exportavel:
+        inicio = time.perf_counter()
+        tabela = compilar_tabela(modelo)
+        compilacao_s = time.perf_counter() - inicio
+        tabela_kb = sum(array.nbytes for array in (
+            tabela.limiares, tabela.faixa_por_dia, tabela.classes, tabela.probabilidades
+        )) / 1024
+        linha = X[0].astype(np.int64).tolist()
+        consultar_linha, prever_lote = (lambda: tabela.consultar(*linha)), tabela.prever
+        lote = X[:TAMANHO_LOTE_LATENCIA].astype(np.int64)
+    else:
+        linha = np.ascontiguousarray(X[:1])
+        consultar_linha, prever_lote = (lambda: modelo.predict_proba(linha)), modelo.predict_proba
+        lote = np.ascontiguousarray(X[:TAMANHO_LOTE_LATENCIA])
+    tempos = []
+    for _ in range(REPETICOES_LATENCIA):
+        inicio = time.perf_counter()
+        consultar_linha()
+        tempos.append(time.perf_counter() - inicio)
+    inicio = time.perf_counter()
+    prever_lote(lote)
+    lote_ms = (time.perf_counter() - inicio) * 1000
+
+    return {
+        "estimador": estimador,
+        "parametros": parametros,
+        "acuracia_media": float(np.mean(acuracias)),
+        "acuracia_desvio": float(np.std(acuracias)),
+        "acuracias": acuracias,
+        "treino_s": treino_s,
+        "latencia_ms": float(np.median(tempos)) * 1000,
+        "lote_ms": lote_ms,
+        "compilacao_s": compilacao_s,
+        "tabela_kb": tabela_kb,
+        "exportavel": exportavel,
+    }
+
+
+def escolher_vencedor(resultados, tolerancia_acuracia=TOLERANCIA_ACURACIA, latencia_maxima_ms=None):
+    """
+    O candidato exportável (e dentro de `latencia_maxima_ms`, se informada)
+    de maior acurácia média. Os que ficam a até `tolerancia_acuracia` dela
+    desempatam pela tabela compilada menor e, depois, mais rápida de compilar.
+    """
+    elegiveis = [
+        r for r in resultados
+        if r["exportavel"] and (latencia_maxima_ms is None or r["latencia_ms"] <= latencia_maxima_ms)
+    ]
+    if not elegiveis:
+        raise ValueError("Nenhum candidato exportável atende ao limite de latência.")
+    melhor = max(r["acuracia_media"] for r in elegiveis)
+    proximos = [r for r in elegiveis if r["acuracia_media"] >= melhor - tolerancia_acuracia]
+    return min(proximos, key=lambda r: (r["tabela_kb"], r["compilacao_s"], -r["acuracia_media"]))
+
+
+def buscar(data, grade=None, dobras=DOBRAS, processos=None, diretorio_cache=DIRETORIO_CACHE,
+           tolerancia_acuracia=TOLERANCIA_ACURACIA, latencia_maxima_ms=None):
+    """
+    Avalia todos os candidatos da grade (`GRADE_PADRAO` por padrão) e escolhe o vencedor.
+
+    Retorna um dicionário com os resultados de todos os candidatos (ordenados
+    pela acurácia média), o vencedor e quantos vieram do cache.
+    """
+    grade = grade or GRADE_PADRAO
+    processos = processos or os.cpu_count() or 1
+    diretorio_cache = Path(diretorio_cache)
+    diretorio_cache.mkdir(parents=True, exist_ok=True)
+
+    X = data[FEATURES].to_numpy(dtype=np.float32)
+    y = data[TARGET].to_numpy(dtype=np.int64)
+    atribuicao = np.empty(len(y), dtype=np.int8)
+    for dobra, (_, teste) in enumerate(StratifiedKFold(dobras, shuffle=True, random_state=42).split(X, y)):
+        atribuicao[teste] = dobra
+    dados = impressao_digital(X, y, atribuicao)
+
+    resultados, pendentes = [], []
+    for estimador, parametros in expandir_grade(grade):
+        arquivo = diretorio_cache / f"{_chave(dados, estimador, parametros)}.json"
+        if arquivo.exists():
+            resultados.append({**json.loads(arquivo.read_text(encoding="utf-8")), "em_cache": True})
+        else:
+            pendentes.append((estimador, parametros, arquivo))
+    em_cache = len(resultados)
+    print(f"{len(resultados) + len(pendentes)} candidatos, {em_cache} já avaliados (cache), "
+          f"{dobras} dobras, {processos} processo(s)")
+
+    def guardar(resultado, arquivo):
+        temporario = arquivo.with_suffix(".tmp")
+        temporario.write_text(json.dumps(resultado, indent=2), encoding="utf-8")
+        os.replace(temporario, arquivo)
+        resultados.append({**resultado, "em_cache": False})
+        print(f"  {resultado['estimador']} {resultado['parametros']}: "
+              f"acurácia {resultado['acuracia_media']:.4f}, latência {resultado['latencia_ms']:.3f} ms")
+
+    if pendentes:
+        with tempfile.TemporaryDirectory() as temporario:
+            for nome, array in (("X", X), ("y", y), ("dobras", atribuicao)):
+                np.save(Path(temporario) / f"{nome}.npy", array)
+            if processos == 1:
+                _abrir_dados(temporario)
+                for estimador, parametros, arquivo in pendentes:
+                    guardar(_avaliar(estimador, parametros), arquivo)
+            else:
+                with ProcessPoolExecutor(
+                    max_workers=processos, initializer=_abrir_dados, initargs=(temporario,)
+                ) as pool:
+                    futuros = {pool.submit(_avaliar, e, p): arquivo for e, p, arquivo in pendentes}
+                    for futuro in as_completed(futuros):
+                        guardar(futuro.result(), futuros[futuro])
+
+    resultados.sort(key=lambda r: -r["acuracia_media"])
+    vencedor = escolher_vencedor(resultados, tolerancia_acuracia, latencia_maxima_ms)
+    return {"candidatos": resultados, "vencedor": vencedor, "em_cache": em_cache}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Busca de estimador e hiperparâmetros com k dobras.")
+    parser.add_argument("--grade", help="JSON {estimador: {parametro: [valores]}} (padrão: GRADE_PADRAO)")
+    parser.add_argument("--linhas", type=int, default=3500, help="data_size de gerar_dados")
+    parser.add_argument("--dobras", type=int, default=DOBRAS)
+    parser.add_argument("--processos", type=int, default=None, help="Padrão: número de CPUs")
+    parser.add_argument("--cache", default=str(DIRETORIO_CACHE), help="Diretório do cache de resultados")
+    parser.add_argument("--tolerancia-acuracia", type=float, default=TOLERANCIA_ACURACIA)
+    parser.add_argument("--latencia-maxima-ms", type=float, default=None)
+    args = parser.parse_args(argv)
+
+    grade = json.loads(Path(args.grade).read_text(encoding="utf-8")) if args.grade else None
+    busca = buscar(
+        gerar_dados(data_size=args.linhas), grade, dobras=args.dobras, processos=args.processos,
+        diretorio_cache=args.cache, tolerancia_acuracia=args.tolerancia_acuracia,
+        latencia_maxima_ms=args.latencia_maxima_ms,
+    )
+    print(f"\n{'estimador':<24} {'acurácia':>15} {'latência':>10} {'lote 1024':>10} "
+          f"{'compilação':>11} {'tabela':>10}  parâmetros")
+    for r in busca["candidatos"]:
+        marcador = "*" if r is busca["vencedor"] else " "
+        tabela = f"{'-':>11} {'-':>10}"
+        if r["exportavel"]:
+            tabela = f"{r['compilacao_s'] * 1000:>9.1f}ms {r['tabela_kb']:>8.1f}KB"
+        print(f"{marcador}{r['estimador']:<23} {r['acuracia_media']:.4f} ±{r['acuracia_desvio']:.4f} "
+              f"{r['latencia_ms']:>8.3f}ms {r['lote_ms']:>8.3f}ms {tabela}  {r['parametros']}"
+              f"{'' if r['exportavel'] else '  (não exportável)'}")
+    vencedor = busca["vencedor"]
+    print(f"\nVencedor: {vencedor['estimador']} {vencedor['parametros']}")
+
+
+if __name__ == "__main__":
+    main()
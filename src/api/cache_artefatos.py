@@ -0,0 +1,230 @@
+"""
+Cache de artefatos das etapas do treinamento, endereçado pelo conteúdo.
+
+Cada entrada é um diretório `<raiz>/<chave>/` com os arquivos gerados por uma
+etapa (os dados sintéticos como um `.npy` por coluna, abertos com
+`mmap_mode="r"`; o modelo com os mesmos artefatos do registro) e um
+`entrada.json` com a etapa, os parâmetros e o tamanho. A chave é o hash dos
+parâmetros da etapa e da versão do código que a produz (o código-fonte das
+funções e módulos envolvidos e as versões das bibliotecas): mudar qualquer um
+deles gera outra chave, e a entrada antiga só sai por despejo.
+
+Uma entrada é gravada em um diretório temporário e renomeada quando completa.
+O instante do último acesso (mtime do `entrada.json`) ordena o despejo LRU:
+depois de cada gravação, as entradas menos usadas saem até o cache voltar ao
+limite de tamanho.
+
+Uso (a partir da raiz do projeto):
+    python -m src.api.cache_artefatos listar
+    python -m src.api.cache_artefatos podar [--limite-mb 512] [--etapa dados] [--tudo]
+"""
+import argparse
+import hashlib
+import inspect
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+if __package__ in (None, ""):
+    sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+ARQUIVO_ENTRADA = "entrada.json"
+ARQUIVO_COLUNAS = "colunas.json"
+# Diretórios temporários mais antigos que isto são de gravações interrompidas
+TEMPORARIO_ABANDONADO_S = 3600
+
+
+def versao_codigo(*objetos, bibliotecas=()):
+    """Hash do código-fonte de funções e módulos e das versões de `bibliotecas` (nomes de pacotes)."""
+    resumo = hashlib.sha256()
+    for objeto in objetos:
+        resumo.update(inspect.getsource(objeto).encode())
+    for nome in bibliotecas:
+        resumo.update(f"{nome}=={__import__(nome).__version__}".encode())
+    return resumo.hexdigest()[:16]
+
+
+def impressao_digital(*arrays):
+    """Hash do tipo, da forma e do conteúdo dos arrays."""
+    import numpy as np
+
+    resumo = hashlib.sha256()
+    for array in arrays:
+        resumo.update(str(array.dtype).encode() + str(array.shape).encode())
+        resumo.update(np.ascontiguousarray(array).tobytes())
+    return resumo.hexdigest()[:16]
+
+
+def salvar_colunas(diretorio, colunas):
+    """Grava `{coluna: array}` como um `.npy` por coluna, com a ordem das colunas."""
+    import numpy as np
+
+    diretorio = Path(diretorio)
+    for nome, valores in colunas.items():
+        np.save(diretorio / f"{nome}.npy", np.asarray(valores))
+    (diretorio / ARQUIVO_COLUNAS).write_text(json.dumps(list(colunas)), encoding="utf-8")
+
+
+def abrir_colunas(diretorio):
+    """`{coluna: array}` gravado por `salvar_colunas`, mapeado em memória (somente leitura)."""
+    import numpy as np
+
+    diretorio = Path(diretorio)
+    nomes = json.loads((diretorio / ARQUIVO_COLUNAS).read_text(encoding="utf-8"))
+    return {nome: np.load(diretorio / f"{nome}.npy", mmap_mode="r") for nome in nomes}
+
+
+def _tamanho(diretorio):
+    return sum(arquivo.stat().st_size for arquivo in Path(diretorio).rglob("*") if arquivo.is_file())
+
+
+class CacheArtefatos:
+    """Entradas do cache em `raiz`, limitadas a `limite_bytes` (None: sem limite)."""
+
+    def __init__(self, raiz, limite_bytes=None):
+        self.raiz = Path(raiz)
+        self.limite_bytes = limite_bytes
+
+    def chave(self, etapa, parametros, codigo):
+        """Chave de uma etapa: hash da etapa, dos parâmetros (JSON) e da versão do código."""
+        texto = json.dumps([etapa, parametros, codigo], sort_keys=True, default=str)
+        return f"{etapa}-{hashlib.sha256(texto.encode()).hexdigest()[:24]}"
+
+    def caminho(self, chave):
+        return self.raiz / chave
+
+    def obter(self, chave):
+        """Diretório da entrada (e marca o acesso), ou None se ela não está no cache."""
+        entrada = self.caminho(chave) / ARQUIVO_ENTRADA
+        try:
+            os.utime(entrada)
+        except FileNotFoundError:
+            return None
+        return entrada.parent
+
+    def gravar(self, chave, etapa, parametros, salvar):
+        """
+        Cria a entrada `chave` com os arquivos gravados por `salvar(diretorio)` e
+        retorna o seu diretório. Se outro processo gravou a mesma chave antes, a
+        entrada dele é mantida. Em seguida despeja as entradas menos usadas
+        além do limite (nunca a recém-gravada).
+        """
+        self.raiz.mkdir(parents=True, exist_ok=True)
+        temporario = Path(tempfile.mkdtemp(prefix=f".{chave}-", dir=self.raiz))
+        try:
+            salvar(temporario)
+            descricao = {
+                "chave": chave,
+                "etapa": etapa,
+                "parametros": parametros,
+                "criada_em": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "bytes": _tamanho(temporario),
+            }
+            (temporario / ARQUIVO_ENTRADA).write_text(
+                json.dumps(descricao, indent=2, ensure_ascii=False, default=str), encoding="utf-8"
+            )
+            try:
+                os.rename(temporario, self.caminho(chave))
+            except OSError:
+                if not (self.caminho(chave) / ARQUIVO_ENTRADA).exists():
+                    raise
+                shutil.rmtree(temporario, ignore_errors=True)
+        except BaseException:
+            shutil.rmtree(temporario, ignore_errors=True)
+            raise
+        if self.limite_bytes is not None:
+            self.podar(self.limite_bytes, preservar={chave})
+        return self.caminho(chave)
+
+    def entradas(self):
+        """Descrição de cada entrada com `acessada_em` (epoch), da menos para a mais recentemente usada."""
+        if not self.raiz.exists():
+            return []
+        entradas = []
+        for diretorio in self.raiz.iterdir():
+            if diretorio.name.startswith("."):
+                continue  # gravação em andamento ou interrompida
+            arquivo = diretorio / ARQUIVO_ENTRADA
+            try:
+                descricao = json.loads(arquivo.read_text(encoding="utf-8"))
+                descricao["acessada_em"] = arquivo.stat().st_mtime
+            except (FileNotFoundError, NotADirectoryError, json.JSONDecodeError):
+                continue
+            entradas.append(descricao)
+        return sorted(entradas, key=lambda descricao: descricao["acessada_em"])
+
+    def remover(self, chave):
+        shutil.rmtree(self.caminho(chave), ignore_errors=True)
+
+    def podar(self, limite_bytes=0, etapa=None, preservar=()):
+        """
+        Remove as entradas menos usadas (só da `etapa`, se dada) até o total do
+        cache caber em `limite_bytes`; retorna as descrições das removidas.
+        Remove também os diretórios temporários de gravações interrompidas.
+        """
+        if self.raiz.exists():
+            for diretorio in self.raiz.glob(".*"):
+                if time.time() - diretorio.stat().st_mtime > TEMPORARIO_ABANDONADO_S:
+                    shutil.rmtree(diretorio, ignore_errors=True)
+        entradas = self.entradas()
+        total = sum(descricao["bytes"] for descricao in entradas)
+        removidas = []
+        for descricao in entradas:
+            if total <= limite_bytes:
+                break
+            if descricao["chave"] in preservar or (etapa is not None and descricao["etapa"] != etapa):
+                continue
+            self.remover(descricao["chave"])
+            total -= descricao["bytes"]
+            removidas.append(descricao)
+        return removidas
+
+
+def criar_cache():
+    """`CacheArtefatos` com o diretório e o limite de `src/config.py`."""
+    from src.config import settings
+
+    return CacheArtefatos(settings.diretorio_cache, int(settings.cache_limite_mb * 2**20))
+
+
+def _mb(quantidade):
+    return f"{quantidade / 2**20:.1f} MB"
+
+
+def main(argv=None):
+    from src.config import settings
+
+    parser = argparse.ArgumentParser(description="Inspeciona e poda o cache de dados e modelos do treinamento.")
+    parser.add_argument("--diretorio", default=settings.diretorio_cache, help="Raiz do cache")
+    comandos = parser.add_subparsers(dest="comando", required=True)
+    comandos.add_parser("listar", help="Entradas, da menos para a mais recentemente usada")
+    podar = comandos.add_parser("podar", help="Remove as entradas menos usadas até caber no limite")
+    podar.add_argument("--limite-mb", type=float, default=settings.cache_limite_mb)
+    podar.add_argument("--etapa", help="Só entradas desta etapa (ex.: dados, modelo)")
+    podar.add_argument("--tudo", action="store_true", help="Esvazia o cache (ou a etapa)")
+    args = parser.parse_args(argv)
+
+    cache = CacheArtefatos(args.diretorio)
+    if args.comando == "listar":
+        entradas = cache.entradas()
+        for descricao in entradas:
+            acesso = time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(descricao["acessada_em"]))
+            parametros = json.dumps(descricao["parametros"], ensure_ascii=False, default=str)
+            print(f"{descricao['chave']:<40} {_mb(descricao['bytes']):>10}  criada {descricao['criada_em']}  "
+                  f"acesso {acesso}  {parametros}")
+        print(f"{len(entradas)} entradas, {_mb(sum(d['bytes'] for d in entradas))} em {cache.raiz}")
+        return
+
+    limite = 0 if args.tudo else int(args.limite_mb * 2**20)
+    removidas = cache.podar(limite, etapa=args.etapa)
+    for descricao in removidas:
+        print(f"removida {descricao['chave']} ({_mb(descricao['bytes'])})")
+    print(f"{len(removidas)} entradas removidas, {_mb(sum(d['bytes'] for d in removidas))} liberados")
+
+
+if __name__ == "__main__":
+    main()
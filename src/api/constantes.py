@@ -0,0 +1,19 @@
+"""
+Constantes do domínio compartilhadas pelas APIs, pelo gerador e pelo modelo.
+
+Ficam em um módulo sem dependências para que a API possa importá-las sem
+carregar o NumPy antes do lifespan.
+"""
+
+# Ordem das colunas de entrada (API, gerador de dados e modelo)
+FEATURES = [
+    'periodo_decorrido_dias', 'suspeito_conhecido', 'tem_testemunhas',
+    'tem_imagens_cameras', 'suspeito_rastreavel', 'vestigios_preservados'
+]
+
+# Mapeamento para as classes de resolutividade
+RESOLUTIVIDADE_CLASSES = {
+    0: "Baixa",
+    1: "Média",
+    2: "Alta"
+}
@@ -0,0 +1,203 @@
+"""
+Geração de dados sintéticos em blocos, fora da memória, com tipos compactos.
+
+Produz as mesmas distribuições de `gerar_modelo.gerar_dados` (os parâmetros
+abaixo são compartilhados com ela), mas bloco a bloco: cada bloco é gerado com
+colunas uint16/uint8, rotulado pelas regras de negócio e gravado em disco como
+uma partição (`.npy` por coluna ou Parquet). Assim, centenas de milhões de
+linhas cabem em memória constante (um bloco por processo).
+
+Cada bloco tem o seu próprio gerador, derivado de `(semente, índice do bloco)`
+por `np.random.SeedSequence`: o conteúdo de um bloco não depende de quantos
+processos existem nem da ordem em que os blocos são gerados.
+
+Uso (a partir da raiz do projeto):
+    python -m src.api.dados_sinteticos dados/ --linhas 100000000 --processos 8
+    python -m src.api.dados_sinteticos dados/ --linhas 10000000 --formato parquet
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+if __package__ in (None, ""):
+    sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+import numpy as np
+
+from src.api.constantes import FEATURES
+from src.api.regras import CLASSE_BAIXA, avaliar_regras
+
+TARGET = 'resolutividade'
+TAMANHO_BLOCO = 5_000_000
+ARQUIVO_MANIFESTO = "manifesto.json"
+
+# Distribuições do gerador (compartilhadas com gerar_modelo.gerar_dados)
+DIAS_MINIMO, DIAS_LIMITE = 1, 60  # periodo_decorrido_dias uniforme em [1, 60)
+PROBABILIDADE_FLAGS = {            # P(flag = 1)
+    'suspeito_conhecido': 0.3,
+    'tem_testemunhas': 0.35,
+    'tem_imagens_cameras': 0.25,
+    'suspeito_rastreavel': 0.3,
+    'vestigios_preservados': 0.4,
+}
+PROBABILIDADE_CLASSES = [0.4, 0.35, 0.25]  # rótulo inicial: Baixa, Média, Alta
+
+TIPOS_COLUNAS = {
+    'periodo_decorrido_dias': np.uint16,
+    **{flag: np.uint8 for flag in PROBABILIDADE_FLAGS},
+    TARGET: np.uint8,
+}
+
+
+def gerar_bloco(semente, indice, linhas):
+    """
+    Gera o bloco `indice` com `linhas` linhas, como um dicionário coluna -> array.
+
+    O resultado depende só de `(semente, indice, linhas)`. O rótulo inicial é
+    sorteado e depois substituído pela classe das regras quando ela não é Baixa,
+    como em `gerar_dados`.
+    """
+    rng = np.random.default_rng(np.random.SeedSequence(semente, spawn_key=(indice,)))
+    colunas = {'periodo_decorrido_dias': rng.integers(DIAS_MINIMO, DIAS_LIMITE, linhas, dtype=np.uint16)}
+    for flag, probabilidade in PROBABILIDADE_FLAGS.items():
+        colunas[flag] = (rng.random(linhas, dtype=np.float32) < probabilidade).view(np.uint8)
+
+    acumulada = np.cumsum(PROBABILIDADE_CLASSES[:-1], dtype=np.float32)
+    rotulo = np.searchsorted(acumulada, rng.random(linhas, dtype=np.float32), side="right").astype(np.uint8)
+    classes_regras, _ = avaliar_regras(*(colunas[coluna] for coluna in FEATURES))
+    colunas[TARGET] = np.where(classes_regras != CLASSE_BAIXA, classes_regras, rotulo)
+    return colunas
+
+
+def _gravar_particao(diretorio, indice, colunas, formato):
+    """Grava a partição de forma atômica: só aparece com o nome final quando completa."""
+    nome = f"parte-{indice:05d}"
+    if formato == "parquet":
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        temporario = diretorio / f".{nome}.parquet.tmp"
+        pq.write_table(pa.table(colunas), temporario)
+        os.replace(temporario, diretorio / f"{nome}.parquet")
+        return
+    temporario = Path(tempfile.mkdtemp(prefix=f".{nome}-", dir=diretorio))
+    try:
+        for coluna, valores in colunas.items():
+            np.save(temporario / f"{coluna}.npy", valores)
+        shutil.rmtree(diretorio / nome, ignore_errors=True)
+        os.rename(temporario, diretorio / nome)
+    except BaseException:
+        shutil.rmtree(temporario, ignore_errors=True)
+        raise
+
+
+def _gerar_particao(diretorio, semente, indice, linhas, formato):
+    colunas = gerar_bloco(semente, indice, linhas)
+    _gravar_particao(Path(diretorio), indice, colunas, formato)
+    return indice, np.bincount(colunas[TARGET], minlength=len(PROBABILIDADE_CLASSES)).tolist()
+
+
+def gerar_particoes(diretorio, linhas, semente=42, tamanho_bloco=TAMANHO_BLOCO, processos=None, formato="npy"):
+    """
+    Gera `linhas` linhas em partições de `tamanho_bloco` dentro de `diretorio`.
+
+    Grava também um `manifesto.json` com os parâmetros e os tipos das colunas.
+    Retorna um dicionário com linhas, tempo, vazão, pico de memória e a
+    contagem de linhas por classe.
+    """
+    if formato == "parquet":
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise ImportError("O formato Parquet requer o pacote 'pyarrow' (pip install pyarrow).") from None
+    from src.api.pontuar_arquivo import rss_pico_mb
+
+    diretorio = Path(diretorio)
+    diretorio.mkdir(parents=True, exist_ok=True)
+    processos = processos or os.cpu_count() or 1
+    blocos = [
+        (indice, min(tamanho_bloco, linhas - inicio))
+        for indice, inicio in enumerate(range(0, linhas, tamanho_bloco))
+    ]
+
+    inicio = time.perf_counter()
+    contagem_classes = np.zeros(len(PROBABILIDADE_CLASSES), dtype=np.int64)
+    argumentos = [(str(diretorio), semente, indice, n, formato) for indice, n in blocos]
+    if processos == 1:
+        resultados = (_gerar_particao(*args) for args in argumentos)
+        for _, contagem in resultados:
+            contagem_classes += contagem
+    else:
+        with ProcessPoolExecutor(max_workers=processos) as pool:
+            for _, contagem in pool.map(_gerar_particao, *zip(*argumentos)):
+                contagem_classes += contagem
+    duracao = time.perf_counter() - inicio
+
+    manifesto = {
+        "linhas": linhas,
+        "semente": semente,
+        "tamanho_bloco": tamanho_bloco,
+        "blocos": len(blocos),
+        "formato": formato,
+        "colunas": {coluna: np.dtype(tipo).name for coluna, tipo in TIPOS_COLUNAS.items()},
+    }
+    (diretorio / ARQUIVO_MANIFESTO).write_text(json.dumps(manifesto, indent=2), encoding="utf-8")
+
+    rss_principal, rss_workers = rss_pico_mb()
+    return {
+        "linhas": linhas,
+        "segundos": duracao,
+        "linhas_por_segundo": linhas / duracao if duracao else 0.0,
+        "rss_pico_principal_mb": rss_principal,
+        "rss_pico_workers_mb": rss_workers,
+        "linhas_por_classe": contagem_classes.tolist(),
+    }
+
+
+def ler_particoes(diretorio, colunas=None):
+    """
+    Percorre as partições de `diretorio` em ordem, uma de cada vez, como
+    dicionários coluna -> array (as `.npy` são mapeadas em memória).
+    """
+    diretorio = Path(diretorio)
+    manifesto = json.loads((diretorio / ARQUIVO_MANIFESTO).read_text(encoding="utf-8"))
+    colunas = colunas or list(manifesto["colunas"])
+    for indice in range(manifesto["blocos"]):
+        nome = f"parte-{indice:05d}"
+        if manifesto["formato"] == "parquet":
+            import pyarrow.parquet as pq
+            tabela = pq.read_table(diretorio / f"{nome}.parquet", columns=colunas)
+            yield {coluna: tabela.column(coluna).to_numpy() for coluna in colunas}
+        else:
+            yield {coluna: np.load(diretorio / nome / f"{coluna}.npy", mmap_mode="r") for coluna in colunas}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gera dados sintéticos em partições, fora da memória.")
+    parser.add_argument("saida", help="Diretório das partições")
+    parser.add_argument("--linhas", type=int, required=True)
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--tamanho-bloco", type=int, default=TAMANHO_BLOCO)
+    parser.add_argument("--processos", type=int, default=None, help="Padrão: número de CPUs")
+    parser.add_argument("--formato", choices=["npy", "parquet"], default="npy")
+    args = parser.parse_args(argv)
+
+    resultado = gerar_particoes(
+        args.saida, args.linhas, semente=args.semente, tamanho_bloco=args.tamanho_bloco,
+        processos=args.processos, formato=args.formato,
+    )
+    print(f"\n--- Geração concluída ({args.formato}) ---")
+    print(f"Linhas: {resultado['linhas']:,} em {resultado['segundos']:.2f} s "
+          f"({resultado['linhas_por_segundo']:,.0f} linhas/s)")
+    print(f"Por classe (Baixa, Média, Alta): {resultado['linhas_por_classe']}")
+    print(f"Pico de RSS: principal {resultado['rss_pico_principal_mb']:.1f} MB, "
+          f"maior worker {resultado['rss_pico_workers_mb']:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Explicações pré-calculadas das previsões do modelo de ML.
+
+As probabilidades da floresta são decompostas pelos caminhos das árvores
+(`FlorestaNumpy.contribuicoes`): `probabilidades = base + Σ contribuição da
+feature`, em que `base` é a distribuição média do treino. Como o domínio de
+entrada é finito, a decomposição é feita uma única vez, na carga do modelo,
+para todas as células da tabela compilada (faixa de dias × 32 combinações de
+flags). Explicar uma previsão é uma consulta nesse array; a explicação de
+cada célula, no formato de `ExplicacaoResponse`, é montada (e serializada em
+JSON) na primeira vez em que ela é pedida e reaproveitada nas seguintes.
+"""
+import json
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from src.api.constantes import FEATURES, RESOLUTIVIDADE_CLASSES
+from src.api.floresta_numpy import FlorestaNumpy, arrays_floresta
+from src.api.tabela_modelo import INDICE_DIAS, _grade_dominio, codificar_flags
+
+# Quantas features entram no resumo em texto (as de maior efeito na classe prevista)
+FEATURES_NO_RESUMO = 3
+
+# Descrição de cada flag quando verdadeira e quando falsa
+CONDICOES_FLAGS = {
+    'suspeito_conhecido': ("suspeito identificado", "suspeito não identificado"),
+    'tem_testemunhas': ("com testemunhas", "sem testemunhas"),
+    'tem_imagens_cameras': ("com imagens de câmeras", "sem imagens de câmeras"),
+    'suspeito_rastreavel': ("suspeito rastreável", "suspeito não rastreável"),
+    'vestigios_preservados': ("vestígios preservados", "sem vestígios preservados"),
+}
+
+
+@dataclass(frozen=True)
+class ExplicacoesModelo:
+    """Contribuição de cada feature nas probabilidades, para cada faixa de dias × combinação de flags."""
+    nomes_classes: tuple         # nome de cada coluna de probabilidade
+    inicios: np.ndarray          # primeiro dia de cada faixa
+    faixa_por_dia: np.ndarray    # o mesmo mapeamento dia -> faixa da `TabelaModelo`
+    classes: np.ndarray          # (K, 32) coluna da classe prevista
+    base: np.ndarray             # (n_classes,) probabilidades médias do treino
+    contribuicoes: np.ndarray    # (K, 32, n_features, n_classes)
+    # Explicação já montada de cada célula; o domínio é finito, então o cache também é
+    _montadas: dict = field(default_factory=dict, repr=False, compare=False)
+
+    @property
+    def dia_maximo(self):
+        return len(self.faixa_por_dia) - 1
+
+    def explicar(self, dias, *flags, serializada=False):
+        """
+        Explicação de uma única ocorrência (valores na ordem de FEATURES): um
+        dicionário ou, com `serializada=True`, o JSON em bytes.
+        """
+        codigo = 0
+        for bit, valor in enumerate(flags):
+            if valor:
+                codigo |= 1 << bit
+        return self._celula(int(self.faixa_por_dia[min(dias, self.dia_maximo)]), codigo)[serializada]
+
+    def explicar_lote(self, X, serializada=False):
+        """Explicações para uma matriz (n, 6) na ordem de FEATURES."""
+        X = np.asarray(X)
+        faixas = self.faixa_por_dia[np.minimum(X[:, INDICE_DIAS].astype(np.int64), self.dia_maximo)]
+        codigos = codificar_flags(X[:, 1:])
+        return [self._celula(f, c)[serializada] for f, c in zip(faixas.tolist(), codigos.tolist())]
+
+    def _condicao(self, feature, faixa, codigo):
+        if feature == FEATURES[INDICE_DIAS]:
+            inicio = int(self.inicios[faixa])
+            if faixa == len(self.inicios) - 1:
+                return f"período decorrido de {inicio} dias ou mais"
+            fim = int(self.inicios[faixa + 1]) - 1
+            if fim == inicio:
+                return f"período decorrido de {inicio} dias"
+            return f"período decorrido de {inicio} a {fim} dias"
+        verdadeira, falsa = CONDICOES_FLAGS[feature]
+        return verdadeira if codigo >> (FEATURES.index(feature) - 1) & 1 else falsa
+
+    def _celula(self, faixa, codigo):
+        """`(dicionário, JSON)` da célula; serializar os floats custaria mais que a consulta."""
+        explicacao = self._montadas.get((faixa, codigo))
+        if explicacao is None:
+            dicionario = self._montar(faixa, codigo)
+            # Mesmo formato do JSONResponse do FastAPI
+            serializada = json.dumps(dicionario, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+            explicacao = self._montadas[(faixa, codigo)] = (dicionario, serializada)
+        return explicacao
+
+    def _montar(self, faixa, codigo):
+        """Classe prevista, base e contribuições em pontos percentuais, da maior para a menor na classe prevista."""
+        prevista = int(self.classes[faixa, codigo])
+        contribuicoes = self.contribuicoes[faixa, codigo] * 100
+        ordem = np.argsort(-np.abs(contribuicoes[:, prevista]), kind="stable")
+        nome_prevista = self.nomes_classes[prevista]
+
+        itens, frases = [], []
+        for indice in ordem.tolist():
+            condicao = self._condicao(FEATURES[indice], faixa, codigo)
+            efeito = float(contribuicoes[indice, prevista])
+            itens.append({
+                "feature": FEATURES[indice],
+                "condicao": condicao,
+                "pontos_percentuais": {
+                    nome: round(float(valor), 2) for nome, valor in zip(self.nomes_classes, contribuicoes[indice])
+                },
+            })
+            if len(frases) < FEATURES_NO_RESUMO and round(abs(efeito), 2) > 0:
+                verbo = "aumentou" if efeito > 0 else "reduziu"
+                frases.append(f"o fator '{condicao}' {verbo} a chance de {nome_prevista} "
+                              f"em {abs(efeito):.2f} pontos percentuais")
+
+        resumo = "; ".join(frases) + "." if frases else "nenhuma feature alterou a chance da classe prevista."
+        return {
+            "classe": nome_prevista,
+            "base": {nome: round(float(valor) * 100, 2) for nome, valor in zip(self.nomes_classes, self.base)},
+            "contribuicoes": itens,
+            "resumo": resumo[0].upper() + resumo[1:],
+        }
+
+
+def compilar_explicacoes(modelo, tabela):
+    """
+    Decompõe as probabilidades de todas as células de `tabela` (compilada a
+    partir de `modelo`). Aceita a `FlorestaNumpy` carregada do registro ou uma
+    floresta do scikit-learn, convertida antes para os arrays planos.
+    """
+    if not hasattr(modelo, "contribuicoes"):
+        modelo = FlorestaNumpy(**arrays_floresta(modelo, FEATURES))
+
+    # Como na tabela, cada faixa é representada pelo seu primeiro dia
+    _, inicios = np.unique(tabela.faixa_por_dia, return_index=True)
+    base, contribuicoes = modelo.contribuicoes(_grade_dominio(inicios))
+    n_faixas, n_combinacoes = tabela.classes.shape
+    return ExplicacoesModelo(
+        nomes_classes=tuple(RESOLUTIVIDADE_CLASSES[int(c)] for c in modelo.classes_),
+        inicios=inicios,
+        faixa_por_dia=tabela.faixa_por_dia,
+        classes=tabela.probabilidades.argmax(axis=2),
+        base=base,
+        contribuicoes=contribuicoes.reshape(n_faixas, n_combinacoes, len(FEATURES), -1),
+    )
@@ -0,0 +1,216 @@
+"""
+Formato compacto e mapeável em memória para a floresta treinada.
+
+A floresta é gravada como arrays planos de nós (feature, limiar, filhos e
+valores dos nós) em um único `.npz` sem compressão. Como cada array fica
+armazenado de forma contígua dentro do arquivo, ele pode ser aberto com
+`np.memmap`: os workers do uvicorn compartilham as mesmas páginas pelo cache do
+sistema operacional e não precisam importar o scikit-learn. O avaliador
+percorre todas as árvores para um lote inteiro de uma vez, só com NumPy.
+"""
+import struct
+import zipfile
+
+import numpy as np
+
+TAMANHO_SUBLOTE = 4096
+
+
+def salvar_floresta(caminho, feature, limiar, filhos, valor, raizes, profundidade, classes, features):
+    """
+    Grava os arrays da floresta em um `.npz` sem compressão.
+
+    `filhos` tem uma linha (esquerdo, direito) por nó, com índices globais (já
+    deslocados para a posição da árvore no array concatenado); as folhas têm
+    feature -1 e apontam para si mesmas, de modo que descer
+    `profundidade` níveis sempre termina em uma folha. `raizes` indica o
+    primeiro nó de cada árvore e `valor` guarda as probabilidades normalizadas.
+    """
+    with open(caminho, "wb") as f:
+        np.savez(
+            f,
+            feature=np.asarray(feature, dtype=np.int32),
+            limiar=np.asarray(limiar, dtype=np.float64),
+            filhos=np.asarray(filhos, dtype=np.int32),
+            valor=np.asarray(valor, dtype=np.float64),
+            raizes=np.asarray(raizes, dtype=np.int32),
+            profundidade=np.int32(profundidade),
+            classes=np.asarray(classes, dtype=np.int64),
+            features=np.asarray(features, dtype=np.str_),
+        )
+
+
+def _mapear_npz(caminho):
+    """Abre cada array de um `.npz` sem compressão como `np.memmap` somente leitura."""
+    arrays = {}
+    with zipfile.ZipFile(caminho) as zf, open(caminho, "rb") as f:
+        for info in zf.infolist():
+            if info.compress_type != zipfile.ZIP_STORED:
+                raise ValueError(f"'{info.filename}' está comprimido e não pode ser mapeado em memória.")
+            # Cabeçalho local do ZIP: 30 bytes fixos + nome + campo extra
+            f.seek(info.header_offset)
+            cabecalho = f.read(30)
+            tamanho_nome, tamanho_extra = struct.unpack("<HH", cabecalho[26:30])
+            f.seek(info.header_offset + 30 + tamanho_nome + tamanho_extra)
+
+            versao = np.lib.format.read_magic(f)
+            if versao == (1, 0):
+                forma, fortran, dtype = np.lib.format.read_array_header_1_0(f)
+            else:
+                forma, fortran, dtype = np.lib.format.read_array_header_2_0(f)
+            nome = info.filename[:-len(".npy")]
+            if 0 in forma:
+                arrays[nome] = np.empty(forma, dtype=dtype)
+                continue
+            arrays[nome] = np.memmap(
+                caminho, dtype=dtype, mode="r", offset=f.tell(), shape=forma,
+                order="F" if fortran else "C",
+            )
+    return arrays
+
+
+def carregar_floresta(caminho, mmap=True):
+    """Carrega a floresta gravada por `salvar_floresta`, mapeada em memória por padrão."""
+    if mmap:
+        arrays = _mapear_npz(caminho)
+    else:
+        with np.load(caminho) as dados:
+            arrays = {nome: dados[nome] for nome in dados.files}
+    return FlorestaNumpy(**arrays)
+
+
+class FlorestaNumpy:
+    """
+    Avaliador vetorizado da floresta, compatível com `predict`/`predict_proba`.
+
+    Segue a mesma convenção do scikit-learn: X é convertido para float32 e a
+    amostra vai para a esquerda quando `x <= limiar`.
+    """
+
+    def __init__(self, feature, limiar, filhos, valor, raizes, profundidade, classes, features=()):
+        self.feature = feature
+        self.limiar = limiar
+        self.filhos = filhos
+        self.valor = valor
+        self.raizes = raizes
+        self.profundidade = int(profundidade)
+        self.classes_ = np.asarray(classes)
+        self.feature_names_in_ = np.asarray(features)
+
+    @property
+    def n_arvores(self):
+        return len(self.raizes)
+
+    def limiares(self, feature):
+        """Todos os limiares usados em `feature`, ordenados e sem repetição."""
+        return np.unique(self.limiar[np.asarray(self.feature) == feature])
+
+    def _folhas(self, X):
+        """Índice da folha alcançada em cada árvore: matriz (n_arvores, n_amostras)."""
+        n_amostras = len(X)
+        # X em ordem de coluna, achatado: o valor da feature f da amostra i fica em f * n + i
+        # (nas folhas, f = -1 lê um valor qualquer, descartado porque o nó aponta para si mesmo)
+        colunas = np.ascontiguousarray(X.T).ravel()
+        amostras = np.arange(n_amostras)
+        # filhos achatado: o filho esquerdo do nó k fica em 2k e o direito em 2k + 1
+        filhos = self.filhos.reshape(-1)
+        nos = np.repeat(np.asarray(self.raizes)[:, None], n_amostras, axis=1)
+        for _ in range(self.profundidade):
+            valores = colunas[self.feature[nos] * n_amostras + amostras]
+            nos = filhos[2 * nos + (valores > self.limiar[nos])]
+        return nos
+
+    def predict_proba(self, X):
+        """
+        Média das probabilidades das folhas de todas as árvores.
+
+        Como o domínio de entrada é pequeno, lotes grandes repetem muitas linhas:
+        só as linhas distintas percorrem a floresta (em sublotes, para limitar a
+        memória), e o resultado é redistribuído para as linhas originais.
+        """
+        X = np.asarray(X, dtype=np.float32)
+        distintas, inverso = np.unique(X, axis=0, return_inverse=True)
+        saida = np.empty((len(distintas), self.valor.shape[1]), dtype=np.float64)
+        for inicio in range(0, len(distintas), TAMANHO_SUBLOTE):
+            folhas = self._folhas(distintas[inicio:inicio + TAMANHO_SUBLOTE])
+            saida[inicio:inicio + TAMANHO_SUBLOTE] = self.valor[folhas].sum(axis=0) / self.n_arvores
+        return saida[inverso.reshape(-1)]
+
+    def predict(self, X):
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+    def _contribuicoes_por_no(self, n_features):
+        """
+        Contribuição de cada feature acumulada da raiz até cada nó: (n_nos, n_features, n_classes).
+
+        Ao descer de um nó para o filho, a variação das probabilidades é
+        atribuída à feature testada no nó. Os nós são preenchidos nível a
+        nível, com todas as árvores juntas.
+        """
+        feature, filhos = np.asarray(self.feature), np.asarray(self.filhos)
+        acumulado = np.zeros((len(self.valor), n_features, self.valor.shape[1]), dtype=np.float64)
+        nivel = np.asarray(self.raizes, dtype=np.intp)
+        for _ in range(self.profundidade):
+            nivel = nivel[feature[nivel] >= 0]
+            for lado in (0, 1):
+                filho = filhos[nivel, lado]
+                acumulado[filho] = acumulado[nivel]
+                acumulado[filho, feature[nivel]] += self.valor[filho] - self.valor[nivel]
+            nivel = filhos[nivel].ravel()
+        return acumulado
+
+    def contribuicoes(self, X):
+        """
+        Decomposição das probabilidades pelos caminhos das árvores (Saabas).
+
+        Retorna `(base, contribuicoes)`, com `predict_proba(X) == base +
+        contribuicoes.sum(axis=1)`: `base` (n_classes,) é a média das raízes (a
+        distribuição de classes do treino, com os pesos das classes) e
+        `contribuicoes` (n_amostras, n_features, n_classes) é a média, entre as
+        árvores, da contribuição acumulada até a folha alcançada.
+        """
+        X = np.asarray(X, dtype=np.float32)
+        acumulado = self._contribuicoes_por_no(X.shape[1])
+        saida = np.zeros((len(X), *acumulado.shape[1:]), dtype=np.float64)
+        for folhas in self._folhas(X):
+            saida += acumulado[folhas]
+        base = self.valor[np.asarray(self.raizes)].mean(axis=0)
+        return base, saida / self.n_arvores
+
+
+def arrays_floresta(model, features=()):
+    """
+    Arrays planos de nós de uma floresta do scikit-learn, no formato de `salvar_floresta`.
+
+    Os nós de todas as árvores são concatenados e os índices dos filhos são
+    deslocados para a posição global. As folhas têm feature -1 e apontam para si mesmas, para que
+    o avaliador desça um número fixo de níveis sem testar se chegou a uma folha.
+    O valor de cada nó é normalizado para probabilidades, como no `predict_proba`.
+    """
+    feature, limiar, filhos, valor, raizes = [], [], [], [], []
+    deslocamento = 0
+    for arvore in model.estimators_:
+        estrutura = arvore.tree_
+        folha = estrutura.children_left == -1
+        proprio = np.arange(estrutura.node_count) + deslocamento
+        raizes.append(deslocamento)
+        feature.append(np.where(folha, -1, estrutura.feature))
+        limiar.append(np.where(folha, 0.0, estrutura.threshold))
+        filhos.append(np.column_stack([
+            np.where(folha, proprio, estrutura.children_left + deslocamento),
+            np.where(folha, proprio, estrutura.children_right + deslocamento),
+        ]))
+        valores = estrutura.value[:, 0, :]
+        valor.append(valores / valores.sum(axis=1, keepdims=True))
+        deslocamento += estrutura.node_count
+
+    return dict(
+        feature=np.concatenate(feature).astype(np.int32),
+        limiar=np.concatenate(limiar).astype(np.float64),
+        filhos=np.concatenate(filhos).astype(np.int32),
+        valor=np.concatenate(valor).astype(np.float64),
+        raizes=np.asarray(raizes, dtype=np.int32),
+        profundidade=max(arvore.tree_.max_depth for arvore in model.estimators_),
+        classes=np.asarray(model.classes_),
+        features=np.asarray(features, dtype=np.str_),
+    )
@@ -0,0 +1,91 @@
+"""
+Formato binário compacto para previsões em lote (`POST /prever/lote/binario`).
+
+Requisição: registros de 3 bytes, sem cabeçalho, um por ocorrência:
+  byte 0     flags; o bit i é `FEATURES[1 + i]` (o mesmo código de combinação
+             usado pela tabela compilada do modelo)
+  bytes 1-2  `periodo_decorrido_dias` como uint16 little-endian
+
+O corpo é lido com `np.frombuffer`, sem cópia: os campos `flags` e `dias` são
+visões do próprio buffer e vão direto para a consulta da tabela compilada do
+modelo ou das regras.
+
+Respostas, também sem cabeçalho (n = número de ocorrências):
+  modelo  n bytes de classe (uint8) seguidos de n × 3 float32 little-endian
+          com as probabilidades de Baixa, Média e Alta
+  regras  n bytes de classe (uint8) seguidos de n bytes de motivo (uint8,
+          índice em `motivos` do conjunto de regras em uso, ver `GET /regras`)
+"""
+import numpy as np
+
+from src.api.constantes import FEATURES, RESOLUTIVIDADE_CLASSES
+
+TIPO_CONTEUDO = "application/octet-stream"
+REGISTRO = np.dtype([("flags", "u1"), ("dias", "<u2")])
+N_FLAGS = len(FEATURES) - 1
+N_CLASSES = len(RESOLUTIVIDADE_CLASSES)
+_MASCARA_INVALIDA = 0xFF & ~((1 << N_FLAGS) - 1)
+
+
+def codificar_ocorrencias(X):
+    """Codifica uma matriz (n, 6), na ordem de FEATURES, nos registros de 3 bytes."""
+    X = np.asarray(X)
+    if X.ndim != 2 or X.shape[1] != len(FEATURES):
+        raise ValueError(f"Esperada uma matriz (n, {len(FEATURES)}) na ordem de FEATURES.")
+    if len(X) and (X[:, 0].min() < 0 or X[:, 0].max() > np.iinfo(np.uint16).max):
+        raise ValueError("periodo_decorrido_dias fora do intervalo de uint16.")
+    registros = np.empty(len(X), dtype=REGISTRO)
+    registros["flags"] = (X[:, 1:].astype(bool) << np.arange(N_FLAGS)).sum(axis=1)
+    registros["dias"] = X[:, 0]
+    return registros.tobytes()
+
+
+def decodificar_ocorrencias(corpo):
+    """
+    Visões `(dias, codigos)` sobre o corpo da requisição (sem cópia).
+
+    Levanta ValueError se o tamanho não for múltiplo de 3 bytes ou se algum
+    registro tiver bits de flag além dos cinco definidos.
+    """
+    if len(corpo) % REGISTRO.itemsize:
+        raise ValueError(f"O corpo deve ter {REGISTRO.itemsize} bytes por ocorrência; recebidos {len(corpo)}.")
+    registros = np.frombuffer(corpo, dtype=REGISTRO)
+    codigos = registros["flags"]
+    invalidos = np.flatnonzero(codigos & _MASCARA_INVALIDA)
+    if len(invalidos):
+        raise ValueError(f"Bits de flag inválidos na ocorrência {int(invalidos[0])} (apenas os bits 0-{N_FLAGS - 1}).")
+    return registros["dias"], codigos
+
+
+def colunas_ocorrencias(dias, codigos):
+    """Colunas na ordem de FEATURES (para as regras), a partir dos dias e dos códigos."""
+    return (dias, *((codigos >> bit) & 1 for bit in range(N_FLAGS)))
+
+
+def codificar_resposta_modelo(classes, probabilidades):
+    return (np.asarray(classes, dtype=np.uint8).tobytes()
+            + np.asarray(probabilidades, dtype="<f4").tobytes())
+
+
+def decodificar_resposta_modelo(corpo):
+    """`(classes uint8 (n,), probabilidades float32 (n, 3))` a partir da resposta do modelo."""
+    n = len(corpo) // (1 + 4 * N_CLASSES)
+    classes = np.frombuffer(corpo, dtype=np.uint8, count=n)
+    probabilidades = np.frombuffer(corpo, dtype="<f4", offset=n).reshape(n, N_CLASSES)
+    return classes, probabilidades
+
+
+def codificar_resposta_regras(classes, motivos):
+    return np.asarray(classes, dtype=np.uint8).tobytes() + np.asarray(motivos, dtype=np.uint8).tobytes()
+
+
+def decodificar_resposta_regras(corpo):
+    """`(classes, motivos)`, ambos uint8 (n,), a partir da resposta das regras."""
+    n = len(corpo) // 2
+    return np.frombuffer(corpo, dtype=np.uint8, count=n), np.frombuffer(corpo, dtype=np.uint8, offset=n)
+
+
+def contar_por_classe(classes):
+    """`{nome da classe: ocorrências}` para as métricas, sem percorrer linha a linha em Python."""
+    contagem = np.bincount(classes, minlength=N_CLASSES)
+    return {RESOLUTIVIDADE_CLASSES[codigo]: int(vezes) for codigo, vezes in enumerate(contagem)}
@@ -1,8 +1,17 @@
+import json
+import shutil
+import sys
+from pathlib import Path
+
+# Permite executar como script (python src/api/gerar_modelo.py) a partir da raiz do projeto
+if __package__ in (None, ""):
+    sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
 import joblib
 import pandas as pd
 import numpy as np
 from sklearn.model_selection import train_test_split
-from sklearn.ensemble import RandomForestClassifier
+from sklearn.ensemble import ExtraTreesClassifier, RandomForestClassifier
 from sklearn.linear_model import LogisticRegression
 from sklearn.metrics import accuracy_score, classification_report
 from sklearn.preprocessing import StandardScaler
@@ -11,67 +20,164 @@ from sklearn.pipeline import Pipeline
 from sklearn.preprocessing import FunctionTransformer
 import warnings
 
+from src.api import dados_sinteticos, floresta_numpy, monitor_deriva, regras, tabela_modelo
+from src.api.cache_artefatos import (
+    ARQUIVO_ENTRADA, abrir_colunas, criar_cache, impressao_digital, salvar_colunas, versao_codigo
+)
+from src.api.regras import (
+    CLASSE_ALTA, CLASSE_MEDIA, FEATURES, RESOLUTIVIDADE_CLASSES, avaliar_regras
+)
+from src.api.dados_sinteticos import (
+    DIAS_LIMITE, DIAS_MINIMO, PROBABILIDADE_CLASSES, PROBABILIDADE_FLAGS, TARGET
+)
+from src.api.floresta_numpy import arrays_floresta, carregar_floresta, salvar_floresta
+from src.api.monitor_deriva import estatisticas_referencia, salvar_referencia
+from src.api.registro_modelos import ARQUIVO_FLORESTA, ARQUIVO_METADADOS, ARQUIVO_MODELO, RegistroModelos
+from src.api.tabela_modelo import compilar_tabela, verificar_tabela
+from src.config import settings
+
 # Ignorar warnings de convergência do modelo, comum em exemplos simples
 warnings.filterwarnings('ignore')
 
-# Mapeamento para as classes de resolutividade
-RESOLUTIVIDADE_CLASSES = {
-    0: "Baixa",
-    1: "Média",
-    2: "Alta"
+MODEL_FILENAME = ARQUIVO_MODELO
+FOREST_FILENAME = ARQUIVO_FLORESTA
+
+# Hiperparâmetros do RandomForestClassifier
+# 'class_weight' é crucial para dados desbalanceados.
+PARAMETROS_MODELO = {
+    'n_estimators': 150,
+    'max_depth': 10,
+    'random_state': 42,
+    'class_weight': 'balanced',
+    'n_jobs': -1  # Usa todos os processadores disponíveis
 }
-FEATURES = [
-    'periodo_decorrido_dias', 'suspeito_conhecido', 'tem_testemunhas',
-    'tem_imagens_cameras', 'suspeito_rastreavel', 'vestigios_preservados'
-]
-TARGET = 'resolutividade'
-MODEL_FILENAME = "resolutividade_model.pkl"
-
-def gerar_dados(data_size=3500):
-    """Gera um DataFrame de dados sintéticos para o treinamento do modelo."""
+
+# Estimadores disponíveis para a busca de hiperparâmetros (src/api/busca_hiperparametros.py).
+# Só as florestas de árvores podem ser exportadas e compiladas para a API.
+ESTIMADORES_EXPORTAVEIS = {"RandomForestClassifier", "ExtraTreesClassifier"}
+
+
+def criar_estimador(nome, parametros, n_jobs=-1):
+    """Instancia um estimador pelo nome, com os parâmetros fixos do projeto."""
+    if nome == "LogisticRegression":
+        return Pipeline([
+            ("escala", StandardScaler()),
+            ("modelo", LogisticRegression(max_iter=1000, class_weight='balanced', **parametros)),
+        ])
+    classes = {"RandomForestClassifier": RandomForestClassifier, "ExtraTreesClassifier": ExtraTreesClassifier}
+    if nome not in classes:
+        raise ValueError(f"Estimador desconhecido: '{nome}'.")
+    fixos = {'random_state': 42, 'class_weight': 'balanced', 'n_jobs': n_jobs}
+    return classes[nome](**{**fixos, **parametros})
+
+def gerar_dados(data_size=3500, cache=None):
+    """
+    Gera um DataFrame de dados sintéticos para o treinamento do modelo.
+
+    Para volumes que não cabem em memória, `src/api/dados_sinteticos.py` gera
+    as mesmas distribuições em blocos, gravados em disco. Com `cache` (um
+    `CacheArtefatos`), dados já gerados com o mesmo tamanho e o mesmo código
+    vêm do cache, com as colunas mapeadas em memória.
+    """
+    if cache is not None:
+        return _dados_em_cache(data_size, cache)
     print("Iniciando a simulação de treinamento do modelo ...")
 
     np.random.seed(42)  
 
     # Gerar dados base
     data = pd.DataFrame({
-        'periodo_decorrido_dias': np.random.randint(1, 60, data_size), # 1 a 60 dias
-        'suspeito_conhecido': np.random.choice([0, 1], data_size, p=[0.7, 0.3]),
-        'tem_testemunhas': np.random.choice([0, 1], data_size, p=[0.65, 0.35]),
-        'tem_imagens_cameras': np.random.choice([0, 1], data_size, p=[0.75, 0.25]),
-        'suspeito_rastreavel': np.random.choice([0, 1], data_size, p=[0.7, 0.3]),
-        'vestigios_preservados': np.random.choice([0, 1], data_size, p=[0.6, 0.4]),
+        'periodo_decorrido_dias': np.random.randint(DIAS_MINIMO, DIAS_LIMITE, data_size), # 1 a 60 dias
+        **{
+            flag: np.random.choice([0, 1], data_size, p=[1 - p, p])
+            for flag, p in PROBABILIDADE_FLAGS.items()
+        },
         # Variável Alvo inicial: 0=Baixa, 1=Média, 2=Alta
-        TARGET: np.random.choice(list(RESOLUTIVIDADE_CLASSES.keys()), data_size, p=[0.4, 0.35, 0.25])
+        TARGET: np.random.choice(list(RESOLUTIVIDADE_CLASSES.keys()), data_size, p=PROBABILIDADE_CLASSES)
     })
 
-    # Lógica para introduzir correlação entre features e o alvo
-    evidencias_suficientes = (
-        data['tem_testemunhas'] + data['tem_imagens_cameras'] + data['vestigios_preservados']
-    )
-    cond_alta = (
-        (data['periodo_decorrido_dias'] <= 5) &
-        (
-            ((data['suspeito_conhecido'] == 1) & (evidencias_suficientes >= 1)) |
-            ((data['suspeito_rastreavel'] == 1) & (evidencias_suficientes >= 2))
-        )
-    )
-    cond_media = (
-        (
-            (data['periodo_decorrido_dias'] < 30) &
-            ((data['suspeito_conhecido'] == 1) | ((data['suspeito_rastreavel'] == 1) & (evidencias_suficientes >= 1)))
-        ) |
-        ((evidencias_suficientes >= 3) & (data['periodo_decorrido_dias'] < 60))
-    )
+    # Lógica para introduzir correlação entre features e o alvo:
+    # as mesmas regras de negócio da API (src/api/regras.py), avaliadas por coluna
+    classes_regras, _ = avaliar_regras(*(data[coluna].to_numpy() for coluna in FEATURES))
     
-    # Aplica as regras para ajustar a variável alvo, da mais específica para a menos
-    data.loc[cond_alta, TARGET] = 2
-    data.loc[cond_media & ~cond_alta, TARGET] = 1
+    # Aplica as regras para ajustar a variável alvo; Baixa mantém o rótulo sorteado
+    data.loc[classes_regras == CLASSE_ALTA, TARGET] = CLASSE_ALTA
+    data.loc[classes_regras == CLASSE_MEDIA, TARGET] = CLASSE_MEDIA
     
     return data
 
-def treinar_avaliar_modelo(data):
-    """Treina, avalia e salva o modelo de classificação."""
+def _dados_em_cache(data_size, cache):
+    parametros = {"data_size": data_size}
+    chave = cache.chave("dados", parametros, versao_codigo(gerar_dados, regras, dados_sinteticos))
+    entrada = cache.obter(chave)
+    if entrada is None:
+        data = gerar_dados(data_size)
+        cache.gravar(chave, "dados", parametros,
+                     lambda diretorio: salvar_colunas(diretorio, {c: data[c].to_numpy() for c in data.columns}))
+        return data
+    print(f"Dados sintéticos carregados do cache ({chave}).")
+    # Views ndarray dos mapas: o DataFrame usa as páginas do arquivo, sem copiar
+    return pd.DataFrame({c: v.view(np.ndarray) for c, v in abrir_colunas(entrada).items()}, copy=False)
+
+def _chave_modelo(cache, data, estimador, parametros):
+    """Chave do treino: conteúdo dos dados, estimador, parâmetros e código do treino e da exportação."""
+    codigo = versao_codigo(
+        treinar_avaliar_modelo, criar_estimador, salvar_modelo, exportar_floresta,
+        floresta_numpy, tabela_modelo, monitor_deriva, regras, bibliotecas=("numpy", "sklearn"),
+    )
+    return cache.chave("modelo", _parametros_cache(data, estimador, parametros), codigo)
+
+def _parametros_cache(data, estimador, parametros):
+    return {
+        "dados": impressao_digital(*(data[coluna].to_numpy() for coluna in [*FEATURES, TARGET])),
+        "linhas": len(data),
+        "estimador": estimador or "RandomForestClassifier",
+        "parametros": PARAMETROS_MODELO if estimador is None else parametros or {},
+    }
+
+def _copiar_artefatos(origem, destino, ignorar=()):
+    for arquivo in Path(origem).iterdir():
+        if arquivo.is_file() and arquivo.name not in ignorar:
+            shutil.copy2(arquivo, Path(destino) / arquivo.name)
+
+def _modelo_do_cache(entrada, chave, registro, promover):
+    """
+    Modelo de um treino em cache: reaproveita a versão do registro com a mesma
+    chave ou registra uma nova com os artefatos do cache, sem treinar.
+    """
+    versao = next((m["versao"] for m in registro.versoes() if m.get("chave_cache") == chave), None)
+    if versao is None:
+        metadados = json.loads((entrada / ARQUIVO_METADADOS).read_text(encoding="utf-8"))
+        metadados = {nome: valor for nome, valor in metadados.items() if nome not in ("versao", "criado_em")}
+        versao = registro.registrar(
+            lambda diretorio: _copiar_artefatos(entrada, diretorio, ignorar={ARQUIVO_METADADOS, ARQUIVO_ENTRADA}),
+            metadados,
+        )
+    if promover:
+        registro.promover(versao)
+    print(f"Modelo carregado do cache ({chave}): versão '{versao}' em '{registro.raiz}'"
+          f"{' (ativa)' if promover else ''}")
+    with open(entrada / MODEL_FILENAME, "rb") as f:
+        return joblib.load(f)
+
+def treinar_avaliar_modelo(data, registro=None, promover=True, estimador=None, parametros=None, cache=None):
+    """
+    Treina, avalia e registra o modelo de classificação como uma nova versão
+    no registro de modelos (promovida a versão ativa por padrão).
+
+    Por padrão treina o RandomForestClassifier com `PARAMETROS_MODELO`;
+    `estimador` e `parametros` (por exemplo, o vencedor da busca de
+    hiperparâmetros) escolhem outra floresta. Com `cache`, um treino com os
+    mesmos dados, parâmetros e código não é refeito: os artefatos vêm do cache
+    (e a versão já registrada com eles é reaproveitada).
+    """
+    registro = registro or RegistroModelos(settings.diretorio_modelos)
+    if cache is not None:
+        chave = _chave_modelo(cache, data, estimador, parametros)
+        entrada = cache.obter(chave)
+        if entrada is not None:
+            return _modelo_do_cache(entrada, chave, registro, promover)
+
     print("Iniciando o treinamento do modelo...")
 
     X = data[FEATURES]
@@ -83,14 +189,12 @@ def treinar_avaliar_modelo(data):
     )
 
     # Definição do Modelo RandomForestClassifier
-    # 'class_weight' é crucial para dados desbalanceados.
-    model = RandomForestClassifier(
-        n_estimators=150,
-        max_depth=10,
-        random_state=42,
-        class_weight='balanced',
-        n_jobs=-1 # Usa todos os processadores disponíveis
-    )
+    if estimador is None:
+        model = RandomForestClassifier(**PARAMETROS_MODELO)
+    elif estimador in ESTIMADORES_EXPORTAVEIS:
+        model = criar_estimador(estimador, parametros or {})
+    else:
+        raise ValueError(f"'{estimador}' não pode ser exportado para a API; use {sorted(ESTIMADORES_EXPORTAVEIS)}.")
 
     # Treinamento
     model.fit(X_train, y_train)
@@ -107,13 +211,77 @@ def treinar_avaliar_modelo(data):
         y_test, y_pred, target_names=list(RESOLUTIVIDADE_CLASSES.values())
     ))
 
-    # Salvar o modelo treinado usando joblib
-    with open(MODEL_FILENAME, "wb") as f:
-        joblib.dump(model, f)
-        print(f"\nModelo salvo em '{MODEL_FILENAME}'")
+    # Compilar a tabela de consulta e conferir contra o predict_proba em todo o domínio
+    verificacao = verificar_tabela(compilar_tabela(model), model)
+    print(f"Tabela compilada: {verificacao['faixas']} faixas de dias x 32 combinações, "
+          f"{verificacao['celulas']} células verificadas, "
+          f"{verificacao['divergencias_classe']} divergências de classe, "
+          f"diferença máxima {verificacao['diferenca_maxima']:.2e}")
+    if not verificacao['ok']:
+        raise RuntimeError("A tabela compilada diverge do modelo treinado.")
+
+    # Registrar a nova versão com os artefatos e os metadados do treino
+    metadados = {
+        "parametros": PARAMETROS_MODELO if estimador is None else {"estimador": estimador, **model.get_params()},
+        "metricas": {
+            "acuracia": accuracy,
+            "relatorio": classification_report(
+                y_test, y_pred, target_names=list(RESOLUTIVIDADE_CLASSES.values()), output_dict=True
+            ),
+        },
+        "features": FEATURES,
+        "classes": RESOLUTIVIDADE_CLASSES,
+        "linhas_treino": len(X_train),
+        "linhas_teste": len(X_test),
+    }
+    if cache is not None:
+        metadados["chave_cache"] = chave
+    versao = registro.registrar(
+        lambda diretorio: salvar_modelo(model, diretorio, X_test, X_train), metadados, promover=promover
+    )
+    print(f"\nModelo registrado como versão '{versao}' em '{registro.raiz}'"
+          f"{' (ativa)' if promover else ''}")
+    if cache is not None:
+        cache.gravar(chave, "modelo", _parametros_cache(data, estimador, parametros),
+                     lambda diretorio: _copiar_artefatos(registro.caminho(versao), diretorio))
     
     return model
 
+def salvar_modelo(model, diretorio, X_verificacao=None, X_referencia=None):
+    """
+    Salva o modelo em `diretorio`: o pickle do scikit-learn e a floresta no
+    formato compacto, mapeável em memória (conferida contra `X_verificacao`).
+    Com `X_referencia` (os dados de treino), grava também as estatísticas de
+    referência do monitor de deriva.
+    """
+    diretorio = Path(diretorio)
+    # Salvar o modelo treinado usando joblib
+    with open(diretorio / MODEL_FILENAME, "wb") as f:
+        joblib.dump(model, f)
+
+    # Exportar também no formato compacto (a API não precisa do scikit-learn para lê-lo)
+    exportar_floresta(model, diretorio / FOREST_FILENAME)
+    if X_verificacao is not None:
+        diferenca = np.max(np.abs(
+            carregar_floresta(diretorio / FOREST_FILENAME).predict_proba(X_verificacao)
+            - model.predict_proba(X_verificacao)
+        ))
+        print(f"Floresta exportada (diferença máxima no teste: {diferenca:.2e})")
+
+    if X_referencia is not None:
+        colunas = [X_referencia[coluna].to_numpy() for coluna in FEATURES]
+        salvar_referencia(diretorio, estatisticas_referencia(
+            np.column_stack(colunas),
+            {"modelo": model.predict(X_referencia[FEATURES]), "regras": avaliar_regras(*colunas)[0]},
+        ))
+
+def exportar_floresta(model, caminho=FOREST_FILENAME):
+    """
+    Exporta a floresta como arrays planos de nós em um único `.npz` mapeável em
+    memória (ver `floresta_numpy.arrays_floresta`).
+    """
+    salvar_floresta(caminho, **arrays_floresta(model, FEATURES))
+
 def prever_novo_caso(model):
     """Demonstra a previsão de um novo caso com o modelo treinado."""
     # Cenário otimista para teste
@@ -139,11 +307,29 @@ def prever_novo_caso(model):
         print(f"  {RESOLUTIVIDADE_CLASSES[i]}: {prob * 100:.2f}%")
 
 if __name__ == "__main__":
-    # 1. Gerar dados
-    dados_ocorrencias = gerar_dados()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Treina e registra o modelo de resolutividade.")
+    parser.add_argument("--buscar", action="store_true",
+                        help="Escolhe estimador e hiperparâmetros por validação cruzada antes de treinar")
+    parser.add_argument("--sem-cache", action="store_true",
+                        help="Gera os dados e treina de novo, sem ler nem gravar o cache de artefatos")
+    args = parser.parse_args()
+    cache = None if args.sem_cache else criar_cache()
+
+    # 1. Gerar dados (ou lê-los do cache)
+    dados_ocorrencias = gerar_dados(cache=cache)
     
-    # 2. Treinar, avaliar e salvar o modelo
-    modelo_treinado = treinar_avaliar_modelo(dados_ocorrencias)
+    # 2. Treinar, avaliar e salvar o modelo (com o vencedor da busca, se pedida)
+    estimador = parametros = None
+    if args.buscar:
+        from src.api.busca_hiperparametros import buscar
+        vencedor = buscar(dados_ocorrencias)["vencedor"]
+        estimador, parametros = vencedor["estimador"], vencedor["parametros"]
+        print(f"Vencedor da busca: {estimador} {parametros}")
+    modelo_treinado = treinar_avaliar_modelo(
+        dados_ocorrencias, estimador=estimador, parametros=parametros, cache=cache
+    )
     
     # 3. Demonstrar uma previsão
     prever_novo_caso(modelo_treinado)
\ No newline at end of file
@@ -0,0 +1,56 @@
+"""
+Histograma de limites fixos, com custo O(log k) por observação e memória constante.
+"""
+from bisect import bisect_left
+from threading import Lock
+
+
+class Histograma:
+    """Contagens por faixa (`valor <= limite`), no estilo do Prometheus."""
+
+    def __init__(self, limites):
+        self.limites = tuple(sorted(limites))
+        self.contagens = [0] * (len(self.limites) + 1)  # última faixa: +Inf
+        self.soma = 0.0
+        self.total = 0
+        self._trava = Lock()
+
+    def registrar(self, valor, vezes=1):
+        indice = bisect_left(self.limites, valor)
+        with self._trava:
+            self.contagens[indice] += vezes
+            self.soma += valor * vezes
+            self.total += vezes
+
+    def instantaneo(self):
+        """Cópia consistente de `(contagens, soma, total)`."""
+        with self._trava:
+            return list(self.contagens), self.soma, self.total
+
+    def quantil(self, q):
+        """
+        Estimativa do quantil `q` pelo limite superior da faixa que o contém;
+        None se ele cair acima do maior limite.
+        """
+        if not self.total:
+            return 0.0
+        alvo = q * self.total
+        acumulado = 0
+        for limite, contagem in zip(self.limites, self.contagens):
+            acumulado += contagem
+            if acumulado >= alvo:
+                return limite
+        return None
+
+    def resumo(self):
+        """Contagens por faixa (não cumulativas), total, média e quantis aproximados."""
+        faixas = {str(limite): contagem for limite, contagem in zip(self.limites, self.contagens)}
+        faixas["+Inf"] = self.contagens[-1]
+        return {
+            "faixas": faixas,
+            "total": self.total,
+            "media": self.soma / self.total if self.total else 0.0,
+            "p50": self.quantil(0.5),
+            "p95": self.quantil(0.95),
+            "p99": self.quantil(0.99),
+        }
@@ -1,35 +1,310 @@
-from http.client import HTTPException
-from fastapi import FastAPI
-from src.models.schemas import OcorrenciaRequest, PrevisaoResponse
-import joblib
-import numpy as np
+import asyncio
+import threading
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, List, Optional
+
+from fastapi import Body, FastAPI, HTTPException
+from fastapi.responses import PlainTextResponse, Response
+from src.models.schemas import OcorrenciaRequest, PrevisaoColunasResponse, PrevisaoResponse
+from src.api.admissao import MiddlewareAdmissao, criar_controle, verificar_prazo
+from src.api.auditoria import criar_auditoria
+from src.api.constantes import RESOLUTIVIDADE_CLASSES
+from src.api.metricas import TIPO_CONTEUDO, Metricas
+from src.api.microlotes import Coalescedor
+from src.api.monitor_deriva import MonitorDeriva, carregar_referencia
+from src.api.registro_modelos import ARQUIVO_METADADOS, RegistroModelos, carregar_artefato
+from src.api.sombra import criar_sombra
+from src.config import settings
+
+if TYPE_CHECKING:
+    from src.api.explicacao_modelo import ExplicacoesModelo
+    from src.api.tabela_modelo import TabelaModelo
+
+# NumPy, a tabela compilada e (só para modelos em pickle) o scikit-learn são
+# importados no lifespan, em `inicializar`: importar este módulo não carrega
+# nada pesado e o processo responde ao `/` antes de o modelo estar pronto.
+
+
+# Diretório dos arquivos anteriores ao registro de modelos, usado se não houver versão ativa
+DIRETORIO_LEGADO = "src/api"
+
+
+@dataclass(frozen=True)
+class ModeloAtivo:
+    """Versão do modelo em uso, já compilada; trocada inteira de uma só vez na recarga."""
+    versao: str
+    modelo: object
+    tabela: "TabelaModelo"
+    explicacoes: "ExplicacoesModelo"
+    metadados: dict
+    referencia: Optional[dict]  # estatísticas do treino para o monitor de deriva
+
+
+registro = RegistroModelos(settings.diretorio_modelos)
+_trava_recarga = threading.Lock()
+
+
+def _carregar_versao(versao=None) -> ModeloAtivo:
+    """
+    Carrega e compila uma versão do registro (a ativa por padrão). Sem versão
+    ativa, usa os arquivos legados em `src/api`.
+    """
+    from src.api.explicacao_modelo import compilar_explicacoes
+    from src.api.tabela_modelo import compilar_tabela
+
+    versao = versao or registro.versao_ativa()
+    if versao is None:
+        diretorio = DIRETORIO_LEGADO
+        modelo = carregar_artefato(diretorio)
+        metadados = {}
+        versao = "legado"
+    else:
+        diretorio = registro.caminho(versao)
+        modelo = registro.carregar(versao)
+        metadados = registro.metadados(versao)
+    # Pré-calcula as previsões e as explicações de todo o domínio; servir vira uma consulta em array
+    tabela = compilar_tabela(modelo)
+    return ModeloAtivo(
+        versao, modelo, tabela, compilar_explicacoes(modelo, tabela), metadados, carregar_referencia(diretorio)
+    )
+
+
+def carregar_candidatos(versoes):
+    """
+    Carrega e compila as versões candidatas da pontuação em sombra, que
+    substituem as anteriores (lista vazia desliga a sombra).
+    """
+    for versao in versoes:
+        if not (registro.caminho(versao) / ARQUIVO_METADADOS).exists():
+            raise FileNotFoundError(f"Versão '{versao}' não encontrada em {registro.raiz}.")
+    candidatos = {versao: _carregar_versao(versao) for versao in versoes}
+    sombra.trocar_candidatos({versao: candidato.tabela for versao, candidato in candidatos.items()})
+    if candidatos:
+        print(f"✓ Pontuação em sombra com {', '.join(candidatos)}")
+    return candidatos
+
+
+def recarregar_modelo(forcar=False):
+    """
+    Troca o modelo em memória se a versão ativa do registro mudou.
+
+    A nova versão é carregada e compilada por completo antes da troca, que é
+    uma única atribuição: requisições em andamento terminam com a versão que
+    já tinham em mãos. Retorna `(modelo_ativo, trocou)`.
+    """
+    global ativo
+    with _trava_recarga:
+        versao = registro.versao_ativa()
+        # Sem versão ativa no registro, mantém o que já estiver carregado
+        if not forcar and ativo is not None and versao in (None, ativo.versao):
+            return ativo, False
+        novo = _carregar_versao(versao)
+        ativo = novo
+        monitor.trocar_referencia(novo.referencia)
+        print(f"✓ Modelo '{novo.versao}' ativo ({len(novo.tabela.classes)} faixas de dias compiladas)")
+        return novo, True
+
+
+async def _observar_registro():
+    """Confere periodicamente o ponteiro da versão ativa e recarrega quando ele muda."""
+    while True:
+        await asyncio.sleep(settings.recarga_intervalo_s)
+        try:
+            await asyncio.to_thread(recarregar_modelo)
+        except Exception as erro:
+            print(f"⚠️ Falha ao recarregar o modelo: {erro}")
+
+
+# Etapa da inicialização, exposta pelo /ready: pendente -> carregando -> pronto | erro
+inicializacao = {"estado": "pendente", "erro": None, "tempos_s": {}}
+
+
+def inicializar():
+    """
+    Importa as dependências pesadas, carrega a versão ativa e aquece a primeira
+    previsão, registrando o tempo de cada etapa em `inicializacao["tempos_s"]`.
+
+    Roda no lifespan, em uma thread. Uma falha não derruba o processo: o
+    `/ready` responde 503 até que uma versão seja carregada (pela verificação
+    periódica do registro ou por `POST /modelo/recarregar`).
+    """
+    tempos = {}
+    inicializacao.update(estado="carregando", erro=None, tempos_s=tempos)
+    print("🤖 Carregando modelo ML...")
+    try:
+        inicio = time.perf_counter()
+        import numpy  # noqa: F401
+        import src.api.explicacao_modelo  # noqa: F401
+        import src.api.floresta_numpy  # noqa: F401
+        import src.api.tabela_modelo  # noqa: F401
+        tempos["importacao"] = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        atual, _ = recarregar_modelo()
+        tempos["carga"] = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        _aquecer(atual)
+        tempos["aquecimento"] = time.perf_counter() - inicio
+
+        versoes = [versao.strip() for versao in settings.sombra_candidatos.split(",") if versao.strip()]
+        if versoes:
+            inicio = time.perf_counter()
+            try:
+                carregar_candidatos(versoes)
+            except Exception as erro:
+                # Sem os candidatos a API funciona normalmente, só sem a sombra
+                print(f"⚠️ Falha ao carregar os candidatos da sombra: {erro}")
+            tempos["sombra"] = time.perf_counter() - inicio
+    except FileNotFoundError as erro:
+        inicializacao.update(estado="erro", erro=str(erro))
+        print("❌ Modelo não encontrado!")
+        print("Execute primeiro: python src/api/gerar_modelo.py")
+        return
+    except Exception as erro:
+        inicializacao.update(estado="erro", erro=str(erro))
+        print(f"⚠️ Falha ao carregar o modelo: {erro}")
+        return
+    inicializacao["estado"] = "pronto"
+
+
+def _aquecer(atual):
+    """Percorre uma vez o caminho da previsão (unitária e em lote) para não pesar na primeira requisição."""
+    import numpy as np
+
+    classe, probabilidades = atual.tabela.consultar(0, False, False, False, False, False)
+    _montar_resposta(classe, probabilidades)
+    atual.tabela.prever(np.zeros((1, 6), dtype=np.int64))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    carga = asyncio.create_task(asyncio.to_thread(inicializar))
+    if not settings.carregamento_em_segundo_plano:
+        # Só começa a aceitar requisições com o modelo carregado
+        await carga
+    auditoria.iniciar()
+    sombra.iniciar()
+    tarefa = None
+    if settings.recarga_intervalo_s > 0:
+        tarefa = asyncio.create_task(_observar_registro())
+    yield
+    if tarefa is not None:
+        tarefa.cancel()
+    # Grava o que ainda estiver na fila da auditoria antes de encerrar
+    await asyncio.to_thread(auditoria.fechar)
+    await asyncio.to_thread(sombra.fechar)
 
 
 # --- Configuração da Aplicação ---
 app = FastAPI(
     title="API de Análise de Resolutividade Criminal",
     description="Prevê o potencial de resolução de uma ocorrência com uso de Machine Learning.",
-    version="1.0" 
+    version="1.0",
+    lifespan=lifespan
+)
+
+# Tempo por etapa de cada requisição, contadores e /metrics
+metricas = Metricas("modelo", habilitadas=settings.metricas_habilitadas)
+app.router.route_class = metricas.classe_rota()
+
+# Limite de concorrência, fila de espera e prazo das rotas /prever* (429/503 com Retry-After)
+admissao = criar_controle("modelo", settings.admissao_simultaneas_modelo)
+app.add_middleware(MiddlewareAdmissao, controles=lambda scope: [admissao])
+metricas.registrar_medida(
+    "admissao", admissao.contagens, "Vagas em uso, fila e requisições recusadas pelo controle de admissão.", "estado"
 )
 
-# Classes de resolutividade
-RESOLUTIVIDADE_CLASSES = {
-    0: "Baixa",
-    1: "Média",
-    2: "Alta"
-}
+# Modelo em uso; carregado no lifespan (ver `inicializar`)
+ativo = None
 
 
-# Carregar modelo treinado
-print("🤖 Carregando modelo ML...")
-try:
-     with open("src/api/resolutividade_model.pkl", "rb") as f:
-        modelo = joblib.load(f)
-        print("✓ Modelo carregado com sucesso!")
-except FileNotFoundError:
-    print("❌ Modelo não encontrado!")
-    print("Execute primeiro: python gerar_modelo.py")
-    modelo = None
+def _pontuar_microlote(linhas, tabela):
+    """Pontua as linhas de um micro-lote; dias além do int64 valem o maior dia, como no /prever/lote."""
+    from src.api.validacao_colunar import matriz_linhas
+
+    return tabela.prever(matriz_linhas(linhas))
+
+
+# Agrupa requisições concorrentes do /prever em uma única consulta vetorizada;
+# o contexto de cada linha é a tabela da versão vigente quando a requisição chegou
+coalescedor = Coalescedor(
+    _pontuar_microlote,
+    janela_ms=settings.microlote_janela_ms,
+    tamanho_maximo=settings.microlote_tamanho_maximo,
+)
+metricas.registrar_histograma(
+    "microlote_tamanho", coalescedor.tamanho_lote, "Requisições pontuadas em cada micro-lote do /prever."
+)
+metricas.registrar_histograma(
+    "microlote_espera_ms", coalescedor.espera_ms, "Espera na fila do micro-lote até a pontuação, em ms."
+)
+
+# Entradas e classes previstas da janela recente, comparadas com a referência do treino (GET /deriva)
+monitor = MonitorDeriva("modelo", settings.deriva_janela_s, settings.deriva_fatias)
+metricas.registrar_medida(
+    "deriva_psi", monitor.psi_atual, "PSI da janela recente contra a referência do treino.", "item"
+)
+
+# Registro de cada previsão (entradas, classe, probabilidades e versão), gravado fora da requisição
+auditoria = criar_auditoria("modelo")
+metricas.registrar_medida(
+    "auditoria_previsoes", auditoria.contagens, "Previsões na fila, gravadas e descartadas pela auditoria.", "estado"
+)
+
+# Candidatos pontuando cópias das entradas em segundo plano (GET /sombra); com a
+# fila do controle de admissão ocupada, a sombra descarta o próprio trabalho
+sombra = criar_sombra(ocupada=lambda: admissao.contagens()["na_fila"] > 0)
+metricas.registrar_medida(
+    "sombra_linhas", sombra.contagens, "Linhas na fila, pontuadas e descartadas pela pontuação em sombra.", "estado"
+)
+metricas.registrar_medida(
+    "sombra_concordancia", sombra.concordancias, "Fração das previsões em que o candidato concorda com o ativo.",
+    "candidato",
+)
+
+
+def _motivo(previsao_classe, probabilidades) -> str:
+    """Justificativa da previsão a partir da classe e das probabilidades."""
+    confianca = probabilidades[previsao_classe] # Probabilidade da classe predita
+    return (f"Previsão baseada em modelo ML com confiança de {confianca * 100:.2f}%. "
+            f"Probabilidades - Baixa: {probabilidades[0] * 100:.2f}%, "
+            f"Média: {probabilidades[1] * 100:.2f}%, "
+            f"Alta: {probabilidades[2] * 100:.2f}%.")
+
+def _montar_resposta(previsao_classe, probabilidades, explicacao=None) -> PrevisaoResponse:
+    """
+    Monta a resposta (classe e justificativa) a partir da classe e das
+    probabilidades e, se pedida, da explicação pré-calculada da célula.
+    """
+    status = RESOLUTIVIDADE_CLASSES.get(previsao_classe, "Desconhecido") # Mapear para string
+    
+    return PrevisaoResponse(
+        resolutividade=status,
+        motivo=_motivo(previsao_classe, probabilidades),
+        explicacao=explicacao
+    )
+
+def _com_explicacao(resposta: PrevisaoResponse, explicacao: bytes) -> bytes:
+    """
+    JSON da resposta com a explicação pré-calculada e já serializada da célula
+    (no formato de `ExplicacaoResponse`), anexada como último campo do objeto:
+    validá-la e serializá-la de novo pelo `response_model` custaria bem mais
+    que a própria consulta.
+    """
+    return resposta.model_dump_json(exclude_none=True).encode("utf-8")[:-1] + b',"explicacao":' + explicacao + b"}"
+
+def _modelo_atual() -> ModeloAtivo:
+    """Versão em uso no início da requisição; 503 enquanto não houver modelo carregado."""
+    atual = ativo
+    if atual is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Modelo não disponível. Execute: python src/api/gerar_modelo.py"
+        )
+    return atual
 
 
 # --- Endpoints da API ---
@@ -39,42 +314,213 @@ def health_check():
     """Endpoint de health check"""
     return {"status": "ok", "message": "API funcionando"}
 
-@app.post("/prever", response_model=PrevisaoResponse, tags=["Previsão"])
-def prever_resolutividade(ocorrencia: OcorrenciaRequest) -> PrevisaoResponse:
+@app.get("/ready")
+def readiness_check():
     """
-    Analisa uma ocorrência e retorna a previsão de resolutividade.
+    Prontidão para receber previsões: 200 com o modelo carregado e 503 enquanto
+    ele carrega ou se a carga falhou (o `/` só indica que o processo está no ar).
     """
-    if modelo is None:
+    atual = ativo
+    if atual is None:
         raise HTTPException(
             status_code=503,
-            detail="Modelo não disponível. Execute: python gerar_modelo.py"
+            detail={"status": inicializacao["estado"], "erro": inicializacao["erro"]}
         )
+    return {"status": "pronto", "versao": atual.versao, "tempos_s": inicializacao["tempos_s"]}
+
+@app.get("/modelo", tags=["Modelo"])
+def versao_modelo():
+    """Versão ativa do modelo e seus metadados (parâmetros, métricas, ordem das features)."""
+    atual = _modelo_atual()
+    return {"versao": atual.versao, "metadados": atual.metadados}
+
+@app.post("/modelo/recarregar", tags=["Modelo"])
+def recarregar_versao_modelo():
+    """Recarrega agora a versão ativa do registro, sem esperar o intervalo de verificação."""
+    try:
+        atual, trocou = recarregar_modelo()
+    except FileNotFoundError as erro:
+        raise HTTPException(status_code=404, detail=str(erro))
+    return {"versao": atual.versao, "trocou": trocou}
+
+@app.get("/sombra", tags=["Modelo"])
+def relatorio_sombra():
+    """
+    Candidatos em sombra contra o modelo ativo, no tráfego recebido:
+    concordância, distribuição de classes, latência e descartes.
+    """
+    return sombra.relatorio()
+
+@app.post("/sombra/candidatos", tags=["Modelo"])
+def definir_candidatos(versoes: List[str] = Body(..., description="Versões do registro (lista vazia desliga)")):
+    """Troca as versões candidatas da pontuação em sombra; as estatísticas recomeçam."""
+    try:
+        candidatos = carregar_candidatos(versoes)
+    except FileNotFoundError as erro:
+        raise HTTPException(status_code=404, detail=str(erro))
+    return {"candidatos": list(candidatos)}
+
+@app.get("/microlotes", tags=["Monitoramento"])
+def estatisticas_microlotes():
+    """Histogramas de tamanho dos micro-lotes e de espera na fila do `/prever`."""
+    return {"habilitado": settings.microlote_habilitado, **coalescedor.estatisticas()}
+
+@app.get("/deriva", tags=["Monitoramento"])
+def deriva_entradas():
+    """
+    Distribuição das entradas e das classes previstas na janela recente contra
+    a do treino do modelo ativo: PSI, KS e situação de cada item.
+    """
+    return monitor.relatorio()
+
+@app.get("/auditoria", tags=["Monitoramento"])
+def estado_auditoria():
+    """Fila, gravação e descartes do registro de auditoria das previsões."""
+    return auditoria.estatisticas()
+
+@app.get("/admissao", tags=["Monitoramento"])
+def estado_admissao():
+    """Vagas em uso, fila de espera e requisições recusadas pelo controle de admissão."""
+    return {
+        "habilitado": admissao.habilitado,
+        "simultaneas": admissao.simultaneas,
+        "fila_maxima": admissao.fila_maxima,
+        "prazo_padrao_ms": admissao.prazo_padrao_s * 1000,
+        **admissao.contagens(),
+    }
+
+@app.get("/metrics", response_class=PlainTextResponse, tags=["Monitoramento"])
+def exportar_metricas():
+    """Histogramas por etapa e contadores de requisições, classes e erros, no formato do Prometheus."""
+    return PlainTextResponse(metricas.exportar(), media_type=TIPO_CONTEUDO)
+
+@app.post("/prever", response_model=PrevisaoResponse, response_model_exclude_none=True, tags=["Previsão"])
+async def prever_resolutividade(ocorrencia: OcorrenciaRequest, explicar: bool = False) -> PrevisaoResponse:
+    """
+    Analisa uma ocorrência e retorna a previsão de resolutividade.
+
+    Com `explicar=true`, inclui a contribuição de cada feature nas
+    probabilidades (pré-calculada na carga do modelo, ver `explicacao_modelo`).
+    """
+    atual = _modelo_atual()
+    etapas = metricas.cronometro()
     
-    features = np.array([[
-        ocorrencia.periodo_decorrido_dias,
-        ocorrencia.suspeito_conhecido,
-        ocorrencia.tem_testemunhas,
-        ocorrencia.tem_imagens_cameras,
-        ocorrencia.suspeito_rastreavel, 
-        ocorrencia.vestigios_preservados
-    ]])
-
-    # Fazer predição
-    previsao_classe = modelo.predict(features)[0] # Obter a classe predita (0, 1, 2)
-    probabilidades = modelo.predict_proba(features)[0] # Obter probabilidades para cada classe
-    status = RESOLUTIVIDADE_CLASSES.get(previsao_classe, "Desconhecido") # Mapear para string
-    confianca = probabilidades[previsao_classe] # Probabilidade da classe predita
-    
-    motivo = (f"Previsão baseada em modelo ML com confiança de {confianca * 100:.2f}%. "
-              f"Probabilidades - Baixa: {probabilidades[0] * 100:.2f}%, "
-              f"Média: {probabilidades[1] * 100:.2f}%, "
-              f"Alta: {probabilidades[2] * 100:.2f}%.")
-    
-    return PrevisaoResponse(
-        resolutividade=status,
-        motivo=motivo
-    )
+    linha = ocorrencia.linha()
+    etapas.marcar("features")
+    verificar_prazo()
+    # Fazer predição consultando a tabela compilada (mesmo resultado de predict/predict_proba),
+    # agrupando requisições concorrentes em micro-lotes quando habilitado
+    if settings.microlote_habilitado:
+        previsao_classe, probabilidades = await coalescedor.submeter(linha, atual.tabela)
+    else:
+        previsao_classe, probabilidades = atual.tabela.consultar(*linha)
+    etapas.marcar("predicao")
+    resposta = _montar_resposta(previsao_classe, probabilidades)
+    metricas.incrementar("previsoes_total", classe=resposta.resolutividade)
+    monitor.registrar(linha, previsao_classe)
+    await auditoria.registrar_async(atual.versao, linha, previsao_classe, probabilidades)
+    sombra.registrar(atual, linha, previsao_classe)
+    if explicar:
+        explicacao = atual.explicacoes.explicar(*linha, serializada=True)
+        resposta = Response(_com_explicacao(resposta, explicacao), media_type="application/json")
+    etapas.marcar("resposta")
+    return resposta
 
+@app.post("/prever/lote", response_model=List[PrevisaoResponse], response_model_exclude_none=True,
+          tags=["Previsão"])
+def prever_resolutividade_lote(ocorrencias: List[OcorrenciaRequest], explicar: bool = False) -> List[PrevisaoResponse]:
+    """
+    Analisa uma lista de ocorrências de uma só vez.
+
+    Monta uma única matriz de features e faz uma única consulta vetorizada;
+    a resposta é idêntica, linha a linha, à do endpoint `/prever` (inclusive
+    com `explicar=true`).
+    """
+    from src.api.validacao_colunar import matriz_ocorrencias
+
+    atual = _modelo_atual()
+    if not ocorrencias:
+        return []
+
+    etapas = metricas.cronometro()
+    features = matriz_ocorrencias(ocorrencias)
+    etapas.marcar("features")
+    verificar_prazo()
+
+    classes, probabilidades = atual.tabela.prever(features)
+    etapas.marcar("predicao")
+    respostas = [_montar_resposta(c, p) for c, p in zip(classes, probabilidades)]
+    metricas.contar_classes(r.resolutividade for r in respostas)
+    monitor.registrar_lote(features, classes)
+    auditoria.registrar_lote(atual.versao, features, classes, probabilidades)
+    sombra.registrar_lote(atual, features, classes)
+    if explicar:
+        explicacoes = atual.explicacoes.explicar_lote(features, serializada=True)
+        corpo = b"[" + b",".join(_com_explicacao(r, e) for r, e in zip(respostas, explicacoes)) + b"]"
+        respostas = Response(corpo, media_type="application/json")
+    etapas.marcar("resposta")
+    return respostas
+
+@app.post("/prever/colunas", response_model=PrevisaoColunasResponse, tags=["Previsão"])
+def prever_resolutividade_colunas(
+    ocorrencias: Any = Body(..., description="Lote por colunas ({feature: [valores]}) ou lista de ocorrências")
+) -> PrevisaoColunasResponse:
+    """
+    Como `/prever/lote`, com validação colunar (`src/api/validacao_colunar.py`)
+    em vez de um `OcorrenciaRequest` por linha, e resposta por colunas. As
+    regras de validação são as do schema; uma linha inválida não derruba o
+    lote: fica com null na resposta e aparece em `erros` com o seu índice.
+    """
+    from src.api.validacao_colunar import validar_lote
+
+    atual = _modelo_atual()
+    etapas = metricas.cronometro()
+    try:
+        lote = validar_lote(ocorrencias)
+    except ValueError as erro:
+        raise HTTPException(status_code=422, detail=str(erro))
+    etapas.marcar("features")
+    verificar_prazo()
+
+    classes, probabilidades = atual.tabela.prever(lote.X)
+    etapas.marcar("predicao")
+    resolutividade, motivo = [None] * lote.total, [None] * lote.total
+    for indice, classe, linha in zip(lote.indices.tolist(), classes.tolist(), probabilidades.tolist()):
+        resolutividade[indice] = RESOLUTIVIDADE_CLASSES[classe]
+        motivo[indice] = _motivo(classe, linha)
+    etapas.marcar("resposta")
+    metricas.contar_classes(resolutividade[i] for i in lote.indices.tolist())
+    monitor.registrar_lote(lote.X, classes)
+    auditoria.registrar_lote(atual.versao, lote.X, classes, probabilidades)
+    sombra.registrar_lote(atual, lote.X, classes)
+    return {"resolutividade": resolutividade, "motivo": motivo, "erros": lote.erros}
+
+@app.post("/prever/lote/binario", response_class=Response, tags=["Previsão"])
+def prever_resolutividade_lote_binario(
+    corpo: bytes = Body(b"", media_type="application/octet-stream")
+) -> Response:
+    """
+    Como `/prever/lote`, no formato binário de `src/api/formato_binario.py`:
+    registros de 3 bytes na entrada; classes uint8 e probabilidades float32 na saída.
+    """
+    from src.api import formato_binario
 
+    atual = _modelo_atual()
+    etapas = metricas.cronometro()
+    try:
+        dias, codigos = formato_binario.decodificar_ocorrencias(corpo)
+    except ValueError as erro:
+        raise HTTPException(status_code=422, detail=str(erro))
+    etapas.marcar("features")
+    verificar_prazo()
 
-  
+    # Os campos do buffer vão direto para a consulta da tabela, sem montar a matriz de features
+    classes, probabilidades = atual.tabela.prever_codificado(dias, codigos)
+    etapas.marcar("predicao")
+    conteudo = formato_binario.codificar_resposta_modelo(classes, probabilidades)
+    etapas.marcar("resposta")
+    metricas.contar_contagens(formato_binario.contar_por_classe(classes))
+    monitor.registrar_codificado(dias, codigos, classes)
+    auditoria.registrar_codificado(atual.versao, dias, codigos, classes, probabilidades)
+    sombra.registrar_codificado(atual, dias, codigos, classes)
+    return Response(conteudo, media_type=formato_binario.TIPO_CONTEUDO)
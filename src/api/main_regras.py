@@ -1,15 +1,148 @@
-from fastapi import FastAPI
-from src.models.schemas import OcorrenciaRequest, PrevisaoResponse
+import asyncio
+import hashlib
+import json
+import threading
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any, List
+
+from fastapi import Body, FastAPI, HTTPException
+from fastapi.responses import PlainTextResponse, Response
+from src.models.schemas import OcorrenciaRequest, PrevisaoColunasResponse, PrevisaoResponse
+from src.api import formato_binario
+from src.api.admissao import MiddlewareAdmissao, criar_controle, verificar_prazo
+from src.api.auditoria import criar_auditoria
+from src.api.constantes import RESOLUTIVIDADE_CLASSES
+from src.api.metricas import TIPO_CONTEUDO, Metricas
+from src.api.monitor_deriva import MonitorDeriva, carregar_referencia
+from src.api.registro_modelos import RegistroModelos
+from src.api.tabela_regras import TabelaRegras, compilar_regras
+from src.api.validacao_colunar import matriz_ocorrencias, validar_lote
+from src.config import settings
+
+
+# Conjunto de regras em uso, já compilado em tabela de decisão (src/api/tabela_regras.py);
+# trocado inteiro de uma só vez quando o arquivo de regras muda
+regras_ativas = None
+_impressao_regras = None
+_trava_recarga = threading.Lock()
+
+
+def recarregar_regras(forcar=False):
+    """
+    Recompila `settings.arquivo_regras` se o conteúdo mudou e troca a tabela em uso.
+
+    Um arquivo inválido levanta ValueError e mantém as regras anteriores.
+    Retorna `(tabela, trocou)`.
+    """
+    global regras_ativas, _impressao_regras
+    with _trava_recarga:
+        conteudo = Path(settings.arquivo_regras).read_bytes()
+        impressao = hashlib.sha256(conteudo).hexdigest()
+        if not forcar and regras_ativas is not None and impressao == _impressao_regras:
+            return regras_ativas, False
+        nova = compilar_regras(json.loads(conteudo))
+        regras_ativas, _impressao_regras = nova, impressao
+        print(f"✓ Regras '{nova.versao}' ativas ({len(nova.nomes)} regras, {len(nova.classes)} faixas de dias)")
+        for problema in nova.problemas:
+            print(f"  ⚠️ {problema['mensagem']}")
+        return nova, True
+
+
+def _regras_atuais() -> TabelaRegras:
+    """Tabela em uso no início da requisição (compilada na primeira chamada, se preciso)."""
+    atual = regras_ativas
+    if atual is None:
+        atual, _ = recarregar_regras()
+    return atual
+
+
+# Versão do registro de modelos cuja referência de treino o monitor de deriva usa
+_versao_referencia = None
+
+
+def atualizar_referencia():
+    """
+    Usa como referência da deriva as estatísticas de treino da versão ativa do
+    registro de modelos (os dados de treino são os mesmos para os dois motores).
+    """
+    global _versao_referencia
+    registro = RegistroModelos(settings.diretorio_modelos)
+    versao = registro.versao_ativa()
+    if versao != _versao_referencia:
+        monitor.trocar_referencia(carregar_referencia(registro.caminho(versao)) if versao else None)
+        _versao_referencia = versao
+
+
+async def _observar_regras():
+    """Confere periodicamente o arquivo de regras e recompila quando ele muda."""
+    while True:
+        await asyncio.sleep(settings.recarga_intervalo_s)
+        try:
+            await asyncio.to_thread(recarregar_regras)
+        except Exception as erro:
+            print(f"⚠️ Falha ao recarregar as regras (mantidas as anteriores): {erro}")
+        try:
+            await asyncio.to_thread(atualizar_referencia)
+        except Exception as erro:
+            print(f"⚠️ Falha ao atualizar a referência da deriva: {erro}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Um arquivo de regras inválido impede a subida, em vez de falhar na primeira requisição
+    recarregar_regras()
+    atualizar_referencia()
+    auditoria.iniciar()
+    tarefa = None
+    if settings.recarga_intervalo_s > 0:
+        tarefa = asyncio.create_task(_observar_regras())
+    yield
+    if tarefa is not None:
+        tarefa.cancel()
+    # Grava o que ainda estiver na fila da auditoria antes de encerrar
+    await asyncio.to_thread(auditoria.fechar)
 
 
 # --- Configuração da Aplicação ---
 app = FastAPI(
     title="API de Análise de Resolutividade Criminal",
     description="Prevê o potencial de resolução de uma ocorrência com base em regras de negócio.",
-    version="1.1.0" # Versão ajustada para refletir a mudança de lógica
+    version="1.2.0", # Regras declarativas compiladas em tabela de decisão
+    lifespan=lifespan
+)
+
+# Tempo por etapa de cada requisição, contadores e /metrics
+metricas = Metricas("regras", habilitadas=settings.metricas_habilitadas)
+app.router.route_class = metricas.classe_rota()
+
+# Limite de concorrência, fila de espera e prazo das rotas /prever* (429/503 com Retry-After)
+admissao = criar_controle("regras", settings.admissao_simultaneas_regras)
+app.add_middleware(MiddlewareAdmissao, controles=lambda scope: [admissao])
+metricas.registrar_medida(
+    "admissao", admissao.contagens, "Vagas em uso, fila e requisições recusadas pelo controle de admissão.", "estado"
+)
+
+# Entradas e classes previstas da janela recente, comparadas com a referência do treino (GET /deriva)
+monitor = MonitorDeriva("regras", settings.deriva_janela_s, settings.deriva_fatias)
+metricas.registrar_medida(
+    "deriva_psi", monitor.psi_atual, "PSI da janela recente contra a referência do treino.", "item"
+)
+
+# Registro de cada previsão (entradas, classe e versão das regras), gravado fora da requisição
+auditoria = criar_auditoria("regras")
+metricas.registrar_medida(
+    "auditoria_previsoes", auditoria.contagens, "Previsões na fila, gravadas e descartadas pela auditoria.", "estado"
 )
 
 
+def _montar_resposta(tabela, classe, motivo) -> PrevisaoResponse:
+    """Monta a resposta a partir dos códigos de classe e de motivo da tabela de regras."""
+    return PrevisaoResponse(
+        resolutividade=RESOLUTIVIDADE_CLASSES[int(classe)],
+        motivo=tabela.motivos[int(motivo)]
+    )
+
 
 # --- Endpoints da API ---
 
@@ -18,40 +151,158 @@ def health_check():
     """Endpoint de health check"""
     return {"status": "ok", "message": "API funcionando"}
 
-@app.post("/prever", response_model=PrevisaoResponse, tags=["Previsão"])
+@app.get("/deriva", tags=["Monitoramento"])
+def deriva_entradas():
+    """
+    Distribuição das entradas e das classes previstas na janela recente contra
+    a do treino da versão ativa do registro de modelos: PSI, KS e situação de cada item.
+    """
+    return monitor.relatorio()
+
+@app.get("/auditoria", tags=["Monitoramento"])
+def estado_auditoria():
+    """Fila, gravação e descartes do registro de auditoria das previsões."""
+    return auditoria.estatisticas()
+
+@app.get("/admissao", tags=["Monitoramento"])
+def estado_admissao():
+    """Vagas em uso, fila de espera e requisições recusadas pelo controle de admissão."""
+    return {
+        "habilitado": admissao.habilitado,
+        "simultaneas": admissao.simultaneas,
+        "fila_maxima": admissao.fila_maxima,
+        "prazo_padrao_ms": admissao.prazo_padrao_s * 1000,
+        **admissao.contagens(),
+    }
+
+@app.get("/metrics", response_class=PlainTextResponse, tags=["Monitoramento"])
+def exportar_metricas():
+    """Histogramas por etapa e contadores de requisições, classes e erros, no formato do Prometheus."""
+    return PlainTextResponse(metricas.exportar(), media_type=TIPO_CONTEUDO)
+
+@app.get("/regras", tags=["Regras"])
+def regras_em_uso():
+    """Versão do conjunto de regras em uso, as regras em ordem de prioridade, os motivos e os avisos do validador."""
+    tabela = _regras_atuais()
+    return {
+        "versao": tabela.versao,
+        "arquivo": settings.arquivo_regras,
+        "regras": list(tabela.nomes),
+        "motivos": list(tabela.motivos),
+        "faixas_de_dias": len(tabela.classes),
+        "problemas": list(tabela.problemas),
+    }
+
+@app.post("/regras/recarregar", tags=["Regras"])
+def recarregar_conjunto_regras():
+    """Recompila agora o arquivo de regras, sem esperar o intervalo de verificação."""
+    try:
+        tabela, trocou = recarregar_regras()
+    except FileNotFoundError as erro:
+        raise HTTPException(status_code=404, detail=str(erro))
+    except ValueError as erro:
+        raise HTTPException(status_code=422, detail=f"Regras inválidas (mantidas as anteriores): {erro}")
+    return {"versao": tabela.versao, "trocou": trocou, "problemas": list(tabela.problemas)}
+
+@app.post("/prever", response_model=PrevisaoResponse, response_model_exclude_none=True, tags=["Previsão"])
 def prever_resolutividade(ocorrencia: OcorrenciaRequest) -> PrevisaoResponse:
     """
     Analisa uma ocorrência e retorna a previsão de resolutividade.
     """
-    # Contagem de evidências físicas e testemunhais
-    total_evidencias = sum([
-        ocorrencia.tem_testemunhas,
-        ocorrencia.tem_imagens_cameras,
-        ocorrencia.vestigios_preservados
-    ])
-
-    # --- Regras de Negócio para Classificação ---
-
-    # REGRA 1: ALTA RESOLUTIVIDADE
-    # Fato recente com suspeito conhecido/rastreável e alguma evidência.
-    if ocorrencia.periodo_decorrido_dias <= 5 and (ocorrencia.suspeito_conhecido or ocorrencia.suspeito_rastreavel) and total_evidencias >= 1:
-        return PrevisaoResponse(
-            resolutividade="Alta",
-            motivo="Fato recente com identificação/rastreio do suspeito e evidências disponíveis."
-        )
-
-    # REGRA 2: MÉDIA RESOLUTIVIDADE
-    # Fato menos recente com suspeito conhecido, ou muitas evidências.
-    if (ocorrencia.periodo_decorrido_dias <= 30 and ((ocorrencia.suspeito_conhecido or ocorrencia.suspeito_rastreavel) and total_evidencias >= 1)) or \
-          total_evidencias >= 3 and ocorrencia.periodo_decorrido_dias <= 60:
-        return PrevisaoResponse(
-            resolutividade="Média",
-            motivo="Boas pistas iniciais (suspeito conhecido ou múltiplas evidências)."
-        )
-
-    # REGRA 3: BAIXA RESOLUTIVIDADE (Default)
-    # Poucas pistas ou muito tempo decorrido.
-    return PrevisaoResponse(
-        resolutividade="Baixa",
-        motivo="Poucas pistas iniciais ou tempo decorrido elevado."
-    )
\ No newline at end of file
+    tabela = _regras_atuais()
+    etapas = metricas.cronometro()
+    linha = ocorrencia.linha()
+    etapas.marcar("features")
+    verificar_prazo()
+    # Uma consulta na tabela de decisão compilada a partir do arquivo de regras
+    classe, motivo = tabela.consultar(*linha)
+    etapas.marcar("predicao")
+    resposta = _montar_resposta(tabela, classe, motivo)
+    etapas.marcar("resposta")
+    metricas.incrementar("previsoes_total", classe=resposta.resolutividade)
+    monitor.registrar(linha, classe)
+    auditoria.registrar(tabela.versao, linha, classe)
+    return resposta
+
+@app.post("/prever/lote", response_model=List[PrevisaoResponse], response_model_exclude_none=True, tags=["Previsão"])
+def prever_resolutividade_lote(ocorrencias: List[OcorrenciaRequest]) -> List[PrevisaoResponse]:
+    """
+    Analisa uma lista de ocorrências de uma só vez.
+
+    Monta uma única matriz de features e faz uma única consulta vetorizada na
+    tabela de regras; a resposta é idêntica, linha a linha, à do endpoint unitário.
+    """
+    tabela = _regras_atuais()
+    if not ocorrencias:
+        return []
+
+    etapas = metricas.cronometro()
+    features = matriz_ocorrencias(ocorrencias)
+    etapas.marcar("features")
+    verificar_prazo()
+
+    classes, motivos = tabela.prever(features)
+    etapas.marcar("predicao")
+    respostas = [_montar_resposta(tabela, c, m) for c, m in zip(classes.tolist(), motivos.tolist())]
+    etapas.marcar("resposta")
+    metricas.contar_classes(r.resolutividade for r in respostas)
+    monitor.registrar_lote(features, classes)
+    auditoria.registrar_lote(tabela.versao, features, classes)
+    return respostas
+
+@app.post("/prever/colunas", response_model=PrevisaoColunasResponse, tags=["Previsão"])
+def prever_resolutividade_colunas(
+    ocorrencias: Any = Body(..., description="Lote por colunas ({feature: [valores]}) ou lista de ocorrências")
+) -> PrevisaoColunasResponse:
+    """
+    Como `/prever/lote`, com validação colunar (`src/api/validacao_colunar.py`)
+    em vez de um `OcorrenciaRequest` por linha, e resposta por colunas. As
+    regras de validação são as do schema; uma linha inválida não derruba o
+    lote: fica com null na resposta e aparece em `erros` com o seu índice.
+    """
+    tabela = _regras_atuais()
+    etapas = metricas.cronometro()
+    try:
+        lote = validar_lote(ocorrencias)
+    except ValueError as erro:
+        raise HTTPException(status_code=422, detail=str(erro))
+    etapas.marcar("features")
+    verificar_prazo()
+
+    classes, motivos = tabela.prever(lote.X)
+    etapas.marcar("predicao")
+    resolutividade, motivo = [None] * lote.total, [None] * lote.total
+    for indice, classe, codigo in zip(lote.indices.tolist(), classes.tolist(), motivos.tolist()):
+        resolutividade[indice] = RESOLUTIVIDADE_CLASSES[classe]
+        motivo[indice] = tabela.motivos[codigo]
+    etapas.marcar("resposta")
+    metricas.contar_classes(resolutividade[i] for i in lote.indices.tolist())
+    monitor.registrar_lote(lote.X, classes)
+    auditoria.registrar_lote(tabela.versao, lote.X, classes)
+    return {"resolutividade": resolutividade, "motivo": motivo, "erros": lote.erros}
+
+@app.post("/prever/lote/binario", response_class=Response, tags=["Previsão"])
+def prever_resolutividade_lote_binario(
+    corpo: bytes = Body(b"", media_type=formato_binario.TIPO_CONTEUDO)
+) -> Response:
+    """
+    Como `/prever/lote`, no formato binário de `src/api/formato_binario.py`:
+    registros de 3 bytes na entrada; códigos de classe e de motivo (uint8) na saída.
+    """
+    tabela = _regras_atuais()
+    etapas = metricas.cronometro()
+    try:
+        dias, codigos = formato_binario.decodificar_ocorrencias(corpo)
+    except ValueError as erro:
+        raise HTTPException(status_code=422, detail=str(erro))
+    etapas.marcar("features")
+    verificar_prazo()
+
+    classes, motivos = tabela.prever_codificado(dias, codigos)
+    etapas.marcar("predicao")
+    conteudo = formato_binario.codificar_resposta_regras(classes, motivos)
+    etapas.marcar("resposta")
+    metricas.contar_contagens(formato_binario.contar_por_classe(classes))
+    monitor.registrar_codificado(dias, codigos, classes)
+    auditoria.registrar_codificado(tabela.versao, dias, codigos, classes)
+    return Response(conteudo, media_type=formato_binario.TIPO_CONTEUDO)
@@ -0,0 +1,201 @@
+"""
+API unificada: regras de negócio e modelo de ML em um único processo.
+
+O motor é escolhido a cada requisição (`?motor=regras|modelo|ambos`). No modo
+`ambos` a ocorrência é validada e convertida em features uma única vez,
+pontuada pelos dois motores e devolvida com os dois resultados e a indicação
+de concordância. O modelo e as regras são carregados, recarregados e
+servidos pelo mesmo estado de `main_modelo` (registro, tabela compilada e
+micro-lotes) e de `main_regras` (arquivo de regras compilado); as duas APIs
+originais continuam disponíveis sob `/regras` e `/modelo`.
+
+Uso (a partir da raiz do projeto):
+    uvicorn src.api.main_unificado:app --port 8000
+"""
+from contextlib import asynccontextmanager
+from urllib.parse import parse_qs
+from enum import Enum
+from typing import List, Union
+
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
+from src.models.schemas import ComparacaoResponse, OcorrenciaRequest, PrevisaoResponse
+from src.api import main_modelo, main_regras
+from src.api.admissao import MiddlewareAdmissao, verificar_prazo
+from src.api.metricas import TIPO_CONTEUDO, Metricas
+from src.config import settings
+
+
+class Motor(str, Enum):
+    regras = "regras"
+    modelo = "modelo"
+    ambos = "ambos"
+
+
+Resposta = Union[PrevisaoResponse, ComparacaoResponse]
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Regras (arquivo compilado e observado) e modelo (carga, registro e /ready) dos dois motores
+    async with main_regras.lifespan(app), main_modelo.lifespan(app):
+        yield
+
+
+# --- Configuração da Aplicação ---
+app = FastAPI(
+    title="API de Análise de Resolutividade Criminal",
+    description="Prevê o potencial de resolução de uma ocorrência com regras de negócio, "
+                "com o modelo de ML ou com os dois lado a lado.",
+    version="1.0",
+    lifespan=lifespan
+)
+
+# Tempo por etapa de cada requisição, contadores e /metrics
+metricas = Metricas("unificado", habilitadas=settings.metricas_habilitadas)
+app.router.route_class = metricas.classe_rota()
+
+
+def _controles_do_motor(scope):
+    """Controles de admissão dos motores usados pela requisição (os mesmos de `/regras` e `/modelo`)."""
+    motor = parse_qs(scope["query_string"].decode("latin-1")).get("motor", [Motor.modelo.value])[0]
+    if motor == Motor.regras:
+        return [main_regras.admissao]
+    if motor == Motor.modelo:
+        return [main_modelo.admissao]
+    return [main_regras.admissao, main_modelo.admissao]
+
+
+# Limite de concorrência, fila de espera e prazo das rotas /prever* de cada motor
+app.add_middleware(MiddlewareAdmissao, controles=_controles_do_motor)
+
+
+def _comparar(regras: PrevisaoResponse, modelo: PrevisaoResponse) -> ComparacaoResponse:
+    concordam = regras.resolutividade == modelo.resolutividade
+    if not concordam:
+        metricas.incrementar("discordancias_total", regras=regras.resolutividade, modelo=modelo.resolutividade)
+    return ComparacaoResponse(regras=regras, modelo=modelo, concordam=concordam)
+
+
+# --- Endpoints da API ---
+
+@app.get("/")
+def health_check():
+    """Endpoint de health check"""
+    return {"status": "ok", "message": "API funcionando"}
+
+@app.get("/ready")
+def readiness_check():
+    """Prontidão do motor de ML (as regras não dependem de carga); ver `main_modelo.readiness_check`."""
+    return main_modelo.readiness_check()
+
+@app.get("/deriva", tags=["Monitoramento"])
+def deriva_entradas():
+    """Relatório de deriva de cada motor (os mesmos de `/regras/deriva` e `/modelo/deriva`)."""
+    return {"regras": main_regras.monitor.relatorio(), "modelo": main_modelo.monitor.relatorio()}
+
+@app.get("/auditoria", tags=["Monitoramento"])
+def estado_auditoria():
+    """Registro de auditoria de cada motor (os mesmos de `/regras/auditoria` e `/modelo/auditoria`)."""
+    return {"regras": main_regras.auditoria.estatisticas(), "modelo": main_modelo.auditoria.estatisticas()}
+
+@app.get("/admissao", tags=["Monitoramento"])
+def estado_admissao():
+    """Controle de admissão de cada motor (os mesmos de `/regras/admissao` e `/modelo/admissao`)."""
+    return {"regras": main_regras.estado_admissao(), "modelo": main_modelo.estado_admissao()}
+
+@app.get("/metrics", response_class=PlainTextResponse, tags=["Monitoramento"])
+def exportar_metricas():
+    """Histogramas por etapa e contadores de requisições, classes, discordâncias e erros, no formato do Prometheus."""
+    return PlainTextResponse(metricas.exportar(), media_type=TIPO_CONTEUDO)
+
+@app.post("/prever", response_model=Resposta, response_model_exclude_none=True, tags=["Previsão"])
+async def prever_resolutividade(
+    ocorrencia: OcorrenciaRequest, motor: Motor = Motor.modelo, explicar: bool = False
+) -> Resposta:
+    """
+    Analisa uma ocorrência com o motor escolhido. Em `ambos`, retorna os dois
+    resultados e se eles concordam. `explicar=true` inclui a explicação do
+    modelo de ML (ver `main_modelo.prever_resolutividade`).
+    """
+    # 503 antes de qualquer trabalho se o modelo for necessário e não estiver carregado
+    atual = main_modelo._modelo_atual() if motor != Motor.regras else None
+    tabela_regras = main_regras._regras_atuais()
+    etapas = metricas.cronometro()
+    linha = ocorrencia.linha()
+    etapas.marcar("features")
+    verificar_prazo()
+
+    if motor != Motor.modelo:
+        classe, motivo = tabela_regras.consultar(*linha)
+        regras = main_regras._montar_resposta(tabela_regras, classe, motivo)
+        metricas.incrementar("previsoes_total", classe=regras.resolutividade, motor="regras")
+        main_regras.monitor.registrar(linha, classe)
+        await main_regras.auditoria.registrar_async(tabela_regras.versao, linha, classe)
+    if motor != Motor.regras:
+        if settings.microlote_habilitado:
+            classe, probabilidades = await main_modelo.coalescedor.submeter(linha, atual.tabela)
+        else:
+            classe, probabilidades = atual.tabela.consultar(*linha)
+        explicacao = atual.explicacoes.explicar(*linha) if explicar else None
+        modelo = main_modelo._montar_resposta(classe, probabilidades, explicacao)
+        metricas.incrementar("previsoes_total", classe=modelo.resolutividade, motor="modelo")
+        main_modelo.monitor.registrar(linha, classe)
+        await main_modelo.auditoria.registrar_async(atual.versao, linha, classe, probabilidades)
+        main_modelo.sombra.registrar(atual, linha, classe)
+    etapas.marcar("predicao")
+
+    if motor == Motor.ambos:
+        resposta = _comparar(regras, modelo)
+        etapas.marcar("resposta")
+        return resposta
+    return regras if motor == Motor.regras else modelo
+
+@app.post("/prever/lote", response_model=List[Resposta], response_model_exclude_none=True, tags=["Previsão"])
+def prever_resolutividade_lote(
+    ocorrencias: List[OcorrenciaRequest], motor: Motor = Motor.modelo, explicar: bool = False
+) -> List[Resposta]:
+    """
+    Analisa uma lista de ocorrências com o motor escolhido, em uma única
+    matriz de features compartilhada pelos dois motores.
+    """
+    from src.api.validacao_colunar import matriz_ocorrencias
+
+    atual = main_modelo._modelo_atual() if motor != Motor.regras else None
+    tabela_regras = main_regras._regras_atuais()
+    if not ocorrencias:
+        return []
+
+    etapas = metricas.cronometro()
+    features = matriz_ocorrencias(ocorrencias)
+    etapas.marcar("features")
+    verificar_prazo()
+
+    if motor != Motor.modelo:
+        classes, motivos = tabela_regras.prever(features)
+        regras = [
+            main_regras._montar_resposta(tabela_regras, c, m) for c, m in zip(classes.tolist(), motivos.tolist())
+        ]
+        metricas.contar_classes((r.resolutividade for r in regras), motor="regras")
+        main_regras.monitor.registrar_lote(features, classes)
+        main_regras.auditoria.registrar_lote(tabela_regras.versao, features, classes)
+    if motor != Motor.regras:
+        classes, probabilidades = atual.tabela.prever(features)
+        explicacoes = atual.explicacoes.explicar_lote(features) if explicar else [None] * len(features)
+        modelo = [main_modelo._montar_resposta(c, p, e) for c, p, e in zip(classes, probabilidades, explicacoes)]
+        metricas.contar_classes((r.resolutividade for r in modelo), motor="modelo")
+        main_modelo.monitor.registrar_lote(features, classes)
+        main_modelo.auditoria.registrar_lote(atual.versao, features, classes, probabilidades)
+        main_modelo.sombra.registrar_lote(atual, features, classes)
+    etapas.marcar("predicao")
+
+    if motor == Motor.ambos:
+        respostas = [_comparar(r, m) for r, m in zip(regras, modelo)]
+        etapas.marcar("resposta")
+        return respostas
+    return regras if motor == Motor.regras else modelo
+
+
+# As APIs de cada motor, com as suas rotas de sempre (ex.: /regras/prever, /modelo/modelo/recarregar)
+app.mount("/regras", main_regras.app)
+app.mount("/modelo", main_modelo.app)
@@ -0,0 +1,219 @@
+"""
+Instrumentação das APIs: tempo de cada etapa do atendimento, contadores e `/metrics`.
+
+Cada rota da API é criada com a classe devolvida por `Metricas.classe_rota`,
+que marca a chegada da requisição e mede a duração total. Dentro do endpoint,
+um `Cronometro` registra as etapas em sequência:
+
+    validacao     leitura do corpo, JSON e validação Pydantic (até o endpoint começar)
+    features      montagem da linha/matriz de features
+    predicao      consulta ao modelo ou às regras
+    resposta      classe, justificativa (`motivo`) e `PrevisaoResponse`
+    serializacao  conversão da resposta para JSON (depois que o endpoint retorna)
+
+Os tempos vão para histogramas de limites fixos (`Histograma`), com custo de
+uma busca binária e um lock por observação, e são expostos no formato texto do
+Prometheus por `exportar`.
+"""
+import time
+from contextvars import ContextVar
+from threading import Lock
+
+from fastapi import HTTPException
+from fastapi.exceptions import RequestValidationError
+from fastapi.routing import APIRoute
+
+from src.api.histograma import Histograma
+
+PREFIXO = "resolutividade"
+TIPO_CONTEUDO = "text/plain; version=0.0.4; charset=utf-8"
+# Limites (em segundos) dos histogramas de duração: de 10 µs a 1 s
+LIMITES_SEGUNDOS = (
+    1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 2.5e-3, 5e-3, 1e-2, 2.5e-2, 5e-2, 0.1, 0.25, 1.0,
+)
+
+# Marcas da requisição em andamento, lidas pelo `Cronometro` dentro do endpoint
+# (o contexto é copiado para a thread dos endpoints síncronos)
+_requisicao = ContextVar("requisicao_metricas", default=None)
+
+
+class _Marcas:
+    __slots__ = ("rota", "inicio", "ultima")
+
+    def __init__(self, rota, inicio):
+        self.rota = rota
+        self.inicio = inicio
+        self.ultima = None
+
+
+class Cronometro:
+    """Mede etapas consecutivas de um endpoint; cada `marcar` fecha a etapa anterior."""
+
+    def __init__(self, metricas):
+        self.metricas = metricas
+        self.marcas = _requisicao.get()
+        self.ultima = time.perf_counter()
+        if self.marcas is not None:
+            metricas.observar_etapa(self.marcas.rota, "validacao", self.ultima - self.marcas.inicio)
+
+    def marcar(self, etapa):
+        agora = time.perf_counter()
+        rota = self.marcas.rota if self.marcas is not None else "-"
+        self.metricas.observar_etapa(rota, etapa, agora - self.ultima)
+        self.ultima = agora
+        if self.marcas is not None:
+            self.marcas.ultima = agora
+
+
+class _CronometroDesligado:
+    def marcar(self, etapa):
+        pass
+
+
+class Metricas:
+    """
+    Histogramas e contadores de uma API, exportados no formato do Prometheus.
+
+    Com `habilitadas=False` nada é medido (usado para medir o custo da instrumentação).
+    """
+
+    def __init__(self, api, habilitadas=True):
+        self.api = api
+        self.habilitadas = habilitadas
+        self._etapas = {}
+        self._contadores = {}
+        self._histogramas_externos = []
+        self._medidas_externas = []
+        self._trava = Lock()
+
+    def cronometro(self):
+        return Cronometro(self) if self.habilitadas else _CronometroDesligado()
+
+    def observar_etapa(self, rota, etapa, segundos):
+        chave = (rota, etapa)
+        histograma = self._etapas.get(chave)
+        if histograma is None:
+            with self._trava:
+                histograma = self._etapas.setdefault(chave, Histograma(LIMITES_SEGUNDOS))
+        histograma.registrar(segundos)
+
+    def incrementar(self, nome, vezes=1, **rotulos):
+        if not self.habilitadas:
+            return
+        chave = (nome, tuple(sorted(rotulos.items())))
+        with self._trava:
+            self._contadores[chave] = self._contadores.get(chave, 0) + vezes
+
+    def contar_classes(self, classes, **rotulos):
+        """Distribuição das classes previstas (`classes`: nomes, um por previsão)."""
+        if not self.habilitadas:
+            return
+        contagem = {}
+        for classe in classes:
+            contagem[classe] = contagem.get(classe, 0) + 1
+        self.contar_contagens(contagem, **rotulos)
+
+    def contar_contagens(self, contagem, **rotulos):
+        """Como `contar_classes`, a partir das contagens já agregadas (`{classe: vezes}`)."""
+        for classe, vezes in contagem.items():
+            if vezes:
+                self.incrementar("previsoes_total", int(vezes), classe=classe, **rotulos)
+
+    def registrar_histograma(self, nome, histograma, descricao):
+        """Inclui na exportação um histograma mantido por outro componente (ex.: micro-lotes)."""
+        self._histogramas_externos.append((nome, histograma, descricao))
+
+    def registrar_medida(self, nome, funcao, descricao, rotulo):
+        """
+        Inclui na exportação um gauge calculado no momento da coleta por outro
+        componente (ex.: deriva): `funcao()` retorna `{valor do rótulo: valor}`.
+        """
+        self._medidas_externas.append((nome, funcao, descricao, rotulo))
+
+    def classe_rota(self):
+        """Classe de rota que mede a duração total, a serialização e os erros de cada requisição."""
+        if not self.habilitadas:
+            return APIRoute
+        metricas = self
+
+        class RotaInstrumentada(APIRoute):
+            def get_route_handler(self):
+                manipulador = super().get_route_handler()
+                rota = self.path
+
+                async def manipulador_instrumentado(request):
+                    marcas = _Marcas(rota, time.perf_counter())
+                    token = _requisicao.set(marcas)
+                    status = 500
+                    try:
+                        resposta = await manipulador(request)
+                        status = resposta.status_code
+                        return resposta
+                    except RequestValidationError:
+                        status = 422
+                        raise
+                    except HTTPException as erro:
+                        status = erro.status_code
+                        raise
+                    finally:
+                        _requisicao.reset(token)
+                        fim = time.perf_counter()
+                        if marcas.ultima is not None:
+                            metricas.observar_etapa(rota, "serializacao", fim - marcas.ultima)
+                        metricas.observar_etapa(rota, "total", fim - marcas.inicio)
+                        metricas.incrementar("requisicoes_total", rota=rota, status=str(status))
+                        if status >= 400:
+                            metricas.incrementar("erros_total", rota=rota, status=str(status))
+
+                return manipulador_instrumentado
+
+        return RotaInstrumentada
+
+    def exportar(self):
+        """Métricas no formato texto de exposição do Prometheus (versão 0.0.4)."""
+        linhas = []
+        api = f'api="{self.api}"'
+
+        nome = f"{PREFIXO}_etapa_segundos"
+        linhas += [f"# HELP {nome} Duração de cada etapa do atendimento da requisição.",
+                   f"# TYPE {nome} histogram"]
+        with self._trava:
+            etapas = sorted(self._etapas.items())
+        for (rota, etapa), histograma in etapas:
+            linhas += _linhas_histograma(nome, histograma, f'{api},rota="{rota}",etapa="{etapa}"')
+
+        for nome_externo, histograma, descricao in self._histogramas_externos:
+            nome = f"{PREFIXO}_{nome_externo}"
+            linhas += [f"# HELP {nome} {descricao}", f"# TYPE {nome} histogram"]
+            linhas += _linhas_histograma(nome, histograma, api)
+
+        for nome_externo, funcao, descricao, rotulo in self._medidas_externas:
+            nome = f"{PREFIXO}_{nome_externo}"
+            linhas += [f"# HELP {nome} {descricao}", f"# TYPE {nome} gauge"]
+            for valor_rotulo, valor in sorted(funcao().items()):
+                linhas.append(f'{nome}{{{api},{rotulo}="{valor_rotulo}"}} {valor}')
+
+        with self._trava:
+            contadores = sorted(self._contadores.items())
+        tipos_declarados = set()
+        for (nome_contador, rotulos), valor in contadores:
+            nome = f"{PREFIXO}_{nome_contador}"
+            if nome not in tipos_declarados:
+                linhas.append(f"# TYPE {nome} counter")
+                tipos_declarados.add(nome)
+            rotulos = ",".join([api] + [f'{chave}="{valor_rotulo}"' for chave, valor_rotulo in rotulos])
+            linhas.append(f"{nome}{{{rotulos}}} {valor}")
+        return "\n".join(linhas) + "\n"
+
+
+def _linhas_histograma(nome, histograma, rotulos):
+    """Linhas `_bucket` (cumulativas), `_sum` e `_count` de um histograma."""
+    contagens, soma, total = histograma.instantaneo()
+    linhas, acumulado = [], 0
+    for limite, contagem in zip(histograma.limites, contagens):
+        acumulado += contagem
+        linhas.append(f'{nome}_bucket{{{rotulos},le="{limite:g}"}} {acumulado}')
+    linhas.append(f'{nome}_bucket{{{rotulos},le="+Inf"}} {total}')
+    linhas.append(f"{nome}_sum{{{rotulos}}} {soma:.9g}")
+    linhas.append(f"{nome}_count{{{rotulos}}} {total}")
+    return linhas
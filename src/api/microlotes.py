@@ -0,0 +1,114 @@
+"""
+Agrupamento adaptativo de requisições concorrentes em micro-lotes.
+
+Sob carga, cada `/prever` faz uma chamada minúscula ao modelo, e quase todo o
+tempo vai para o custo fixo por chamada. O `Coalescedor` junta as ocorrências
+que chegam dentro de uma janela curta (ou até atingir o tamanho máximo),
+pontua todas como uma única matriz e devolve a cada requisição o seu resultado.
+
+A janela é adaptativa: enquanto os lotes recentes têm em média menos de duas
+requisições (pouca concorrência), o lote fecha já na próxima iteração do event
+loop, sem somar a janela à latência; quando a concorrência aumenta, o lote
+passa a esperar a janela configurada ou fecha ao atingir o tamanho máximo.
+"""
+import asyncio
+import time
+
+from src.api.histograma import Histograma
+
+LIMITES_TAMANHO_LOTE = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+LIMITES_ESPERA_MS = (0.1, 0.25, 0.5, 1, 2, 5, 10, 25, 50, 100)
+# Peso da média móvel exponencial do tamanho dos lotes
+PESO_MEDIA_LOTE = 0.2
+
+
+class Coalescedor:
+    """
+    Junta linhas de features enviadas por requisições concorrentes.
+
+    `pontuar(X, contexto)` recebe a lista das n linhas e o contexto informado em
+    `submeter` (por exemplo, a versão do modelo vigente quando a requisição
+    chegou) e retorna `(classes, probabilidades)`. Linhas com contextos
+    diferentes nunca são misturadas na mesma chamada. Se `executor` for
+    informado, a pontuação roda nele (para modelos pesados);
+    caso contrário roda no próprio event loop, o que é o mais rápido quando a
+    pontuação é só uma consulta à tabela compilada.
+    """
+
+    def __init__(self, pontuar, janela_ms=2.0, tamanho_maximo=64, executor=None):
+        self.pontuar = pontuar
+        self.janela = janela_ms / 1000
+        self.tamanho_maximo = tamanho_maximo
+        self.executor = executor
+        self.tamanho_lote = Histograma(LIMITES_TAMANHO_LOTE)
+        self.espera_ms = Histograma(LIMITES_ESPERA_MS)
+        self._loop = None
+        self._pendentes = []
+        self._temporizador = None
+        self._media_lote = 1.0
+
+    async def submeter(self, linha, contexto=None):
+        """Enfileira uma linha de features e aguarda `(classe, probabilidades)`."""
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # Novo event loop (ex.: reinício do servidor): começa com a fila vazia
+            self._loop, self._pendentes, self._temporizador = loop, [], None
+
+        futuro = loop.create_future()
+        self._pendentes.append((linha, contexto, futuro, time.perf_counter()))
+        if len(self._pendentes) >= self.tamanho_maximo:
+            self._disparar()
+        elif self._temporizador is None:
+            if self._media_lote < 2:
+                self._temporizador = loop.call_soon(self._disparar)
+            else:
+                self._temporizador = loop.call_later(self.janela, self._disparar)
+        return await futuro
+
+    def _disparar(self):
+        if self._temporizador is not None:
+            self._temporizador.cancel()
+            self._temporizador = None
+        lote, self._pendentes = self._pendentes, []
+        if lote:
+            self._loop.create_task(self._processar(lote))
+
+    async def _processar(self, lote):
+        agora = time.perf_counter()
+        self.tamanho_lote.registrar(len(lote))
+        self._media_lote += PESO_MEDIA_LOTE * (len(lote) - self._media_lote)
+        grupos = {}
+        for item in lote:
+            self.espera_ms.registrar((agora - item[3]) * 1000)
+            grupos.setdefault(id(item[1]), []).append(item)
+        for grupo in grupos.values():
+            await self._pontuar_grupo(grupo)
+
+    async def _pontuar_grupo(self, grupo):
+        X = [linha for linha, _, _, _ in grupo]
+        contexto = grupo[0][1]
+        try:
+            if self.executor is None:
+                classes, probabilidades = self.pontuar(X, contexto)
+            else:
+                classes, probabilidades = await self._loop.run_in_executor(
+                    self.executor, self.pontuar, X, contexto
+                )
+        except Exception as erro:
+            for _, _, futuro, _ in grupo:
+                if not futuro.done():
+                    futuro.set_exception(erro)
+            return
+
+        for (_, _, futuro, _), classe, proba in zip(grupo, classes, probabilidades):
+            # A requisição pode ter sido cancelada (cliente desconectou) enquanto esperava
+            if not futuro.done():
+                futuro.set_result((classe, proba))
+
+    def estatisticas(self):
+        return {
+            "janela_ms": self.janela * 1000,
+            "tamanho_maximo": self.tamanho_maximo,
+            "tamanho_lote": self.tamanho_lote.resumo(),
+            "espera_fila_ms": self.espera_ms.resumo(),
+        }
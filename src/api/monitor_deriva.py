@@ -0,0 +1,273 @@
+"""
+Monitor de deriva das entradas e das classes previstas, com memória constante.
+
+No treino, `estatisticas_referencia` resume o conjunto de treino em contagens
+(faixas fixas de `periodo_decorrido_dias`, ocorrências de cada flag e classes
+previstas por cada motor), gravadas em `referencia.json` ao lado do modelo.
+
+Nas APIs, `MonitorDeriva` mantém as mesmas contagens para o tráfego recente,
+em uma janela deslizante dividida em fatias de tempo (um anel de listas de
+inteiros de tamanho fixo): registrar uma previsão é uma busca binária nas
+faixas de dias e alguns incrementos, sob um lock; a fatia mais antiga é
+zerada e reaproveitada quando o tempo avança. A memória não depende do volume
+de tráfego.
+
+`relatorio` compara a janela com a referência: PSI (índice de estabilidade
+populacional) e KS (maior diferença entre as distribuições acumuladas) para
+cada feature e para as classes previstas.
+
+O NumPy só é importado nos lotes e na referência: o monitor é criado junto com
+a API de ML, que não carrega nada pesado ao ser importada.
+"""
+import json
+import math
+import threading
+import time
+from bisect import bisect_right
+from pathlib import Path
+
+from src.api.constantes import FEATURES, RESOLUTIVIDADE_CLASSES
+
+ARQUIVO_REFERENCIA = "referencia.json"
+
+# Início de cada faixa de `periodo_decorrido_dias`; a última vai até o infinito
+BORDAS_DIAS = (0, 1, 3, 7, 15, 30, 45, 60, 90, 180, 365)
+FLAGS = FEATURES[1:]
+N_CLASSES = len(RESOLUTIVIDADE_CLASSES)
+
+# Limiares usuais do PSI: abaixo de 0,1 estável, até 0,25 moderada, acima significativa
+PSI_MODERADA = 0.1
+PSI_SIGNIFICATIVA = 0.25
+# Abaixo disso a janela não tem observações suficientes para comparar
+AMOSTRA_MINIMA = 100
+
+# Posições na lista de contagens de cada fatia
+_N = 0
+_DIAS = 1
+_FLAGS = _DIAS + len(BORDAS_DIAS)
+_CLASSES = _FLAGS + len(FLAGS)
+_TAMANHO = _CLASSES + N_CLASSES
+
+
+def rotulos_faixas_dias():
+    """Rótulo de cada faixa de dias ("0", "1-2", ..., "365+")."""
+    rotulos = []
+    for inicio, fim in zip(BORDAS_DIAS, BORDAS_DIAS[1:]):
+        rotulos.append(str(inicio) if fim - 1 == inicio else f"{inicio}-{fim - 1}")
+    return rotulos + [f"{BORDAS_DIAS[-1]}+"]
+
+
+def _faixas_dias(dias):
+    import numpy as np
+
+    return np.searchsorted(BORDAS_DIAS, np.asarray(dias), side="right") - 1
+
+
+def estatisticas_referencia(X, classes_por_motor):
+    """
+    Contagens de referência de uma matriz (n, 6) na ordem de FEATURES e das
+    classes previstas por cada motor (`{"modelo": classes, "regras": classes}`).
+    """
+    import numpy as np
+
+    X = np.asarray(X)
+    return {
+        "linhas": len(X),
+        "bordas_dias": list(BORDAS_DIAS),
+        "dias": np.bincount(_faixas_dias(X[:, 0]), minlength=len(BORDAS_DIAS)).tolist(),
+        "flags": {flag: int(np.count_nonzero(X[:, 1 + i])) for i, flag in enumerate(FLAGS)},
+        "classes": {
+            motor: np.bincount(np.asarray(classes, dtype=np.int64), minlength=N_CLASSES).tolist()
+            for motor, classes in classes_por_motor.items()
+        },
+    }
+
+
+def salvar_referencia(diretorio, referencia):
+    (Path(diretorio) / ARQUIVO_REFERENCIA).write_text(json.dumps(referencia, indent=2), encoding="utf-8")
+
+
+def carregar_referencia(diretorio):
+    """Referência gravada em `diretorio`, ou None (modelos treinados antes do monitor)."""
+    caminho = Path(diretorio) / ARQUIVO_REFERENCIA
+    if not caminho.exists():
+        return None
+    referencia = json.loads(caminho.read_text(encoding="utf-8"))
+    if tuple(referencia.get("bordas_dias", ())) != BORDAS_DIAS:
+        print(f"⚠️ {caminho}: faixas de dias diferentes das atuais; deriva sem referência")
+        return None
+    return referencia
+
+
+def _psi(observado, esperado):
+    """PSI entre duas listas de contagens, com suavização de 0,5 por faixa."""
+    total_obs = sum(observado) + 0.5 * len(observado)
+    total_esp = sum(esperado) + 0.5 * len(esperado)
+    psi = 0.0
+    for o, e in zip(observado, esperado):
+        p, q = (o + 0.5) / total_obs, (e + 0.5) / total_esp
+        psi += (p - q) * math.log(p / q)
+    return psi
+
+
+def _ks(observado, esperado):
+    """Maior diferença entre as distribuições acumuladas (faixas em ordem)."""
+    total_obs, total_esp = sum(observado), sum(esperado)
+    acumulado_obs = acumulado_esp = maior = 0.0
+    for o, e in zip(observado, esperado):
+        acumulado_obs += o / total_obs
+        acumulado_esp += e / total_esp
+        maior = max(maior, abs(acumulado_obs - acumulado_esp))
+    return maior
+
+
+def _situacao(psi):
+    if psi is None:
+        return "sem_dados"
+    if psi >= PSI_SIGNIFICATIVA:
+        return "significativa"
+    return "moderada" if psi >= PSI_MODERADA else "estavel"
+
+
+class MonitorDeriva:
+    """Contagens da janela recente de um motor, comparadas com a referência do treino."""
+
+    def __init__(self, motor, janela_s=3600.0, fatias=12, relogio=time.monotonic):
+        self.motor = motor
+        self.janela_s = float(janela_s)
+        self._duracao = self.janela_s / fatias
+        self._fatias = [[0] * _TAMANHO for _ in range(fatias)]
+        self._atual = 0
+        self._relogio = relogio
+        self._fim_fatia = relogio() + self._duracao
+        self._total = 0
+        self._referencia = None
+        self._trava = threading.Lock()
+
+    def trocar_referencia(self, referencia):
+        """
+        Passa a comparar com `referencia` (de `carregar_referencia`; None desliga
+        a comparação). A janela recomeça: as classes previstas até aqui vieram
+        de outra versão.
+        """
+        if referencia is not None and self.motor not in referencia.get("classes", {}):
+            referencia = None
+        with self._trava:
+            self._referencia = referencia
+            for fatia in self._fatias:
+                fatia[:] = [0] * _TAMANHO
+
+    def _fatia(self):
+        """Fatia corrente (sob a trava), zerando as que ficaram para trás se o tempo avançou."""
+        agora = self._relogio()
+        if agora >= self._fim_fatia:
+            passos = int((agora - self._fim_fatia) // self._duracao) + 1
+            for _ in range(min(passos, len(self._fatias))):
+                self._atual = (self._atual + 1) % len(self._fatias)
+                self._fatias[self._atual][:] = [0] * _TAMANHO
+            self._fim_fatia += passos * self._duracao
+        return self._fatias[self._atual]
+
+    def registrar(self, linha, classe):
+        """Uma previsão: `linha` na ordem de FEATURES e o código da classe prevista."""
+        faixa = bisect_right(BORDAS_DIAS, linha[0]) - 1
+        with self._trava:
+            fatia = self._fatia()
+            fatia[_N] += 1
+            fatia[_DIAS + faixa] += 1
+            for indice, valor in enumerate(linha[1:]):
+                if valor:
+                    fatia[_FLAGS + indice] += 1
+            fatia[_CLASSES + int(classe)] += 1
+            self._total += 1
+
+    def registrar_lote(self, X, classes):
+        """Um lote: matriz (n, 6) na ordem de FEATURES e os códigos das classes previstas."""
+        import numpy as np
+
+        X = np.asarray(X)
+        flags = np.count_nonzero(X[:, 1:], axis=0)
+        self._somar(len(X), _faixas_dias(X[:, 0]), flags, classes)
+
+    def registrar_codificado(self, dias, codigos, classes):
+        """Um lote no formato binário: dias e código da combinação de flags (bit i = FLAGS[i])."""
+        import numpy as np
+
+        codigos = np.asarray(codigos)
+        flags = [np.count_nonzero(codigos & (1 << bit)) for bit in range(len(FLAGS))]
+        self._somar(len(codigos), _faixas_dias(dias), flags, classes)
+
+    def _somar(self, n, faixas, flags, classes):
+        import numpy as np
+
+        contagens = [n]
+        contagens += np.bincount(faixas, minlength=len(BORDAS_DIAS)).tolist()
+        contagens += [int(f) for f in flags]
+        contagens += np.bincount(np.asarray(classes, dtype=np.int64), minlength=N_CLASSES).tolist()
+        with self._trava:
+            fatia = self._fatia()
+            for indice, valor in enumerate(contagens):
+                fatia[indice] += valor
+            self._total += n
+
+    def _janela(self):
+        with self._trava:
+            self._fatia()
+            return [sum(coluna) for coluna in zip(*self._fatias)], self._total
+
+    def relatorio(self):
+        """PSI, KS e situação de cada feature e das classes previstas na janela, contra a referência."""
+        janela, total = self._janela()
+        n = janela[_N]
+        referencia = self._referencia
+        comparar = referencia is not None and n >= AMOSTRA_MINIMA
+
+        def comparacao(observado, esperado, rotulos):
+            item = {"observado": dict(zip(rotulos, observado))}
+            if referencia is not None:
+                item["referencia"] = dict(zip(rotulos, esperado))
+            psi = _psi(observado, esperado) if comparar else None
+            item.update(psi=psi, ks=_ks(observado, esperado) if comparar else None, situacao=_situacao(psi))
+            return item
+
+        linhas_ref = referencia["linhas"] if referencia else 0
+        features = {
+            FEATURES[0]: comparacao(
+                janela[_DIAS:_FLAGS], referencia["dias"] if referencia else None, rotulos_faixas_dias()
+            ),
+        }
+        for indice, flag in enumerate(FLAGS):
+            verdadeiras = janela[_FLAGS + indice]
+            esperadas = referencia["flags"][flag] if referencia else 0
+            features[flag] = comparacao(
+                [n - verdadeiras, verdadeiras], [linhas_ref - esperadas, esperadas], ["nao", "sim"]
+            )
+        classes = comparacao(
+            janela[_CLASSES:], referencia["classes"][self.motor] if referencia else None,
+            list(RESOLUTIVIDADE_CLASSES.values()),
+        )
+
+        if referencia is None:
+            situacao = "sem_referencia"
+        elif not comparar:
+            situacao = "sem_dados"
+        else:
+            piores = [item["psi"] for item in (*features.values(), classes)]
+            situacao = _situacao(max(piores))
+        return {
+            "motor": self.motor,
+            "situacao": situacao,
+            "janela_s": self.janela_s,
+            "observacoes_janela": n,
+            "observacoes_total": total,
+            "linhas_referencia": linhas_ref,
+            "amostra_minima": AMOSTRA_MINIMA,
+            "features": features,
+            "classes": classes,
+        }
+
+    def psi_atual(self):
+        """`{item: PSI}` das features e da classe prevista, para o `/metrics` (vazio sem comparação)."""
+        relatorio = self.relatorio()
+        itens = {**relatorio["features"], "classe_prevista": relatorio["classes"]}
+        return {nome: item["psi"] for nome, item in itens.items() if item["psi"] is not None}
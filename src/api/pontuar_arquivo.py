@@ -0,0 +1,341 @@
+"""
+Pontuação offline de arquivos grandes de ocorrências (CSV ou JSONL).
+
+Lê a entrada em blocos de tamanho fixo (memória limitada), distribui os blocos
+entre um pool de processos e grava os resultados na ordem original das linhas.
+O progresso é registrado após cada bloco gravado, permitindo retomar o
+processamento após uma falha com `--retomar`.
+
+Uso (a partir da raiz do projeto):
+    python -m src.api.pontuar_arquivo entrada.csv saida.csv --motor regras
+    python -m src.api.pontuar_arquivo entrada.jsonl saida.jsonl --motor modelo --processos 4
+"""
+import argparse
+import io
+import json
+import os
+import resource
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+if __package__ in (None, ""):
+    sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+import numpy as np
+import pandas as pd
+
+from src.api.floresta_numpy import carregar_floresta
+from src.api.registro_modelos import RegistroModelos, carregar_artefato
+from src.api.regras import FEATURES, MOTIVOS, RESOLUTIVIDADE_CLASSES, avaliar_regras
+from src.api.validacao_colunar import validar_bloco
+from src.config import settings
+
+TAMANHO_BLOCO = 100_000
+COLUNAS_PROBABILIDADE = {0: "probabilidade_baixa", 1: "probabilidade_media", 2: "probabilidade_alta"}
+
+# Motor de pontuação do processo atual (inicializado uma vez por worker)
+_motor = None
+
+
+class MotorRegras:
+    """Pontua blocos com o motor de regras colunar."""
+
+    def pontuar(self, X):
+        classes, motivos = avaliar_regras(*X.T)
+        return {
+            "resolutividade": _nomes(classes, RESOLUTIVIDADE_CLASSES),
+            "motivo": _nomes(motivos, MOTIVOS),
+        }
+
+
+class MotorModelo:
+    """Pontua blocos com a tabela compilada do modelo treinado."""
+
+    def __init__(self, caminho_modelo):
+        from src.api.tabela_modelo import compilar_tabela
+
+        self.tabela = compilar_tabela(_carregar_modelo(caminho_modelo))
+
+    def pontuar(self, X):
+        classes, probabilidades = self.tabela.prever(X)
+        resultado = {"resolutividade": _nomes(classes, RESOLUTIVIDADE_CLASSES)}
+        for codigo, coluna in COLUNAS_PROBABILIDADE.items():
+            resultado[coluna] = probabilidades[:, codigo].round(6)
+        return resultado
+
+
+def _nomes(codigos, mapa):
+    """Converte códigos inteiros nos textos correspondentes, sem laço Python por linha."""
+    textos = np.array([mapa[i] for i in range(max(mapa) + 1)], dtype=object)
+    return textos[codigos]
+
+
+def _carregar_modelo(caminho):
+    """Carrega um diretório de versão do registro, uma floresta `.npz` ou um pickle."""
+    caminho = Path(caminho)
+    if caminho.is_dir():
+        return carregar_artefato(caminho)
+    if caminho.suffix == ".npz":
+        return carregar_floresta(caminho)
+    import joblib
+    with open(caminho, "rb") as f:
+        return joblib.load(f)
+
+
+def _resolver_modelo(caminho_modelo):
+    """Sem caminho explícito, fixa o diretório da versão ativa do registro para toda a execução."""
+    if caminho_modelo is not None:
+        return str(Path(caminho_modelo).resolve())
+    registro = RegistroModelos(settings.diretorio_modelos)
+    versao = registro.versao_ativa()
+    if versao is None:
+        raise SystemExit(f"Nenhuma versão ativa em '{registro.raiz}'. Informe --modelo.")
+    return str(registro.caminho(versao).resolve())
+
+
+def _criar_motor(nome, caminho_modelo):
+    return MotorModelo(caminho_modelo) if nome == "modelo" else MotorRegras()
+
+
+def _inicializar_worker(nome, caminho_modelo):
+    global _motor
+    _motor = _criar_motor(nome, caminho_modelo)
+
+
+def _formato(caminho, formato=None):
+    if formato:
+        return formato
+    return "jsonl" if Path(caminho).suffix.lower() in (".jsonl", ".json", ".ndjson") else "csv"
+
+
+def _pontuar_bloco(bloco, deslocamento, formato_saida):
+    """Pontua um bloco e devolve as linhas já serializadas para gravação."""
+    X = validar_bloco(bloco, deslocamento)
+    saida = bloco.assign(**_motor.pontuar(X))
+    if formato_saida == "csv":
+        return saida.to_csv(index=False, header=False).encode("utf-8")
+    texto = saida.to_json(orient="records", lines=True, force_ascii=False)
+    if not texto.endswith("\n"):
+        texto += "\n"
+    return texto.encode("utf-8")
+
+
+def _interpretar(partes, formato, cabecalho):
+    dados = io.BytesIO(b"".join(partes))
+    if formato == "csv":
+        return pd.read_csv(dados, names=cabecalho, header=None)
+    return pd.read_json(dados, lines=True)
+
+
+def _ler_blocos(caminho, formato, tamanho_bloco, posicao=0, deslocamento=0):
+    """
+    Gera (bloco, deslocamento, posição) a partir do arquivo, começando no byte `posicao`.
+
+    Os registros são separados aqui, como o leitor do pandas os conta: linhas em
+    branco são ignoradas e, no CSV, um campo entre aspas pode ocupar várias linhas.
+    A posição devolvida é o byte da entrada logo após o bloco, usado para retomar.
+    """
+    with open(caminho, "rb") as f:
+        cabecalho = f.readline().decode("utf-8").rstrip("\r\n").split(",") if formato == "csv" else None
+        if posicao:
+            f.seek(posicao)
+        else:
+            posicao = f.tell()
+        partes, registros, aspas = [], 0, 0
+        for linha in f:
+            posicao += len(linha)
+            # Fora de um campo entre aspas, linha em branco não é registro
+            if aspas % 2 == 0 and not linha.strip():
+                continue
+            partes.append(linha)
+            if formato == "csv":
+                aspas += linha.count(b'"')
+            if aspas % 2:
+                continue
+            registros += 1
+            if registros == tamanho_bloco:
+                bloco = _interpretar(partes, formato, cabecalho)
+                yield bloco, deslocamento, posicao
+                deslocamento += len(bloco)
+                partes, registros = [], 0
+        if partes:
+            yield _interpretar(partes, formato, cabecalho), deslocamento, posicao
+
+
+class Progresso:
+    """Ponto de controle gravado ao lado do arquivo de saída após cada bloco."""
+
+    def __init__(self, caminho_saida, parametros):
+        self.caminho = Path(f"{caminho_saida}.progresso.json")
+        self.parametros = parametros
+        self.blocos = 0
+        self.linhas = 0
+        self.bytes = 0
+        self.entrada_bytes = 0
+
+    def carregar(self):
+        dados = json.loads(self.caminho.read_text())
+        if dados["parametros"] != self.parametros:
+            raise SystemExit(
+                "Os parâmetros diferem da execução interrompida; "
+                f"esperado {dados['parametros']}. Remova {self.caminho} para recomeçar."
+            )
+        if "entrada_bytes" not in dados:
+            raise SystemExit(f"Ponto de controle sem a posição na entrada. Remova {self.caminho} para recomeçar.")
+        self.blocos, self.linhas, self.bytes = dados["blocos"], dados["linhas"], dados["bytes"]
+        self.entrada_bytes = dados["entrada_bytes"]
+
+    def salvar(self):
+        temporario = self.caminho.with_suffix(".tmp")
+        temporario.write_text(json.dumps({
+            "parametros": self.parametros,
+            "blocos": self.blocos,
+            "linhas": self.linhas,
+            "bytes": self.bytes,
+            "entrada_bytes": self.entrada_bytes,
+        }))
+        os.replace(temporario, self.caminho)
+
+    def remover(self):
+        self.caminho.unlink(missing_ok=True)
+
+
+def rss_pico_mb():
+    """Pico de memória residente (MB) do processo principal e dos workers."""
+    proprio = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    filhos = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    # No Linux ru_maxrss é em KB; no macOS, em bytes
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return proprio / divisor, filhos / divisor
+
+
+def pontuar_arquivo(entrada, saida, motor="regras", caminho_modelo=None,
+                    tamanho_bloco=TAMANHO_BLOCO, processos=None, retomar=False,
+                    formato_entrada=None, formato_saida=None):
+    """
+    Pontua `entrada` e grava o resultado em `saida`, preservando a ordem das linhas.
+
+    No máximo `2 × processos` blocos ficam em memória ao mesmo tempo. Com o
+    motor "modelo", `caminho_modelo` pode ser um diretório de versão, um `.npz`
+    ou um pickle; sem ele, é usada a versão ativa do registro de modelos.
+    Retorna um dicionário com linhas, tempo, vazão e pico de memória.
+    """
+    formato_entrada = _formato(entrada, formato_entrada)
+    formato_saida = _formato(saida, formato_saida)
+    processos = processos or os.cpu_count() or 1
+    if motor == "modelo":
+        caminho_modelo = _resolver_modelo(caminho_modelo)
+    progresso = Progresso(saida, {
+        "entrada": str(Path(entrada).resolve()),
+        "motor": motor,
+        "modelo": caminho_modelo if motor == "modelo" else None,
+        "tamanho_bloco": tamanho_bloco,
+        "formato_saida": formato_saida,
+    })
+    if retomar and progresso.caminho.exists():
+        progresso.carregar()
+        print(f"Retomando a partir do bloco {progresso.blocos} ({progresso.linhas:,} linhas já gravadas).")
+    linhas_iniciais = progresso.linhas
+
+    inicio = time.perf_counter()
+    with open(saida, "r+b" if progresso.blocos else "wb") as arquivo_saida:
+        # Descarta qualquer gravação parcial posterior ao último ponto de controle
+        arquivo_saida.truncate(progresso.bytes)
+        arquivo_saida.seek(progresso.bytes)
+
+        def gravar(dados, n_linhas, posicao_entrada):
+            arquivo_saida.write(dados)
+            arquivo_saida.flush()
+            os.fsync(arquivo_saida.fileno())
+            progresso.blocos += 1
+            progresso.linhas += n_linhas
+            progresso.bytes = arquivo_saida.tell()
+            progresso.entrada_bytes = posicao_entrada
+            progresso.salvar()
+
+        blocos = _ler_blocos(entrada, formato_entrada, tamanho_bloco, progresso.entrada_bytes, progresso.linhas)
+        primeiro = progresso.blocos == 0
+
+        if processos == 1:
+            _inicializar_worker(motor, caminho_modelo)
+            for bloco, deslocamento, posicao in blocos:
+                dados = _pontuar_bloco(bloco, deslocamento, formato_saida)
+                if primeiro and formato_saida == "csv":
+                    dados = _cabecalho_csv(bloco, motor) + dados
+                primeiro = False
+                gravar(dados, len(bloco), posicao)
+        else:
+            with ProcessPoolExecutor(
+                max_workers=processos,
+                initializer=_inicializar_worker,
+                initargs=(motor, caminho_modelo),
+            ) as pool:
+                pendentes = deque()
+                for bloco, deslocamento, posicao in blocos:
+                    cabecalho = b""
+                    if primeiro and formato_saida == "csv":
+                        cabecalho = _cabecalho_csv(bloco, motor)
+                    primeiro = False
+                    futuro = pool.submit(_pontuar_bloco, bloco, deslocamento, formato_saida)
+                    pendentes.append((futuro, len(bloco), cabecalho, posicao))
+                    # Limita os blocos em memória; grava sempre o mais antigo (ordem original)
+                    while len(pendentes) >= 2 * processos:
+                        futuro, n_linhas, cabecalho, posicao = pendentes.popleft()
+                        gravar(cabecalho + futuro.result(), n_linhas, posicao)
+                while pendentes:
+                    futuro, n_linhas, cabecalho, posicao = pendentes.popleft()
+                    gravar(cabecalho + futuro.result(), n_linhas, posicao)
+
+    duracao = time.perf_counter() - inicio
+    progresso.remover()
+    rss_principal, rss_workers = rss_pico_mb()
+    linhas = progresso.linhas - linhas_iniciais
+    return {
+        "linhas": linhas,
+        "segundos": duracao,
+        "linhas_por_segundo": linhas / duracao if duracao else 0.0,
+        "rss_pico_principal_mb": rss_principal,
+        "rss_pico_workers_mb": rss_workers,
+    }
+
+
+def _cabecalho_csv(bloco, motor):
+    colunas = list(bloco.columns) + ["resolutividade"]
+    if motor == "modelo":
+        colunas += list(COLUNAS_PROBABILIDADE.values())
+    else:
+        colunas += ["motivo"]
+    return pd.DataFrame(columns=colunas).to_csv(index=False).encode("utf-8")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pontua um arquivo CSV/JSONL de ocorrências em blocos.")
+    parser.add_argument("entrada", help="Arquivo de entrada (.csv ou .jsonl)")
+    parser.add_argument("saida", help="Arquivo de saída (.csv ou .jsonl)")
+    parser.add_argument("--motor", choices=["regras", "modelo"], default="regras")
+    parser.add_argument("--modelo", help="Motor 'modelo': diretório de versão, .npz ou .pkl "
+                                         "(padrão: versão ativa do registro)")
+    parser.add_argument("--tamanho-bloco", type=int, default=TAMANHO_BLOCO)
+    parser.add_argument("--processos", type=int, default=None, help="Padrão: número de CPUs")
+    parser.add_argument("--retomar", action="store_true", help="Continua uma execução interrompida")
+    parser.add_argument("--formato-entrada", choices=["csv", "jsonl"])
+    parser.add_argument("--formato-saida", choices=["csv", "jsonl"])
+    args = parser.parse_args(argv)
+
+    resultado = pontuar_arquivo(
+        args.entrada, args.saida, motor=args.motor, caminho_modelo=args.modelo,
+        tamanho_bloco=args.tamanho_bloco, processos=args.processos, retomar=args.retomar,
+        formato_entrada=args.formato_entrada, formato_saida=args.formato_saida,
+    )
+    print(f"\n--- Pontuação concluída ({args.motor}) ---")
+    print(f"Linhas: {resultado['linhas']:,} em {resultado['segundos']:.2f} s "
+          f"({resultado['linhas_por_segundo']:,.0f} linhas/s)")
+    print(f"Pico de RSS: principal {resultado['rss_pico_principal_mb']:.1f} MB, "
+          f"maior worker {resultado['rss_pico_workers_mb']:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
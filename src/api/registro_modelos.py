@@ -0,0 +1,157 @@
+"""
+Registro versionado de modelos treinados.
+
+Cada versão fica em um diretório próprio dentro da raiz do registro, com os
+artefatos do modelo e um `metadados.json` (parâmetros de treino, métricas,
+ordem das features). O arquivo `ATIVO` na raiz aponta para a versão em uso;
+ele é trocado de forma atômica (`os.replace`), então um leitor nunca vê um
+estado intermediário. A API observa esse arquivo e troca o modelo em memória.
+
+Uso (a partir da raiz do projeto):
+    python -m src.api.registro_modelos listar
+    python -m src.api.registro_modelos ativo
+    python -m src.api.registro_modelos promover <versao>
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+if __package__ in (None, ""):
+    sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+ARQUIVO_MODELO = "resolutividade_model.pkl"
+ARQUIVO_FLORESTA = "resolutividade_model.npz"
+ARQUIVO_METADADOS = "metadados.json"
+ARQUIVO_ATIVO = "ATIVO"
+
+
+class RegistroModelos:
+    """Versões de modelo em disco e o ponteiro para a versão ativa."""
+
+    def __init__(self, raiz):
+        self.raiz = Path(raiz)
+
+    @property
+    def caminho_ativo(self):
+        return self.raiz / ARQUIVO_ATIVO
+
+    def caminho(self, versao):
+        return self.raiz / versao
+
+    def registrar(self, salvar_artefatos, metadados, promover=False):
+        """
+        Cria uma nova versão e retorna o seu identificador.
+
+        `salvar_artefatos(diretorio)` grava os arquivos do modelo em um diretório
+        temporário, que só é renomeado para o nome definitivo depois de completo.
+        """
+        self.raiz.mkdir(parents=True, exist_ok=True)
+        versao = self._nova_versao()
+        temporario = Path(tempfile.mkdtemp(prefix=f".{versao}-", dir=self.raiz))
+        try:
+            salvar_artefatos(temporario)
+            metadados = {"versao": versao, "criado_em": time.strftime("%Y-%m-%dT%H:%M:%S"), **metadados}
+            (temporario / ARQUIVO_METADADOS).write_text(
+                json.dumps(metadados, indent=2, ensure_ascii=False, default=str), encoding="utf-8"
+            )
+            os.rename(temporario, self.caminho(versao))
+        except BaseException:
+            shutil.rmtree(temporario, ignore_errors=True)
+            raise
+        if promover:
+            self.promover(versao)
+        return versao
+
+    def _nova_versao(self):
+        base = time.strftime("v%Y%m%d-%H%M%S")
+        versao, sufixo = base, 1
+        while self.caminho(versao).exists():
+            sufixo += 1
+            versao = f"{base}-{sufixo}"
+        return versao
+
+    def versoes(self):
+        """Metadados de todas as versões, da mais antiga para a mais recente."""
+        if not self.raiz.exists():
+            return []
+        return [
+            self.metadados(diretorio.name)
+            for diretorio in sorted(self.raiz.iterdir())
+            if (diretorio / ARQUIVO_METADADOS).exists()
+        ]
+
+    def metadados(self, versao):
+        return json.loads((self.caminho(versao) / ARQUIVO_METADADOS).read_text(encoding="utf-8"))
+
+    def versao_ativa(self):
+        """Versão apontada por `ATIVO`, ou None se nenhuma foi promovida."""
+        try:
+            return self.caminho_ativo.read_text().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def promover(self, versao):
+        """Torna `versao` a versão ativa, trocando o ponteiro de forma atômica."""
+        if not (self.caminho(versao) / ARQUIVO_METADADOS).exists():
+            raise ValueError(f"Versão '{versao}' não encontrada em {self.raiz}.")
+        temporario = self.raiz / f".{ARQUIVO_ATIVO}.tmp"
+        temporario.write_text(versao)
+        os.replace(temporario, self.caminho_ativo)
+
+    def carregar(self, versao=None):
+        """
+        Carrega o modelo da versão (a ativa por padrão): a floresta `.npz` mapeada
+        em memória, sem scikit-learn, ou o pickle se ela não existir.
+        """
+        versao = versao or self.versao_ativa()
+        if versao is None:
+            raise FileNotFoundError(f"Nenhuma versão ativa em {self.raiz}.")
+        return carregar_artefato(self.caminho(versao))
+
+
+def carregar_artefato(diretorio, arquivo_floresta=ARQUIVO_FLORESTA, arquivo_modelo=ARQUIVO_MODELO):
+    """Carrega o modelo de um diretório, preferindo o formato compacto ao pickle."""
+    diretorio = Path(diretorio)
+    # Imports adiados: listar e promover versões não precisa do NumPy nem do scikit-learn
+    if (diretorio / arquivo_floresta).exists():
+        from src.api.floresta_numpy import carregar_floresta
+        return carregar_floresta(diretorio / arquivo_floresta)
+    import joblib
+    with open(diretorio / arquivo_modelo, "rb") as f:
+        return joblib.load(f)
+
+
+def main(argv=None):
+    from src.config import settings
+
+    parser = argparse.ArgumentParser(description="Gerencia as versões do modelo de resolutividade.")
+    parser.add_argument("--raiz", default=settings.diretorio_modelos, help="Diretório do registro")
+    comandos = parser.add_subparsers(dest="comando", required=True)
+    comandos.add_parser("listar", help="Lista as versões registradas")
+    comandos.add_parser("ativo", help="Mostra a versão ativa")
+    promover = comandos.add_parser("promover", help="Torna uma versão ativa")
+    promover.add_argument("versao")
+    args = parser.parse_args(argv)
+
+    registro = RegistroModelos(args.raiz)
+    if args.comando == "listar":
+        ativa = registro.versao_ativa()
+        for metadados in registro.versoes():
+            marcador = "*" if metadados["versao"] == ativa else " "
+            acuracia = metadados.get("metricas", {}).get("acuracia")
+            acuracia = f"{acuracia:.4f}" if acuracia is not None else "-"
+            print(f"{marcador} {metadados['versao']}  criado em {metadados['criado_em']}  acurácia {acuracia}")
+    elif args.comando == "ativo":
+        print(registro.versao_ativa() or "(nenhuma)")
+    else:
+        registro.promover(args.versao)
+        print(f"Versão '{args.versao}' promovida.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Regras de negócio de resolutividade avaliadas sobre colunas NumPy.
+
+Regras usadas pelo gerador de dados sintéticos (`gerar_modelo.gerar_dados` e
+`dados_sinteticos`) e pela pontuação offline. Todas as funções recebem
+colunas (arrays ou escalares) e avaliam milhões de linhas de uma só vez,
+retornando o código da classe e o código do motivo de cada linha.
+
+A API de regras (`main_regras`) usa o conjunto declarativo de
+`tabela_regras`; o arquivo padrão, `regras_padrao.json`, reproduz estas regras.
+"""
+import numpy as np
+
+from src.api.constantes import FEATURES, RESOLUTIVIDADE_CLASSES  # noqa: F401 (reexportadas)
+
+CLASSE_BAIXA, CLASSE_MEDIA, CLASSE_ALTA = 0, 1, 2
+
+# Códigos de motivo: indicam qual regra determinou a classe
+MOTIVO_POUCAS_PISTAS = 0       # nenhuma regra atendida (default)
+MOTIVO_SUSPEITO_EVIDENCIA = 1  # suspeito identificado/rastreável + evidência em até 30 dias
+MOTIVO_MULTIPLAS_EVIDENCIAS = 2  # três evidências em até 60 dias
+MOTIVO_FATO_RECENTE = 3        # suspeito identificado/rastreável + evidência em até 5 dias
+
+# Justificativa retornada pela API para cada código de motivo
+MOTIVOS = {
+    MOTIVO_POUCAS_PISTAS: "Poucas pistas iniciais ou tempo decorrido elevado.",
+    MOTIVO_SUSPEITO_EVIDENCIA: "Boas pistas iniciais (suspeito conhecido ou múltiplas evidências).",
+    MOTIVO_MULTIPLAS_EVIDENCIAS: "Boas pistas iniciais (suspeito conhecido ou múltiplas evidências).",
+    MOTIVO_FATO_RECENTE: "Fato recente com identificação/rastreio do suspeito e evidências disponíveis.",
+}
+
+# Classe correspondente a cada código de motivo
+CLASSE_POR_MOTIVO = np.array(
+    [CLASSE_BAIXA, CLASSE_MEDIA, CLASSE_MEDIA, CLASSE_ALTA], dtype=np.uint8
+)
+
+# Limites das regras
+DIAS_ALTA = 5
+DIAS_MEDIA = 30
+DIAS_MULTIPLAS_EVIDENCIAS = 60
+EVIDENCIAS_MINIMAS = 1
+EVIDENCIAS_MULTIPLAS = 3
+
+
+def avaliar_regras(periodo_decorrido_dias, suspeito_conhecido, tem_testemunhas,
+                   tem_imagens_cameras, suspeito_rastreavel, vestigios_preservados):
+    """
+    Aplica as regras de negócio a colunas de ocorrências.
+
+    Retorna `(classes, motivos)` como arrays uint8 com o mesmo formato das
+    entradas. As regras são avaliadas da mais específica para a menos:
+
+    1. Alta: até 5 dias, suspeito conhecido ou rastreável e ao menos uma evidência.
+    2. Média: até 30 dias, suspeito conhecido ou rastreável e ao menos uma
+       evidência; ou as três evidências em até 60 dias.
+    3. Baixa: demais casos.
+    """
+    dias = np.asarray(periodo_decorrido_dias)
+    suspeito = np.logical_or(
+        np.asarray(suspeito_conhecido, dtype=bool), np.asarray(suspeito_rastreavel, dtype=bool)
+    )
+    # Contagem de evidências físicas e testemunhais
+    total_evidencias = (
+        np.asarray(tem_testemunhas, dtype=np.uint8)
+        + np.asarray(tem_imagens_cameras, dtype=np.uint8)
+        + np.asarray(vestigios_preservados, dtype=np.uint8)
+    )
+
+    pistas = suspeito & (total_evidencias >= EVIDENCIAS_MINIMAS)
+    alta = pistas & (dias <= DIAS_ALTA)
+    media_suspeito = pistas & (dias <= DIAS_MEDIA)
+    media_evidencias = (total_evidencias >= EVIDENCIAS_MULTIPLAS) & (dias <= DIAS_MULTIPLAS_EVIDENCIAS)
+
+    motivos = np.select(
+        [alta, media_suspeito, media_evidencias],
+        [MOTIVO_FATO_RECENTE, MOTIVO_SUSPEITO_EVIDENCIA, MOTIVO_MULTIPLAS_EVIDENCIAS],
+        MOTIVO_POUCAS_PISTAS,
+    ).astype(np.uint8)
+    classes = CLASSE_POR_MOTIVO[motivos]
+    return classes, motivos
+
+
+def avaliar_matriz(X):
+    """Aplica as regras a uma matriz (n, 6) com as colunas na ordem de FEATURES."""
+    X = np.asarray(X, dtype=np.int64)
+    return avaliar_regras(*(X[:, i] for i in range(X.shape[1])))
@@ -0,0 +1,293 @@
+"""
+Pontuação em sombra: modelos candidatos avaliados no tráfego real, fora da resposta.
+
+A resposta do `/prever*` vem só do modelo ativo. Com candidatos carregados
+(versões do registro ainda não promovidas), cada requisição deixa na fila
+uma cópia das entradas e das classes servidas; uma thread pontua a fila em
+lotes com a tabela compilada de cada candidato e acumula, por candidato:
+
+  - a matriz de concordância (classe servida x classe do candidato);
+  - a distribuição de classes do ativo e do candidato e a diferença entre elas;
+  - a latência por linha do ativo e do candidato no mesmo lote.
+
+Na requisição, registrar custa um append em uma fila limitada (sem
+candidatos, nada). A sombra descarta o próprio trabalho, nunca o da API:
+com a fila cheia, as entradas novas ficam de fora; com a API ocupada
+(`ocupada()`, ex.: fila do controle de admissão), o lote retirado da fila é
+descartado sem pontuar; e depois de cada lote a thread pausa para gastar no
+máximo `fracao_cpu` do tempo (e do GIL) pontuando. As estatísticas
+recomeçam quando a versão ativa ou os candidatos mudam.
+"""
+import itertools
+import threading
+import time
+from collections import deque
+
+from src.api.constantes import RESOLUTIVIDADE_CLASSES
+from src.api.histograma import Histograma
+
+# Faixas da latência por linha de um lote, em µs
+LIMITES_LATENCIA_US = (0.05, 0.1, 0.2, 0.5, 1, 2, 5, 10, 20, 50, 100)
+
+
+class _Comparacao:
+    """Acumulado de um candidato contra o ativo."""
+
+    def __init__(self):
+        import numpy as np
+
+        n = len(RESOLUTIVIDADE_CLASSES)
+        self.matriz = np.zeros((n, n), dtype=np.int64)
+        self.latencia = Histograma(LIMITES_LATENCIA_US)
+
+
+def _latencia(histograma):
+    resumo = histograma.resumo()
+    return {"media": resumo["media"], "p50": resumo["p50"], "p99": resumo["p99"]}
+
+
+class Sombra:
+    """Fila de cópias das previsões do ativo e a thread que as pontua com os candidatos."""
+
+    def __init__(self, habilitada=True, capacidade=50_000, tamanho_lote=4096, intervalo_s=0.05,
+                 fracao_cpu=0.25, ocupada=lambda: False):
+        if not 0 < fracao_cpu <= 1:
+            raise ValueError(f"A fração de CPU da sombra deve estar em (0, 1]: {fracao_cpu!r}.")
+        self.habilitada = habilitada
+        self.capacidade = capacidade
+        self.tamanho_lote = tamanho_lote
+        self.intervalo_s = intervalo_s
+        self.fracao_cpu = fracao_cpu
+        self._ocupada = ocupada
+        self._candidatos = {}  # versão -> tabela compilada
+        self._fila = deque()
+        self._pendentes = 0
+        self._condicao = threading.Condition()
+        self._trava = threading.Lock()  # estatísticas
+        self._fechando = False
+        self._thread = None
+        self.recebidas = 0
+        self.pontuadas = 0
+        self.descartadas = {"fila_cheia": 0, "api_ocupada": 0, "erro": 0}
+        self._reiniciar(None)
+
+    def _reiniciar(self, versao_ativa):
+        """Zera as estatísticas (com `_trava` adquirida ou antes de a thread existir)."""
+        self._versao_ativa = versao_ativa
+        self._latencia_ativo = Histograma(LIMITES_LATENCIA_US)
+        self._comparacoes = {versao: _Comparacao() for versao in self._candidatos}
+
+    def trocar_candidatos(self, candidatos):
+        """Passa a comparar com `candidatos` (`{versão: tabela compilada}`; vazio desliga a sombra)."""
+        with self._trava:
+            self._candidatos = dict(candidatos)
+            self._reiniciar(self._versao_ativa)
+
+    # --- Lado da requisição ---
+
+    def registrar(self, atual, linha, classe):
+        """Uma previsão do ativo (`ModeloAtivo`): `linha` na ordem de FEATURES e o código da classe servida."""
+        if self.habilitada and self._candidatos:
+            self._enfileirar((atual, False, (linha,), (classe,)), 1)
+
+    def registrar_lote(self, atual, X, classes):
+        """Um lote: matriz (n, 6) na ordem de FEATURES e códigos das classes servidas."""
+        if self.habilitada and self._candidatos and len(classes):
+            self._enfileirar((atual, False, X, classes), len(classes))
+
+    def registrar_codificado(self, atual, dias, codigos, classes):
+        """Um lote no formato binário (dias e código das flags), pontuado pelo caminho codificado da tabela."""
+        if self.habilitada and self._candidatos and len(classes):
+            self._enfileirar((atual, True, (dias, codigos), classes), len(classes))
+
+    def _enfileirar(self, entrada, n):
+        with self._condicao:
+            if self._pendentes + n > self.capacidade:
+                self.descartadas["fila_cheia"] += n
+                return
+            self._fila.append(entrada)
+            self._pendentes += n
+            self.recebidas += n
+            if self._pendentes >= self.tamanho_lote:
+                self._condicao.notify_all()
+
+    # --- Thread de pontuação ---
+
+    def iniciar(self):
+        """Inicia a thread de pontuação (no lifespan)."""
+        if not self.habilitada or (self._thread is not None and self._thread.is_alive()):
+            return
+        self._fechando = False
+        self._thread = threading.Thread(target=self._pontuar_continuamente, name="sombra", daemon=True)
+        self._thread.start()
+
+    def fechar(self, timeout=10.0):
+        """Encerra a thread; o que estiver na fila é abandonado (a sombra não precisa ver tudo)."""
+        if self._thread is None:
+            return
+        with self._condicao:
+            self._fechando = True
+            self._condicao.notify_all()
+        self._thread.join(timeout)
+        self._thread = None
+
+    def _pontuar_continuamente(self):
+        while True:
+            with self._condicao:
+                self._condicao.wait_for(
+                    lambda: self._pendentes >= self.tamanho_lote or self._fechando, timeout=self.intervalo_s
+                )
+                lote, n = self._fila, self._pendentes
+                self._fila, self._pendentes = deque(), 0
+                if self._fechando:
+                    return
+            if not lote:
+                continue
+            if self._ocupada():
+                self.descartadas["api_ocupada"] += n
+                continue
+            inicio = time.perf_counter()
+            try:
+                self._pontuar(lote)
+            except Exception as erro:
+                self.descartadas["erro"] += n
+                print(f"⚠️ Falha na pontuação em sombra ({n} linhas descartadas): {erro}")
+            # Pausa proporcional ao lote: o que chegar enquanto isso acumula na fila (ou é descartado)
+            pausa = (time.perf_counter() - inicio) * (1 / self.fracao_cpu - 1)
+            with self._condicao:
+                self._condicao.wait_for(lambda: self._fechando, timeout=pausa)
+
+    def _pontuar(self, lote):
+        """Pontua o lote com o ativo e os candidatos, agrupando as entradas da mesma versão e formato."""
+        import numpy as np
+
+        from src.api.validacao_colunar import matriz_linhas
+
+        n_classes = len(RESOLUTIVIDADE_CLASSES)
+        # Agrupa pela identidade do `ModeloAtivo` (o `==` da dataclass compararia as tabelas campo a campo)
+        for (_, codificado), grupo in itertools.groupby(lote, key=lambda entrada: (id(entrada[0]), entrada[1])):
+            grupo = list(grupo)
+            atual = grupo[0][0]
+            servidas = np.concatenate([np.asarray(entrada[3], dtype=np.int64) for entrada in grupo])
+            if codificado:
+                dias = np.concatenate([np.asarray(entrada[2][0]) for entrada in grupo])
+                codigos = np.concatenate([np.asarray(entrada[2][1]) for entrada in grupo])
+
+                def pontuar(tabela):
+                    return tabela.prever_codificado(dias, codigos)[0]
+            else:
+                # Linhas do /prever chegam como tuplas e podem ter dias além do int64 (válidos no schema)
+                X = np.concatenate([
+                    entrada[2] if isinstance(entrada[2], np.ndarray) else matriz_linhas(entrada[2])
+                    for entrada in grupo
+                ])
+
+                def pontuar(tabela):
+                    return tabela.prever(X)[0]
+
+            candidatos = self._candidatos
+            tempos = {}
+            classes = {}
+            inicio = time.perf_counter()
+            pontuar(atual.tabela)
+            tempo_ativo = time.perf_counter() - inicio
+            for versao, tabela in candidatos.items():
+                inicio = time.perf_counter()
+                classes[versao] = np.asarray(pontuar(tabela), dtype=np.int64)
+                tempos[versao] = time.perf_counter() - inicio
+
+            n = len(servidas)
+            with self._trava:
+                if atual.versao != self._versao_ativa:
+                    self._reiniciar(atual.versao)
+                self._latencia_ativo.registrar(tempo_ativo / n * 1e6)
+                for versao, previstas in classes.items():
+                    comparacao = self._comparacoes.get(versao)
+                    if comparacao is None:  # candidatos trocados durante a pontuação
+                        continue
+                    comparacao.matriz += np.bincount(
+                        servidas * n_classes + previstas, minlength=n_classes * n_classes
+                    ).reshape(n_classes, n_classes)
+                    comparacao.latencia.registrar(tempos[versao] / n * 1e6)
+                self.pontuadas += n
+
+    # --- Consulta ---
+
+    def relatorio(self):
+        """Concordância, distribuição de classes e latência de cada candidato contra o ativo (GET /sombra)."""
+        nomes = [RESOLUTIVIDADE_CLASSES[c] for c in sorted(RESOLUTIVIDADE_CLASSES)]
+        with self._condicao:
+            pendentes = self._pendentes
+        with self._trava:
+            latencia_ativo = _latencia(self._latencia_ativo)
+            comparacoes = {}
+            for versao, comparacao in self._comparacoes.items():
+                matriz = comparacao.matriz.copy()
+                total = int(matriz.sum())
+                ativo, candidato = matriz.sum(axis=1), matriz.sum(axis=0)
+                latencia = _latencia(comparacao.latencia)
+                comparacoes[versao] = {
+                    "linhas": total,
+                    "concordancia": float(matriz.trace() / total) if total else None,
+                    # Linhas: classe servida pelo ativo; colunas: classe do candidato
+                    "matriz_concordancia": {
+                        nome: dict(zip(nomes, matriz[i].tolist())) for i, nome in enumerate(nomes)
+                    },
+                    "classes": {
+                        nome: {
+                            "ativo": float(ativo[i] / total) if total else None,
+                            "candidato": float(candidato[i] / total) if total else None,
+                            "diferenca": float((candidato[i] - ativo[i]) / total) if total else None,
+                        }
+                        for i, nome in enumerate(nomes)
+                    },
+                    "latencia_us_por_linha": {
+                        **latencia,
+                        "razao_ativo": latencia["media"] / latencia_ativo["media"] if latencia_ativo["media"] else None,
+                    },
+                }
+            versao_ativa = self._versao_ativa
+        return {
+            "habilitada": self.habilitada,
+            "versao_ativa": versao_ativa,
+            "candidatos": list(self._candidatos),
+            "capacidade": self.capacidade,
+            "fracao_cpu": self.fracao_cpu,
+            "pendentes": pendentes,
+            "recebidas": self.recebidas,
+            "pontuadas": self.pontuadas,
+            "descartadas": dict(self.descartadas),
+            "latencia_ativo_us_por_linha": latencia_ativo,
+            "comparacoes": comparacoes,
+        }
+
+    def contagens(self):
+        """`{estado: linhas}` para o gauge do /metrics."""
+        with self._condicao:
+            pendentes = self._pendentes
+        return {
+            "pendentes": pendentes,
+            "pontuadas": self.pontuadas,
+            **{f"descartadas_{motivo}": n for motivo, n in self.descartadas.items()},
+        }
+
+    def concordancias(self):
+        """`{versão candidata: fração de concordância com o ativo}` para o gauge do /metrics."""
+        with self._trava:
+            return {
+                versao: float(comparacao.matriz.trace() / comparacao.matriz.sum())
+                for versao, comparacao in self._comparacoes.items() if comparacao.matriz.sum()
+            }
+
+
+def criar_sombra(ocupada):
+    """`Sombra` com as opções de `src/config.py`; `ocupada()` indica a API sem folga."""
+    from src.config import settings
+
+    return Sombra(
+        habilitada=settings.sombra_habilitada,
+        capacidade=settings.sombra_capacidade,
+        tamanho_lote=settings.sombra_tamanho_lote,
+        fracao_cpu=settings.sombra_fracao_cpu,
+        ocupada=ocupada,
+    )
@@ -0,0 +1,149 @@
+"""
+Compilação do modelo de ML em uma tabela de consulta densa.
+
+O espaço de entrada da API é pequeno: cinco booleanos (32 combinações) e o
+`periodo_decorrido_dias`. A floresta só separa os dias em um conjunto finito de
+limiares, portanto a previsão é constante dentro de cada faixa de dias. Este
+módulo percorre as árvores para encontrar esses limiares e pré-calcula classe e
+probabilidades para todas as 32 × K células, de modo que servir uma previsão
+passa a ser uma consulta O(1) em um array, sem chamar o scikit-learn.
+"""
+import warnings
+from dataclasses import dataclass
+
+import numpy as np
+
+# Posição de 'periodo_decorrido_dias' na ordem de FEATURES; as demais são booleanas
+INDICE_DIAS = 0
+N_FLAGS = 5
+N_COMBINACOES = 1 << N_FLAGS
+PESOS_FLAGS = 1 << np.arange(N_FLAGS)
+
+
+def extrair_limiares(modelo, feature=INDICE_DIAS):
+    """Retorna, ordenados e sem repetição, os limiares usados por todas as árvores em `feature`."""
+    if hasattr(modelo, "limiares"):
+        # Floresta exportada em arrays planos (src/api/floresta_numpy.py)
+        return modelo.limiares(feature)
+    limiares = []
+    for arvore in modelo.estimators_:
+        estrutura = arvore.tree_
+        limiares.append(estrutura.threshold[estrutura.feature == feature])
+    if not limiares:
+        return np.empty(0, dtype=np.float64)
+    return np.unique(np.concatenate(limiares))
+
+
+def codificar_flags(flags):
+    """Converte uma matriz (n, 5) de booleanos no índice da combinação (0..31)."""
+    return np.asarray(flags, dtype=np.int64) @ PESOS_FLAGS
+
+
+def _grade_dominio(dias):
+    """Monta a matriz de features para todas as combinações de flags em cada dia de `dias`."""
+    combinacoes = (np.arange(N_COMBINACOES)[:, None] & PESOS_FLAGS) > 0
+    grade = np.empty((len(dias) * N_COMBINACOES, N_FLAGS + 1), dtype=np.float64)
+    grade[:, INDICE_DIAS] = np.repeat(dias, N_COMBINACOES)
+    grade[:, 1:] = np.tile(combinacoes, (len(dias), 1))
+    return grade
+
+
+def _sem_aviso_nomes(funcao, X):
+    """Chama `funcao(X)` ignorando o aviso de nomes de features (o modelo é treinado com DataFrame)."""
+    with warnings.catch_warnings():
+        warnings.filterwarnings("ignore", message="X does not have valid feature names")
+        return funcao(X)
+
+
+@dataclass(frozen=True)
+class TabelaModelo:
+    """Classe e probabilidades pré-calculadas para cada faixa de dias × combinação de flags."""
+    limiares: np.ndarray       # limiares de dias encontrados na floresta
+    faixa_por_dia: np.ndarray  # dia inteiro (0..dia_maximo) -> índice da faixa
+    classes: np.ndarray        # (K, 32) rótulo previsto
+    probabilidades: np.ndarray  # (K, 32, n_classes)
+
+    @property
+    def dia_maximo(self):
+        """Último dia mapeado explicitamente; dias maiores caem na última faixa."""
+        return len(self.faixa_por_dia) - 1
+
+    def consultar(self, dias, *flags):
+        """Consulta escalar de uma única ocorrência; retorna (classe, probabilidades)."""
+        faixa = self.faixa_por_dia[min(dias, self.dia_maximo)]
+        codigo = 0
+        for bit, valor in enumerate(flags):
+            if valor:
+                codigo |= 1 << bit
+        return self.classes[faixa, codigo], self.probabilidades[faixa, codigo]
+
+    def prever(self, X):
+        """Consulta vetorizada para uma matriz (n, 6) na ordem de FEATURES."""
+        X = np.asarray(X)
+        return self.prever_codificado(X[:, INDICE_DIAS].astype(np.int64), codificar_flags(X[:, 1:]))
+
+    def prever_codificado(self, dias, codigos):
+        """Consulta vetorizada a partir dos dias e do código da combinação de flags (0..31)."""
+        faixas = self.faixa_por_dia[np.minimum(dias, self.dia_maximo)]
+        return self.classes[faixas, codigos], self.probabilidades[faixas, codigos]
+
+
+def compilar_tabela(modelo):
+    """
+    Compila o modelo treinado em uma `TabelaModelo`.
+
+    Cada faixa de dias é representada pelo primeiro dia inteiro que cai nela;
+    todas as 32 combinações de flags desses dias são avaliadas em uma única
+    chamada a `predict_proba`.
+    """
+    limiares = extrair_limiares(modelo)
+    # Primeiro inteiro acima do maior limiar: a partir dele a faixa não muda mais
+    dia_maximo = int(np.floor(limiares[-1])) + 1 if len(limiares) else 0
+    dia_maximo = max(dia_maximo, 0)
+
+    dias = np.arange(dia_maximo + 1)
+    # O scikit-learn compara X em float32 contra limiares float64 (x <= limiar -> esquerda)
+    faixas_brutas = np.searchsorted(limiares, dias.astype(np.float32), side="left")
+    faixas_unicas, representantes, faixa_por_dia = np.unique(
+        faixas_brutas, return_index=True, return_inverse=True
+    )
+
+    probabilidades = _sem_aviso_nomes(modelo.predict_proba, _grade_dominio(dias[representantes]))
+    probabilidades = probabilidades.reshape(len(faixas_unicas), N_COMBINACOES, -1)
+    classes = np.asarray(modelo.classes_)[probabilidades.argmax(axis=2)]
+
+    return TabelaModelo(
+        limiares=limiares,
+        faixa_por_dia=faixa_por_dia.astype(np.intp),
+        classes=classes,
+        probabilidades=probabilidades,
+    )
+
+
+def verificar_tabela(tabela, modelo, dia_maximo=None, tolerancia=1e-9):
+    """
+    Compara a tabela com `modelo.predict`/`predict_proba` em todo o domínio.
+
+    Como a previsão é constante entre limiares consecutivos, avaliar todos os
+    dias inteiros até depois do maior limiar cobre o domínio inteiro; por padrão
+    o intervalo vai ao dobro desse ponto para também exercitar a faixa final.
+    Retorna um dicionário com o número de células avaliadas, divergências de
+    classe e a maior diferença absoluta de probabilidade.
+    """
+    if dia_maximo is None:
+        dia_maximo = 2 * tabela.dia_maximo + 1
+    grade = _grade_dominio(np.arange(dia_maximo + 1))
+
+    classes_esperadas = _sem_aviso_nomes(modelo.predict, grade)
+    probabilidades_esperadas = _sem_aviso_nomes(modelo.predict_proba, grade)
+    classes, probabilidades = tabela.prever(grade)
+
+    divergencias = int(np.count_nonzero(classes != classes_esperadas))
+    diferenca = float(np.max(np.abs(probabilidades - probabilidades_esperadas)))
+    return {
+        "celulas": len(grade),
+        "faixas": len(tabela.classes),
+        "divergencias_classe": divergencias,
+        "diferenca_maxima": diferenca,
+        "ok": divergencias == 0 and diferenca <= tolerancia,
+    }
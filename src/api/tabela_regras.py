@@ -0,0 +1,260 @@
+"""
+Regras de negócio declarativas, compiladas em uma tabela de decisão na carga.
+
+As regras ficam em um arquivo JSON (`settings.arquivo_regras`; o padrão,
+`src/api/regras_padrao.json`, reproduz `regras.py`), em ordem de prioridade:
+vale a primeira regra cujas condições a ocorrência atende e, sem nenhuma, o
+`padrao`. Condições aceitas (todas opcionais, combinadas com "e"):
+
+  dias_min, dias_max              limites inclusivos de `periodo_decorrido_dias`
+  suspeito                        suspeito conhecido ou rastreável (true/false)
+  evidencias_min, evidencias_max  quantas entre testemunhas, imagens e vestígios
+  <flag de FEATURES>              valor exigido da flag (true/false)
+
+Uma regra pode declarar em `prevalece_sobre` os nomes de regras seguintes que
+ela sobrepõe de propósito (ex.: uma exceção antes da regra geral).
+
+O domínio é finito: 32 combinações de flags × as faixas de dias delimitadas
+pelos limites que aparecem nas regras. O conjunto é compilado em uma tabela
+(faixa, combinação) -> (classe, motivo), e avaliar uma ocorrência passa a ser
+uma consulta em array, como na tabela do modelo (`tabela_modelo`). A mesma
+compilação aponta regras inalcançáveis e sobreposições entre regras com
+resultados diferentes (classe ou motivo) que não foram declaradas.
+
+Uso (a partir da raiz do projeto):
+    python -m src.api.tabela_regras regras.json [--estrito]
+"""
+import argparse
+import json
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+
+if __package__ in (None, ""):
+    sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+import numpy as np
+
+from src.api.constantes import FEATURES, RESOLUTIVIDADE_CLASSES
+from src.api.tabela_modelo import INDICE_DIAS, N_COMBINACOES, codificar_flags
+
+FLAGS = FEATURES[1:]
+SUSPEITO = ('suspeito_conhecido', 'suspeito_rastreavel')
+EVIDENCIAS = ('tem_testemunhas', 'tem_imagens_cameras', 'vestigios_preservados')
+CONDICOES_NUMERICAS = {'dias_min', 'dias_max', 'evidencias_min', 'evidencias_max'}
+CONDICOES_BOOLEANAS = {'suspeito', *FLAGS}
+
+_CODIGO_POR_CLASSE = {nome: codigo for codigo, nome in RESOLUTIVIDADE_CLASSES.items()}
+# Valor de cada flag nas 32 combinações (bit i = FLAGS[i], como em `codificar_flags`)
+_COMBINACOES = {flag: (np.arange(N_COMBINACOES) >> bit) & 1 == 1 for bit, flag in enumerate(FLAGS)}
+_SUSPEITO = _COMBINACOES[SUSPEITO[0]] | _COMBINACOES[SUSPEITO[1]]
+_EVIDENCIAS = sum(_COMBINACOES[flag].astype(np.int64) for flag in EVIDENCIAS)
+
+
+@dataclass(frozen=True)
+class TabelaRegras:
+    """Classe e motivo de cada faixa de dias × combinação de flags para um conjunto de regras."""
+    versao: str
+    nomes: tuple               # nome de cada regra, em ordem de prioridade
+    motivos: tuple             # texto de cada código de motivo: 0 = padrão, i = i-ésima regra
+    faixa_por_dia: np.ndarray  # dia inteiro (0..dia_maximo) -> índice da faixa
+    classes: np.ndarray        # (K, 32) código da classe
+    codigos_motivo: np.ndarray  # (K, 32) código do motivo
+    problemas: tuple           # regras inalcançáveis e sobreposições (ver `compilar_regras`)
+
+    @property
+    def dia_maximo(self):
+        """Início da última faixa; dias maiores caem nela."""
+        return len(self.faixa_por_dia) - 1
+
+    def consultar(self, dias, *flags):
+        """Consulta escalar de uma única ocorrência; retorna (classe, motivo)."""
+        faixa = self.faixa_por_dia[min(dias, self.dia_maximo)]
+        codigo = 0
+        for bit, valor in enumerate(flags):
+            if valor:
+                codigo |= 1 << bit
+        return self.classes[faixa, codigo], self.codigos_motivo[faixa, codigo]
+
+    def prever(self, X):
+        """Consulta vetorizada para uma matriz (n, 6) na ordem de FEATURES."""
+        X = np.asarray(X)
+        return self.prever_codificado(X[:, INDICE_DIAS].astype(np.int64), codificar_flags(X[:, 1:]))
+
+    def prever_codificado(self, dias, codigos):
+        """Consulta vetorizada a partir dos dias e do código da combinação de flags (0..31)."""
+        faixas = self.faixa_por_dia[np.minimum(dias, self.dia_maximo)]
+        return self.classes[faixas, codigos], self.codigos_motivo[faixas, codigos]
+
+
+def _erro(local, mensagem):
+    raise ValueError(f"{local}: {mensagem}")
+
+
+def _validar_definicao(definicao):
+    """Confere a estrutura do conjunto de regras; levanta ValueError no primeiro problema."""
+    if not isinstance(definicao, dict) or not isinstance(definicao.get('regras'), list):
+        _erro("conjunto", "esperado um objeto com a lista 'regras'")
+    padrao = definicao.get('padrao')
+    if not isinstance(padrao, dict) or padrao.get('classe') not in _CODIGO_POR_CLASSE:
+        _erro("padrao", f"informe 'classe' (uma de {list(_CODIGO_POR_CLASSE)}) e 'motivo'")
+    if not isinstance(padrao.get('motivo'), str) or not padrao['motivo']:
+        _erro("padrao", "'motivo' deve ser um texto não vazio")
+
+    nomes = []
+    for posicao, regra in enumerate(definicao['regras'], start=1):
+        local = f"regra {posicao}"
+        if not isinstance(regra, dict):
+            _erro(local, "esperado um objeto")
+        nome = regra.get('nome')
+        if not isinstance(nome, str) or not nome:
+            _erro(local, "'nome' deve ser um texto não vazio")
+        local = f"regra '{nome}'"
+        if nome in nomes:
+            _erro(local, "nome repetido")
+        nomes.append(nome)
+        if regra.get('classe') not in _CODIGO_POR_CLASSE:
+            _erro(local, f"'classe' deve ser uma de {list(_CODIGO_POR_CLASSE)}")
+        if not isinstance(regra.get('motivo'), str) or not regra['motivo']:
+            _erro(local, "'motivo' deve ser um texto não vazio")
+        condicoes = regra.get('condicoes', {})
+        if not isinstance(condicoes, dict):
+            _erro(local, "'condicoes' deve ser um objeto")
+        for chave, valor in condicoes.items():
+            if chave in CONDICOES_NUMERICAS:
+                # bool é subclasse de int no Python; true/false não valem como número
+                if isinstance(valor, bool) or not isinstance(valor, int) or valor < 0:
+                    _erro(local, f"'{chave}' deve ser um inteiro >= 0")
+            elif chave in CONDICOES_BOOLEANAS:
+                if not isinstance(valor, bool):
+                    _erro(local, f"'{chave}' deve ser true ou false")
+            else:
+                _erro(local, f"condição desconhecida '{chave}'; use {sorted(CONDICOES_NUMERICAS | CONDICOES_BOOLEANAS)}")
+
+    for posicao, regra in enumerate(definicao['regras']):
+        prevalece = regra.get('prevalece_sobre', [])
+        if not isinstance(prevalece, list) or not all(isinstance(nome, str) for nome in prevalece):
+            _erro(f"regra '{regra['nome']}'", "'prevalece_sobre' deve ser uma lista de nomes de regras")
+        for nome in prevalece:
+            if nome not in nomes[posicao + 1:]:
+                _erro(f"regra '{regra['nome']}'", f"'prevalece_sobre' cita '{nome}', que não é uma regra seguinte")
+
+
+def _cobertura(condicoes, dias):
+    """Máscara (faixas, 32) das células em que todas as condições da regra valem."""
+    dias = dias[:, None]
+    cobre = np.ones((len(dias), N_COMBINACOES), dtype=bool)
+    if 'dias_min' in condicoes:
+        cobre &= dias >= condicoes['dias_min']
+    if 'dias_max' in condicoes:
+        cobre &= dias <= condicoes['dias_max']
+    if 'suspeito' in condicoes:
+        cobre &= _SUSPEITO == condicoes['suspeito']
+    if 'evidencias_min' in condicoes:
+        cobre &= _EVIDENCIAS >= condicoes['evidencias_min']
+    if 'evidencias_max' in condicoes:
+        cobre &= _EVIDENCIAS <= condicoes['evidencias_max']
+    for flag in FLAGS:
+        if flag in condicoes:
+            cobre &= _COMBINACOES[flag] == condicoes[flag]
+    return cobre
+
+
+def compilar_regras(definicao):
+    """
+    Valida e compila um conjunto de regras (o JSON já decodificado) em uma `TabelaRegras`.
+
+    Erros de estrutura levantam ValueError. Regras que nunca decidem nenhuma
+    célula (condições impossíveis ou sempre atendidas antes por regras de maior
+    prioridade) e pares de regras que atendem às mesmas células com classe ou
+    motivo diferentes, sem a anterior declarar a seguinte em `prevalece_sobre`,
+    ficam em `problemas`, como dicionários com `tipo` ("inalcancavel" ou
+    "sobreposicao"), `regras` e `mensagem`. Sobreposições com o mesmo resultado
+    não mudam nenhuma resposta e não são apontadas.
+    """
+    _validar_definicao(definicao)
+    regras = definicao['regras']
+
+    # Cada limite de dias abre uma faixa; dentro de uma faixa nenhuma condição muda
+    cortes = {0}
+    for regra in regras:
+        condicoes = regra.get('condicoes', {})
+        if 'dias_min' in condicoes:
+            cortes.add(condicoes['dias_min'])
+        if 'dias_max' in condicoes:
+            cortes.add(condicoes['dias_max'] + 1)
+    inicios = np.array(sorted(cortes), dtype=np.int64)
+    faixa_por_dia = np.searchsorted(inicios, np.arange(inicios[-1] + 1), side="right") - 1
+
+    codigos_motivo = np.zeros((len(inicios), N_COMBINACOES), dtype=np.uint8)
+    decididas = np.zeros_like(codigos_motivo, dtype=bool)
+    coberturas, problemas = [], []
+    for codigo, regra in enumerate(regras, start=1):
+        cobre = _cobertura(regra.get('condicoes', {}), inicios)
+        vence = cobre & ~decididas
+        codigos_motivo[vence] = codigo
+        decididas |= cobre
+
+        nome = regra['nome']
+        if not cobre.any():
+            problemas.append({"tipo": "inalcancavel", "regras": [nome],
+                              "mensagem": f"'{nome}' tem condições que nenhuma ocorrência atende."})
+        elif not vence.any():
+            problemas.append({"tipo": "inalcancavel", "regras": [nome],
+                              "mensagem": f"'{nome}' nunca decide: regras anteriores já cobrem todos os seus casos."})
+        for anterior, cobre_anterior in coberturas:
+            mesmo_resultado = (anterior['classe'], anterior['motivo']) == (regra['classe'], regra['motivo'])
+            if mesmo_resultado or nome in anterior.get('prevalece_sobre', []):
+                continue
+            comuns = int((cobre & cobre_anterior).sum())
+            if comuns:
+                conflito = anterior['classe'] != regra['classe']
+                problemas.append({
+                    "tipo": "sobreposicao", "regras": [anterior['nome'], nome],
+                    "mensagem": f"'{anterior['nome']}' e '{nome}' atendem às mesmas {comuns} células "
+                                f"(faixa de dias × flags); vale '{anterior['nome']}'"
+                                + (f" ({anterior['classe']} em vez de {regra['classe']})." if conflito else "."),
+                })
+        coberturas.append((regra, cobre))
+
+    classe_por_motivo = np.array(
+        [_CODIGO_POR_CLASSE[definicao['padrao']['classe']]] + [_CODIGO_POR_CLASSE[r['classe']] for r in regras],
+        dtype=np.uint8,
+    )
+    return TabelaRegras(
+        versao=str(definicao.get('versao', '')),
+        nomes=tuple(r['nome'] for r in regras),
+        motivos=(definicao['padrao']['motivo'], *(r['motivo'] for r in regras)),
+        faixa_por_dia=faixa_por_dia.astype(np.intp),
+        classes=classe_por_motivo[codigos_motivo],
+        codigos_motivo=codigos_motivo,
+        problemas=tuple(problemas),
+    )
+
+
+def carregar_regras(caminho):
+    """Lê e compila o arquivo JSON de regras."""
+    return compilar_regras(json.loads(Path(caminho).read_text(encoding="utf-8")))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Valida um arquivo de regras declarativas.")
+    parser.add_argument("arquivo", help="Arquivo JSON de regras")
+    parser.add_argument("--estrito", action="store_true", help="Sobreposições também reprovam o arquivo")
+    args = parser.parse_args(argv)
+
+    try:
+        tabela = carregar_regras(args.arquivo)
+    except ValueError as erro:
+        print(f"❌ Arquivo inválido: {erro}")
+        return 1
+    print(f"Regras '{tabela.versao}': {len(tabela.nomes)} regra(s), "
+          f"{len(tabela.classes)} faixa(s) de dias × {N_COMBINACOES} combinações de flags")
+    for problema in tabela.problemas:
+        print(f"  {'❌' if problema['tipo'] == 'inalcancavel' else '⚠️'} {problema['mensagem']}")
+    reprovam = {"inalcancavel", "sobreposicao"} if args.estrito else {"inalcancavel"}
+    return 1 if any(p['tipo'] in reprovam for p in tabela.problemas) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
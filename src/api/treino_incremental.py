@@ -0,0 +1,243 @@
+"""
+Atualização incremental do modelo com novos casos rotulados, sem retreinar tudo.
+
+A floresta da versão base recebe árvores novas treinadas apenas com cada lote
+de casos rotulados; as árvores mais antigas saem para manter o total em
+`maximo_arvores`. `estimators_` fica sempre da árvore mais antiga para a mais
+nova, então o envelhecimento é só descartar o início da lista. A entrada é lida
+em lotes (JSONL, CSV, Parquet ou partições de `dados_sinteticos`), e o resultado
+é registrado como uma nova versão no registro de modelos.
+
+Uma fração de cada lote é separada para avaliação: a acurácia da versão base e
+da nova versão sobre esses casos novos mostra quanto a base tinha se afastado
+dos dados recentes.
+
+Uso (a partir da raiz do projeto):
+    python -m src.api.treino_incremental novos_casos.jsonl
+    python -m src.api.treino_incremental dados/ --arvores-por-lote 25 --promover
+"""
+import argparse
+import copy
+import sys
+from pathlib import Path
+
+if __package__ in (None, ""):
+    sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.utils.class_weight import compute_class_weight
+
+from src.api.constantes import FEATURES, RESOLUTIVIDADE_CLASSES
+from src.api.dados_sinteticos import ARQUIVO_MANIFESTO, TARGET, ler_particoes
+from src.api.gerar_modelo import PARAMETROS_MODELO, salvar_modelo
+from src.api.registro_modelos import ARQUIVO_MODELO, RegistroModelos
+from src.api.tabela_modelo import compilar_tabela, verificar_tabela
+from src.api.validacao_colunar import validar_bloco
+from src.config import settings
+
+ARVORES_POR_LOTE = 25
+MAXIMO_ARVORES = PARAMETROS_MODELO['n_estimators']
+TAMANHO_LOTE = 50_000
+FRACAO_AVALIACAO = 0.2
+# Limite de linhas guardadas para avaliação (memória constante em entradas grandes)
+MAXIMO_LINHAS_AVALIACAO = 200_000
+
+_CODIGO_POR_CLASSE = {nome: codigo for codigo, nome in RESOLUTIVIDADE_CLASSES.items()}
+
+
+def _rotulos(valores):
+    """Rótulos como códigos 0/1/2; aceita os códigos ou os nomes das classes."""
+    valores = pd.Series(valores)
+    if pd.api.types.is_numeric_dtype(valores):
+        validos = valores.isin(list(RESOLUTIVIDADE_CLASSES)).all()
+    else:
+        valores = valores.map(_CODIGO_POR_CLASSE)
+        validos = not valores.isna().any()
+    if not validos:
+        raise ValueError(f"Rótulos desconhecidos; use {list(_CODIGO_POR_CLASSE)} ou 0/1/2.")
+    return valores.to_numpy(dtype=np.uint8)
+
+
+def ler_lotes_rotulados(caminho, tamanho_lote=TAMANHO_LOTE):
+    """
+    Gera `(X, y)` em lotes de até `tamanho_lote` linhas a partir de JSONL, CSV,
+    Parquet ou de um diretório de partições (`dados_sinteticos`). As features
+    passam pelas regras do schema (`validacao_colunar.validar_bloco`): um valor
+    que a API recusaria interrompe a leitura, com as linhas inválidas.
+    """
+    caminho = Path(caminho)
+    colunas = FEATURES + [TARGET]
+    deslocamento = 0
+    if caminho.is_dir() and (caminho / ARQUIVO_MANIFESTO).exists():
+        for particao in ler_particoes(caminho, colunas):
+            for inicio in range(0, len(particao[TARGET]), tamanho_lote):
+                bloco = {c: particao[c][inicio:inicio + tamanho_lote] for c in colunas}
+                yield validar_bloco(bloco, deslocamento), _rotulos(bloco[TARGET])
+                deslocamento += len(bloco[TARGET])
+        return
+
+    sufixo = caminho.suffix.lower()
+    if sufixo == ".parquet":
+        import pyarrow.parquet as pq
+        blocos = (
+            lote.to_pandas()
+            for lote in pq.ParquetFile(caminho).iter_batches(batch_size=tamanho_lote, columns=colunas)
+        )
+    elif sufixo in (".jsonl", ".json", ".ndjson"):
+        blocos = pd.read_json(caminho, lines=True, chunksize=tamanho_lote)
+    else:
+        blocos = pd.read_csv(caminho, chunksize=tamanho_lote)
+    for bloco in blocos:
+        if TARGET not in bloco.columns:
+            raise ValueError(f"Colunas obrigatórias ausentes: {[TARGET]}")
+        yield validar_bloco(bloco, deslocamento), _rotulos(bloco[TARGET])
+        deslocamento += len(bloco)
+
+
+def carregar_modelo_treinavel(registro, versao=None):
+    """Versão (a ativa por padrão) e o seu RandomForestClassifier, lido do pickle."""
+    versao = versao or registro.versao_ativa()
+    if versao is None:
+        raise FileNotFoundError(f"Nenhuma versão ativa em {registro.raiz}; informe a versão base.")
+    with open(registro.caminho(versao) / ARQUIVO_MODELO, "rb") as f:
+        return versao, joblib.load(f)
+
+
+def adicionar_arvores(modelo, X, y, arvores=ARVORES_POR_LOTE, maximo_arvores=MAXIMO_ARVORES, semente=0):
+    """
+    Treina `arvores` árvores só com `(X, y)` e as acrescenta ao fim da floresta,
+    descartando as mais antigas além de `maximo_arvores`. Retorna quantas saíram.
+
+    O lote pode não ter todas as classes do modelo (ex.: o último lote, curto),
+    mas não pode ter classes que o modelo não conhece.
+    """
+    desconhecidas = np.setdiff1d(np.unique(y), modelo.classes_)
+    if len(desconhecidas):
+        raise ValueError(
+            f"O lote tem as classes {desconhecidas.tolist()}, que o modelo não usa ({modelo.classes_.tolist()})."
+        )
+    # Os índices de classe das árvores precisam coincidir com os da floresta: cada classe ausente
+    # do lote entra com uma linha de peso zero, cópia da primeira (mesmas features, não cria divisão
+    # nem pesa nas folhas), e as árvores novas ficam com todas as classes do modelo
+    parametros = {**PARAMETROS_MODELO, 'n_estimators': arvores, 'random_state': semente}
+    ausentes = np.setdiff1d(modelo.classes_, y)
+    pesos = np.ones(len(y))
+    if len(ausentes):
+        if parametros.get('class_weight') == 'balanced':
+            # "balanced" contaria as linhas de peso zero (divisão por zero): os pesos vêm só das linhas reais
+            presentes = np.unique(y)
+            balanceados = compute_class_weight('balanced', classes=presentes, y=y)
+            parametros['class_weight'] = {
+                **dict(zip(presentes.tolist(), balanceados)), **{classe: 1.0 for classe in ausentes.tolist()}
+            }
+        X = np.concatenate([X, np.repeat(X[:1], len(ausentes), axis=0)])
+        y = np.concatenate([y, ausentes.astype(y.dtype)])
+        pesos = np.concatenate([pesos, np.zeros(len(ausentes))])
+    novas = RandomForestClassifier(**parametros)
+    novas.fit(pd.DataFrame(X, columns=FEATURES), y, sample_weight=pesos)
+    estimadores = list(modelo.estimators_) + novas.estimators_
+    removidas = max(0, len(estimadores) - maximo_arvores)
+    modelo.estimators_ = estimadores[removidas:]
+    modelo.n_estimators = len(modelo.estimators_)
+    return removidas
+
+
+def treinar_incremental(entrada, registro=None, versao_base=None, arvores_por_lote=ARVORES_POR_LOTE,
+                        maximo_arvores=MAXIMO_ARVORES, tamanho_lote=TAMANHO_LOTE, promover=False):
+    """
+    Acrescenta à versão base árvores treinadas em cada lote de `entrada` e
+    registra o resultado como nova versão. Retorna `(versao, resumo)`.
+    """
+    registro = registro or RegistroModelos(settings.diretorio_modelos)
+    versao_base, modelo = carregar_modelo_treinavel(registro, versao_base)
+    # Cópia rasa: `adicionar_arvores` troca a lista de árvores em vez de alterá-la
+    base = copy.copy(modelo)
+
+    avaliacao_X, avaliacao_y = [], []
+    linhas_avaliacao = linhas_treino = lotes = removidas = 0
+    ignorados = []
+    rng = np.random.default_rng(PARAMETROS_MODELO['random_state'])
+    for X, y in ler_lotes_rotulados(entrada, tamanho_lote):
+        separar = rng.random(len(y)) < FRACAO_AVALIACAO
+        if linhas_avaliacao < MAXIMO_LINHAS_AVALIACAO:
+            avaliacao_X.append(X[separar])
+            avaliacao_y.append(y[separar])
+            linhas_avaliacao += int(separar.sum())
+        lotes += 1
+        desconhecidas = np.setdiff1d(np.unique(y[~separar]), modelo.classes_)
+        if not (~separar).any() or len(desconhecidas):
+            # Um lote que não dá para treinar não perde os anteriores: fica de fora e é informado
+            motivo = "sem linhas de treino"
+            if len(desconhecidas):
+                motivo = f"classes {desconhecidas.tolist()} fora do modelo"
+            ignorados.append({"lote": lotes, "linhas": len(y), "motivo": motivo})
+            print(f"⚠️ Lote {lotes}: {len(y):,} linhas ignoradas ({motivo})")
+            continue
+        semente = PARAMETROS_MODELO['random_state'] + lotes
+        removidas += adicionar_arvores(
+            modelo, X[~separar], y[~separar], arvores_por_lote, maximo_arvores, semente
+        )
+        linhas_treino += int((~separar).sum())
+        print(f"Lote {lotes}: {len(y):,} linhas, {modelo.n_estimators} árvores na floresta")
+    if not linhas_treino:
+        raise ValueError(f"Nenhuma linha rotulada utilizável em '{entrada}'.")
+
+    X_teste = pd.DataFrame(np.concatenate(avaliacao_X), columns=FEATURES)
+    y_teste = np.concatenate(avaliacao_y)
+    acuracia_base = float((base.predict(X_teste) == y_teste).mean())
+    acuracia = float((modelo.predict(X_teste) == y_teste).mean())
+    print(f"Acurácia nos casos novos: versão base {acuracia_base:.4f} -> nova {acuracia:.4f}")
+
+    verificacao = verificar_tabela(compilar_tabela(modelo), modelo)
+    if not verificacao['ok']:
+        raise RuntimeError("A tabela compilada diverge do modelo atualizado.")
+
+    resumo = {
+        "versao_base": versao_base,
+        "lotes": lotes,
+        "lotes_ignorados": ignorados,
+        "arvores_por_lote": arvores_por_lote,
+        "maximo_arvores": maximo_arvores,
+        "arvores_removidas": removidas,
+        "arvores": modelo.n_estimators,
+    }
+    metadados = {
+        "parametros": {**PARAMETROS_MODELO, 'n_estimators': modelo.n_estimators},
+        "incremental": resumo,
+        "metricas": {"acuracia": acuracia, "acuracia_versao_base": acuracia_base},
+        "features": FEATURES,
+        "classes": RESOLUTIVIDADE_CLASSES,
+        "linhas_treino": linhas_treino,
+        "linhas_teste": len(y_teste),
+    }
+    # A amostra de avaliação, sorteada dos casos novos, serve de referência para o monitor de deriva
+    versao = registro.registrar(
+        lambda diretorio: salvar_modelo(modelo, diretorio, X_teste, X_teste), metadados, promover=promover
+    )
+    print(f"Modelo registrado como versão '{versao}' em '{registro.raiz}'{' (ativa)' if promover else ''}")
+    return versao, {**resumo, "acuracia": acuracia, "acuracia_versao_base": acuracia_base}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Atualiza o modelo com novos casos rotulados.")
+    parser.add_argument("entrada", help="Casos rotulados: .jsonl, .csv, .parquet ou diretório de partições")
+    parser.add_argument("--raiz", default=settings.diretorio_modelos, help="Diretório do registro")
+    parser.add_argument("--versao-base", help="Padrão: versão ativa")
+    parser.add_argument("--arvores-por-lote", type=int, default=ARVORES_POR_LOTE)
+    parser.add_argument("--maximo-arvores", type=int, default=MAXIMO_ARVORES)
+    parser.add_argument("--tamanho-lote", type=int, default=TAMANHO_LOTE)
+    parser.add_argument("--promover", action="store_true", help="Torna a nova versão ativa")
+    args = parser.parse_args(argv)
+
+    treinar_incremental(
+        args.entrada, RegistroModelos(args.raiz), versao_base=args.versao_base,
+        arvores_por_lote=args.arvores_por_lote, maximo_arvores=args.maximo_arvores,
+        tamanho_lote=args.tamanho_lote, promover=args.promover,
+    )
+
+
+if __name__ == "__main__":
+    main()
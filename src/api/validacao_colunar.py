@@ -0,0 +1,220 @@
+"""
+Validação colunar de lotes de ocorrências, sem um objeto Pydantic por linha.
+
+No `/prever/lote`, montar um `OcorrenciaRequest` por ocorrência custa mais que
+pontuar o lote inteiro. Aqui o lote é validado coluna a coluna: uma coluna
+"limpa" (só `int` em `periodo_decorrido_dias`, só `bool` nas flags, que é o
+caso de um JSON bem formado) vira um array de uma vez, e `ge=0` é uma
+comparação vetorizada. Qualquer outro valor (strings como "3" ou "true",
+0/1 nas flags, 3.0, None, negativos...) é validado individualmente pelo
+validador do próprio campo de `OcorrenciaRequest`, montado a partir de
+`model_fields`: as regras aceitas e as mensagens de erro são exatamente as do
+schema, e só as linhas fora do caminho rápido pagam por isso.
+
+Aceita o lote por colunas (`{"periodo_decorrido_dias": [...], ...}`) ou por
+linhas (a lista de objetos do `/prever/lote`). Colunas ausentes ou de tamanhos
+diferentes invalidam o lote inteiro (ValueError); os demais problemas viram
+erros por linha, e as linhas válidas seguem para a pontuação.
+"""
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Annotated, List
+
+import numpy as np
+from pydantic import ValidationError
+
+from src.api.constantes import FEATURES
+from src.models.schemas import OcorrenciaRequest
+
+_MAXIMO_INT64 = np.iinfo(np.int64).max
+# Valor de um campo ausente em uma linha (diferente de `null`, que é um valor inválido)
+_FALTANDO = object()
+# Linha que não é um objeto: ocupa o lugar com valores válidos e só gera o erro da linha
+_SUBSTITUTA = {FEATURES[0]: 0, **{flag: False for flag in FEATURES[1:]}}
+
+
+@dataclass(frozen=True)
+class LoteValidado:
+    """Linhas válidas de um lote, prontas para a pontuação, e os erros das demais."""
+    X: np.ndarray  # (linhas válidas, 6) int64 na ordem de FEATURES
+    indices: np.ndarray  # posição de cada linha válida no lote original
+    erros: List[dict]  # {"indice", "campo", "tipo", "mensagem"}, em ordem de linha
+    total: int
+
+
+@lru_cache(maxsize=None)
+def _validadores():
+    """Validador de cada campo de `OcorrenciaRequest`, com as restrições (ex.: `ge=0`) do schema."""
+    from pydantic import TypeAdapter
+
+    return {
+        nome: TypeAdapter(
+            Annotated[(campo.annotation, *campo.metadata)] if campo.metadata else campo.annotation
+        ).validate_python
+        for nome, campo in OcorrenciaRequest.model_fields.items()
+    }
+
+
+@lru_cache(maxsize=None)
+def _erro_faltando():
+    erro = next(e for e in _erros_modelo({}) if e["type"] == "missing")
+    return erro["type"], erro["msg"]
+
+
+def _erros_modelo(valor):
+    try:
+        OcorrenciaRequest.model_validate(valor)
+    except ValidationError as erro:
+        return erro.errors()
+    return []
+
+
+def _validar_individualmente(nome, valores, indices, coluna, invalidas, erros):
+    """Valida `valores[indices]` com o validador do campo; grava os convertidos em `coluna`."""
+    validar = _validadores()[nome]
+    for i in indices:
+        valor = valores[i]
+        if valor is _FALTANDO:
+            tipo, mensagem = _erro_faltando()
+            erros.append({"indice": i, "campo": nome, "tipo": tipo, "mensagem": mensagem})
+            invalidas[i] = True
+            continue
+        try:
+            convertido = validar(valor)
+        except ValidationError as erro:
+            for detalhe in erro.errors():
+                erros.append({"indice": i, "campo": nome, "tipo": detalhe["type"], "mensagem": detalhe["msg"]})
+            invalidas[i] = True
+            continue
+        # Inteiros além do int64 são válidos no schema; para a pontuação equivalem ao maior dia representável
+        coluna[i] = min(int(convertido), _MAXIMO_INT64)
+
+
+def _validar_coluna(nome, valores, invalidas, erros):
+    """Array int64 da coluna (0 nas linhas inválidas), marcando em `invalidas` as linhas com erro."""
+    inteiro = nome == FEATURES[0]
+    tipo_esperado = int if inteiro else bool
+    limpos, lentos = valores, []
+    if not set(map(type, valores)) <= {tipo_esperado}:
+        # Só os valores fora do tipo esperado passam pelo validador do campo
+        lentos = [i for i, valor in enumerate(valores) if type(valor) is not tipo_esperado]
+        limpos = list(valores)
+        for i in lentos:
+            limpos[i] = 0
+    try:
+        coluna = np.array(limpos, dtype=np.int64)
+    except OverflowError:
+        grandes = [i for i, valor in enumerate(limpos) if not -_MAXIMO_INT64 - 1 <= valor <= _MAXIMO_INT64]
+        limpos = list(limpos)
+        for i in grandes:
+            limpos[i] = 0
+        lentos += grandes
+        coluna = np.array(limpos, dtype=np.int64)
+    if inteiro:
+        negativos = np.flatnonzero(coluna < 0)
+        if len(negativos):
+            coluna[negativos] = 0
+            lentos += negativos.tolist()
+    if lentos:
+        _validar_individualmente(nome, valores, sorted(lentos), coluna, invalidas, erros)
+    return coluna
+
+
+def _montar(colunas, total, invalidas, erros):
+    X = np.column_stack([_validar_coluna(nome, colunas[nome], invalidas, erros) for nome in FEATURES])
+    erros.sort(key=lambda erro: (erro["indice"], FEATURES.index(erro["campo"]) if erro["campo"] else -1))
+    validas = np.flatnonzero(~invalidas)
+    return LoteValidado(X[validas] if len(validas) < total else X, validas, erros, total)
+
+
+def validar_colunas(colunas) -> LoteValidado:
+    """Lote por colunas: `{feature: [valor por linha]}`, todas as features e do mesmo tamanho."""
+    if not isinstance(colunas, dict):
+        raise ValueError("O lote por colunas deve ser um objeto com uma lista por feature.")
+    ausentes = [nome for nome in FEATURES if nome not in colunas]
+    if ausentes:
+        raise ValueError(f"Colunas obrigatórias ausentes: {', '.join(ausentes)}.")
+    if not all(isinstance(colunas[nome], list) for nome in FEATURES):
+        raise ValueError("Cada coluna deve ser uma lista de valores.")
+    tamanhos = {len(colunas[nome]) for nome in FEATURES}
+    if len(tamanhos) > 1:
+        raise ValueError(f"As colunas têm tamanhos diferentes: {sorted(tamanhos)}.")
+    total = tamanhos.pop()
+    return _montar(colunas, total, np.zeros(total, dtype=bool), [])
+
+
+def validar_linhas(linhas) -> LoteValidado:
+    """Lote por linhas: a lista de objetos do `/prever/lote`, validada coluna a coluna."""
+    if not isinstance(linhas, list):
+        raise ValueError("O lote por linhas deve ser uma lista de ocorrências.")
+    total = len(linhas)
+    invalidas = np.zeros(total, dtype=bool)
+    erros = []
+    if not all(type(linha) is dict for linha in linhas):
+        linhas = list(linhas)
+        for i, linha in enumerate(linhas):
+            if type(linha) is not dict:
+                for detalhe in _erros_modelo(linha):
+                    erros.append({"indice": i, "campo": None, "tipo": detalhe["type"], "mensagem": detalhe["msg"]})
+                invalidas[i] = True
+                linhas[i] = _SUBSTITUTA
+    colunas = {nome: [linha.get(nome, _FALTANDO) for linha in linhas] for nome in FEATURES}
+    return _montar(colunas, total, invalidas, erros)
+
+
+def validar_lote(lote) -> LoteValidado:
+    """Lote por colunas (objeto) ou por linhas (lista)."""
+    if isinstance(lote, dict):
+        return validar_colunas(lote)
+    if isinstance(lote, list):
+        return validar_linhas(lote)
+    raise ValueError("O lote deve ser um objeto com uma lista por feature ou uma lista de ocorrências.")
+
+
+def matriz_linhas(linhas) -> np.ndarray:
+    """Matriz (n, 6) int64 de linhas já validadas na ordem de FEATURES, com os dias limitados como em `validar_lote`."""
+    try:
+        return np.array(linhas, dtype=np.int64)
+    except OverflowError:
+        # Dias além do int64 são válidos no schema; para a pontuação equivalem ao maior dia representável
+        return np.array([(min(linha[0], _MAXIMO_INT64), *linha[1:]) for linha in linhas], dtype=np.int64)
+
+
+def matriz_ocorrencias(ocorrencias) -> np.ndarray:
+    """Matriz (n, 6) int64 de `OcorrenciaRequest` já validados (ver `matriz_linhas`)."""
+    return matriz_linhas([ocorrencia.linha() for ocorrencia in ocorrencias])
+
+
+def _coluna_valida(valores, flag):
+    """Coluna inteira (ou bool) que o schema aceita por inteiro, conferida de forma vetorizada."""
+    if valores.dtype.kind == "b":
+        return flag
+    if valores.dtype.kind not in "iu":
+        return False
+    return bool(((valores == 0) | (valores == 1)).all()) if flag else bool((valores >= 0).all())
+
+
+def validar_bloco(colunas, deslocamento=0) -> np.ndarray:
+    """
+    Matriz (n, 6) int64 de um bloco lido de arquivo (DataFrame ou `{feature:
+    array}`), com as regras do schema. Colunas inteiras ou bool já dentro das
+    faixas passam direto; as demais passam por `validar_colunas`, e qualquer
+    valor inválido levanta ValueError com as linhas (contadas a partir de
+    `deslocamento` + 1) e o primeiro erro.
+    """
+    faltando = [c for c in FEATURES if c not in colunas]
+    if faltando:
+        raise ValueError(f"Colunas obrigatórias ausentes: {faltando}")
+    arrays = {c: np.asarray(colunas[c]) for c in FEATURES}
+    if all(_coluna_valida(arrays[c], i > 0) for i, c in enumerate(FEATURES)):
+        return np.column_stack([arrays[c] for c in FEATURES]).astype(np.int64)
+    # Algum valor fora do caminho rápido (ausente, fracionário, texto...): o validador colunar aponta as linhas
+    lote = validar_colunas({c: arrays[c].tolist() for c in FEATURES})
+    if lote.erros:
+        linhas = sorted({erro["indice"] for erro in lote.erros})
+        primeiro = lote.erros[0]
+        raise ValueError(
+            f"Linhas com valores ausentes ou inválidos (primeiras): {[i + deslocamento + 1 for i in linhas[:10]]}; "
+            f"linha {primeiro['indice'] + deslocamento + 1}, {primeiro['campo']}: {primeiro['mensagem']}"
+        )
+    return lote.X
@@ -17,12 +17,14 @@ st.markdown(
 
     Esta aplicação funciona como uma ferramenta de apoio à decisão, projetada para auxiliar na avaliação do **potencial de investigação** de uma ocorrência recém-registrada. 
     
-    Utilize uma das duas abordagens de análise:
+    Utilize uma das abordagens de análise:
     
     1. **Previsão com Modelo de Machine Learning**: Utiliza um modelo preditivo treinado 
        para estimar a viabilidade da investigação.
     2. **Previsão com Regras de Negócio**: Aplica um conjunto de regras pré-definidas 
        para classificar a ocorrência.
+    3. **Previsão em Lote**: Analisa um arquivo CSV com várias ocorrências e permite
+       baixar os resultados.
 
     **👈 Selecione uma das páginas no menu ao lado para começar.**
     
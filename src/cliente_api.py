@@ -0,0 +1,113 @@
+"""
+Cliente HTTP das APIs de previsão, compartilhado pelas páginas do Streamlit.
+
+Uma única `requests.Session` por processo mantém as conexões abertas (pool),
+com timeout em todas as chamadas e novas tentativas com espera exponencial
+para falhas de conexão e respostas 502/503/504. Os endereços vêm das
+variáveis de ambiente `API_REGRAS_URL` e `API_MODELO_URL`.
+
+As previsões unitárias ficam em cache pela tupla de entrada; a validade é
+limitada a `VALIDADE_CACHE_S` para acompanhar a troca da versão do modelo.
+"""
+import itertools
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from src.api.constantes import FEATURES
+
+URLS_PADRAO = {"regras": "http://127.0.0.1:8001", "modelo": "http://127.0.0.1:8002"}
+VARIAVEIS_URL = {"regras": "API_REGRAS_URL", "modelo": "API_MODELO_URL"}
+COMANDOS_API = {
+    "regras": "uvicorn src.api.main_regras:app --port 8001",
+    "modelo": "uvicorn src.api.main_modelo:app --port 8002",
+}
+
+TIMEOUT = (3.05, 30)  # (conexão, leitura) em segundos
+TENTATIVAS = 3
+TAMANHO_LOTE = 1000
+REQUISICOES_SIMULTANEAS = 4
+VALIDADE_CACHE_S = 300
+
+_sessao = None
+_trava_sessao = threading.Lock()
+
+
+def url_base(api):
+    return os.environ.get(VARIAVEIS_URL[api], URLS_PADRAO[api]).rstrip("/")
+
+
+def sessao():
+    """Sessão HTTP compartilhada (criada na primeira chamada)."""
+    global _sessao
+    with _trava_sessao:
+        if _sessao is None:
+            # As previsões não têm efeito colateral, então o POST pode ser repetido
+            tentativas = Retry(
+                total=TENTATIVAS, backoff_factor=0.2, status_forcelist=(502, 503, 504),
+                allowed_methods=frozenset({"GET", "POST"}),
+            )
+            adaptador = HTTPAdapter(pool_connections=2, pool_maxsize=2 * REQUISICOES_SIMULTANEAS,
+                                    max_retries=tentativas)
+            _sessao = requests.Session()
+            _sessao.mount("http://", adaptador)
+            _sessao.mount("https://", adaptador)
+        return _sessao
+
+
+def _linha(ocorrencia):
+    """Tupla normalizada da ocorrência, na ordem de FEATURES (chave do cache)."""
+    return (int(ocorrencia[FEATURES[0]]), *(bool(ocorrencia[c]) for c in FEATURES[1:]))
+
+
+def _post(api, caminho, payload):
+    resposta = sessao().post(url_base(api) + caminho, json=payload, timeout=TIMEOUT)
+    resposta.raise_for_status()
+    return resposta.json()
+
+
+@lru_cache(maxsize=4096)
+def _prever_em_cache(api, url, linha, janela_validade):
+    return _post(api, "/prever", dict(zip(FEATURES, linha)))
+
+
+def prever(api, ocorrencia):
+    """Previsão de uma ocorrência (`api`: "regras" ou "modelo"), com cache pela entrada."""
+    janela = int(time.monotonic() // VALIDADE_CACHE_S)
+    return dict(_prever_em_cache(api, url_base(api), _linha(ocorrencia), janela))
+
+
+def limpar_cache():
+    _prever_em_cache.cache_clear()
+
+
+def prever_lote(api, ocorrencias):
+    """Previsões de uma lista de ocorrências em uma única chamada a `/prever/lote`."""
+    return _post(api, "/prever/lote", [dict(zip(FEATURES, _linha(o))) for o in ocorrencias])
+
+
+def prever_em_lotes(api, ocorrencias, tamanho_lote=TAMANHO_LOTE, simultaneas=REQUISICOES_SIMULTANEAS):
+    """
+    Envia `ocorrencias` em lotes, com até `simultaneas` requisições ao mesmo
+    tempo, e gera `(inicio, resultados)` de cada lote na ordem original.
+    """
+    lotes = ((inicio, ocorrencias[inicio:inicio + tamanho_lote])
+             for inicio in range(0, len(ocorrencias), tamanho_lote))
+    with ThreadPoolExecutor(max_workers=simultaneas) as executor:
+        # No máximo `simultaneas` lotes em andamento à frente do que já foi entregue
+        pendentes = deque(
+            (inicio, executor.submit(prever_lote, api, lote))
+            for inicio, lote in itertools.islice(lotes, simultaneas)
+        )
+        while pendentes:
+            inicio, futuro = pendentes.popleft()
+            for proximo, lote in itertools.islice(lotes, 1):
+                pendentes.append((proximo, executor.submit(prever_lote, api, lote)))
+            yield inicio, futuro.result()
@@ -1,12 +1,88 @@
-from pydantic import BaseSettings
+from typing import Literal
+
+from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
     """Configurações da aplicação"""
     app_name: str = "Minha API"
     app_version: str = "1.0.0"
     debug: bool = False
+
+    # Micro-lotes do /prever da API de ML: requisições concorrentes que chegam
+    # dentro da janela são pontuadas juntas, em uma única matriz. Com pouca
+    # concorrência a janela é dispensada (ver src/api/microlotes.py)
+    microlote_habilitado: bool = True
+    microlote_janela_ms: float = 2.0
+    microlote_tamanho_maximo: int = 64
+
+    # Registro de modelos (src/api/registro_modelos.py) e troca da versão ativa
+    # sem reiniciar: a API confere o ponteiro ATIVO a cada intervalo (0 desliga)
+    diretorio_modelos: str = "modelos"
+    recarga_intervalo_s: float = 5.0
+
+    # Cache das etapas do treinamento (src/api/cache_artefatos.py): dados e
+    # modelos indexados pelos parâmetros e pela versão do código; as entradas
+    # menos usadas saem quando o total passa de `cache_limite_mb`
+    diretorio_cache: str = ".cache/artefatos"
+    cache_limite_mb: float = 2048.0
+
+    # Arquivo JSON das regras de negócio da API de regras (src/api/tabela_regras.py),
+    # recompilado sem reiniciar quando muda (mesmo intervalo da recarga do modelo)
+    arquivo_regras: str = "src/api/regras_padrao.json"
+
+    # Carga do modelo no lifespan da API de ML: por padrão o servidor só aceita
+    # requisições depois dela; em segundo plano ele sobe na hora e o /ready
+    # responde 503 até o modelo ficar pronto
+    carregamento_em_segundo_plano: bool = False
+
+    # Monitor de deriva (src/api/monitor_deriva.py): contagens das entradas e
+    # das classes previstas em uma janela deslizante de `deriva_janela_s`,
+    # dividida em `deriva_fatias` fatias, comparadas com a referência do treino
+    deriva_janela_s: float = 3600.0
+    deriva_fatias: int = 12
+
+    # Auditoria das previsões (src/api/auditoria.py): fila limitada em memória,
+    # gravada em lotes por uma thread em segmentos JSONL comprimidos. A política
+    # decide o que fazer com a fila cheia: descartar, bloquear ou amostrar
+    auditoria_habilitada: bool = True
+    diretorio_auditoria: str = "auditoria"
+    auditoria_capacidade: int = 100_000
+    auditoria_politica: Literal["descartar", "bloquear", "amostrar"] = "descartar"
+    auditoria_taxa_amostragem: float = 0.1
+    auditoria_tamanho_lote: int = 1000
+    auditoria_intervalo_s: float = 1.0
+    auditoria_segmento_mb: float = 64.0
+    auditoria_segmento_s: float = 3600.0
+
+    # Pontuação em sombra (src/api/sombra.py): versões candidatas do registro
+    # (separadas por vírgula) pontuam cópias das entradas do /prever* da API de
+    # ML em uma thread, fora da resposta. A sombra descarta o próprio trabalho
+    # com a fila cheia ou a API ocupada e gasta no máximo `sombra_fracao_cpu`
+    # do tempo pontuando
+    sombra_habilitada: bool = True
+    sombra_candidatos: str = ""
+    sombra_capacidade: int = 50_000
+    sombra_tamanho_lote: int = 4096
+    sombra_fracao_cpu: float = 0.25
+
+    # Controle de admissão das rotas /prever* (src/api/admissao.py): até
+    # `admissao_simultaneas_<motor>` requisições em andamento por motor e até
+    # `admissao_fila` esperando uma vaga (além disso, 429). Cada requisição tem
+    # um prazo (cabeçalho X-Prazo-Ms ou `admissao_prazo_ms`); esgotado na fila
+    # ou antes da pontuação, 503. As duas respostas trazem Retry-After. As
+    # regras pontuam no threadpool e disputam o GIL: mais vagas que núcleos só
+    # dividem a CPU; o modelo espera o coalescedor, então comporta mais vagas.
+    # A fila deve ser atendida bem antes do prazo (fila / vazão < prazo)
+    admissao_habilitada: bool = True
+    admissao_simultaneas_regras: int = 4
+    admissao_simultaneas_modelo: int = 64
+    admissao_fila: int = 64
+    admissao_prazo_ms: float = 1000.0
+
+    # Tempo por etapa, contadores e /metrics (src/api/metricas.py); desligar só
+    # para medir o custo da própria instrumentação
+    metricas_habilitadas: bool = True
     
-    class Config:
-        env_file = ".env"
+    model_config = {"env_file": ".env"}
 
 settings = Settings()
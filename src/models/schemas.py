@@ -1,3 +1,5 @@
+from typing import Dict, List, Optional
+
 from pydantic import BaseModel, Field
 
 class OcorrenciaRequest(BaseModel):
@@ -22,12 +24,58 @@ class OcorrenciaRequest(BaseModel):
         }
     }
 
+    def linha(self):
+        """Valores na ordem das features do modelo e das regras (`constantes.FEATURES`)."""
+        return (
+            self.periodo_decorrido_dias,
+            self.suspeito_conhecido,
+            self.tem_testemunhas,
+            self.tem_imagens_cameras,
+            self.suspeito_rastreavel,
+            self.vestigios_preservados
+        )
+
+class ContribuicaoFeature(BaseModel):
+    """Efeito de uma feature nas probabilidades do modelo, em pontos percentuais por classe."""
+    feature: str
+    condicao: str = Field(..., description="Valor da feature na ocorrência, por extenso")
+    pontos_percentuais: Dict[str, float]
+
+class ExplicacaoResponse(BaseModel):
+    """Decomposição das probabilidades do modelo: base do treino + contribuição de cada feature."""
+    classe: str = Field(..., description="Classe prevista, usada para ordenar as contribuições")
+    base: Dict[str, float] = Field(..., description="Probabilidades médias do treino, em %")
+    contribuicoes: List[ContribuicaoFeature] = Field(..., description="Da maior para a menor na classe prevista")
+    resumo: str
+
 class PrevisaoResponse(BaseModel):
     """Define a estrutura de dados da resposta da previsão."""
     resolutividade: str
     motivo: str
+    explicacao: Optional[ExplicacaoResponse] = Field(
+        None, description="Contribuição de cada feature; só no modelo de ML, com `explicar=true`"
+    )
 
     
 
     
   
+
+class ErroLinha(BaseModel):
+    """Problema de validação de uma linha de um lote (mesmo tipo e mensagem do Pydantic)."""
+    indice: int = Field(..., description="Posição da linha no lote")
+    campo: Optional[str] = Field(None, description="Feature com problema; vazio se a linha não é um objeto")
+    tipo: str
+    mensagem: str
+
+class PrevisaoColunasResponse(BaseModel):
+    """Previsões de um lote por colunas; linhas inválidas ficam com null e aparecem em `erros`."""
+    resolutividade: List[Optional[str]]
+    motivo: List[Optional[str]]
+    erros: List[ErroLinha]
+
+class ComparacaoResponse(BaseModel):
+    """Resultado dos dois motores para a mesma ocorrência (modo `ambos` da API unificada)."""
+    regras: PrevisaoResponse
+    modelo: PrevisaoResponse
+    concordam: bool = Field(..., description="Se os dois motores preveem a mesma classe")
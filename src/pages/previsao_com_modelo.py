@@ -1,8 +1,16 @@
 
+import sys
+from pathlib import Path
+
 import streamlit as st
 import requests
 import pandas as pd
 
+if str(Path(__file__).resolve().parents[2]) not in sys.path:
+    sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from src import cliente_api
+
 # --- Configuração da Página ---
 st.set_page_config(page_title="Previsão com Modelo", page_icon="🤖", layout="wide")
 
@@ -52,9 +60,6 @@ with st.form("ocorrencia_form_modelo", width=770):
 
 # --- Lógica de Previsão ---
 if submit_button:
-    # URL do endpoint da API do modelo
-    API_URL = "http://127.0.0.1:8002/prever" 
-
     # Montar o payload da requisição
     ocorrencia_data = {
         "periodo_decorrido_dias": periodo_decorrido_dias,
@@ -68,10 +73,8 @@ if submit_button:
     st.info("Analisando com o modelo de Machine Learning...")
 
     try:
-        response = requests.post(API_URL, json=ocorrencia_data)
-        response.raise_for_status()  # Lança erro para status HTTP 4xx/5xx
-
-        resultado = response.json()
+        # Sessão com pool de conexões, timeout e novas tentativas; respostas em cache
+        resultado = cliente_api.prever("modelo", ocorrencia_data)
 
         # Exibir o resultado
         st.subheader("Resultado da Análise")
@@ -91,6 +94,6 @@ if submit_button:
     except requests.exceptions.RequestException as e:
         st.error(f"**Erro ao conectar com a API:** {e}")
         st.warning(
-            "Verifique se a API do **modelo** está em execução na porta 8002. "
+            f"Verifique se a API do **modelo** está em execução em {cliente_api.url_base('modelo')}. "
             "Use o comando: `uvicorn src.api.main_modelo:app --reload --port 8002`"
         )
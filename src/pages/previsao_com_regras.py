@@ -1,8 +1,16 @@
 
+import sys
+from pathlib import Path
+
 import streamlit as st
 import requests
 import pandas as pd
 
+if str(Path(__file__).resolve().parents[2]) not in sys.path:
+    sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from src import cliente_api
+
 # --- Configuração da Página ---
 st.set_page_config(page_title="Previsão com Regras", page_icon="📜", layout="wide")
 
@@ -51,9 +59,6 @@ with st.form("ocorrencia_form_regras", width=800):
 
 # --- Lógica de Previsão ---
 if submit_button:
-    # URL do endpoint da API de regras
-    API_URL = "http://127.0.0.1:8001/prever"
-
     # Montar o payload da requisição
     ocorrencia_data = {
         "periodo_decorrido_dias": periodo_decorrido_dias,
@@ -67,10 +72,8 @@ if submit_button:
     st.info("Analisando com as Regras de Negócio...")
 
     try:
-        response = requests.post(API_URL, json=ocorrencia_data)
-        response.raise_for_status()  # Lança erro para status HTTP 4xx/5xx
-
-        resultado = response.json()
+        # Sessão com pool de conexões, timeout e novas tentativas; respostas em cache
+        resultado = cliente_api.prever("regras", ocorrencia_data)
 
         # Exibir o resultado
         st.subheader("Resultado da Análise")
@@ -90,6 +93,6 @@ if submit_button:
     except requests.exceptions.RequestException as e:
         st.error(f"**Erro ao conectar com a API:** {e}")
         st.warning(
-            "Verifique se a API de **regras** está em execução na porta 8001. "
+            f"Verifique se a API de **regras** está em execução em {cliente_api.url_base('regras')}. "
             "Use o comando: `uvicorn src.api.main_regras:app --port 8001`"
         )
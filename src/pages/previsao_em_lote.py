@@ -0,0 +1,129 @@
+
+import sys
+from pathlib import Path
+
+import streamlit as st
+import requests
+import numpy as np
+import pandas as pd
+
+if str(Path(__file__).resolve().parents[2]) not in sys.path:
+    sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from src import cliente_api
+from src.api.constantes import FEATURES
+
+# Linhas lidas do CSV por vez; cada bloco é enviado em lotes de TAMANHO_LOTE
+LINHAS_POR_BLOCO = 20_000
+
+# --- Configuração da Página ---
+st.set_page_config(page_title="Previsão em Lote", page_icon="📂", layout="wide")
+
+st.title("📂 Previsão em Lote (arquivo CSV)")
+
+st.markdown(
+    f"""
+    Envie um CSV com uma ocorrência por linha e as colunas
+    `{"`, `".join(FEATURES)}`. Os campos de sim/não aceitam `0`/`1` ou `True`/`False`.
+    """
+)
+
+# --- Entrada ---
+arquivo = st.file_uploader("Arquivo de ocorrências", type=["csv"])
+api = st.radio(
+    "Analisar com",
+    options=["modelo", "regras"],
+    format_func={"modelo": "🤖 Modelo de Machine Learning", "regras": "📜 Regras de Negócio"}.get,
+    horizontal=True,
+)
+tamanho_lote = st.number_input(
+    "Ocorrências por requisição", min_value=100, max_value=10_000,
+    value=cliente_api.TAMANHO_LOTE, step=100,
+)
+
+
+def _validar(bloco):
+    """Máscara das linhas completas e com valores válidos para a API."""
+    dias = pd.to_numeric(bloco[FEATURES[0]], errors="coerce")
+    valida = dias.notna() & (dias >= 0) & (dias == dias.round())
+    for coluna in FEATURES[1:]:
+        valores = bloco[coluna].astype(str).str.strip().str.lower()
+        valida &= valores.isin(["0", "1", "true", "false"])
+        bloco[coluna] = valores.isin(["1", "true"])
+    # Dias acima do int64 viram o máximo, como na API, em vez de estourar na conversão
+    grandes = dias >= 2**63
+    bloco[FEATURES[0]] = dias.mask(grandes, 0).fillna(0).astype("int64").mask(grandes, np.iinfo(np.int64).max)
+    return valida
+
+
+def _pontuar(arquivo, api, tamanho_lote):
+    """Pontua o CSV bloco a bloco, atualizando a barra de progresso; retorna `(resultado, invalidas)`."""
+    total = max(arquivo.getvalue().count(b"\n") - 1, 1)
+    progresso = st.progress(0.0, text="Iniciando...")
+    partes, processadas, invalidas = [], 0, 0
+    arquivo.seek(0)
+    for bloco in pd.read_csv(arquivo, chunksize=LINHAS_POR_BLOCO, dtype=str, keep_default_na=False):
+        faltando = [c for c in FEATURES if c not in bloco.columns]
+        if faltando:
+            raise ValueError(f"Colunas obrigatórias ausentes: {faltando}")
+        saida = bloco.copy()
+        saida["resolutividade"] = ""
+        saida["motivo"] = "Linha com valores ausentes ou inválidos."
+        valida = _validar(bloco)
+        invalidas += int((~valida).sum())
+
+        indices = bloco.index[valida]
+        ocorrencias = bloco.loc[valida, FEATURES].to_dict("records")
+        for inicio, resultados in cliente_api.prever_em_lotes(api, ocorrencias, tamanho_lote):
+            linhas = indices[inicio:inicio + len(resultados)]
+            saida.loc[linhas, "resolutividade"] = [r["resolutividade"] for r in resultados]
+            saida.loc[linhas, "motivo"] = [r["motivo"] for r in resultados]
+            processadas += len(resultados)
+            progresso.progress(
+                min(processadas / total, 1.0), text=f"{processadas:,} de ~{total:,} ocorrências analisadas"
+            )
+        partes.append(saida)
+
+    progresso.progress(1.0, text=f"Concluído: {processadas:,} ocorrências analisadas")
+    resultado = pd.concat(partes, ignore_index=True) if partes else pd.DataFrame()
+    return resultado, invalidas
+
+
+# --- Lógica de Previsão ---
+if arquivo is not None and st.button("Analisar arquivo"):
+    try:
+        resultado, invalidas = _pontuar(arquivo, api, int(tamanho_lote))
+        # Guardado na sessão: o clique no botão de download executa a página de novo
+        st.session_state["previsao_em_lote"] = {
+            "arquivo": arquivo.name,
+            "api": api,
+            "resumo": resultado.loc[resultado["resolutividade"] != "", "resolutividade"].value_counts().to_dict()
+            if len(resultado) else {},
+            "invalidas": invalidas,
+            "amostra": resultado.head(100),
+            "csv": resultado.to_csv(index=False).encode("utf-8"),
+        }
+    except ValueError as e:
+        st.error(f"**Arquivo inválido:** {e}")
+    except requests.exceptions.RequestException as e:
+        st.error(f"**Erro ao conectar com a API:** {e}")
+        st.warning(
+            f"Verifique se a API ({api}) está em execução em {cliente_api.url_base(api)}. "
+            f"Use o comando: `{cliente_api.COMANDOS_API[api]}`"
+        )
+
+ultimo = st.session_state.get("previsao_em_lote")
+if ultimo is not None:
+    st.subheader("Resultado da Análise")
+    st.write(f"Arquivo **{ultimo['arquivo']}**, analisado com **{ultimo['api']}**.")
+    if ultimo["resumo"]:
+        st.bar_chart(pd.Series(ultimo["resumo"], name="ocorrências"))
+    if ultimo["invalidas"]:
+        st.warning(f"{ultimo['invalidas']:,} linha(s) com valores ausentes ou inválidos não foram analisadas.")
+    st.dataframe(ultimo["amostra"], use_container_width=True)
+    st.download_button(
+        "Baixar resultados (CSV)",
+        data=ultimo["csv"],
+        file_name=f"{Path(ultimo['arquivo']).stem}_resultados.csv",
+        mime="text/csv",
+    )
@@ -0,0 +1,13 @@
+import pytest
+
+from src.api import main_modelo, main_regras
+from src.config import settings
+
+
+@pytest.fixture(autouse=True)
+def auditoria_temporaria(tmp_path, monkeypatch):
+    """Os segmentos de auditoria gravados no lifespan das APIs vão para o diretório temporário do teste."""
+    diretorio = tmp_path / "auditoria"
+    monkeypatch.setattr(settings, "diretorio_auditoria", str(diretorio))
+    for modulo in (main_regras, main_modelo):
+        monkeypatch.setattr(modulo.auditoria, "diretorio", diretorio / modulo.auditoria.api)
@@ -0,0 +1,60 @@
+import asyncio
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.api import main_regras, main_unificado
+from src.api.admissao import ControleAdmissao, Sobrecarga
+
+PAYLOAD = {"periodo_decorrido_dias": 1, "suspeito_conhecido": True, "tem_testemunhas": True,
+           "tem_imagens_cameras": False, "suspeito_rastreavel": False, "vestigios_preservados": True}
+
+
+def test_vagas_fila_e_prazo():
+    """Com as vagas ocupadas a requisição espera; fila cheia é 429 e prazo esgotado na fila é 503."""
+    async def cenario():
+        controle = ControleAdmissao("regras", simultaneas=1, fila=1)
+        prazo = time.monotonic() + 5
+        await controle.entrar(prazo)
+        esperando = asyncio.create_task(controle.entrar(prazo))
+        await asyncio.sleep(0)
+        assert controle.contagens()["na_fila"] == 1
+
+        with pytest.raises(Sobrecarga) as recusa:
+            await controle.entrar(prazo)
+        assert recusa.value.status == 429 and recusa.value.retry_after >= 1
+
+        controle.sair(0.01)  # a vaga passa direto para quem esperava
+        await esperando
+        assert controle.contagens()["em_andamento"] == 1
+
+        with pytest.raises(Sobrecarga) as recusa:
+            await controle.entrar(time.monotonic() + 0.02)
+        assert recusa.value.status == 503
+        controle.sair()
+        assert controle.contagens() == {
+            "em_andamento": 0, "na_fila": 0, "rejeitadas_fila_cheia": 1, "rejeitadas_prazo": 1
+        }
+
+    asyncio.run(cenario())
+
+
+def test_recusas_na_api(monkeypatch):
+    """As rotas /prever* passam pelo controle (também montadas na API unificada); o monitoramento não."""
+    monkeypatch.setattr(main_regras, "admissao", ControleAdmissao("regras", simultaneas=0, fila=1))
+    with TestClient(main_unificado.app) as client:
+        resposta = client.post("/regras/prever", json=PAYLOAD, headers={"X-Prazo-Ms": "20"})
+        assert resposta.status_code == 503 and resposta.headers["Retry-After"] == "1"
+        assert client.get("/regras/metrics").status_code == 200
+        assert client.get("/admissao").json()["regras"]["rejeitadas_prazo"] == 1
+
+    monkeypatch.setattr(main_regras, "admissao", ControleAdmissao("regras", simultaneas=0, fila=0))
+    with TestClient(main_regras.app) as client:
+        assert client.post("/prever/lote", json=[PAYLOAD]).status_code == 429
+
+    # Prazo que acaba antes da pontuação: admitida, mas não pontuada
+    monkeypatch.setattr(main_regras, "admissao", ControleAdmissao("regras"))
+    with TestClient(main_regras.app) as client:
+        assert client.post("/prever", json=PAYLOAD, headers={"X-Prazo-Ms": "0"}).status_code == 503
+        assert client.post("/prever", json=PAYLOAD).status_code == 200
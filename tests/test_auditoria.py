@@ -0,0 +1,113 @@
+import asyncio
+import time
+
+import numpy as np
+from fastapi.testclient import TestClient
+
+from src.api import formato_binario, main_regras
+from src.api.auditoria import Auditoria, consultar, segmentos
+
+PAYLOAD = {"periodo_decorrido_dias": 1, "suspeito_conhecido": True, "tem_testemunhas": True,
+           "tem_imagens_cameras": False, "suspeito_rastreavel": False, "vestigios_preservados": True}
+
+
+def test_grava_em_segmentos_e_consulta_por_intervalo(tmp_path):
+    """Unitárias, lotes e binário chegam aos segmentos; a consulta devolve só o intervalo pedido."""
+    agora = [1_000.0]
+    auditoria = Auditoria(tmp_path, "modelo", tamanho_lote=1, intervalo_s=0.01,
+                          segmento_max_s=60, relogio=lambda: agora[0])
+    auditoria.iniciar()
+    auditoria.registrar("v1", (3, True, False, False, True, True), 2, np.array([0.1, 0.2, 0.7]))
+    agora[0] = 1_100.0  # passou da idade máxima: novo segmento
+    X = np.array([[10, 0, 1, 0, 0, 0], [400, 1, 1, 1, 1, 1]])
+    auditoria.registrar_lote("v1", X, np.array([0, 2]), np.array([[0.8, 0.1, 0.1], [0, 0, 1.0]]))
+    agora[0] = 1_200.0
+    dias, codigos = formato_binario.decodificar_ocorrencias(formato_binario.codificar_ocorrencias(X))
+    auditoria.registrar_codificado("v2", dias, codigos, np.array([1, 1]))
+    auditoria.fechar()
+
+    assert auditoria.estatisticas()["gravadas"] == 5
+    assert [inicio for _, inicio, _, _ in segmentos(tmp_path)] == [1_000.0, 1_100.0, 1_200.0]
+    registros = list(consultar(tmp_path))
+    assert registros[0] == {
+        "ts": 1_000.0, "api": "modelo", "versao": "v1",
+        "entrada": {"periodo_decorrido_dias": 3, "suspeito_conhecido": True, "tem_testemunhas": False,
+                    "tem_imagens_cameras": False, "suspeito_rastreavel": True, "vestigios_preservados": True},
+        "classe": "Alta", "probabilidades": {"Baixa": 0.1, "Média": 0.2, "Alta": 0.7},
+    }
+    assert [r["entrada"]["periodo_decorrido_dias"] for r in consultar(tmp_path, inicio=1_050, fim=1_200)] == [10, 400]
+    binario = list(consultar(tmp_path, "modelo", inicio=1_200))
+    assert [r["entrada"] for r in binario] == [r["entrada"] for r in registros[1:3]]
+    assert "probabilidades" not in binario[0] and binario[0]["classe"] == "Média"
+
+
+def test_politicas_com_a_fila_cheia(tmp_path):
+    """Sem a thread de gravação a fila enche: cada política decide o que fica de fora."""
+    linha = (1, True, True, False, False, True)
+    descartar = Auditoria(tmp_path, "regras", capacidade=4)
+    bloquear = Auditoria(tmp_path, "regras", capacidade=4, politica="bloquear", espera_max_s=0.01)
+    amostrar = Auditoria(tmp_path, "regras", capacidade=4, politica="amostrar", taxa_amostragem=0.0)
+    for auditoria in (descartar, bloquear, amostrar):
+        for _ in range(6):
+            auditoria.registrar("r", linha, 2)
+    assert descartar.estatisticas()["pendentes"] == 4 and descartar.descartadas["fila_cheia"] == 2
+    assert bloquear.estatisticas()["pendentes"] == 4 and bloquear.descartadas["fila_cheia"] == 2
+    # A partir de metade da capacidade só a fração amostrada (zero aqui) entra
+    assert amostrar.estatisticas()["pendentes"] == 2 and amostrar.descartadas["amostragem"] == 4
+
+    # Com a thread gravando, quem espera (bloquear) entra assim que a fila esvazia
+    bloquear.espera_max_s, bloquear.intervalo_s = 5.0, 0.01
+    bloquear.iniciar()
+    bloquear.registrar_lote("r", np.array([linha] * 4), np.array([2] * 4))
+    bloquear.fechar()
+    assert bloquear.gravadas == 8 and bloquear.descartadas["fila_cheia"] == 2
+
+
+
+def test_lote_maior_que_a_fila_e_espera_fora_do_event_loop(tmp_path):
+    """Um lote maior que a capacidade entra em partes; a espera de `registrar_async` não trava o event loop."""
+    linha = (1, True, True, False, False, True)
+    X, classes = np.array([linha] * 10), np.array([2] * 10)
+    descartar = Auditoria(tmp_path, "regras", capacidade=4)
+    descartar.registrar_lote("r", X, classes)
+    assert descartar.estatisticas()["pendentes"] == 4 and descartar.descartadas["fila_cheia"] == 6
+
+    bloquear = Auditoria(tmp_path, "regras", capacidade=4, politica="bloquear", intervalo_s=0.01)
+    bloquear.iniciar()
+    bloquear.registrar_lote("r", X, classes)
+    bloquear.fechar()
+    assert bloquear.gravadas == 10 and bloquear.descartadas["fila_cheia"] == 0
+
+    cheia = Auditoria(tmp_path, "modelo", capacidade=1, politica="bloquear", espera_max_s=0.3)
+    cheia.registrar("v1", linha, 2)
+
+    async def cenario():
+        voltas = 0
+
+        async def contar():
+            nonlocal voltas
+            while True:
+                voltas += 1
+                await asyncio.sleep(0.01)
+
+        contador = asyncio.create_task(contar())
+        inicio = time.perf_counter()
+        await cheia.registrar_async("v1", linha, 2)
+        contador.cancel()
+        return time.perf_counter() - inicio, voltas
+
+    espera, voltas = asyncio.run(cenario())
+    assert espera >= 0.3 and voltas >= 10  # o loop seguiu atendendo durante a espera
+    assert cheia.descartadas["fila_cheia"] == 1
+
+def test_api_grava_a_fila_ao_encerrar(tmp_path, monkeypatch):
+    """O que está na fila quando o servidor para é gravado no fim do lifespan."""
+    auditoria = Auditoria(tmp_path, "regras", intervalo_s=3600)
+    monkeypatch.setattr(main_regras, "auditoria", auditoria)
+    with TestClient(main_regras.app) as client:
+        client.post("/prever", json=PAYLOAD)
+        client.post("/prever/lote", json=[PAYLOAD, PAYLOAD])
+        assert client.get("/auditoria").json()["pendentes"] == 3
+    registros = list(consultar(tmp_path, "regras"))
+    assert len(registros) == 3 and {r["classe"] for r in registros} == {"Alta"}
+    assert registros[0]["versao"] == main_regras.regras_ativas.versao
@@ -0,0 +1,36 @@
+from src.api.busca_hiperparametros import buscar, escolher_vencedor, expandir_grade
+from src.api.gerar_modelo import gerar_dados
+
+GRADE = {
+    "RandomForestClassifier": {"n_estimators": [3, 6], "max_depth": [4]},
+    "LogisticRegression": {"C": [1.0]},
+}
+
+
+def test_busca_em_paralelo_reaproveita_o_cache(tmp_path):
+    """Testa a busca com k dobras em um pool de processos e que uma nova execução vem toda do cache."""
+    dados = gerar_dados(data_size=600)
+    primeira = buscar(dados, GRADE, dobras=3, processos=2, diretorio_cache=tmp_path)
+    assert len(primeira["candidatos"]) == len(expandir_grade(GRADE)) == 3
+    assert primeira["em_cache"] == 0
+    assert all(len(r["acuracias"]) == 3 and r["latencia_ms"] > 0 for r in primeira["candidatos"])
+    assert primeira["vencedor"]["exportavel"] and primeira["vencedor"]["tabela_kb"] > 0
+    assert primeira["vencedor"]["acuracia_media"] == max(
+        r["acuracia_media"] for r in primeira["candidatos"] if r["exportavel"]
+    )
+
+    segunda = buscar(dados, GRADE, dobras=3, processos=2, diretorio_cache=tmp_path)
+    assert segunda["em_cache"] == 3
+    assert [r["acuracias"] for r in segunda["candidatos"]] == [r["acuracias"] for r in primeira["candidatos"]]
+
+def test_vencedor_e_o_mais_preciso_e_desempata_pela_tabela():
+    """Testa que vence o exportável mais preciso; dentro da tolerância, o de tabela compilada menor."""
+    resultados = [
+        {"acuracia_media": 0.900, "latencia_ms": 0.002, "tabela_kb": 90.0, "compilacao_s": 0.3, "exportavel": True},
+        {"acuracia_media": 0.897, "latencia_ms": 0.002, "tabela_kb": 20.0, "compilacao_s": 0.1, "exportavel": True},
+        {"acuracia_media": 0.850, "latencia_ms": 0.001, "tabela_kb": 5.0, "compilacao_s": 0.1, "exportavel": True},
+        {"acuracia_media": 0.950, "latencia_ms": 0.1, "tabela_kb": None, "compilacao_s": None, "exportavel": False},
+    ]
+    assert escolher_vencedor(resultados) is resultados[0]
+    assert escolher_vencedor(resultados, tolerancia_acuracia=0.005) is resultados[1]
+    assert escolher_vencedor(resultados, latencia_maxima_ms=0.0015) is resultados[2]
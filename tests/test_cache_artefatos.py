@@ -0,0 +1,71 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.api import gerar_modelo
+from src.api.cache_artefatos import CacheArtefatos, main, versao_codigo
+from src.api.gerar_modelo import gerar_dados, treinar_avaliar_modelo
+from src.api.registro_modelos import RegistroModelos
+
+
+def _gravar(cache, chave, tamanho, acesso):
+    diretorio = cache.gravar(chave, "teste", {}, lambda d: (d / "dados.bin").write_bytes(b"x" * tamanho))
+    os.utime(diretorio / "entrada.json", (acesso, acesso))
+
+
+def test_dados_em_cache_mapeados_em_memoria(tmp_path):
+    """A segunda geração vem do cache, igual à primeira; outro tamanho ou outro código é outra chave."""
+    cache = CacheArtefatos(tmp_path)
+    gerados = gerar_dados(data_size=500, cache=cache)
+    lidos = gerar_dados(data_size=500, cache=cache)
+    pd.testing.assert_frame_equal(lidos, gerados)
+    assert not lidos["periodo_decorrido_dias"].to_numpy().flags.writeable  # páginas do arquivo, sem cópia
+
+    gerar_dados(data_size=501, cache=cache)
+    assert [descricao["parametros"] for descricao in cache.entradas()] == [{"data_size": 500}, {"data_size": 501}]
+    assert versao_codigo(gerar_dados) != versao_codigo(treinar_avaliar_modelo)
+
+
+def test_despejo_lru_e_poda(tmp_path, capsys):
+    """Passando do limite saem as entradas menos usadas; ler uma entrada a torna recente."""
+    cache = CacheArtefatos(tmp_path, limite_bytes=2500)
+    _gravar(cache, "a", 1000, acesso=1)
+    _gravar(cache, "b", 1000, acesso=2)
+    cache.obter("a")
+    _gravar(cache, "c", 1000, acesso=3)
+    assert [descricao["chave"] for descricao in cache.entradas()] == ["c", "a"]
+    assert cache.obter("b") is None
+
+    main(["--diretorio", str(tmp_path), "podar", "--limite-mb", "0.001"])
+    assert [descricao["chave"] for descricao in cache.entradas()] == ["a"]
+    main(["--diretorio", str(tmp_path), "podar", "--tudo"])
+    assert cache.entradas() == [] and "1 entradas removidas" in capsys.readouterr().out
+
+
+def test_modelo_em_cache_sem_treinar(tmp_path, monkeypatch):
+    """Com os mesmos dados e parâmetros o treino não é refeito; a versão registrada é reaproveitada."""
+    cache = CacheArtefatos(tmp_path / "cache")
+    registro = RegistroModelos(tmp_path / "modelos")
+    dados = gerar_dados(data_size=600)
+    monkeypatch.setitem(gerar_modelo.PARAMETROS_MODELO, "n_estimators", 5)
+    modelo = treinar_avaliar_modelo(dados, registro, cache=cache)
+
+    def falhar(*args, **kwargs):
+        raise AssertionError("treinou de novo")
+
+    monkeypatch.setattr(gerar_modelo.RandomForestClassifier, "fit", falhar)
+    do_cache = treinar_avaliar_modelo(dados, registro, cache=cache)
+    np.testing.assert_array_equal(do_cache.predict_proba(dados[gerar_modelo.FEATURES]),
+                                  modelo.predict_proba(dados[gerar_modelo.FEATURES]))
+    assert len(registro.versoes()) == 1
+
+    # Um registro vazio recebe os artefatos do cache como uma nova versão ativa
+    outro = RegistroModelos(tmp_path / "outro")
+    treinar_avaliar_modelo(dados, outro, cache=cache)
+    assert outro.carregar().predict(dados[gerar_modelo.FEATURES][:5]).tolist() == modelo.predict(
+        dados[gerar_modelo.FEATURES][:5]).tolist()
+
+    with pytest.raises(AssertionError, match="treinou de novo"):
+        treinar_avaliar_modelo(dados.iloc[:500], registro, cache=cache)
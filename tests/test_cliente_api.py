@@ -0,0 +1,46 @@
+from src import cliente_api
+from src.api.regras import avaliar_regras
+
+
+def _api_falsa(monkeypatch):
+    """Substitui as chamadas HTTP pelas regras locais e registra cada chamada."""
+    chamadas = []
+
+    def post(api, caminho, payload):
+        chamadas.append((caminho, payload))
+
+        def responder(o):
+            classe, motivo = avaliar_regras(*o.values())
+            return {"resolutividade": int(classe), "motivo": int(motivo)}
+        return responder(payload) if caminho == "/prever" else [responder(o) for o in payload]
+
+    monkeypatch.setattr(cliente_api, "_post", post)
+    cliente_api.limpar_cache()
+    return chamadas
+
+
+def test_previsao_unitaria_usa_cache_pela_entrada(monkeypatch):
+    """Testa que a mesma ocorrência (mesmo com tipos diferentes) só chama a API uma vez."""
+    chamadas = _api_falsa(monkeypatch)
+    ocorrencia = {"periodo_decorrido_dias": 3, "suspeito_conhecido": True, "tem_testemunhas": False,
+                  "tem_imagens_cameras": True, "suspeito_rastreavel": False, "vestigios_preservados": True}
+    primeira = cliente_api.prever("regras", ocorrencia)
+    segunda = cliente_api.prever("regras", {**ocorrencia, "suspeito_conhecido": 1, "tem_testemunhas": 0})
+    assert primeira == segunda and len(chamadas) == 1
+    cliente_api.prever("modelo", ocorrencia)
+    assert len(chamadas) == 2
+
+
+def test_previsao_em_lotes_mantem_a_ordem(monkeypatch):
+    """Testa que os lotes chegam na ordem original e cobrem todas as ocorrências."""
+    chamadas = _api_falsa(monkeypatch)
+    ocorrencias = [
+        {"periodo_decorrido_dias": i % 40, "suspeito_conhecido": i % 2, "tem_testemunhas": i % 3 == 0,
+         "tem_imagens_cameras": i % 5 == 0, "suspeito_rastreavel": i % 7 == 0, "vestigios_preservados": True}
+        for i in range(2_350)
+    ]
+    lotes = list(cliente_api.prever_em_lotes("regras", ocorrencias, tamanho_lote=500, simultaneas=3))
+    assert [inicio for inicio, _ in lotes] == [0, 500, 1000, 1500, 2000]
+    assert len(chamadas) == 5 and sum(len(r) for _, r in lotes) == len(ocorrencias)
+    esperado = [int(avaliar_regras(*cliente_api._linha(o))[0]) for o in ocorrencias]
+    assert [r["resolutividade"] for _, resultados in lotes for r in resultados] == esperado
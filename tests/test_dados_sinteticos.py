@@ -0,0 +1,37 @@
+import numpy as np
+
+from src.api.dados_sinteticos import (
+    TARGET, TIPOS_COLUNAS, gerar_bloco, gerar_particoes, ler_particoes,
+)
+from src.api.gerar_modelo import gerar_dados
+
+
+def test_particoes_deterministicas_e_compactas(tmp_path):
+    """Testa que as partições têm tipos compactos e não dependem do número de processos."""
+    sequencial = gerar_particoes(tmp_path / "um", 25_000, tamanho_bloco=10_000, processos=1)
+    paralelo = gerar_particoes(tmp_path / "dois", 25_000, tamanho_bloco=10_000, processos=2)
+    assert sequencial["linhas_por_classe"] == paralelo["linhas_por_classe"]
+    assert sum(sequencial["linhas_por_classe"]) == 25_000
+
+    blocos = list(zip(ler_particoes(tmp_path / "um"), ler_particoes(tmp_path / "dois")))
+    assert [len(a[TARGET]) for a, _ in blocos] == [10_000, 10_000, 5_000]
+    for indice, (a, b) in enumerate(blocos):
+        for coluna, tipo in TIPOS_COLUNAS.items():
+            assert a[coluna].dtype == tipo
+            assert np.array_equal(a[coluna], b[coluna])
+        # Cada bloco depende só da semente e do seu índice
+        assert np.array_equal(a[TARGET], gerar_bloco(42, indice, len(a[TARGET]))[TARGET])
+
+def test_blocos_com_as_mesmas_distribuicoes_de_gerar_dados():
+    """Testa que o gerador em blocos reproduz as distribuições (features e rótulo) de `gerar_dados`."""
+    referencia = gerar_dados(data_size=200_000)
+    bloco = gerar_bloco(7, 0, 200_000)
+    for coluna in TIPOS_COLUNAS:
+        if coluna == TARGET:
+            continue
+        assert abs(bloco[coluna].mean() - referencia[coluna].mean()) < 0.01 * max(1, referencia[coluna].mean())
+        assert bloco[coluna].min() == referencia[coluna].min()
+        assert bloco[coluna].max() == referencia[coluna].max()
+    proporcoes = np.bincount(bloco[TARGET], minlength=3) / 200_000
+    proporcoes_referencia = referencia[TARGET].value_counts(normalize=True).sort_index().to_numpy()
+    assert np.allclose(proporcoes, proporcoes_referencia, atol=0.01)
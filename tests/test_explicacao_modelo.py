@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+from sklearn.ensemble import RandomForestClassifier
+
+from src.api import main_modelo
+from src.api.explicacao_modelo import compilar_explicacoes
+from src.api.floresta_numpy import carregar_floresta
+from src.api.gerar_modelo import FEATURES, TARGET, exportar_floresta, gerar_dados, salvar_modelo
+from src.api.registro_modelos import RegistroModelos
+from src.api.tabela_modelo import compilar_tabela
+
+PAYLOAD = {"periodo_decorrido_dias": 3, "suspeito_conhecido": True, "tem_testemunhas": False,
+           "tem_imagens_cameras": False, "suspeito_rastreavel": True, "vestigios_preservados": True}
+
+
+@pytest.fixture(scope="module")
+def modelo():
+    dados = gerar_dados(data_size=800)
+    return RandomForestClassifier(
+        n_estimators=15, max_depth=6, random_state=0, class_weight="balanced"
+    ).fit(dados[FEATURES], dados[TARGET])
+
+def test_contribuicoes_somam_as_probabilidades_em_todo_dominio(modelo, tmp_path):
+    """Base + soma das contribuições deve reproduzir a tabela, com o scikit-learn ou com a floresta exportada."""
+    exportar_floresta(modelo, tmp_path / "modelo.npz")
+    tabela = compilar_tabela(modelo)
+    for origem in (modelo, carregar_floresta(tmp_path / "modelo.npz")):
+        explicacoes = compilar_explicacoes(origem, tabela)
+        reconstruidas = explicacoes.base + explicacoes.contribuicoes.sum(axis=2)
+        np.testing.assert_allclose(reconstruidas, tabela.probabilidades, atol=1e-12)
+
+def test_explicacao_opcional_na_api(modelo, tmp_path, monkeypatch):
+    """Sem `explicar` a resposta não muda; com ele, traz as contribuições em p.p. que somam à probabilidade."""
+    registro = RegistroModelos(tmp_path / "modelos")
+    registro.registrar(lambda d: salvar_modelo(modelo, d), {}, promover=True)
+    monkeypatch.setattr(main_modelo, "registro", registro)
+    monkeypatch.setattr(main_modelo, "ativo", None)
+
+    with TestClient(main_modelo.app) as client:
+        simples = client.post("/prever", json=PAYLOAD).json()
+        assert set(simples) == {"resolutividade", "motivo"}
+
+        resposta = client.post("/prever?explicar=true", json=PAYLOAD).json()
+        assert {k: resposta[k] for k in simples} == simples
+        explicacao = resposta["explicacao"]
+        assert explicacao["classe"] == simples["resolutividade"]
+        assert {c["feature"] for c in explicacao["contribuicoes"]} == set(FEATURES)
+        assert any(c["condicao"] == "sem imagens de câmeras" for c in explicacao["contribuicoes"])
+
+        classe = explicacao["classe"]
+        total = explicacao["base"][classe] + sum(c["pontos_percentuais"][classe] for c in explicacao["contribuicoes"])
+        probabilidade = modelo.predict_proba(pd.DataFrame([PAYLOAD])[FEATURES])[0].max() * 100
+        assert total == pytest.approx(probabilidade, abs=0.1)
+
+        lote = client.post("/prever/lote?explicar=true", json=[PAYLOAD, PAYLOAD]).json()
+        assert lote == [resposta, resposta]
@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+from src.api.floresta_numpy import carregar_floresta
+from src.api.gerar_modelo import FEATURES, TARGET, exportar_floresta, gerar_dados
+from src.api.tabela_modelo import compilar_tabela, verificar_tabela
+
+
+@pytest.fixture(scope="module")
+def dados():
+    return gerar_dados(data_size=1500)
+
+@pytest.fixture(scope="module")
+def modelo(dados):
+    return RandomForestClassifier(
+        n_estimators=20, max_depth=8, random_state=0, class_weight="balanced"
+    ).fit(dados[FEATURES], dados[TARGET])
+
+def test_floresta_exportada_igual_ao_predict_proba(modelo, dados, tmp_path):
+    """A floresta mapeada em memória deve reproduzir predict_proba e predict do scikit-learn."""
+    caminho = tmp_path / "modelo.npz"
+    exportar_floresta(modelo, caminho)
+    floresta = carregar_floresta(caminho)
+
+    X = dados[FEATURES].to_numpy()
+    assert isinstance(floresta.valor, np.memmap)
+    np.testing.assert_allclose(floresta.predict_proba(X), modelo.predict_proba(X), atol=1e-12)
+    assert np.array_equal(floresta.predict(X), modelo.predict(X))
+
+def test_tabela_compilada_a_partir_da_floresta(modelo, tmp_path):
+    """A tabela de consulta pode ser compilada da floresta exportada, sem o objeto do scikit-learn."""
+    caminho = tmp_path / "modelo.npz"
+    exportar_floresta(modelo, caminho)
+    tabela = compilar_tabela(carregar_floresta(caminho))
+    assert verificar_tabela(tabela, modelo, tolerancia=1e-12)["ok"]
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from sklearn.ensemble import RandomForestClassifier
+
+from src.api import formato_binario, main_modelo
+from src.api.gerar_modelo import FEATURES, TARGET, gerar_dados, salvar_modelo
+from src.api.main_regras import app as app_regras
+from src.api.registro_modelos import RegistroModelos
+
+CABECALHOS = {"content-type": formato_binario.TIPO_CONTEUDO}
+
+
+def _ocorrencias(n=500, semente=0):
+    rng = np.random.default_rng(semente)
+    return np.column_stack([rng.integers(0, 400, n), rng.random((n, 5)) < 0.5]).astype(np.int64)
+
+
+def test_codificacao_ida_e_volta():
+    """Testa que os registros de 3 bytes preservam dias e flags e que entradas inválidas são recusadas."""
+    X = _ocorrencias()
+    corpo = formato_binario.codificar_ocorrencias(X)
+    assert len(corpo) == 3 * len(X)
+    dias, codigos = formato_binario.decodificar_ocorrencias(corpo)
+    assert np.array_equal(np.column_stack(formato_binario.colunas_ocorrencias(dias, codigos)), X)
+    with pytest.raises(ValueError):
+        formato_binario.decodificar_ocorrencias(corpo[:-1])
+    with pytest.raises(ValueError):
+        formato_binario.decodificar_ocorrencias(bytes([0b100000, 1, 0]))
+
+
+def test_endpoints_binarios_equivalem_ao_json(tmp_path, monkeypatch):
+    """Testa que /prever/lote/binario devolve as mesmas classes e probabilidades do /prever/lote."""
+    dados = gerar_dados(data_size=600)
+    registro = RegistroModelos(tmp_path / "modelos")
+    modelo = RandomForestClassifier(n_estimators=5, max_depth=4, random_state=0).fit(dados[FEATURES], dados[TARGET])
+    registro.registrar(lambda d: salvar_modelo(modelo, d), {}, promover=True)
+    monkeypatch.setattr(main_modelo, "registro", registro)
+    monkeypatch.setattr(main_modelo, "ativo", None)
+
+    X = _ocorrencias()
+    corpo = formato_binario.codificar_ocorrencias(X)
+    json_lote = [{nome: int(v) for nome, v in zip(FEATURES, linha)} for linha in X]
+    with TestClient(main_modelo.app) as client:
+        resposta = client.post("/prever/lote/binario", content=corpo, headers=CABECALHOS)
+        classes, probabilidades = formato_binario.decodificar_resposta_modelo(resposta.content)
+        esperado = main_modelo.ativo.tabela.prever(X)
+        assert np.array_equal(classes, esperado[0])
+        assert np.allclose(probabilidades, esperado[1], atol=1e-6)
+        nomes = [r["resolutividade"] for r in client.post("/prever/lote", json=json_lote).json()]
+        assert [main_modelo.RESOLUTIVIDADE_CLASSES[c] for c in classes] == nomes
+
+    regras = TestClient(app_regras)
+    classes, motivos = formato_binario.decodificar_resposta_regras(
+        regras.post("/prever/lote/binario", content=corpo, headers=CABECALHOS).content
+    )
+    respostas = regras.post("/prever/lote", json=json_lote).json()
+    assert [main_modelo.RESOLUTIVIDADE_CLASSES[c] for c in classes] == [r["resolutividade"] for r in respostas]
+    assert regras.post("/prever/lote/binario", content=corpo[:4], headers=CABECALHOS).status_code == 422
+    assert regras.post("/prever/lote/binario", content=b"", headers=CABECALHOS).content == b""
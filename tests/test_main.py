@@ -18,9 +18,9 @@ def test_previsao_resolutividade_alta():
         "periodo_decorrido_dias": 1,
         "suspeito_conhecido": 1,
         "tem_testemunhas": 1,
-        "tem_imagens_capturadas": 0,
+        "tem_imagens_cameras": 0,
         "suspeito_rastreavel": 1,
-        "tem_vestigios_preservados": 1
+        "vestigios_preservados": 1
     }
     response = client.post("/prever", json=payload)
     assert response.status_code == 200
@@ -37,9 +37,9 @@ def test_previsao_resolutividade_baixa():
         "periodo_decorrido_dias": 50,
         "suspeito_conhecido": 0,
         "tem_testemunhas": 0,
-        "tem_imagens_capturadas": 0,
+        "tem_imagens_cameras": 0,
         "suspeito_rastreavel": 0,
-        "tem_vestigios_preservados": 0
+        "vestigios_preservados": 0
     }
     response = client.post("/prever", json=payload)
     assert response.status_code == 200
@@ -60,3 +60,40 @@ def test_previsao_payload_invalido():
     }
     response = client.post("/prever", json=payload)
     assert response.status_code == 422  # Unprocessable Entity
+
+def test_previsao_lote_igual_ao_endpoint_unitario():
+    """
+    Testa o endpoint de lote com todas as combinações de flags em dias de
+    fronteira das regras, esperando respostas idênticas às do endpoint unitário.
+    """
+    campos = ["suspeito_conhecido", "tem_testemunhas", "tem_imagens_cameras",
+              "suspeito_rastreavel", "vestigios_preservados"]
+    payloads = [
+        {"periodo_decorrido_dias": dias, **{c: bool(codigo >> i & 1) for i, c in enumerate(campos)}}
+        for dias in (0, 5, 6, 30, 31, 60, 61)
+        for codigo in range(32)
+    ]
+    response = client.post("/prever/lote", json=payloads)
+    assert response.status_code == 200
+    assert response.json() == [client.post("/prever", json=p).json() for p in payloads]
+
+def test_previsao_lote_com_dias_alem_do_int64():
+    """
+    Testa que um `periodo_decorrido_dias` válido maior que o int64 é pontuado
+    no lote e por colunas como no endpoint unitário, sem erro 500.
+    """
+    payload = {
+        "periodo_decorrido_dias": 10**20,
+        "suspeito_conhecido": 1,
+        "tem_testemunhas": 1,
+        "tem_imagens_cameras": 0,
+        "suspeito_rastreavel": 1,
+        "vestigios_preservados": 1
+    }
+    unitaria = client.post("/prever", json=payload)
+    assert unitaria.status_code == 200
+    response = client.post("/prever/lote", json=[payload, {**payload, "periodo_decorrido_dias": 1}])
+    assert response.status_code == 200
+    assert response.json()[0] == unitaria.json()
+    colunas = client.post("/prever/colunas", json=[payload]).json()
+    assert colunas["resolutividade"] == [unitaria.json()["resolutividade"]]
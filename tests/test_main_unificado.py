@@ -0,0 +1,41 @@
+from fastapi.testclient import TestClient
+from sklearn.ensemble import RandomForestClassifier
+
+from src.api import main_modelo
+from src.api.gerar_modelo import FEATURES, TARGET, gerar_dados, salvar_modelo
+from src.api.main_regras import app as app_regras
+from src.api.main_unificado import app
+from src.api.registro_modelos import RegistroModelos
+
+PAYLOADS = [
+    {"periodo_decorrido_dias": dias, "suspeito_conhecido": True, "tem_testemunhas": dias % 2 == 0,
+     "tem_imagens_cameras": True, "suspeito_rastreavel": False, "vestigios_preservados": dias > 20}
+    # 10**20: válido no schema, além do int64
+    for dias in (1, 4, 12, 25, 45, 70, 10**20)
+]
+
+
+def test_motores_unificados_equivalem_as_apis_separadas(tmp_path, monkeypatch):
+    """Testa que cada motor responde como a sua API e que `ambos` traz os dois resultados e a concordância."""
+    dados = gerar_dados(data_size=600)
+    registro = RegistroModelos(tmp_path / "modelos")
+    modelo = RandomForestClassifier(n_estimators=5, max_depth=4, random_state=0).fit(dados[FEATURES], dados[TARGET])
+    registro.registrar(lambda d: salvar_modelo(modelo, d), {}, promover=True)
+    monkeypatch.setattr(main_modelo, "registro", registro)
+    monkeypatch.setattr(main_modelo, "ativo", None)
+
+    with TestClient(app) as client:
+        regras = TestClient(app_regras).post("/prever/lote", json=PAYLOADS).json()
+        ml = client.post("/modelo/prever/lote", json=PAYLOADS).json()
+        assert client.post("/prever/lote?motor=regras", json=PAYLOADS).json() == regras
+        assert client.post("/prever/lote", json=PAYLOADS).json() == ml
+
+        ambos = client.post("/prever/lote?motor=ambos", json=PAYLOADS).json()
+        assert [a["regras"] for a in ambos] == regras and [a["modelo"] for a in ambos] == ml
+        assert [a["concordam"] for a in ambos] == [
+            r["resolutividade"] == m["resolutividade"] for r, m in zip(regras, ml)
+        ]
+        unitarias = [client.post("/prever?motor=ambos", json=p).json() for p in PAYLOADS]
+        assert unitarias == ambos
+        assert client.post("/prever?motor=outro", json=PAYLOADS[0]).status_code == 422
+        assert 'motor="regras"' in client.get("/metrics").text
@@ -0,0 +1,47 @@
+from fastapi.testclient import TestClient
+
+from src.api.main_regras import app
+
+client = TestClient(app)
+
+PAYLOAD = {
+    "periodo_decorrido_dias": 1,
+    "suspeito_conhecido": True,
+    "tem_testemunhas": True,
+    "tem_imagens_cameras": False,
+    "suspeito_rastreavel": False,
+    "vestigios_preservados": True
+}
+
+
+def _metricas():
+    """Valores do /metrics indexados pelo nome da série com rótulos."""
+    resposta = client.get("/metrics")
+    assert resposta.status_code == 200
+    assert resposta.headers["content-type"].startswith("text/plain")
+    return {
+        serie: float(valor)
+        for serie, valor in (linha.rsplit(" ", 1) for linha in resposta.text.splitlines() if not linha.startswith("#"))
+    }
+
+def test_metrics_conta_requisicoes_classes_erros_e_etapas():
+    """Testa que o /metrics reflete requisições, classes previstas, erros de validação e a duração de cada etapa."""
+    antes = _metricas()
+    for _ in range(3):
+        assert client.post("/prever", json=PAYLOAD).json()["resolutividade"] == "Alta"
+    assert client.post("/prever", json={"periodo_decorrido_dias": 1}).status_code == 422
+    depois = _metricas()
+
+    def delta(serie):
+        return depois.get(serie, 0) - antes.get(serie, 0)
+
+    rotulos = 'api="regras",rota="/prever"'
+    assert delta(f'resolutividade_requisicoes_total{{{rotulos},status="200"}}') == 3
+    assert delta(f'resolutividade_erros_total{{{rotulos},status="422"}}') == 1
+    assert delta('resolutividade_previsoes_total{api="regras",classe="Alta"}') == 3
+    for etapa in ("validacao", "features", "predicao", "resposta", "serializacao"):
+        assert delta(f'resolutividade_etapa_segundos_count{{{rotulos},etapa="{etapa}"}}') == 3
+    # A requisição inválida não chega ao endpoint, mas entra na duração total
+    assert delta(f'resolutividade_etapa_segundos_count{{{rotulos},etapa="total"}}') == 4
+    assert depois[f'resolutividade_etapa_segundos_bucket{{{rotulos},etapa="total",le="+Inf"}}'] == \
+        depois[f'resolutividade_etapa_segundos_count{{{rotulos},etapa="total"}}']
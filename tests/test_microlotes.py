@@ -0,0 +1,77 @@
+import asyncio
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+
+from src.api import main_modelo
+from src.api.gerar_modelo import FEATURES, TARGET, gerar_dados
+from src.api.microlotes import Coalescedor
+from src.api.tabela_modelo import compilar_tabela
+
+
+def test_requisicoes_concorrentes_sao_agrupadas():
+    """Testa que requisições concorrentes viram poucos lotes e cada uma recebe o próprio resultado."""
+    lotes = []
+
+    def pontuar(X, contexto):
+        lotes.append(len(X))
+        X = np.asarray(X)
+        return X[:, 0] % 3, X.astype(float)
+
+    coalescedor = Coalescedor(pontuar, janela_ms=5, tamanho_maximo=16)
+
+    async def cenario():
+        return await asyncio.gather(*(coalescedor.submeter((i, 1, 0, 1, 0, 1)) for i in range(40)))
+
+    resultados = asyncio.run(cenario())
+    assert [int(classe) for classe, _ in resultados] == [i % 3 for i in range(40)]
+    assert [int(proba[0]) for _, proba in resultados] == list(range(40))
+    assert sum(lotes) == 40 and max(lotes) <= 16 and len(lotes) < 40
+    assert coalescedor.estatisticas()["tamanho_lote"]["total"] == len(lotes)
+
+def test_erro_na_pontuacao_chega_a_todas_as_requisicoes():
+    """Testa que uma falha ao pontuar o lote é propagada para cada requisição do lote."""
+    def pontuar(X, contexto):
+        raise RuntimeError("falha no modelo")
+
+    coalescedor = Coalescedor(pontuar)
+
+    async def cenario():
+        return await asyncio.gather(
+            *(coalescedor.submeter((1, 0, 0, 0, 0, 0)) for _ in range(3)), return_exceptions=True
+        )
+
+    assert all(isinstance(r, RuntimeError) for r in asyncio.run(cenario()))
+
+def test_contextos_diferentes_nao_se_misturam():
+    """Testa que linhas enviadas com contextos (versões de modelo) diferentes são pontuadas separadamente."""
+    chamadas = []
+
+    def pontuar(X, contexto):
+        chamadas.append((contexto, len(X)))
+        return [contexto] * len(X), X
+
+    coalescedor = Coalescedor(pontuar, janela_ms=5)
+
+    async def cenario():
+        return await asyncio.gather(
+            *(coalescedor.submeter((i, 0, 0, 0, 0, 0), "antiga" if i < 3 else "nova") for i in range(5))
+        )
+
+    resultados = asyncio.run(cenario())
+    assert [classe for classe, _ in resultados] == ["antiga"] * 3 + ["nova"] * 2
+    assert sorted(chamadas) == [("antiga", 3), ("nova", 2)]
+
+def test_dias_alem_do_int64_no_microlote():
+    """Testa que um dia válido maior que o int64 é pontuado no micro-lote como na consulta escalar."""
+    dados = gerar_dados(data_size=600)
+    modelo = RandomForestClassifier(n_estimators=3, max_depth=4, random_state=0).fit(dados[FEATURES], dados[TARGET])
+    tabela = compilar_tabela(modelo)
+    coalescedor = Coalescedor(main_modelo._pontuar_microlote, janela_ms=5)
+    linhas = [(10**20, 1, 0, 1, 0, 1), (3, 0, 0, 0, 0, 0)]
+
+    async def cenario():
+        return await asyncio.gather(*(coalescedor.submeter(linha, tabela) for linha in linhas))
+
+    resultados = asyncio.run(cenario())
+    assert [int(classe) for classe, _ in resultados] == [int(tabela.consultar(*linha)[0]) for linha in linhas]
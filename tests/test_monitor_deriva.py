@@ -0,0 +1,58 @@
+import numpy as np
+from fastapi.testclient import TestClient
+from sklearn.ensemble import RandomForestClassifier
+
+from src.api import main_modelo
+from src.api.gerar_modelo import FEATURES, TARGET, gerar_dados, salvar_modelo
+from src.api.monitor_deriva import MonitorDeriva, estatisticas_referencia
+from src.api.registro_modelos import RegistroModelos
+
+
+def _ocorrencias(n, p_suspeito, dias_max, semente):
+    rng = np.random.default_rng(semente)
+    flags = rng.random((n, 5)) < [p_suspeito, 0.35, 0.25, 0.3, 0.4]
+    return np.column_stack([rng.integers(1, dias_max, n), flags]).astype(np.int64)
+
+
+def test_janela_compara_com_referencia_e_descarta_fatias_antigas():
+    """Tráfego como o do treino fica estável, tráfego derivado é apontado e sai da janela com o tempo."""
+    agora = [0.0]
+    referencia_X = _ocorrencias(5000, 0.3, 60, semente=0)
+    monitor = MonitorDeriva("modelo", janela_s=60, fatias=6, relogio=lambda: agora[0])
+    monitor.trocar_referencia(estatisticas_referencia(referencia_X, {"modelo": referencia_X[:, 1]}))
+
+    semelhante = _ocorrencias(2000, 0.3, 60, semente=1)
+    for linha, classe in zip(semelhante.tolist(), semelhante[:, 1].tolist()):
+        monitor.registrar(linha, classe)
+    relatorio = monitor.relatorio()
+    assert relatorio["situacao"] == "estavel" and relatorio["observacoes_janela"] == 2000
+
+    agora[0] = 120.0  # a janela inteira passou: as contagens anteriores saem
+    derivado = _ocorrencias(2000, 0.8, 200, semente=2)
+    monitor.registrar_lote(derivado, derivado[:, 1])
+    relatorio = monitor.relatorio()
+    assert relatorio["observacoes_janela"] == 2000 and relatorio["observacoes_total"] == 4000
+    assert relatorio["features"]["suspeito_conhecido"]["situacao"] == "significativa"
+    assert relatorio["features"]["periodo_decorrido_dias"]["ks"] > 0.5
+    assert relatorio["features"]["tem_testemunhas"]["situacao"] == "estavel"
+    assert relatorio["situacao"] == "significativa"
+
+
+def test_deriva_na_api_com_referencia_do_registro(tmp_path, monkeypatch):
+    """A referência gravada no treino chega ao `/deriva` e ao `/metrics` da API de ML."""
+    dados = gerar_dados(data_size=800)
+    modelo = RandomForestClassifier(n_estimators=5, max_depth=4, random_state=0).fit(dados[FEATURES], dados[TARGET])
+    registro = RegistroModelos(tmp_path / "modelos")
+    registro.registrar(lambda d: salvar_modelo(modelo, d, X_referencia=dados[FEATURES]), {}, promover=True)
+    monkeypatch.setattr(main_modelo, "registro", registro)
+    monkeypatch.setattr(main_modelo, "ativo", None)
+
+    derivado = _ocorrencias(300, 0.9, 60, semente=3)
+    payloads = [{FEATURES[0]: int(l[0]), **{f: bool(v) for f, v in zip(FEATURES[1:], l[1:])}} for l in derivado.tolist()]
+    with TestClient(main_modelo.app) as client:
+        assert client.get("/deriva").json()["situacao"] == "sem_dados"
+        client.post("/prever/lote", json=payloads)
+        relatorio = client.get("/deriva").json()
+        assert relatorio["linhas_referencia"] == 800
+        assert relatorio["features"]["suspeito_conhecido"]["situacao"] == "significativa"
+        assert 'resolutividade_deriva_psi{api="modelo",item="suspeito_conhecido"}' in client.get("/metrics").text
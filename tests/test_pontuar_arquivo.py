@@ -0,0 +1,102 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.api.pontuar_arquivo import Progresso, pontuar_arquivo
+from src.api.regras import FEATURES, MOTIVOS, RESOLUTIVIDADE_CLASSES, avaliar_matriz
+
+
+def _entrada(tmp_path, linhas=2_500):
+    rng = np.random.default_rng(1)
+    dados = pd.DataFrame({"periodo_decorrido_dias": rng.integers(0, 90, linhas)})
+    for coluna in FEATURES[1:]:
+        dados[coluna] = rng.random(linhas) < 0.4
+    caminho = tmp_path / "entrada.csv"
+    dados.to_csv(caminho, index=False)
+    return caminho, dados
+
+def test_pontuacao_preserva_ordem_e_resultado(tmp_path):
+    """Testa que a saída tem uma linha por entrada, na mesma ordem, com as classes das regras."""
+    entrada, dados = _entrada(tmp_path)
+    saida = tmp_path / "saida.jsonl"
+    resultado = pontuar_arquivo(entrada, saida, tamanho_bloco=300, processos=2)
+
+    pontuado = pd.read_json(saida, lines=True)
+    classes, motivos = avaliar_matriz(dados[FEATURES].to_numpy())
+    assert resultado["linhas"] == len(dados)
+    assert pontuado["periodo_decorrido_dias"].tolist() == dados["periodo_decorrido_dias"].tolist()
+    assert pontuado["resolutividade"].tolist() == [RESOLUTIVIDADE_CLASSES[c] for c in classes]
+    assert pontuado["motivo"].tolist() == [MOTIVOS[m] for m in motivos]
+
+def test_retomar_continua_do_ultimo_bloco(tmp_path):
+    """Testa que uma execução retomada gera o mesmo arquivo que uma execução completa."""
+    entrada, _ = _entrada(tmp_path)
+    completa = tmp_path / "completa.csv"
+    pontuar_arquivo(entrada, completa, tamanho_bloco=400, processos=1)
+
+    # Simula uma falha após 3 blocos gravados, com lixo parcial no fim do arquivo
+    interrompida = tmp_path / "interrompida.csv"
+    conteudo = completa.read_bytes()
+    linhas = conteudo.splitlines(keepends=True)
+    gravado = b"".join(linhas[:1 + 3 * 400])
+    interrompida.write_bytes(gravado + b"lixo parcial")
+    progresso = Progresso(interrompida, {
+        "entrada": str(entrada.resolve()), "motor": "regras", "modelo": None,
+        "tamanho_bloco": 400, "formato_saida": "csv",
+    })
+    progresso.blocos, progresso.linhas, progresso.bytes = 3, 1200, len(gravado)
+    progresso.entrada_bytes = len(b"".join(entrada.read_bytes().splitlines(keepends=True)[:1 + 1200]))
+    progresso.salvar()
+
+    resultado = pontuar_arquivo(entrada, interrompida, tamanho_bloco=400, processos=1, retomar=True)
+    assert resultado["linhas"] == 2_500 - 1_200
+    assert interrompida.read_bytes() == conteudo
+    assert not progresso.caminho.exists()
+
+def test_retomar_com_linhas_em_branco_e_campo_multilinha(tmp_path, monkeypatch):
+    """Testa que a retomada parte do byte certo da entrada quando linhas físicas e registros diferem."""
+    entrada, dados = _entrada(tmp_path, linhas=1_000)
+    dados.insert(0, "descricao", [f"ocorrência {i}\ncontinuação" if i % 7 == 0 else f"ocorrência {i}"
+                                  for i in range(len(dados))])
+    texto = dados.to_csv(index=False).splitlines(keepends=True)
+    entrada.write_text("".join(linha + ("\n" if i % 50 == 0 else "") for i, linha in enumerate(texto)))
+    completa = tmp_path / "completa.csv"
+    pontuar_arquivo(entrada, completa, tamanho_bloco=300, processos=1)
+
+    # Simula uma falha real durante o terceiro bloco
+    import src.api.pontuar_arquivo as modulo
+    original = modulo._pontuar_bloco
+    def falhar_no_terceiro(bloco, deslocamento, formato_saida):
+        if deslocamento == 600:
+            raise RuntimeError("falha simulada")
+        return original(bloco, deslocamento, formato_saida)
+    monkeypatch.setattr(modulo, "_pontuar_bloco", falhar_no_terceiro)
+    interrompida = tmp_path / "interrompida.csv"
+    with pytest.raises(RuntimeError):
+        pontuar_arquivo(entrada, interrompida, tamanho_bloco=300, processos=1)
+
+    monkeypatch.setattr(modulo, "_pontuar_bloco", original)
+    resultado = pontuar_arquivo(entrada, interrompida, tamanho_bloco=300, processos=1, retomar=True)
+    assert resultado["linhas"] == 1_000 - 600
+    assert interrompida.read_bytes() == completa.read_bytes()
+    assert pd.read_csv(completa)["descricao"].tolist() == dados["descricao"].tolist()
+
+def test_valores_fora_do_schema_sao_recusados(tmp_path):
+    """Testa que flags fora de 0/1 e dias fracionários são recusados com o número da linha, como na API."""
+    entrada, dados = _entrada(tmp_path, linhas=20)
+    dados = dados.astype({c: int for c in FEATURES[1:]})  # flags 0/1 valem, como no schema
+    dados.to_csv(entrada, index=False)
+    saida = tmp_path / "saida.csv"
+    assert pontuar_arquivo(entrada, saida, processos=1)["linhas"] == 20
+
+    dados.loc[3, "tem_testemunhas"] = 2
+    dados.to_csv(entrada, index=False)
+    with pytest.raises(ValueError, match=r"\[4\]; linha 4, tem_testemunhas"):
+        pontuar_arquivo(entrada, saida, processos=1)
+
+    dados.loc[3, "tem_testemunhas"] = 1
+    dados["periodo_decorrido_dias"] = dados["periodo_decorrido_dias"].astype(float)
+    dados.loc[7, "periodo_decorrido_dias"] = 1.5
+    dados.to_csv(entrada, index=False)
+    with pytest.raises(ValueError, match=r"\[8\]; linha 8, periodo_decorrido_dias"):
+        pontuar_arquivo(entrada, saida, processos=1)
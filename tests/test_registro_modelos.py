@@ -0,0 +1,76 @@
+import pytest
+from fastapi.testclient import TestClient
+from sklearn.ensemble import RandomForestClassifier
+
+from src.api import main_modelo
+from src.api.gerar_modelo import FEATURES, TARGET, gerar_dados, salvar_modelo
+from src.api.registro_modelos import RegistroModelos
+
+PAYLOAD = {
+    "periodo_decorrido_dias": 3,
+    "suspeito_conhecido": True,
+    "tem_testemunhas": True,
+    "tem_imagens_cameras": False,
+    "suspeito_rastreavel": False,
+    "vestigios_preservados": True
+}
+
+
+@pytest.fixture
+def registro(tmp_path, monkeypatch):
+    dados = gerar_dados(data_size=600)
+    registro = RegistroModelos(tmp_path / "modelos")
+    for semente in (0, 1):
+        modelo = RandomForestClassifier(n_estimators=5, max_depth=4, random_state=semente)
+        modelo.fit(dados[FEATURES], dados[TARGET])
+        registro.registrar(lambda d, m=modelo: salvar_modelo(m, d), {"semente": semente})
+    monkeypatch.setattr(main_modelo, "registro", registro)
+    monkeypatch.setattr(main_modelo, "ativo", None)
+    return registro
+
+def test_registro_promove_versao_de_forma_atomica(registro):
+    """Testa que as versões são listadas em ordem e que promover troca o ponteiro ATIVO."""
+    primeira, segunda = [m["versao"] for m in registro.versoes()]
+    assert registro.versao_ativa() is None
+    registro.promover(segunda)
+    assert registro.versao_ativa() == segunda
+    assert registro.metadados(primeira)["semente"] == 0
+    with pytest.raises(ValueError):
+        registro.promover("inexistente")
+
+def test_api_troca_de_versao_sem_reiniciar(registro):
+    """Testa que a API passa a usar a nova versão ativa após a recarga, sem reiniciar."""
+    primeira, segunda = [m["versao"] for m in registro.versoes()]
+    client = TestClient(main_modelo.app)
+
+    registro.promover(primeira)
+    assert client.post("/modelo/recarregar").json() == {"versao": primeira, "trocou": True}
+    antigo = main_modelo.ativo
+    assert client.get("/modelo").json()["metadados"]["semente"] == 0
+    assert client.post("/prever", json=PAYLOAD).status_code == 200
+
+    registro.promover(segunda)
+    assert client.post("/modelo/recarregar").json() == {"versao": segunda, "trocou": True}
+    assert client.get("/modelo").json()["versao"] == segunda
+    assert client.post("/modelo/recarregar").json()["trocou"] is False
+    # A versão antiga continua íntegra para quem ainda a referencia
+    assert antigo.tabela.consultar(3, True, True, False, False, True) is not None
+
+def test_ready_so_fica_pronto_com_o_modelo_carregado(registro, monkeypatch):
+    """Testa que o /ready responde 503 sem modelo e 200 depois da carga feita no lifespan."""
+    monkeypatch.setattr(main_modelo.settings, "recarga_intervalo_s", 0)
+    monkeypatch.setattr(main_modelo, "inicializacao", {"estado": "pendente", "erro": None, "tempos_s": {}})
+    primeira = registro.versoes()[0]["versao"]
+    registro.promover(primeira)
+
+    # Sem o lifespan nada é carregado: o processo está no ar, mas não pronto
+    client = TestClient(main_modelo.app)
+    assert client.get("/").status_code == 200
+    assert client.get("/ready").status_code == 503
+
+    with TestClient(main_modelo.app) as client:
+        resposta = client.get("/ready")
+        assert client.post("/prever", json=PAYLOAD).status_code == 200
+    assert resposta.status_code == 200
+    assert resposta.json()["versao"] == primeira
+    assert set(resposta.json()["tempos_s"]) == {"importacao", "carga", "aquecimento"}
@@ -0,0 +1,37 @@
+import itertools
+
+import numpy as np
+
+from src.api.regras import (
+    CLASSE_ALTA, CLASSE_BAIXA, CLASSE_MEDIA, MOTIVO_MULTIPLAS_EVIDENCIAS,
+    MOTIVO_SUSPEITO_EVIDENCIA, avaliar_matriz, avaliar_regras
+)
+
+
+def test_regras_nas_fronteiras():
+    """Testa os limites de dias de cada regra para um caso com suspeito e evidência."""
+    dias = np.array([0, 5, 6, 30, 31])
+    uns = np.ones_like(dias, dtype=bool)
+    zeros = np.zeros_like(uns)
+    classes, _ = avaliar_regras(dias, uns, uns, zeros, zeros, zeros)
+    assert classes.tolist() == [CLASSE_ALTA, CLASSE_ALTA, CLASSE_MEDIA, CLASSE_MEDIA, CLASSE_BAIXA]
+
+def test_motivo_distingue_regras_de_media():
+    """Testa que os códigos de motivo indicam qual cláusula da regra Média foi atendida."""
+    classes, motivos = avaliar_regras(
+        np.array([20, 60]), np.array([True, False]), np.array([True, True]),
+        np.array([False, True]), np.array([False, False]), np.array([False, True])
+    )
+    assert classes.tolist() == [CLASSE_MEDIA, CLASSE_MEDIA]
+    assert motivos.tolist() == [MOTIVO_SUSPEITO_EVIDENCIA, MOTIVO_MULTIPLAS_EVIDENCIAS]
+
+def test_avaliacao_escalar_igual_a_colunar():
+    """Testa que avaliar linha a linha e em colunas produz o mesmo resultado."""
+    linhas = np.array([
+        (dias, *flags)
+        for dias in range(0, 70)
+        for flags in itertools.product([0, 1], repeat=5)
+    ])
+    classes, motivos = avaliar_matriz(linhas)
+    for linha, classe, motivo in zip(linhas[::7], classes[::7], motivos[::7]):
+        assert avaliar_regras(*linha) == (classe, motivo)
@@ -0,0 +1,114 @@
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+from sklearn.ensemble import RandomForestClassifier
+
+from src.api import main_modelo
+from src.api.gerar_modelo import FEATURES, TARGET, gerar_dados, salvar_modelo
+from src.api.registro_modelos import RegistroModelos
+from src.api.sombra import Sombra
+
+
+class _TabelaFixa:
+    """Tabela de mentira: a classe é a de uma coluna da matriz."""
+
+    def __init__(self, coluna):
+        self.coluna = coluna
+
+    def prever(self, X):
+        return np.asarray(X)[:, self.coluna] * 2, None
+
+
+class _Ativo(SimpleNamespace):
+    """Como o `ModeloAtivo`, mas sem `==` barato: a sombra não deve comparar modelos por valor."""
+
+    def __eq__(self, outro):
+        raise AssertionError("comparou o modelo ativo por valor")
+
+    __hash__ = object.__hash__
+
+
+def _aguardar(condicao, limite_s=10):
+    inicio = time.monotonic()
+    while not condicao():
+        assert time.monotonic() - inicio < limite_s
+        time.sleep(0.01)
+
+
+def test_concordancia_e_descartes():
+    """A matriz cruza a classe servida com a do candidato; a sombra descarta o próprio trabalho."""
+    ativo = _Ativo(versao="v1", tabela=_TabelaFixa(1))
+    sombra = Sombra(capacidade=5, tamanho_lote=1, intervalo_s=0.01, fracao_cpu=1.0)
+    sombra.registrar(ativo, (3, 1, 0, 0, 0, 0), 2)  # sem candidatos: nada entra na fila
+    assert sombra.recebidas == 0
+
+    sombra.trocar_candidatos({"v2": _TabelaFixa(2)})
+    X = np.array([[3, 1, 1, 0, 0, 0], [3, 1, 0, 0, 0, 0], [3, 0, 0, 0, 0, 0], [3, 0, 1, 0, 0, 0]])
+    sombra.registrar_lote(ativo, X, X[:, 1] * 2)
+    sombra.registrar(ativo, (3, 1, 1, 0, 0, 0), 2)
+    sombra.registrar(ativo, (3, 0, 0, 0, 0, 0), 0)  # passa da capacidade
+    sombra.iniciar()
+    _aguardar(lambda: sombra.pontuadas == 5)
+    sombra.fechar()
+
+    relatorio = sombra.relatorio()
+    comparacao = relatorio["comparacoes"]["v2"]
+    assert relatorio["descartadas"]["fila_cheia"] == 1 and relatorio["versao_ativa"] == "v1"
+    assert comparacao["linhas"] == 5 and comparacao["concordancia"] == 0.6
+    assert comparacao["matriz_concordancia"]["Alta"] == {"Baixa": 1, "Média": 0, "Alta": 2}
+    assert comparacao["matriz_concordancia"]["Baixa"] == {"Baixa": 1, "Média": 0, "Alta": 1}
+    assert comparacao["classes"]["Alta"] == {"ativo": 0.6, "candidato": 0.6, "diferenca": 0.0}
+    assert sombra.concordancias() == {"v2": 0.6}
+    for fracao in (0, 1.5):
+        with pytest.raises(ValueError, match="fração de CPU"):
+            Sombra(fracao_cpu=fracao)
+
+    ocupada = Sombra(tamanho_lote=1, intervalo_s=0.01, ocupada=lambda: True)
+    ocupada.trocar_candidatos({"v2": _TabelaFixa(2)})
+    ocupada.iniciar()
+    ocupada.registrar_lote(ativo, X, X[:, 1] * 2)
+    _aguardar(lambda: ocupada.descartadas["api_ocupada"] == 4)
+    ocupada.fechar()
+    assert ocupada.pontuadas == 0
+
+
+def test_candidato_do_registro_na_api(tmp_path, monkeypatch):
+    """O candidato pontua as mesmas entradas em segundo plano; a resposta continua sendo a do ativo."""
+    dados = gerar_dados(data_size=600)
+    registro = RegistroModelos(tmp_path / "modelos")
+    modelos = []
+    for semente, profundidade in ((0, 4), (1, 2)):
+        modelo = RandomForestClassifier(n_estimators=5, max_depth=profundidade, random_state=semente)
+        modelo.fit(dados[FEATURES], dados[TARGET])
+        modelos.append(modelo)
+        registro.registrar(lambda d, m=modelo: salvar_modelo(m, d), {"semente": semente})
+    ativa, candidata = [m["versao"] for m in registro.versoes()]
+    registro.promover(ativa)
+    monkeypatch.setattr(main_modelo, "registro", registro)
+    monkeypatch.setattr(main_modelo, "ativo", None)
+    monkeypatch.setattr(main_modelo, "sombra", Sombra(tamanho_lote=64, intervalo_s=0.01))
+
+    entradas = dados[FEATURES].iloc[:200]
+    lote = [dict(zip(FEATURES, (int(v) for v in linha))) for linha in entradas.to_numpy()]
+    with TestClient(main_modelo.app) as client:
+        assert client.post("/sombra/candidatos", json=["inexistente"]).status_code == 404
+        assert client.post("/sombra/candidatos", json=[candidata]).json() == {"candidatos": [candidata]}
+        respostas = client.post("/prever/lote", json=lote).json()
+        # Um dia além do int64 (válido no schema) não derruba o lote da sombra junto com as demais linhas
+        unitarias = [{**lote[0], "periodo_decorrido_dias": 2**70}, lote[1]]
+        assert all(client.post("/prever", json=linha).status_code == 200 for linha in unitarias)
+        _aguardar(lambda: main_modelo.sombra.pontuadas == len(lote) + len(unitarias))
+        assert main_modelo.sombra.descartadas["erro"] == 0
+        relatorio = client.get("/sombra").json()
+
+    servidas = modelos[0].predict(entradas)
+    assert [r["resolutividade"] for r in respostas] == [main_modelo.RESOLUTIVIDADE_CLASSES[c] for c in servidas]
+    comparacao = relatorio["comparacoes"][candidata]
+    assert relatorio["versao_ativa"] == ativa and comparacao["linhas"] == len(lote) + len(unitarias)
+    entradas = pd.concat([entradas, pd.DataFrame(unitarias)[FEATURES].clip(upper=np.iinfo(np.int64).max)])
+    servidas = modelos[0].predict(entradas)
+    assert comparacao["concordancia"] == np.mean(modelos[1].predict(entradas) == servidas)
@@ -0,0 +1,29 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+from src.api.gerar_modelo import FEATURES, TARGET, gerar_dados
+from src.api.tabela_modelo import compilar_tabela, verificar_tabela
+
+
+@pytest.fixture(scope="module")
+def modelo():
+    dados = gerar_dados(data_size=800)
+    return RandomForestClassifier(n_estimators=15, max_depth=6, random_state=0).fit(
+        dados[FEATURES], dados[TARGET]
+    )
+
+def test_tabela_confere_com_modelo_em_todo_dominio(modelo):
+    """A tabela compilada deve reproduzir predict/predict_proba em todas as células."""
+    verificacao = verificar_tabela(compilar_tabela(modelo), modelo)
+    assert verificacao["ok"]
+    assert verificacao["divergencias_classe"] == 0
+
+def test_consulta_escalar_igual_a_predict_proba(modelo):
+    """A consulta de uma única ocorrência deve ser igual ao caminho com scikit-learn."""
+    tabela = compilar_tabela(modelo)
+    for linha in ([0, 1, 0, 1, 1, 0], [5, 1, 1, 1, 1, 1], [400, 0, 0, 0, 0, 0]):
+        classe, probabilidades = tabela.consultar(*linha)
+        X = np.array([linha])
+        assert classe == modelo.predict(X)[0]
+        np.testing.assert_allclose(probabilidades, modelo.predict_proba(X)[0])
@@ -0,0 +1,77 @@
+import copy
+import itertools
+import json
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from src.api import main_regras
+from src.api.regras import MOTIVOS, avaliar_matriz
+from src.api.tabela_regras import carregar_regras, compilar_regras
+from src.config import settings
+
+PADRAO = json.loads(open(settings.arquivo_regras, encoding="utf-8").read())
+PAYLOAD = {"periodo_decorrido_dias": 20, "suspeito_conhecido": True, "tem_testemunhas": True,
+           "tem_imagens_cameras": False, "suspeito_rastreavel": False, "vestigios_preservados": False}
+
+
+def test_arquivo_padrao_reproduz_as_regras_em_todo_o_dominio():
+    """Testa que a tabela compilada do arquivo padrão coincide com `avaliar_matriz` célula a célula."""
+    tabela = carregar_regras(settings.arquivo_regras)
+    X = np.array([(dias, *flags) for dias in range(0, 120) for flags in itertools.product([0, 1], repeat=5)])
+    classes, motivos = tabela.prever(X)
+    classes_esperadas, motivos_esperados = avaliar_matriz(X)
+    assert np.array_equal(classes, classes_esperadas)
+    assert [tabela.motivos[m] for m in motivos] == [MOTIVOS[m] for m in motivos_esperados]
+    assert all(tabela.consultar(*linha) == (c, m) for linha, c, m in zip(X[::37], classes[::37], motivos[::37]))
+    assert tabela.problemas == ()  # as sobreposições do arquivo padrão são declaradas em `prevalece_sobre`
+
+
+def test_validador_aponta_regras_inalcancaveis_e_definicoes_invalidas():
+    """Testa que regras encobertas ou impossíveis são apontadas e que erros de estrutura são recusados."""
+    definicao = copy.deepcopy(PADRAO)
+    definicao["regras"] += [
+        {"nome": "encoberta", "classe": "Alta", "motivo": "x", "condicoes": {"dias_max": 3, "suspeito": True,
+                                                                           "evidencias_min": 2}},
+        {"nome": "impossivel", "classe": "Alta", "motivo": "x", "condicoes": {"dias_min": 10, "dias_max": 5}},
+    ]
+    problemas = compilar_regras(definicao).problemas
+    assert {p["regras"][0] for p in problemas if p["tipo"] == "inalcancavel"} == {"encoberta", "impossivel"}
+    assert any(p["tipo"] == "sobreposicao" and p["regras"] == ["fato_recente", "encoberta"] for p in problemas)
+
+    # Sem `prevalece_sobre`, só as sobreposições com resultados diferentes são apontadas
+    for regra in definicao["regras"]:
+        regra.pop("prevalece_sobre", None)
+    sobreposicoes = [p["regras"] for p in compilar_regras(definicao).problemas if p["tipo"] == "sobreposicao"]
+    assert ["fato_recente", "suspeito_com_evidencia"] in sobreposicoes
+    assert ["suspeito_com_evidencia", "multiplas_evidencias"] not in sobreposicoes  # mesma classe e motivo
+
+    for alteracao in ({"classe": "Altíssima"}, {"condicoes": {"dias": 5}}, {"condicoes": {"dias_max": True}},
+                      {"prevalece_sobre": ["inexistente"]}, {"prevalece_sobre": "multiplas_evidencias"}):
+        invalida = copy.deepcopy(PADRAO)
+        invalida["regras"][0].update(alteracao)
+        with pytest.raises(ValueError):
+            compilar_regras(invalida)
+
+
+def test_troca_de_regras_sem_reiniciar(tmp_path, monkeypatch):
+    """Testa que a API passa a usar o arquivo alterado após a recarga e mantém as regras se ele ficar inválido."""
+    arquivo = tmp_path / "regras.json"
+    arquivo.write_text(json.dumps(PADRAO), encoding="utf-8")
+    monkeypatch.setattr(settings, "arquivo_regras", str(arquivo))
+    monkeypatch.setattr(main_regras, "regras_ativas", None)
+    client = TestClient(main_regras.app)
+    assert client.post("/prever", json=PAYLOAD).json()["resolutividade"] == "Média"
+
+    novo = copy.deepcopy(PADRAO)
+    novo["versao"] = "prazo-alta-30"
+    novo["regras"][0]["condicoes"]["dias_max"] = 30
+    arquivo.write_text(json.dumps(novo), encoding="utf-8")
+    assert client.post("/regras/recarregar").json()["trocou"] is True
+    assert client.post("/prever", json=PAYLOAD).json()["resolutividade"] == "Alta"
+    assert client.get("/regras").json()["versao"] == "prazo-alta-30"
+
+    arquivo.write_text("{", encoding="utf-8")
+    assert client.post("/regras/recarregar").status_code == 422
+    assert client.post("/prever", json=PAYLOAD).json()["resolutividade"] == "Alta"
@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+from src.api.dados_sinteticos import gerar_bloco
+from src.api.gerar_modelo import FEATURES, TARGET, gerar_dados, salvar_modelo
+from src.api.registro_modelos import RegistroModelos
+from src.api.treino_incremental import carregar_modelo_treinavel, treinar_incremental
+
+
+@pytest.fixture
+def registro(tmp_path):
+    dados = gerar_dados(data_size=600)
+    modelo = RandomForestClassifier(n_estimators=10, max_depth=4, random_state=0)
+    modelo.fit(dados[FEATURES], dados[TARGET])
+    registro = RegistroModelos(tmp_path / "modelos")
+    registro.registrar(lambda d: salvar_modelo(modelo, d), {}, promover=True)
+    return registro
+
+def test_incremental_acrescenta_arvores_e_descarta_as_antigas(registro, tmp_path):
+    """Testa que cada lote acrescenta árvores, que as mais antigas saem e que a nova versão é registrada."""
+    import pandas as pd
+
+    novos = pd.DataFrame(gerar_bloco(1, 0, 2_000))
+    novos[TARGET] = novos[TARGET].map({0: "Baixa", 1: "Média", 2: "Alta"})
+    entrada = tmp_path / "novos.jsonl"
+    novos.to_json(entrada, orient="records", lines=True, force_ascii=False)
+
+    base_versao, base = carregar_modelo_treinavel(registro)
+    versao, resumo = treinar_incremental(
+        entrada, registro, arvores_por_lote=4, maximo_arvores=12, tamanho_lote=1_000
+    )
+    assert registro.versao_ativa() == base_versao  # sem --promover a ativa não muda
+    assert resumo["lotes"] == 2 and resumo["arvores"] == 12 and resumo["arvores_removidas"] == 6
+
+    _, atualizado = carregar_modelo_treinavel(registro, versao)
+    # As 4 árvores mais novas da base continuam, no início da floresta
+    for antiga, mantida in zip(base.estimators_[6:], atualizado.estimators_[:4]):
+        assert np.array_equal(antiga.tree_.threshold, mantida.tree_.threshold)
+    metadados = registro.metadados(versao)
+    assert metadados["incremental"]["versao_base"] == base_versao
+    assert 0 <= metadados["metricas"]["acuracia"] <= 1
+    assert registro.carregar(versao).n_arvores == 12
+
+def test_lote_sem_todas_as_classes_e_rotulos_invalidos(registro, tmp_path):
+    """Testa que um último lote curto, de uma só classe, entra na floresta e que valores inválidos são recusados."""
+    import pandas as pd
+
+    novos = pd.DataFrame(gerar_bloco(1, 0, 2_005))
+    novos.loc[2_000:, TARGET] = 0
+    entrada = tmp_path / "novos.csv"
+    novos.to_csv(entrada, index=False)
+
+    versao, resumo = treinar_incremental(entrada, registro, arvores_por_lote=4, maximo_arvores=12, tamanho_lote=1_000)
+    assert resumo["lotes"] == 3 and resumo["arvores"] == 12
+    _, atualizado = carregar_modelo_treinavel(registro, versao)
+    X = novos[FEATURES].iloc[:50]
+    assert atualizado.predict_proba(X).shape == (50, 3)
+    # As árvores do último lote só conhecem a classe 0, agora no índice de classe da floresta
+    assert (atualizado.estimators_[-1].predict_proba(X.to_numpy())[:, 0] == 1).all()
+
+    novos.loc[0, TARGET] = 7
+    novos.to_csv(entrada, index=False)
+    with pytest.raises(ValueError, match="Rótulos desconhecidos"):
+        treinar_incremental(entrada, registro, tamanho_lote=1_000)
+
+    # Features fora das regras do schema (flag 2) são recusadas com a linha, como na API
+    novos.loc[0, TARGET] = 1
+    novos.loc[1_500, "tem_testemunhas"] = 2
+    novos.to_csv(entrada, index=False)
+    with pytest.raises(ValueError, match=r"\[1501\]; linha 1501, tem_testemunhas"):
+        treinar_incremental(entrada, registro, tamanho_lote=1_000)
@@ -0,0 +1,85 @@
+import random
+
+import pytest
+from fastapi.testclient import TestClient
+from pydantic import ValidationError
+
+from src.api import main_regras
+from src.api.constantes import FEATURES
+from src.api.validacao_colunar import validar_colunas, validar_linhas, validar_lote
+from src.models.schemas import OcorrenciaRequest
+
+# Valores que o modo lax do Pydantic aceita (convertendo) e que ele rejeita
+DIAS = [0, 7, True, 3.0, 3.5, "3", "3.0", " 3", "1_000", "-1", -1, None, "", [1], float("inf"), 2**63, 10**30]
+FLAGS = [True, False, 1, 0, 2, 1.0, 0.5, -0.0, "true", "YES", "off", "t", "x", None, []]
+
+
+def _linhas_sortidas(n, semente=0):
+    aleatorio = random.Random(semente)
+    linhas = []
+    for _ in range(n):
+        if aleatorio.random() < 0.02:
+            linhas.append(aleatorio.choice([5, "texto", None, [1, 2]]))
+            continue
+        linha = {FEATURES[0]: aleatorio.choice(DIAS) if aleatorio.random() < 0.3 else aleatorio.randint(0, 400)}
+        for flag in FEATURES[1:]:
+            linha[flag] = aleatorio.choice(FLAGS) if aleatorio.random() < 0.2 else aleatorio.random() < 0.5
+        if aleatorio.random() < 0.05:
+            del linha[aleatorio.choice(FEATURES)]
+        linhas.append(linha)
+    return linhas
+
+
+def test_mesmas_regras_e_mensagens_do_schema():
+    """Linhas aceitas, valores convertidos e erros (tipo e mensagem) iguais aos de `OcorrenciaRequest`."""
+    linhas = _linhas_sortidas(3000)
+    validas, erros = [], []
+    for indice, linha in enumerate(linhas):
+        try:
+            ocorrencia = OcorrenciaRequest.model_validate(linha)
+        except ValidationError as erro:
+            erros += [(indice, e["loc"][0] if e["loc"] else None, e["type"], e["msg"]) for e in erro.errors()]
+            continue
+        validas.append((indice, [min(int(v), 2**63 - 1) for v in ocorrencia.linha()]))
+
+    lote = validar_linhas(linhas)
+    assert list(zip(lote.indices.tolist(), lote.X.tolist())) == validas
+    assert [(e["indice"], e["campo"], e["tipo"], e["mensagem"]) for e in lote.erros] == erros
+    assert 0 < len(validas) < len(linhas)
+
+    completas = [linha for linha in linhas if isinstance(linha, dict) and set(FEATURES) <= set(linha)]
+    por_colunas = validar_colunas({nome: [linha[nome] for linha in completas] for nome in FEATURES})
+    por_linhas = validar_linhas(completas)
+    assert (por_colunas.X == por_linhas.X).all() and por_colunas.erros == por_linhas.erros
+
+
+def test_problemas_do_lote_inteiro():
+    colunas = {nome: [0, 1] for nome in FEATURES}
+    with pytest.raises(ValueError, match="ausentes: tem_testemunhas"):
+        validar_colunas({nome: valores for nome, valores in colunas.items() if nome != "tem_testemunhas"})
+    with pytest.raises(ValueError, match="tamanhos diferentes"):
+        validar_colunas({**colunas, FEATURES[0]: [1]})
+    with pytest.raises(ValueError):
+        validar_lote("texto")
+    assert validar_lote({nome: [] for nome in FEATURES}).X.shape == (0, len(FEATURES))
+
+
+def test_endpoint_por_colunas_igual_ao_lote():
+    """O `/prever/colunas` responde como o `/prever/lote` nas linhas válidas e aponta as inválidas."""
+    linhas = [dict(zip(FEATURES, (dias, *(bool(codigo >> bit & 1) for bit in range(5)))))
+              for dias in (0, 2, 10, 40) for codigo in range(32)]
+    with TestClient(main_regras.app) as client:
+        esperado = client.post("/prever/lote", json=linhas).json()
+        colunas = {nome: [linha[nome] for linha in linhas] for nome in FEATURES}
+        colunas[FEATURES[0]][5] = -3
+        colunas["tem_testemunhas"][7] = "talvez"
+        resposta = client.post("/prever/colunas", json=colunas).json()
+        assert [e["indice"] for e in resposta["erros"]] == [5, 7]
+        assert resposta["resolutividade"][5] is None and resposta["motivo"][7] is None
+        validas = [i for i in range(len(linhas)) if i not in (5, 7)]
+        assert [resposta["resolutividade"][i] for i in validas] == [esperado[i]["resolutividade"] for i in validas]
+        assert [resposta["motivo"][i] for i in validas] == [esperado[i]["motivo"] for i in validas]
+
+        por_linhas = client.post("/prever/colunas", json=linhas).json()
+        assert por_linhas["resolutividade"] == [r["resolutividade"] for r in esperado]
+        assert client.post("/prever/colunas", json={FEATURES[0]: [1]}).status_code == 422